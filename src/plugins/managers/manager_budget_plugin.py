@@ -0,0 +1,117 @@
+from typing import ClassVar, List, Optional
+
+from pydantic import Field, PrivateAttr, field_validator
+
+from rapidswarm.budget import (
+    DEFAULT_STALENESS_HORIZON,
+    BudgetCoverage,
+    BudgetScheduler,
+    NodePriors,
+    PriorityWeights,
+)
+from rapidswarm.history import DEFAULT_DATABASE
+from rapidswarm.models.manager import BaseManager
+from rapidswarm.models.node import Node
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.models.results import ProbeStatus
+from rapidswarm.scheduling import parse_duration
+from rapidswarm.selection import NodeIndex
+
+
+class BudgetedManager(BaseManager):
+    """
+    Manages the execution of probes within a fixed time budget per round,
+    e.g. a maintenance window too short for full coverage.
+
+    Splits each probe into one unit per target node, like the
+    SequentialManager, and runs the most informative units first: those
+    whose nodes were tested longest ago, failed or were outliers in the
+    last run recorded in the `history` database by the SQLiteReporter, and
+    those on switches the round has not covered yet or found failures on.
+    Units are re-prioritized as results arrive. Once the budget is spent
+    the round stops starting units, waits for the running ones and reports
+    the rest as deferred. See BudgetScheduler.
+
+    In a streaming run the round waits for the scan to finish, so that it
+    is prioritized and budgeted over every node rather than batch by batch.
+
+    Attributes:
+        probes (List[BaseProbe]): A list of probe instances to be managed.
+        budget (float): Wall-clock time each round may take.
+        max_concurrent_tests (int): Upper bound on units running at once.
+        history (str): Result database the priorities are read from.
+        staleness_horizon (float): Time after which a node counts as fully
+            stale.
+        outlier_metric (Optional[str]): Result field checked for outliers.
+        outlier_threshold (Optional[float]): Scaled MADs from the median
+            beyond which a node is an outlier.
+        weights (PriorityWeights): Weights of the parts of the priority.
+    """
+
+    probes: List[BaseProbe]
+    budget: float = Field(
+        ..., gt=0, description="Wall-clock time each round may take, e.g. '45m'."
+    )
+    max_concurrent_tests: int = Field(1, ge=1)
+    history: str = Field(
+        DEFAULT_DATABASE, description="Result database the priorities are read from."
+    )
+    staleness_horizon: float = Field(
+        DEFAULT_STALENESS_HORIZON,
+        gt=0,
+        description="Time after which a node counts as fully stale, e.g. '7d'.",
+    )
+    outlier_metric: Optional[str] = Field(
+        None,
+        description="Result field whose per-node mean in the last run is checked "
+        "for outliers, e.g. 'bw_average_mbps'.",
+    )
+    outlier_threshold: Optional[float] = Field(
+        None, gt=0, description="Scaled MADs from the median, 3.5 by default."
+    )
+    weights: PriorityWeights = PriorityWeights()
+
+    streams: ClassVar[bool] = False
+
+    _coverage: List[BudgetCoverage] = PrivateAttr(default_factory=list)
+
+    @field_validator("budget", "staleness_horizon", mode="before")
+    def validate_budget_duration(cls, v):
+        return parse_duration(v)
+
+    @property
+    def coverage(self) -> List[BudgetCoverage]:
+        """What each round run so far covered."""
+        return self._coverage
+
+    def units(
+        self, nodes: Optional[List[Node]] = None, index: Optional[NodeIndex] = None
+    ) -> List[BaseProbe]:
+        return [unit for probe in self.probes for unit in probe.units(nodes, index)]
+
+    def priors(self) -> NodePriors:
+        return NodePriors.from_history(
+            self.history,
+            metric=self.outlier_metric,
+            threshold=self.outlier_threshold,
+            horizon=self.staleness_horizon,
+        )
+
+    def scheduler(self) -> BudgetScheduler:
+        return BudgetScheduler(
+            self.budget,
+            load_priors=self.priors,
+            defer=lambda unit: self._failures(
+                unit, ProbeStatus.DEFERRED, "time budget exhausted"
+            ),
+            weights=self.weights,
+            max_workers=self.max_concurrent_tests,
+            name=self.name or type(self).__name__,
+            report=self._coverage.append,
+        )
+
+    def run(self):
+        results = []
+        for round_results in self.run_rounds():
+            results.extend(round_results)
+        return results
@@ -0,0 +1,45 @@
+from typing import List, Optional
+
+from pydantic import Field
+
+from rapidswarm.models.manager import BaseManager
+from rapidswarm.models.node import Node
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.scheduling import RoundScheduler
+from rapidswarm.selection import NodeIndex
+
+
+class ParallelManager(BaseManager):
+    """
+    Manages the execution of probes concurrently.
+
+    Works like the SequentialManager, splitting each probe into one unit per
+    target node, but runs up to `max_concurrent_tests` units at the same
+    time on a pool of worker threads. Jitter, retries and the interval
+    between rounds behave the same way. Use the shared `rate_limits`
+    configuration to keep the extra concurrency from overloading the
+    fabric.
+
+    Attributes:
+        probes (List[BaseProbe]): A list of probe instances to be managed.
+        max_concurrent_tests (int): Upper bound on units running at once.
+    """
+
+    probes: List[BaseProbe]
+    max_concurrent_tests: int = Field(5, ge=1)
+
+    def units(
+        self, nodes: Optional[List[Node]] = None, index: Optional[NodeIndex] = None
+    ) -> List[BaseProbe]:
+        return [unit for probe in self.probes for unit in probe.units(nodes, index)]
+
+    def scheduler(self) -> RoundScheduler:
+        scheduler = super().scheduler()
+        scheduler.max_workers = self.max_concurrent_tests
+        return scheduler
+
+    def run(self):
+        results = []
+        for round_results in self.run_rounds():
+            results.extend(round_results)
+        return results
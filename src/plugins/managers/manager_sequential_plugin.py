@@ -1,9 +1,9 @@
-from typing import List
-
-from loguru import logger
+from typing import List, Optional
 
 from rapidswarm.models.manager import BaseManager
+from rapidswarm.models.node import Node
 from rapidswarm.models.probes import BaseProbe
+from rapidswarm.selection import NodeIndex
 
 
 class SequentialManager(BaseManager):
@@ -12,10 +12,12 @@ class SequentialManager(BaseManager):
     special or amazing about this manager. It doesn't run anything in parallel
     or do anything fancy. It just runs the probes one after the other.
 
-    This manager takes a list of probes and runs them one after the other,
-    logging the start and end of each probe's execution, along with any results
-    or errors encountered. The probes are expected to be instances of classes
-    that inherit from BaseProbe and implement the run method.
+    This manager takes a list of probes, splits each of them into one unit per
+    target node and runs the units one after the other. Failed units are
+    retried with exponential backoff when `retry_on_failure` is set, and the
+    whole set is re-run every `interval` when one is given. The probes are
+    expected to be instances of classes that inherit from BaseProbe and
+    implement the run method.
 
     Attributes:
         probes (List[BaseProbe]): A list of probe instances to be managed.
@@ -23,16 +25,13 @@ class SequentialManager(BaseManager):
 
     probes: List[BaseProbe]
 
+    def units(
+        self, nodes: Optional[List[Node]] = None, index: Optional[NodeIndex] = None
+    ) -> List[BaseProbe]:
+        return [unit for probe in self.probes for unit in probe.units(nodes, index)]
+
     def run(self):
         results = []
-        for probe in self.probes:
-            logger.info(f"Running probe: {type(probe).__name__}")
-            try:
-                probe_results = probe.run()
-                logger.info(f"Results: {probe_results}")
-                results.append(probe_results)
-            except Exception as e:
-                logger.error(f"Error running probe {type(probe).__name__}: {e}")
+        for round_results in self.run_rounds():
+            results.extend(round_results)
         return results
-
-    probes: List[BaseProbe]
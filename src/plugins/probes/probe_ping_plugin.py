@@ -5,8 +5,12 @@ from typing import List, Optional
 from loguru import logger
 from pydantic import BaseModel
 
+from rapidswarm import instrumentation
 from rapidswarm.models.probes import BaseProbe
 
+# An echo request and its reply, each 64 bytes of ICMP plus a 20 byte IP header.
+PING_BYTES_PER_INTERFACE = 2 * 84
+
 
 class PingResult(BaseModel):
     node: str
@@ -26,26 +30,47 @@ class PingProbe(BaseProbe):
             )
             self.nodes = []  # Assume we'll get some later.
 
+    def probe_count(self) -> int:
+        return sum(
+            1
+            for node in self.nodes
+            for interface in node.network_interfaces
+            if interface.is_active
+        )
+
+    def estimated_bytes(self) -> int:
+        return self.probe_count() * PING_BYTES_PER_INTERFACE
+
     def execute_command(self) -> str:
         """Executes the ping command for each node's network interfaces, including the IP address."""
         results = []
         for node in self.nodes:
             for interface in node.network_interfaces:
+                if not interface.is_active:
+                    continue
                 ip_address = interface.ip_address
                 command_with_ip = f"{self.command} {ip_address}"
                 try:
-                    # Use a verbose log message with a specific prefix or pattern
+                    # Per-target messages are only formatted when DEBUG is on.
                     logger.debug(
-                        f"[VERBOSE] Executing ping for node: {node.id} on interface: {interface.mac_address} with IP: {ip_address}"
+                        "Pinging {target} on {interface} at {ip_address}",
+                        target=node.id,
+                        interface=interface.mac_address,
+                        ip_address=ip_address,
+                    )
+                    instrumentation.count(
+                        instrumentation.SUBPROCESS_SPAWNS, source="PingProbe"
                     )
                     output = subprocess.check_output(
                         command_with_ip.split(),
                         stderr=subprocess.STDOUT,
                         universal_newlines=True,
                     )
-                    # Similarly, for successful ping output
                     logger.debug(
-                        f"[VERBOSE] Ping successful for node: {node.id} ({interface.mac_address}) with output: {output}"
+                        "Ping of {target} ({interface}) succeeded",
+                        target=node.id,
+                        interface=interface.mac_address,
+                        output=output,
                     )
                     results.append(
                         {
@@ -56,7 +81,10 @@ class PingProbe(BaseProbe):
                     )
                 except subprocess.CalledProcessError as e:
                     logger.debug(
-                        f"[VERBOSE] Ping failed for node: {node.id} ({interface.mac_address}) with error: {e.output}"
+                        "Ping of {target} ({interface}) failed: {output}",
+                        target=node.id,
+                        interface=interface.mac_address,
+                        output=e.output,
                     )
                     results.append(
                         {
@@ -0,0 +1,54 @@
+import os
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from rapidswarm.columnar import StoreFormat, open_writer, result_columns
+from rapidswarm.models.reporters import BaseReporter
+from rapidswarm.output import move_aside
+
+__module_name__ = "reporter_columnar_plugin"
+
+
+class ColumnarReporter(BaseReporter):
+    """
+    Writes results to a columnar binary store for fast analysis.
+
+    The store is a directory holding Parquet files when pyarrow is
+    installed, or one NumPy .npy file per column otherwise. Either way,
+    analysis tools read it with rapidswarm.columnar.ColumnStore and load only
+    the columns they need. A store left by a previous run is moved aside.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    output_directory: str = "report.cols"
+    format: StoreFormat = StoreFormat.AUTO
+
+    _writer: object = PrivateAttr(None)
+
+    def report(self, data):
+        self.write(data if isinstance(data, list) else [data])
+        self.flush()
+
+    def write(self, batch: List[BaseModel]):
+        if not batch:
+            return
+        if self._writer is None:
+            if os.path.exists(self.output_directory):
+                move_aside(self.output_directory)
+            self._writer = open_writer(self.output_directory, self.format)
+        try:
+            self._writer.append(result_columns(batch, datetime.now()))
+        except IOError as e:
+            raise IOError(f"Error writing columnar report: {e}")
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
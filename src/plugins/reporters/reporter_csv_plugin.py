@@ -1,19 +1,40 @@
 import csv
-from datetime import datetime
-from typing import List, Union
+import io
+from itertools import islice
+from typing import Iterator, List, TextIO, Union
 
-from pydantic import BaseModel, ConfigDict
+from loguru import logger
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
-from rapidswarm.models.reporters import BaseReporter
+from rapidswarm.models.reporters import StreamingReporter
+from rapidswarm.output import RotatingFile
 
 __module_name__ = "reporter_csv_plugin"
 
 
-class CSVReporter(BaseReporter):
+class CSVReporter(StreamingReporter):
+    """
+    Appends results to a CSV file batch by batch.
+
+    Results of different types (e.g. probe results and ProbeFailure records)
+    share one file, so the columns are the union of their fields. When a
+    batch brings in a type with new fields, the rows written so far are
+    rewritten under the wider header, so the file holds the whole run under
+    a single header. New columns are added at the end, and this happens at
+    most once per result type.
+    """
+
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     output_file: str = "report.csv"
 
+    _columns: List[str] = PrivateAttr(default_factory=lambda: ["timestamp"])
+
+    def open_file(self, keep_existing: bool = True) -> RotatingFile:
+        # A previous run's file may have different columns, so it is moved
+        # aside rather than appended to.
+        return super().open_file(keep_existing=False)
+
     def report(self, data: Union[BaseModel, List[BaseModel]]):
         if issubclass(type(data), BaseModel):
             data_list = [data]
@@ -25,17 +46,46 @@ class CSVReporter(BaseReporter):
             raise ValueError(
                 "Unsupported data format. Expected a Pydantic model or a list of Pydantic models."
             )
+        super().report(data_list)
 
-        fieldnames = ["timestamp"] + list(data_list[0].model_fields.keys())
-
+    def write(self, batch: List[BaseModel]):
         try:
-            with open(self.output_file, "w", newline="") as file:
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                writer.writeheader()
-
-                for item in data_list:
-                    row = {"timestamp": datetime.now().isoformat()}
-                    row.update(item.model_dump())
-                    writer.writerow(row)
+            super().write(batch)
         except IOError as e:
             raise IOError(f"Error writing CSV report: {e}")
+
+    def encode(self, batch: List[BaseModel], timestamp: str) -> str:
+        added = []
+        for model_class in dict.fromkeys(type(item) for item in batch):
+            for field in model_class.model_fields:
+                if field not in self._columns and field not in added:
+                    added.append(field)
+        if added:
+            self._columns.extend(added)
+            header = self._encode_rows([self._columns])
+            if self.file.size > 0:
+                logger.info(f"New CSV columns {added}, rewriting {self.file.path}")
+                self.file.rewrite(lambda file: self._widen(file, header, len(added)))
+            self.file.header = header
+
+        fields = self._columns[1:]
+        return self._encode_rows(
+            [timestamp] + [getattr(item, field, None) for field in fields]
+            for item in batch
+        )
+
+    def _widen(self, file: TextIO, header: str, added: int) -> Iterator[str]:
+        """
+        The rows of a file under a new header, with `added` empty columns,
+        read and encoded a thousand rows at a time.
+        """
+        yield header
+        rows = csv.reader(file)
+        next(rows, None)
+        while chunk := list(islice(rows, 1000)):
+            yield self._encode_rows(row + [""] * added for row in chunk)
+
+    def _encode_rows(self, rows) -> str:
+        buffer = io.StringIO(newline="")
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
@@ -1,5 +1,6 @@
 import json
 from datetime import datetime
+from typing import List, Union
 
 from pydantic import BaseModel, ConfigDict
 from rapidswarm.models.reporters import BaseReporter
@@ -13,10 +14,14 @@ class JSONReporter(BaseReporter):
 
     output_file: str = "report.json"
 
-    def report(self, data: BaseModel):
+    def report(self, data: Union[BaseModel, List[BaseModel]]):
+        if isinstance(data, list):
+            dumped = [item.model_dump(mode="json") for item in data]
+        else:
+            dumped = data.model_dump(mode="json")
         report = {
             "timestamp": datetime.now().isoformat(),
-            "data": data.model_dump(),
+            "data": dumped,
         }
 
         try:
@@ -0,0 +1,40 @@
+from typing import List
+
+from pydantic import BaseModel, ConfigDict
+
+from rapidswarm.models.reporters import StreamingReporter
+
+__module_name__ = "reporter_jsonl_plugin"
+
+
+class JSONLinesReporter(StreamingReporter):
+    """
+    Appends results to a JSON Lines file, one JSON object per result.
+
+    Unlike JSONReporter, which writes a single document, results are written
+    batch by batch as the run progresses and the file can be appended to
+    across runs and read back line by line.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    output_file: str = "report.jsonl"
+
+    def write(self, batch: List[BaseModel]):
+        try:
+            super().write(batch)
+        except IOError as e:
+            raise IOError(f"Error writing JSON Lines report: {e}")
+
+    def encode(self, batch: List[BaseModel], timestamp: str) -> str:
+        prefix = f'{{"timestamp":"{timestamp}"'
+        lines = []
+        for item in batch:
+            # Splice the timestamp into the model's own JSON instead of
+            # building and re-serializing a dict for every result.
+            body = item.model_dump_json()
+            if body == "{}":
+                lines.append(prefix + "}\n")
+            else:
+                lines.append(prefix + "," + body[1:] + "\n")
+        return "".join(lines)
@@ -0,0 +1,59 @@
+import os
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from rapidswarm.linkmatrix import DEFAULT_CAPACITY, LinkMatrix
+from rapidswarm.models.reporters import BaseReporter
+from rapidswarm.output import move_aside
+
+__module_name__ = "reporter_linkmatrix_plugin"
+
+
+class LinkMatrixReporter(BaseReporter):
+    """
+    Records pairwise results in a memory-mapped link matrix.
+
+    Every numeric field of results that have two ends, such as a client and
+    a server, becomes a source × target matrix of means and sample counts
+    in `output_directory`, read with rapidswarm.linkmatrix.LinkMatrix.
+    Results of a single node are ignored. A matrix left by a previous run
+    is moved aside.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    output_directory: str = "report.links"
+    metrics: Optional[List[str]] = Field(
+        None, description="Fields to record. Defaults to every numeric field."
+    )
+    capacity: int = Field(
+        DEFAULT_CAPACITY, description="Number of endpoints to size the matrices for."
+    )
+
+    _matrix: Optional[LinkMatrix] = PrivateAttr(None)
+
+    def report(self, data):
+        self.write(data if isinstance(data, list) else [data])
+        self.flush()
+
+    def write(self, batch: List[BaseModel]):
+        if not batch:
+            return
+        if self._matrix is None:
+            if os.path.exists(self.output_directory):
+                move_aside(self.output_directory)
+            self._matrix = LinkMatrix(self.output_directory, capacity=self.capacity)
+        try:
+            self._matrix.add_results(batch, self.metrics)
+        except IOError as e:
+            raise IOError(f"Error writing link matrix: {e}")
+
+    def flush(self):
+        if self._matrix is not None:
+            self._matrix.flush()
+
+    def close(self):
+        if self._matrix is not None:
+            self._matrix.close()
+            self._matrix = None
@@ -0,0 +1,76 @@
+import os
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from rapidswarm.models.reporters import BaseReporter
+from rapidswarm.sketches import DEFAULT_COMPRESSION, DEFAULT_GROUPINGS, SketchSet
+
+__module_name__ = "reporter_sketch_plugin"
+
+
+class SketchReporter(BaseReporter):
+    """
+    Keeps constant-memory quantile summaries of result metrics.
+
+    Every numeric field is summarized per group of each grouping, by default
+    per node and interface and per switch, with an exact count, mean and
+    standard deviation and a t-digest for quantiles such as p99. The set is
+    saved to `output_file` at every flush and queried with
+    `rapidswarm analysis quantiles`. With `merge_existing`, the summaries in
+    an existing file are loaded and added to, so they span several runs.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    output_file: str = "report.sketch.npz"
+    metrics: Optional[List[str]] = Field(
+        None, description="Fields to summarize. Defaults to every numeric field."
+    )
+    groupings: List[List[str]] = Field(
+        [list(grouping) for grouping in DEFAULT_GROUPINGS],
+        description="Key fields to group results by; 'switch' is the node's switch.",
+    )
+    compression: int = Field(
+        DEFAULT_COMPRESSION, description="Most centroids kept per t-digest."
+    )
+    merge_existing: bool = Field(
+        True, description="Add to the summaries of an existing output file."
+    )
+
+    _sketches: Optional[SketchSet] = PrivateAttr(None)
+    _changed: bool = PrivateAttr(False)
+
+    @property
+    def sketches(self) -> SketchSet:
+        if self._sketches is None:
+            options = dict(groupings=self.groupings, metrics=self.metrics)
+            if self.merge_existing and os.path.exists(self.output_file):
+                self._sketches = SketchSet.load(self.output_file, **options)
+            else:
+                self._sketches = SketchSet(compression=self.compression, **options)
+        return self._sketches
+
+    def report(self, data):
+        self.write(data if isinstance(data, list) else [data])
+        self.flush()
+
+    def add_nodes(self, nodes: List):
+        self.sketches.add_nodes(nodes)
+
+    def write(self, batch: List[BaseModel]):
+        if batch:
+            self.sketches.add_results(batch)
+            self._changed = True
+
+    def flush(self):
+        if not self._changed:
+            return
+        try:
+            self._sketches.save(self.output_file)
+        except IOError as e:
+            raise IOError(f"Error writing sketch report: {e}")
+        self._changed = False
+
+    def close(self):
+        self.flush()
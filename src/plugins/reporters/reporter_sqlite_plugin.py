@@ -0,0 +1,51 @@
+from typing import List, Optional
+
+from loguru import logger
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from rapidswarm.history import DEFAULT_DATABASE, ResultHistory
+from rapidswarm.models.reporters import BaseReporter
+
+__module_name__ = "reporter_sqlite_plugin"
+
+
+class SQLiteReporter(BaseReporter):
+    """
+    Records results in a SQLite database that accumulates every run.
+
+    Each batch of results is inserted in one transaction as it arrives. Use
+    `rapidswarm history` or rapidswarm.history.ResultHistory to query a
+    node's history or its last known good results across runs.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    database: str = DEFAULT_DATABASE
+    run_id: Optional[str] = None
+
+    _history: Optional[ResultHistory] = PrivateAttr(None)
+
+    def report(self, data):
+        self.write(data if isinstance(data, list) else [data])
+
+    def write(self, batch: List[BaseModel]):
+        if not batch:
+            return
+        try:
+            if self._history is None:
+                self._history = ResultHistory(self.database)
+                self.run_id = self._history.start_run(self.run_id)
+                logger.info(f"Recording run {self.run_id} in {self.database}")
+            self._history.insert(self.run_id, batch)
+        except Exception as e:
+            raise IOError(f"Error writing SQLite report: {e}") from e
+
+    def flush(self):
+        # Every batch is committed as it is written.
+        pass
+
+    def close(self):
+        if self._history is not None:
+            self._history.finish_run(self.run_id)
+            self._history.close()
+            self._history = None
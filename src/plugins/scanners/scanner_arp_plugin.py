@@ -1,8 +1,9 @@
 import subprocess
-from typing import List
+from typing import Iterator, List, Optional
 
 from pydantic import field_validator
 
+from rapidswarm import instrumentation
 from rapidswarm.models.network_interface import NetworkInterface
 from rapidswarm.models.node import Node
 from rapidswarm.models.scanners import BaseScanner
@@ -54,9 +55,27 @@ class ARPScanner(BaseScanner):
             List[Node]: A list of Node objects discovered during the ARP scan.
         """
         command = f"sudo arp-scan --interface={self.interface} {self.target_range}"
+        instrumentation.count(instrumentation.SUBPROCESS_SPAWNS, source="ARPScanner")
         result = subprocess.check_output(command.split(), text=True)
         return self.parse_arp_output(result)
 
+    def iter_scan(self) -> Iterator[Node]:
+        """
+        Executes an ARP scan and yields each Node as soon as arp-scan reports
+        the host, rather than waiting for the whole range to be scanned.
+        """
+        command = f"sudo arp-scan --interface={self.interface} {self.target_range}"
+        instrumentation.count(instrumentation.SUBPROCESS_SPAWNS, source="ARPScanner")
+        with subprocess.Popen(
+            command.split(), stdout=subprocess.PIPE, text=True
+        ) as process:
+            for line in process.stdout:
+                node = self.parse_arp_line(line.rstrip("\n"))
+                if node is not None:
+                    yield node
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command)
+
     def parse_arp_output(self, arp_output: str) -> List[Node]:
         """
         Parses the output from an ARP scan and creates Node objects.
@@ -69,23 +88,34 @@ class ARPScanner(BaseScanner):
         """
         nodes = []
         for line in arp_output.splitlines():
-            if (
-                line
-                and not line.startswith("Interface:")
-                and not line.startswith("Starting")
-                and not line.startswith("Ending")
-            ):
-                parts = line.split()
-                if len(parts) >= 2:
-                    ip_address, mac_address = parts[0], parts[1]
-                    node = Node(
-                        id=mac_address,
-                        hostname=ip_address,
-                        network_interfaces=[
-                            NetworkInterface(
-                                mac_address=mac_address, ip_address=ip_address
-                            )
-                        ],
-                    )
-                    nodes.append(node)
+            node = self.parse_arp_line(line)
+            if node is not None:
+                nodes.append(node)
         return nodes
+
+    def parse_arp_line(self, line: str) -> Optional[Node]:
+        """
+        Parses a single line of ARP scan output.
+
+        Returns:
+            Optional[Node]: The Node reported on the line, or None if the line
+            does not describe a host.
+        """
+        if (
+            not line
+            or line.startswith("Interface:")
+            or line.startswith("Starting")
+            or line.startswith("Ending")
+        ):
+            return None
+        parts = line.split()
+        if len(parts) < 2:
+            return None
+        ip_address, mac_address = parts[0], parts[1]
+        return Node(
+            id=mac_address,
+            hostname=ip_address,
+            network_interfaces=[
+                NetworkInterface(mac_address=mac_address, ip_address=ip_address)
+            ],
+        )
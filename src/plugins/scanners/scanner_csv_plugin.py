@@ -6,7 +6,7 @@ from typing import List, Union
 from pydantic import Field, field_validator
 from rapidswarm.models.network_interface import NetworkInterface
 from rapidswarm.models.network_interface_type import NetworkInterfaceType
-from rapidswarm.models.node import Node
+from rapidswarm.models.node import NetworkSwitch, Node
 from rapidswarm.models.scanners import BaseScanner
 
 INFINIBAND_MAC_PREFIX = "00:02:c9"
@@ -16,6 +16,10 @@ MAC_ADDRESS_FIELD = "mac_address"
 IP_ADDRESS_FIELD = "ip_address"
 INTERFACE_TYPE_FIELD = "interface_type"
 INTERFACES_FIELD = "interfaces"
+# Optional columns placing a node on a switch.
+SWITCH_FIELD = "switch"
+SWITCH_MODEL_FIELD = "switch_model"
+SWITCH_IP_FIELD = "switch_ip"
 EXPECTED_HEADERS = [
     NODE_NAME_FIELD,
     INTERFACE_NAME_FIELD,
@@ -69,30 +73,41 @@ class CSVScanner(BaseScanner):
             )
 
     def scan(self) -> List[Node]:
-        nodes_dict = {}
-
         try:
             if self.csv_data:
-                csv_data = io.StringIO(self.csv_data)
-            else:
-                with open(self.csv_file, "r") as file:
-                    csv_data = file
-            reader = csv.DictReader(csv_data)
-
-            for row in reader:
-                node_id = row[NODE_NAME_FIELD]
-                if node_id not in nodes_dict:
-                    nodes_dict[node_id] = Node(
-                        id=node_id, hostname=node_id, network_interfaces=[]
-                    )
-                interface = NetworkInterface(
-                    mac_address=row[MAC_ADDRESS_FIELD],
-                    ip_address=row[IP_ADDRESS_FIELD],
-                    interface_type=self.get_interface_type(row[MAC_ADDRESS_FIELD]),
-                )
-                nodes_dict[node_id].network_interfaces.append(interface)
-
+                return self.parse_rows(csv.DictReader(io.StringIO(self.csv_data)))
+            with open(self.csv_file, "r", newline="") as file:
+                return self.parse_rows(csv.DictReader(file))
         except Exception as e:
             raise Exception(f"An error occurred while reading the CSV data: {str(e)}")
 
+    def parse_rows(self, rows) -> List[Node]:
+        """
+        Builds a Node per node name from rows of interfaces. A row with a
+        `switch` column places its node on that switch, described by the
+        optional `switch_model` and `switch_ip` columns.
+        """
+        nodes_dict = {}
+        switches = {}
+        for row in rows:
+            node_id = row[NODE_NAME_FIELD]
+            if node_id not in nodes_dict:
+                nodes_dict[node_id] = Node(
+                    id=node_id, hostname=node_id, network_interfaces=[]
+                )
+            switch_id = row.get(SWITCH_FIELD)
+            if switch_id:
+                if switch_id not in switches:
+                    switches[switch_id] = NetworkSwitch(
+                        id=switch_id,
+                        model=row.get(SWITCH_MODEL_FIELD) or "",
+                        ip_address=row.get(SWITCH_IP_FIELD) or "",
+                    )
+                nodes_dict[node_id].network_switch = switches[switch_id]
+            interface = NetworkInterface(
+                mac_address=row[MAC_ADDRESS_FIELD],
+                ip_address=row[IP_ADDRESS_FIELD],
+                interface_type=self.get_interface_type(row[MAC_ADDRESS_FIELD]),
+            )
+            nodes_dict[node_id].network_interfaces.append(interface)
         return list(nodes_dict.values())
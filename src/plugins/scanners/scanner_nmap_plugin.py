@@ -4,6 +4,8 @@ from typing import List
 
 from pydantic import field_validator
 
+from rapidswarm import instrumentation
+from rapidswarm.models.network_interface import NetworkInterface
 from rapidswarm.models.node import Node
 from rapidswarm.models.scanners import BaseScanner
 
@@ -47,6 +49,7 @@ class NmapScanner(BaseScanner):
         then parses the XML output to create and return a list of Node objects.
         """
         command = f"nmap {self.scan_options} {self.target_range} -oX -"
+        instrumentation.count(instrumentation.SUBPROCESS_SPAWNS, source="NmapScanner")
         result = subprocess.check_output(command.split())
         return self.parse_nmap_output(result)
 
@@ -54,6 +57,9 @@ class NmapScanner(BaseScanner):
         """
         Parses the XML output from Nmap and creates Node objects.
 
+        Hosts that are not up, and hosts without a MAC address, which nmap
+        only reports for hosts on a local network, are skipped.
+
         Args:
             xml_output (bytes): The XML output from an Nmap scan.
 
@@ -62,9 +68,30 @@ class NmapScanner(BaseScanner):
         """
         root = ET.fromstring(xml_output)
         nodes = []
-        for host in root.findall("host"):
-            # TODO: Parsing logic goes here.
-            nodes.append(Node(...))
+        for host in root.iter("host"):
+            status = host.find("status")
+            if status is not None and status.get("state") != "up":
+                continue
+            addresses = {
+                address.get("addrtype"): address.get("addr")
+                for address in host.iter("address")
+            }
+            mac_address = addresses.get("mac")
+            ip_address = addresses.get("ipv4") or addresses.get("ipv6")
+            if mac_address is None:
+                continue
+            hostname = host.find("hostnames/hostname")
+            nodes.append(
+                Node(
+                    id=mac_address,
+                    hostname=(
+                        hostname.get("name") if hostname is not None else ip_address
+                    ),
+                    network_interfaces=[
+                        NetworkInterface(mac_address=mac_address, ip_address=ip_address)
+                    ],
+                )
+            )
         return nodes
 
     def validate(self):
@@ -5,13 +5,35 @@ from pathlib import Path
 from loguru import logger
 from pydantic import ValidationError
 
+from rapidswarm import (
+    analysis,
+    benchmark,
+    client,
+    history,
+    instrumentation,
+    logs,
+    profiling,
+    server,
+)
+from rapidswarm.checkpoint import DEFAULT_CHECKPOINT_DIR
+from rapidswarm.plan import ProbeDurations, format_plan
 from rapidswarm.rapidswarm import RapidSwarm
+from rapidswarm.scheduling import parse_duration
 
-logger.remove()
-logger.add(sys.stderr, level="DEBUG")
+# Commands other than running a configuration, e.g. `rapidswarm history`.
+COMMANDS = {
+    "analysis": analysis.main,
+    "benchmark": benchmark.main,
+    "history": history.main,
+    "serve": server.main,
+    "submit": client.main,
+}
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        return COMMANDS[sys.argv[1]](sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description="RapidSwarm - A network scanning and testing tool."
     )
@@ -21,33 +43,138 @@ def main():
     parser.add_argument(
         "-v", "--verbose", action="store_true", help="Enable verbose logging."
     )
+    parser.add_argument(
+        "--log-format",
+        choices=logs.LOG_FORMATS,
+        default=logs.TEXT,
+        help="'json' writes one JSON record per message, with fields such as the "
+        "target, from a background thread so that logging never blocks the run.",
+    )
+    parser.add_argument(
+        "--log-rate",
+        type=float,
+        help="Per-target messages, e.g. one per probed node, written per second "
+        "from each line of code. The rest are counted and dropped.",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=str,
+        help="Journal completed probe units to this directory so the run can be resumed.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip probe units completed by a previous run of the same plan "
+        f"(uses {DEFAULT_CHECKPOINT_DIR} unless --checkpoint-dir is given).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Scan the inventory and print the plan of the run, its number of "
+        "probe executions and estimated duration, without probing.",
+    )
+    parser.add_argument(
+        "--durations",
+        action="append",
+        default=[],
+        metavar="METRICS_JSON",
+        help="--metrics-json file of an earlier run to estimate probe durations "
+        "from. May be given more than once.",
+    )
+    parser.add_argument(
+        "--plan-output",
+        type=str,
+        help="With --dry-run, also write the plan as JSON to this file.",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=str,
+        help="Write the time spent per phase, scanner, manager, probe and reporter "
+        "and the run's counters to this JSON file.",
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        type=str,
+        help="Write the same metrics in the Prometheus text format, e.g. for the "
+        "node exporter's textfile collector.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=profiling.PROFILERS,
+        help="Profile the run: 'cpu' writes a cProfile pstats file, 'wall' samples "
+        "every thread's stack into a collapsed-stack flamegraph file and 'alloc' "
+        "writes a report of the top allocations per phase.",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        help="File to write the profile to. Defaults to rapidswarm.pstats, "
+        "rapidswarm.collapsed or rapidswarm.alloc.txt.",
+    )
+    parser.add_argument(
+        "--profile-phase",
+        type=str,
+        help="Only profile a phase, manager, probe or reporter, given by kind "
+        "(e.g. 'probe'), name (e.g. 'PingProbe') or both ('probe:PingProbe').",
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=parse_duration,
+        default=profiling.DEFAULT_INTERVAL,
+        help="Time between the samples of the wall-clock profiler, e.g. '1ms'.",
+    )
     args = parser.parse_args()
 
-    if args.verbose:
-        logger.remove()
-        logger.add(sys.stderr, level="DEBUG")
-    else:
-        logger.remove()
-        logger.add(sys.stderr, level="INFO")
+    sampler = logs.configure(
+        level="DEBUG" if args.verbose else "INFO",
+        log_format=args.log_format,
+        rate=args.log_rate,
+    )
 
     config_file = Path(args.config_file)
     if not config_file.is_file():
         logger.error(f"Configuration file '{config_file}' not found.")
+        logs.finish(sampler)
         return
 
+    if args.metrics_json or args.metrics_prom:
+        instrumentation.enable()
+    profiler = None
+    if args.profile:
+        profiler = profiling.create_profiler(
+            args.profile,
+            output=args.profile_output,
+            phase=args.profile_phase,
+            interval=args.profile_interval,
+        )
+        profiler.start()
+
     try:
-        rapidswarm = RapidSwarm(config_file, verbose=args.verbose)
+        checkpoint_dir = args.checkpoint_dir
+        if args.resume and checkpoint_dir is None:
+            checkpoint_dir = DEFAULT_CHECKPOINT_DIR
+        rapidswarm = RapidSwarm(
+            config_file,
+            verbose=args.verbose,
+            checkpoint_dir=checkpoint_dir,
+            resume=args.resume,
+        )
         rapidswarm.load_config()
         rapidswarm.create_scanners()
-        rapidswarm.run_scanners()
-
-        # Create and run managers and reporters within the RapidSwarm instance
-        rapidswarm.create_managers()
+        if args.dry_run:
+            dry_run(rapidswarm, args.durations, args.plan_output)
+            return
         rapidswarm.create_reporters()
-        results = rapidswarm.run_managers()
 
-        logger.info(f"Scan and testing results: {results}")
+        # Scan, compile the plan, then probe and report as units complete.
+        result_count = rapidswarm.run_pipeline()
 
+        logger.info(
+            f"Reported {result_count} results for {len(rapidswarm.scanned_nodes)} nodes."
+        )
+
+    except KeyboardInterrupt:
+        logger.info("Interrupted, stopping.")
     except FileNotFoundError as e:
         logger.error(f"Error: {e}")
     except ValidationError as e:
@@ -59,6 +186,53 @@ def main():
             logger.debug(f"Scanners: {rapidswarm.scanners}")
             logger.debug(f"Managers: {rapidswarm.managers}")
             logger.debug(f"Reporters: {rapidswarm.reporters}")
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            write_profile(profiler)
+        write_metrics(args.metrics_json, args.metrics_prom)
+        logs.finish(sampler)
+
+
+def dry_run(rapidswarm: RapidSwarm, metrics_files, plan_output=None):
+    try:
+        durations = ProbeDurations.from_metrics(metrics_files)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading probe durations: {e}")
+        return
+    plan = rapidswarm.dry_run(durations)
+    print(format_plan(plan))
+    if plan_output:
+        with open(plan_output, "w") as file:
+            file.write(plan.model_dump_json(indent=2) + "\n")
+        logger.info(f"Wrote the plan to {plan_output}")
+
+
+def write_profile(profiler: profiling.Profiler):
+    try:
+        profiler.write()
+    except OSError as e:
+        logger.error(f"Error writing profile: {e}")
+
+
+def write_metrics(json_path, prometheus_path):
+    recorder = instrumentation.recorder()
+    if not recorder.enabled:
+        return
+    for span in instrumentation.top_spans(5):
+        logger.debug(
+            f"{span['kind']} {span['name']}: {span['total_seconds']:.3f}s "
+            f"over {span['count']} spans"
+        )
+    try:
+        if json_path:
+            recorder.write_json(json_path)
+            logger.info(f"Wrote run metrics to {json_path}")
+        if prometheus_path:
+            recorder.write_prometheus(prometheus_path)
+            logger.info(f"Wrote run metrics to {prometheus_path}")
+    except OSError as e:
+        logger.error(f"Error writing run metrics: {e}")
 
 
 if __name__ == "__main__":
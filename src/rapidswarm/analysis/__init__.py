@@ -0,0 +1,50 @@
+"""
+Vectorized analysis of result datasets.
+
+Datasets, CSV reports or columnar result stores, are loaded column by
+column into NumPy arrays and grouped by sorting once, so statistics over
+millions of results take seconds rather than a Python loop per group.
+Runs too long to keep every result are summarized as they go by the
+SketchReporter and queried from its sketches instead.
+"""
+
+from rapidswarm.analysis.baseline import (
+    Baseline,
+    RegressionReport,
+    Regressions,
+    compare,
+    load_baseline,
+)
+from rapidswarm.analysis.cli import main
+from rapidswarm.analysis.data import KeyColumn, load_columns
+from rapidswarm.analysis.groups import STATISTICS, Segments, summarize
+from rapidswarm.analysis.outliers import (
+    OutlierMethod,
+    OutlierReport,
+    find_outliers,
+    fit,
+    outlier_report,
+)
+from rapidswarm.analysis.p2p import P2PStats, format_p2p_stats, p2p_stats
+
+__all__ = [
+    "Baseline",
+    "KeyColumn",
+    "OutlierMethod",
+    "OutlierReport",
+    "P2PStats",
+    "RegressionReport",
+    "Regressions",
+    "STATISTICS",
+    "Segments",
+    "compare",
+    "find_outliers",
+    "fit",
+    "format_p2p_stats",
+    "load_baseline",
+    "load_columns",
+    "main",
+    "outlier_report",
+    "p2p_stats",
+    "summarize",
+]
@@ -0,0 +1,572 @@
+import csv
+import os
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, TextIO, Tuple
+
+import numpy as np
+
+from rapidswarm.analysis.cache import ColumnCache
+from rapidswarm.analysis.data import KeyColumn, ip_sort_key, load_columns
+from rapidswarm.analysis.outliers import (
+    DEFAULT_CLIENT,
+    DEFAULT_SERVER,
+    MAD_SCALE,
+    shared_codes,
+)
+
+DEFAULT_METRICS = ("bw_average_mbps", "msg_rate_mpps")
+DEFAULT_TOLERANCE = 0.05
+DEFAULT_ALPHA = 0.01
+
+# Metrics whose names contain one of these are better when lower, e.g.
+# latencies; all others, e.g. bandwidths and message rates, when higher.
+LOWER_IS_BETTER = ("latency", "time", "rtt", "loss", "error")
+
+# Links are numbered client * endpoints + server. Up to this many times as
+# many possible links as rows, they are grouped with a dense table rather
+# than by sorting.
+DENSE_LINKS_PER_ROW = 8
+
+LEVELS = ("link", "node")
+
+# Fields of the rows of a RegressionReport.
+ROW_FIELDS = ("level", "name", "metric", "baseline", "current", "worse_by", "z", "p")
+
+# Differences sampled to estimate the noise of runs measuring groups once.
+VARIANCE_SAMPLE = 1_000_000
+
+
+class Moments(NamedTuple):
+    """Count, mean and sum of squared deviations of each group's values."""
+
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+
+    @property
+    def variance(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    def take(self, indices: np.ndarray) -> "Moments":
+        return Moments(*(array[indices] for array in self))
+
+
+def moments(groups: np.ndarray, values: np.ndarray, size: int) -> Moments:
+    """Computes the Moments of values per group, ignoring NaN values."""
+    present = ~np.isnan(values)
+    if not present.all():
+        groups, values = groups[present], values[present]
+    count = np.bincount(groups, minlength=size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(groups, values, minlength=size) / count
+    if count.max(initial=0) <= 1:
+        # No group has a spread, as in all-pairs runs measuring links once.
+        return Moments(count, mean, np.zeros(size))
+    # Deviations from the group mean, rather than sums of squares, which
+    # lose their precision for values far from zero.
+    m2 = np.bincount(groups, (values - mean[groups]) ** 2, minlength=size)
+    return Moments(count, mean, m2)
+
+
+def combine(groups: np.ndarray, parts: Moments, size: int) -> Moments:
+    """Combines the Moments of parts, e.g. links, into those of their groups."""
+    count = np.bincount(groups, parts.count, minlength=size).astype(np.int64)
+    part_means = np.where(parts.count > 0, parts.mean, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(groups, parts.count * part_means, minlength=size) / count
+    deviations = np.where(parts.count > 0, part_means - mean[groups], 0.0)
+    m2 = np.bincount(groups, parts.m2 + parts.count * deviations**2, minlength=size)
+    return Moments(count, mean, m2)
+
+
+def merge(first: Moments, second: Moments) -> Moments:
+    """Merges the Moments of the same groups over two disjoint sets of values."""
+    count = first.count + second.count
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(count > 0, second.count / count, 0.0)
+    delta = np.where(second.count > 0, second.mean - first.mean, 0.0)
+    delta = np.where(first.count > 0, delta, 0.0)
+    mean = np.where(first.count > 0, first.mean, second.mean) + delta * weight
+    m2 = first.m2 + second.m2 + delta**2 * first.count * weight
+    return Moments(count, mean, m2)
+
+
+def node_moments(links: np.ndarray, stats: Moments, size: int) -> Moments:
+    """
+    Combines the Moments of links into those of the nodes at either end.
+
+    Links are numbered client * size + server, so when they fill much of
+    the size × size grid, as in all-pairs runs, each node's links are a row
+    and a column of it and are summed as such rather than grouped.
+    """
+    if size * size > DENSE_LINKS_PER_ROW * max(len(links), 1):
+        return merge(
+            combine(links // size, stats, size), combine(links % size, stats, size)
+        )
+
+    def grid(values):
+        array = np.zeros(size * size)
+        array[links] = values
+        return array.reshape(size, size)
+
+    def ends(array):
+        return array.sum(axis=1) + array.sum(axis=0)
+
+    counts = grid(stats.count)
+    means = grid(np.where(stats.count > 0, stats.mean, 0.0))
+    count = ends(counts).astype(np.int64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = ends(counts * means) / count
+    center = np.nan_to_num(mean)
+    m2 = ends(grid(stats.m2))
+    m2 += (counts * (means - center[:, None]) ** 2).sum(axis=1)
+    m2 += (counts * (means - center[None, :]) ** 2).sum(axis=0)
+    return Moments(count, mean, m2)
+
+
+def lower_is_better(metric: str) -> bool:
+    return any(word in metric for word in LOWER_IS_BETTER)
+
+
+class Baseline:
+    """
+    Per-link and per-node summary statistics of a run, to compare later
+    runs against.
+
+    Links are (client, server) pairs; a node's statistics cover the results
+    it took part in as either.
+
+    Args:
+        labels (List[str]): Endpoint names.
+        links (np.ndarray): Sorted link numbers, client * len(labels) + server.
+        stats (Dict[str, Dict[str, Moments]]): Moments of each metric, for
+            the links and for the nodes, by level and metric.
+        source (str): Where the run's results came from.
+        created (Optional[str]): When the baseline was made.
+    """
+
+    def __init__(
+        self,
+        labels: List[str],
+        links: np.ndarray,
+        stats: Dict[str, Dict[str, Moments]],
+        source: str = "",
+        created: Optional[str] = None,
+    ):
+        self.labels = labels
+        self.links = links
+        self.stats = stats
+        self.source = source
+        self.created = created or datetime.now().isoformat(timespec="seconds")
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self.stats["link"])
+
+    @property
+    def clients(self) -> np.ndarray:
+        return self.links // len(self.labels)
+
+    @property
+    def servers(self) -> np.ndarray:
+        return self.links % len(self.labels)
+
+    @classmethod
+    def from_columns(
+        cls,
+        clients: KeyColumn,
+        servers: KeyColumn,
+        values: Dict[str, np.ndarray],
+        source: str = "",
+    ) -> "Baseline":
+        (client_codes, server_codes), labels = shared_codes(clients, servers)
+        # Endpoints are numbered in address order, so that runs over the same
+        # nodes number their links alike whatever order results came in.
+        order = sorted(range(len(labels)), key=lambda code: ip_sort_key(labels[code]))
+        labels = [labels[code] for code in order]
+        renumber = np.empty(len(order), dtype=np.int64)
+        renumber[order] = np.arange(len(order))
+        client_codes, server_codes = renumber[client_codes], renumber[server_codes]
+        size = len(labels)
+        links, groups = _group_links(client_codes * size + server_codes, size)
+        del client_codes, server_codes
+        stats = {"link": {}, "node": {}}
+        for metric, column in values.items():
+            link_stats = stats["link"][metric] = moments(groups, column, len(links))
+            # Nodes are summarized from their links, which are far fewer
+            # than the results in long runs.
+            stats["node"][metric] = node_moments(links, link_stats, size)
+        return cls(labels, links, stats, source)
+
+    def save(self, path: str):
+        """Writes the baseline to a .npz file, replacing it atomically."""
+        arrays = {
+            "labels": np.array(self.labels, dtype=str),
+            "links": self.links,
+            "metrics": np.array(self.metrics, dtype=str),
+            "source": np.array(self.source),
+            "created": np.array(self.created),
+        }
+        for level, level_stats in self.stats.items():
+            for metric, stats in level_stats.items():
+                for name, array in stats._asdict().items():
+                    arrays[f"{level}.{name}.{metric}"] = array
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "Baseline":
+        with np.load(path) as data:
+            stats = {
+                level: {
+                    metric: Moments(
+                        *(data[f"{level}.{name}.{metric}"] for name in Moments._fields)
+                    )
+                    for metric in data["metrics"].tolist()
+                }
+                for level in LEVELS
+            }
+            return cls(
+                data["labels"].tolist(),
+                data["links"],
+                stats,
+                str(data["source"]),
+                str(data["created"]),
+            )
+
+
+def _group_links(links: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the distinct links, sorted, and the group of every row."""
+    if size * size <= DENSE_LINKS_PER_ROW * max(len(links), 1):
+        present = np.bincount(links, minlength=size * size) > 0
+        return np.flatnonzero(present), (np.cumsum(present) - 1)[links]
+    return np.unique(links, return_inverse=True)
+
+
+def normal_sf(z: np.ndarray) -> np.ndarray:
+    """
+    The standard normal survival function, P(Z > z), accurate to 1.5e-7
+    (Abramowitz and Stegun 7.1.26), without a per-value Python call.
+    """
+    x = np.abs(z) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * x)
+    poly = t * (
+        0.254829592
+        + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152014 + t * 1.061405429)))
+    )
+    tail = 0.5 * poly * np.exp(-x * x)
+    return np.where(z >= 0, tail, 1 - tail)
+
+
+def significant(p: np.ndarray, alpha: float, tests: Optional[int] = None) -> np.ndarray:
+    """
+    Selects the p-values significant at a false discovery rate of alpha,
+    with the Benjamini-Hochberg procedure. Testing millions of links at a
+    plain significance level would flag a fraction alpha of unchanged ones.
+
+    Args:
+        p (np.ndarray): The p-values.
+        alpha (float): The false discovery rate.
+        tests (Optional[int]): The number of tests, if more than len(p);
+            leaving out untested groups only makes the selection stricter.
+    """
+    tests = len(p) if tests is None else tests
+    # Only p-values up to alpha can pass, so only those are sorted.
+    ranked = np.sort(p[p <= alpha])
+    passing = np.flatnonzero(ranked <= alpha * np.arange(1, len(ranked) + 1) / tests)
+    if not len(passing):
+        return np.zeros(len(p), dtype=bool)
+    return p <= ranked[passing[-1]]
+
+
+class Regressions(NamedTuple):
+    """
+    The links or nodes whose metric got worse, out of those measured in both
+    runs.
+
+    Attributes:
+        level (str): "link" or "node".
+        metric (str): The metric.
+        compared (int): Number of links or nodes compared.
+        keys (np.ndarray): Baseline link numbers or node codes.
+        baseline (np.ndarray): Baseline means.
+        current (np.ndarray): Means in the compared run.
+        change (np.ndarray): Relative change, positive when worse.
+        z (np.ndarray): The worsening in standard errors.
+        p (np.ndarray): One-sided p-value of a worsening that large.
+    """
+
+    level: str
+    metric: str
+    compared: int
+    keys: np.ndarray
+    baseline: np.ndarray
+    current: np.ndarray
+    change: np.ndarray
+    z: np.ndarray
+    p: np.ndarray
+
+
+def pooled_variance(baseline: Moments, current: Moments, delta: np.ndarray) -> float:
+    """
+    The variance of single values, for groups with too few values for their
+    own: the median variance of the groups that have one or, when there are
+    none, e.g. all-pairs runs measuring every link once, half the variance of
+    the differences across all groups, estimated robustly from a sample.
+    """
+    known = [
+        moments.variance[moments.count > 1]
+        for moments in (baseline, current)
+        if (moments.count > 1).any()
+    ]
+    if known:
+        return float(np.median(np.concatenate(known)))
+    sample = delta[:: max(1, len(delta) // VARIANCE_SAMPLE)]
+    sample = sample[~np.isnan(sample)]
+    if len(sample) < 2:
+        return np.nan
+    spread = MAD_SCALE * np.median(np.abs(sample - np.median(sample)))
+    # Each difference of single values carries the noise of both runs.
+    return float(spread**2 / 2)
+
+
+def compare_moments(
+    baseline: Moments, current: Moments, lower_better: bool, tolerance: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compares the means of matched groups and tests those worse by more than
+    the tolerance, the only ones that can be regressions.
+
+    Groups with at least two values in both runs are tested with Welch's
+    statistic, using the normal distribution for its p-value. Others use
+    pooled_variance() for the runs where they have fewer. Groups whose
+    variance cannot be estimated at all, e.g. single values in runs of a
+    single group, are left untested: their z and p are NaN, which is never
+    significant. Only a spread of exactly zero makes any worsening certain.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: The tested
+        groups and their relative change, z and p, oriented so that positive
+        means worse.
+    """
+    delta = current.mean - baseline.mean
+    if not lower_better:
+        np.negative(delta, out=delta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = delta / np.abs(baseline.mean)
+    tested = np.flatnonzero(change > tolerance)
+
+    pooled = pooled_variance(baseline, current, delta)
+    baseline, current = baseline.take(tested), current.take(tested)
+    base_var = np.where(baseline.count > 1, baseline.variance, pooled)
+    current_var = np.where(current.count > 1, current.variance, pooled)
+    se = np.sqrt(base_var / baseline.count + current_var / current.count)
+    delta = delta[tested]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(se > 0, delta / se, np.where(se == 0, np.inf, np.nan))
+    return tested, change[tested], z, normal_sf(z)
+
+
+def match_links(baseline: Baseline, run: Baseline) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the links of a run in a baseline.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Positions of the matched links in the
+        baseline and in the run, or slices when every link matches.
+    """
+    if run.labels == baseline.labels:
+        if np.array_equal(run.links, baseline.links):
+            # The usual case of the same links measured again, matched
+            # without copying their statistics.
+            return slice(None), slice(None)
+        keys, run_index = run.links, np.arange(len(run.links))
+    else:
+        # Run endpoints renumbered as in the baseline, -1 if not in it.
+        index = {label: code for code, label in enumerate(baseline.labels)}
+        mapping = np.array(
+            [index.get(label, -1) for label in run.labels], dtype=np.int64
+        )
+        clients, servers = mapping[run.clients], mapping[run.servers]
+        known = (clients >= 0) & (servers >= 0)
+        run_index = np.flatnonzero(known)
+        keys = clients[run_index] * len(baseline.labels) + servers[run_index]
+    if not len(baseline.links):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    positions = np.searchsorted(baseline.links, keys)
+    positions[positions == len(baseline.links)] = 0
+    found = baseline.links[positions] == keys
+    return positions[found], run_index[found]
+
+
+def match_nodes(baseline: Baseline, run: Baseline) -> Tuple[np.ndarray, np.ndarray]:
+    index = {label: code for code, label in enumerate(baseline.labels)}
+    mapping = np.array([index.get(label, -1) for label in run.labels], dtype=np.int64)
+    run_index = np.flatnonzero(mapping >= 0)
+    return mapping[run_index], run_index
+
+
+def compare(
+    baseline: Baseline,
+    run: Baseline,
+    tolerance: float = DEFAULT_TOLERANCE,
+    alpha: float = DEFAULT_ALPHA,
+    lower_better: Optional[Sequence[str]] = None,
+) -> List[Regressions]:
+    """
+    Compares the links and nodes of a run with a baseline.
+
+    Args:
+        baseline (Baseline): The blessed run.
+        run (Baseline): The run to check, summarized the same way.
+        tolerance (float): Relative worsening, e.g. 0.05 for 5%, below which
+            changes are never regressions.
+        alpha (float): False discovery rate among the regressions of each
+            level and metric.
+        lower_better (Optional[Sequence[str]]): Metrics that are better when
+            lower. Defaults to those named like LOWER_IS_BETTER.
+
+    Returns:
+        List[Regressions]: The regressions of each level and metric in both
+        runs.
+    """
+    matches = {"link": match_links(baseline, run), "node": match_nodes(baseline, run)}
+    results = []
+    for level in LEVELS:
+        base_index, run_index = matches[level]
+        keys = baseline.links[base_index] if level == "link" else base_index
+        for metric in baseline.metrics:
+            if metric not in run.stats[level]:
+                continue
+            base = baseline.stats[level][metric].take(base_index)
+            current = run.stats[level][metric].take(run_index)
+            both = (base.count > 0) & (current.count > 0)
+            both = slice(None) if both.all() else np.flatnonzero(both)
+            base, current = base.take(both), current.take(both)
+            lower = (
+                lower_is_better(metric)
+                if lower_better is None
+                else metric in lower_better
+            )
+            tested, change, z, p = compare_moments(base, current, lower, tolerance)
+            regressed = np.flatnonzero(significant(p, alpha, len(base.count)))
+            tested = tested[regressed]
+            results.append(
+                Regressions(
+                    level,
+                    metric,
+                    len(base.count),
+                    keys[both][tested],
+                    base.mean[tested],
+                    current.mean[tested],
+                    change[regressed],
+                    z[regressed],
+                    p[regressed],
+                )
+            )
+    return results
+
+
+class RegressionReport:
+    """
+    Regressions of a run against a baseline, ranked by how much worse they
+    are.
+
+    Args:
+        baseline (Baseline): The blessed run.
+        run (Baseline): The run to check.
+        **options: Passed on to compare().
+    """
+
+    def __init__(self, baseline: Baseline, run: Baseline, **options):
+        self.baseline = baseline
+        self.regressions = compare(baseline, run, **options)
+
+    def _select(self, level: Optional[str]) -> List[Regressions]:
+        return [r for r in self.regressions if level is None or r.level == level]
+
+    def count(self, level: Optional[str] = None) -> int:
+        return sum(len(r.keys) for r in self._select(level))
+
+    def compared(self, level: str) -> int:
+        return max((r.compared for r in self._select(level)), default=0)
+
+    def rows(
+        self, level: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Returns the regressions, worst first.
+
+        Args:
+            level (Optional[str]): Only links or only nodes.
+            limit (Optional[int]): Return at most this many.
+        """
+        selected = self._select(level)
+        if not selected:
+            return []
+        # Ranks all regressions at once and builds rows for the top ones only.
+        ranking = np.concatenate([r.change for r in selected])
+        owners = np.concatenate(
+            [np.full(len(r.keys), i) for i, r in enumerate(selected)]
+        )
+        indices = np.concatenate([np.arange(len(r.keys)) for r in selected])
+        order = np.argsort(-ranking, kind="stable")[:limit]
+
+        labels, size = self.baseline.labels, len(self.baseline.labels)
+        rows = []
+        for position in order.tolist():
+            regressions, index = selected[owners[position]], indices[position]
+            key = int(regressions.keys[index])
+            if regressions.level == "link":
+                name = f"{labels[key // size]} -> {labels[key % size]}"
+            else:
+                name = labels[key]
+            rows.append(
+                {
+                    "level": regressions.level,
+                    "name": name,
+                    "metric": regressions.metric,
+                    "baseline": float(regressions.baseline[index]),
+                    "current": float(regressions.current[index]),
+                    "worse_by": float(regressions.change[index]),
+                    "z": float(regressions.z[index]),
+                    "p": float(regressions.p[index]),
+                }
+            )
+        return rows
+
+    def write_csv(self, file: TextIO, level: Optional[str] = None):
+        writer = csv.writer(file)
+        writer.writerow(ROW_FIELDS)
+        for row in self.rows(level):
+            writer.writerow(row.values())
+
+
+def load_baseline(
+    path: str,
+    client: str = DEFAULT_CLIENT,
+    server: str = DEFAULT_SERVER,
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    cache: Optional[ColumnCache] = None,
+) -> Baseline:
+    """
+    Summarizes the pairwise results of a run as a Baseline.
+
+    Args:
+        path (str): A CSV file or columnar result store.
+        client (str): Column naming the client of each result.
+        server (str): Column naming the server of each result.
+        metrics (Sequence[str]): Numeric columns to summarize.
+        cache (Optional[ColumnCache]): See load_columns().
+
+    Returns:
+        Baseline: The summary, to save or to compare with a saved one.
+    """
+    keys, values = load_columns(
+        path, keys=[client, server], values=metrics, cache=cache
+    )
+    return Baseline.from_columns(keys[client], keys[server], values, source=path)
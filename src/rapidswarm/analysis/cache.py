@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+DEFAULT_CACHE_DIR = os.path.join(".rapidswarm", "cache")
+DEFAULT_CACHE_SIZE = 4 * 2**30
+
+# Bytes hashed at each end of a file. Hashing all of a file of hundreds of
+# megabytes would take a good part of the time the cache saves, while
+# rewrites that keep the size and modification time are caught by the ends.
+HASH_BLOCK = 2**20
+
+META_FILE = "meta.json"
+
+
+def fingerprint(path: str) -> Dict:
+    """Identifies the contents of a file by size, mtime and a content hash."""
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        digest.update(file.read(HASH_BLOCK))
+        if stat.st_size > HASH_BLOCK:
+            file.seek(max(HASH_BLOCK, stat.st_size - HASH_BLOCK))
+            digest.update(file.read(HASH_BLOCK))
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": digest.hexdigest(),
+    }
+
+
+class ColumnCache:
+    """
+    Keeps arrays parsed from files, e.g. the columns of CSV reports, as .npy
+    files, so that analysing the same file again memory-maps them instead
+    of parsing it.
+
+    Each file gets an entry directory named after its path, holding the
+    arrays parsed from it so far and the file's fingerprint(). An entry
+    whose file has changed is dropped. When the cache grows past
+    `max_bytes`, the least recently used entries are removed.
+
+    Args:
+        directory (str): Where to keep the entries.
+        max_bytes (int): Size the entries are kept under.
+    """
+
+    def __init__(
+        self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_SIZE
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def entry(self, path: str) -> str:
+        name = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:32]
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self, entry: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(entry, META_FILE)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, entry: str, meta: Dict):
+        path = os.path.join(entry, META_FILE)
+        with open(path + ".tmp", "w") as file:
+            json.dump(meta, file)
+        os.replace(path + ".tmp", path)
+
+    def get(self, path: str, names: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Returns the arrays of a file that are in the cache, memory-mapped.
+
+        Args:
+            path (str): The file the arrays were parsed from.
+            names (Sequence[str]): The arrays wanted.
+
+        Returns:
+            Dict[str, np.ndarray]: Those of the arrays that are cached.
+        """
+        entry = self.entry(path)
+        meta = self._read_meta(entry)
+        if meta is None:
+            return {}
+        if meta["source"] != fingerprint(path):
+            logger.debug(f"Dropping the cached columns of changed {path}")
+            shutil.rmtree(entry, ignore_errors=True)
+            return {}
+        files = meta["arrays"]
+        try:
+            arrays = {
+                name: np.load(os.path.join(entry, files[name]), mmap_mode="r")
+                for name in names
+                if name in files
+            }
+            # The meta file's mtime orders entries by last use.
+            os.utime(os.path.join(entry, META_FILE))
+        except (OSError, ValueError):
+            # Evicted by another process while being read.
+            return {}
+        return arrays
+
+    def put(self, path: str, arrays: Dict[str, np.ndarray]):
+        """Adds arrays parsed from a file to its entry, then evicts."""
+        entry = self.entry(path)
+        meta = self._read_meta(entry)
+        source = fingerprint(path)
+        if meta is None or meta["source"] != source:
+            shutil.rmtree(entry, ignore_errors=True)
+            meta = {"path": os.path.abspath(path), "source": source, "arrays": {}}
+        os.makedirs(entry, exist_ok=True)
+        files = meta["arrays"]
+        for name, array in arrays.items():
+            # Arrays are named after columns, which need not be valid file
+            # names, so files are numbered.
+            file_name = files.setdefault(name, f"{len(files)}.npy")
+            file_path = os.path.join(entry, file_name)
+            with open(file_path + ".tmp", "wb") as file:
+                np.save(file, array)
+            os.replace(file_path + ".tmp", file_path)
+        self._write_meta(entry, meta)
+        self.evict()
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """Returns the last use, size and directory of every entry."""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            try:
+                last_use = os.stat(os.path.join(entry, META_FILE)).st_mtime
+                size = sum(
+                    file.stat().st_size for file in os.scandir(entry) if file.is_file()
+                )
+            except OSError:
+                continue
+            entries.append((last_use, size, entry))
+        return entries
+
+    def evict(self):
+        """Removes the least recently used entries until under max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            logger.debug(f"Evicting {size} bytes of cached columns in {entry}")
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,339 @@
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from rapidswarm.analysis.baseline import (
+    DEFAULT_ALPHA,
+    DEFAULT_TOLERANCE,
+    LEVELS,
+    LOWER_IS_BETTER,
+    Baseline,
+    RegressionReport,
+    load_baseline,
+)
+from rapidswarm.analysis.baseline import DEFAULT_METRICS as BASELINE_METRICS
+from rapidswarm.analysis.cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, ColumnCache
+from rapidswarm.analysis.outliers import (
+    DEFAULT_CLIENT,
+    DEFAULT_SERVER,
+    OutlierMethod,
+    outlier_report,
+)
+from rapidswarm.analysis.outliers import DEFAULT_METRICS as OUTLIER_METRICS
+from rapidswarm.analysis.p2p import (
+    DEFAULT_GROUP_BY,
+    DEFAULT_METRICS,
+    format_p2p_stats,
+    p2p_stats,
+)
+from rapidswarm.history import format_rows
+from rapidswarm.sketches import DEFAULT_QUANTILES, SketchSet
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="rapidswarm analysis",
+        description="Analyse results written by the CSV or columnar reporters.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stats = commands.add_parser(
+        "p2p-stats", help="Summarize pairwise results overall and per client."
+    )
+    stats.add_argument("path", help="A CSV file or columnar result store.")
+    stats.add_argument(
+        "--group-by",
+        default=DEFAULT_GROUP_BY,
+        help=f"Column to group results by (default: {DEFAULT_GROUP_BY}).",
+    )
+    stats.add_argument(
+        "--metric",
+        action="append",
+        dest="metrics",
+        help="Numeric column to summarize. Can be repeated "
+        f"(default: {', '.join(DEFAULT_METRICS)}).",
+    )
+    stats.add_argument(
+        "--no-color", action="store_true", help="Do not color the output."
+    )
+    stats.add_argument(
+        "--no-plots", action="store_true", help="Leave out the box plots."
+    )
+
+    outliers = commands.add_parser(
+        "outliers",
+        help="Find outlying pairwise results and the addresses involved.",
+    )
+    outliers.add_argument("path", help="A CSV file or columnar result store.")
+    outliers.add_argument("--client", default=DEFAULT_CLIENT, help="Client column.")
+    outliers.add_argument("--server", default=DEFAULT_SERVER, help="Server column.")
+    outliers.add_argument(
+        "--metric",
+        action="append",
+        dest="metrics",
+        help="Numeric column to check. Can be repeated "
+        f"(default: {', '.join(OUTLIER_METRICS)}).",
+    )
+    outliers.add_argument(
+        "--method",
+        type=OutlierMethod,
+        choices=list(OutlierMethod),
+        default=OutlierMethod.ZSCORE,
+        help="Standard deviations from the mean (zscore), scaled median "
+        "absolute deviations from the median (mad) or Tukey's fences (iqr).",
+    )
+    outliers.add_argument(
+        "--threshold",
+        type=float,
+        help="Distance from the center in units of the method's spread "
+        "(default: 2 for zscore, 3.5 for mad, 1.5 for iqr).",
+    )
+    outliers.add_argument(
+        "--orders", type=int, default=2, help="Number of outlier passes."
+    )
+    outliers.add_argument(
+        "--min-count",
+        type=int,
+        default=2,
+        help="Report addresses in more outlier results than this.",
+    )
+    outliers.add_argument(
+        "--output", help="Write the Markdown report here instead of to stdout."
+    )
+    outliers.add_argument(
+        "--csv-prefix",
+        help="Also write the outliers of each pass to PREFIX-<order>.csv.",
+    )
+
+    baseline = commands.add_parser(
+        "baseline",
+        help="Save per-link and per-node statistics of a run to compare others with.",
+    )
+    baseline.add_argument("path", help="A CSV file or columnar result store.")
+    baseline.add_argument(
+        "--output", required=True, help="The baseline file to write, e.g. base.npz."
+    )
+    compare = commands.add_parser(
+        "compare", help="Rank the links and nodes that got worse since a baseline."
+    )
+    compare.add_argument("path", help="A CSV file or columnar result store.")
+    compare.add_argument(
+        "--baseline", required=True, help="A file written by the baseline command."
+    )
+    compare.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Smallest relative worsening reported "
+        f"(default: {DEFAULT_TOLERANCE}, i.e. {DEFAULT_TOLERANCE:.0%}).",
+    )
+    compare.add_argument(
+        "--alpha",
+        type=float,
+        default=DEFAULT_ALPHA,
+        help=f"False discovery rate of the regressions (default: {DEFAULT_ALPHA}).",
+    )
+    compare.add_argument(
+        "--lower-is-better",
+        action="append",
+        dest="lower_better",
+        help="Metric that is better when lower. Can be repeated (default: "
+        f"metrics named with {', '.join(LOWER_IS_BETTER)}).",
+    )
+    compare.add_argument("--level", choices=LEVELS, help="Only links or only nodes.")
+    compare.add_argument(
+        "--limit", type=int, default=20, help="Show the worst this many (default: 20)."
+    )
+    compare.add_argument("--csv", help="Also write every regression to this file.")
+    compare.add_argument(
+        "--exit-code",
+        action="store_true",
+        help="Exit with status 1 when there are regressions.",
+    )
+    for command in (baseline, compare):
+        command.add_argument("--client", default=DEFAULT_CLIENT, help="Client column.")
+        command.add_argument("--server", default=DEFAULT_SERVER, help="Server column.")
+    baseline.add_argument(
+        "--metric",
+        action="append",
+        dest="metrics",
+        help="Numeric column to summarize. Can be repeated "
+        f"(default: {', '.join(BASELINE_METRICS)}).",
+    )
+
+    for command in (stats, outliers, baseline, compare):
+        command.add_argument(
+            "--cache-dir",
+            default=DEFAULT_CACHE_DIR,
+            help="Keep columns parsed from CSV files here for the next analyses "
+            f"(default: {DEFAULT_CACHE_DIR}).",
+        )
+        command.add_argument(
+            "--cache-size",
+            type=int,
+            default=DEFAULT_CACHE_SIZE // 2**20,
+            help="Largest size of the cache in MiB; the least recently used "
+            f"files are evicted past it (default: {DEFAULT_CACHE_SIZE // 2**20}).",
+        )
+        command.add_argument(
+            "--no-cache", action="store_true", help="Parse CSV files every time."
+        )
+
+    quantiles = commands.add_parser(
+        "quantiles",
+        help="Query quantile summaries written by the SketchReporter.",
+    )
+    quantiles.add_argument(
+        "paths", nargs="+", help="Sketch files, merged into one summary."
+    )
+    quantiles.add_argument("--metric", help="Only show this metric.")
+    quantiles.add_argument(
+        "--grouping", help="Only show this grouping, e.g. 'switch' or 'node+interface'."
+    )
+    quantiles.add_argument(
+        "--quantile",
+        action="append",
+        type=float,
+        dest="quantiles",
+        help="Quantile to estimate, between 0 and 1. Can be repeated "
+        f"(default: {', '.join(map(str, DEFAULT_QUANTILES))}).",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "quantiles":
+        return _quantiles(parser, args)
+    if not os.path.exists(args.path):
+        parser.error(f"'{args.path}' not found.")
+    if args.command == "outliers":
+        return _outliers(parser, args)
+    if args.command == "baseline":
+        return _baseline(parser, args)
+    if args.command == "compare":
+        return _compare(parser, args)
+    try:
+        result = p2p_stats(
+            args.path,
+            args.group_by,
+            args.metrics or DEFAULT_METRICS,
+            cache=_cache(args),
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    color = not args.no_color and sys.stdout.isatty()
+    sys.stdout.write(format_p2p_stats(result, color=color, plots=not args.no_plots))
+
+
+def _cache(args: argparse.Namespace) -> Optional[ColumnCache]:
+    if args.no_cache:
+        return None
+    return ColumnCache(args.cache_dir, args.cache_size * 2**20)
+
+
+def _outliers(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    try:
+        report = outlier_report(
+            args.path,
+            client=args.client,
+            server=args.server,
+            metrics=args.metrics or OUTLIER_METRICS,
+            method=args.method,
+            threshold=args.threshold,
+            orders=args.orders,
+            min_count=args.min_count,
+            cache=_cache(args),
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    if args.csv_prefix:
+        for outlier_pass in report.passes:
+            path = f"{args.csv_prefix}-{outlier_pass.order}.csv"
+            with open(path, "w", newline="") as file:
+                report.write_csv(file, outlier_pass.order)
+    if args.output:
+        with open(args.output, "w") as file:
+            report.write_markdown(file)
+    else:
+        report.write_markdown(sys.stdout)
+
+
+def _baseline(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    try:
+        baseline = load_baseline(
+            args.path,
+            args.client,
+            args.server,
+            args.metrics or BASELINE_METRICS,
+            cache=_cache(args),
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    baseline.save(args.output)
+    print(
+        f"Saved statistics of {len(baseline.links)} links and "
+        f"{len(baseline.labels)} nodes to {args.output}."
+    )
+
+
+def _compare(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    if not os.path.exists(args.baseline):
+        parser.error(f"'{args.baseline}' not found.")
+    baseline = Baseline.load(args.baseline)
+    try:
+        run = load_baseline(
+            args.path, args.client, args.server, baseline.metrics, cache=_cache(args)
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    report = RegressionReport(
+        baseline,
+        run,
+        tolerance=args.tolerance,
+        alpha=args.alpha,
+        lower_better=args.lower_better,
+    )
+    levels = [args.level] if args.level else LEVELS
+    counts = ", ".join(
+        f"{report.count(level)} of {report.compared(level)} {level}s"
+        for level in levels
+    )
+    print(
+        f"Regressions against {baseline.source or args.baseline} "
+        f"({baseline.created}): {counts}."
+    )
+    rows = report.rows(args.level, args.limit)
+    if rows:
+        for row in rows:
+            row.update(
+                baseline=f"{row['baseline']:.6g}",
+                current=f"{row['current']:.6g}",
+                worse_by=f"{row['worse_by']:.1%}",
+                z=f"{row['z']:.1f}",
+                p=f"{row['p']:.2g}",
+            )
+        print(format_rows(rows))
+    if args.csv:
+        with open(args.csv, "w", newline="") as file:
+            report.write_csv(file, args.level)
+    if args.exit_code and report.count(args.level):
+        sys.exit(1)
+
+
+def _quantiles(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    quantiles = args.quantiles or DEFAULT_QUANTILES
+    if not all(0 <= q <= 1 for q in quantiles):
+        parser.error("Quantiles must be between 0 and 1.")
+    sketches = None
+    for path in args.paths:
+        if not os.path.exists(path):
+            parser.error(f"'{path}' not found.")
+        if sketches is None:
+            sketches = SketchSet.load(path)
+        else:
+            sketches.merge(SketchSet.load(path))
+    rows = sketches.query(args.metric, args.grouping, quantiles)
+    for row in rows:
+        for name, value in row.items():
+            if isinstance(value, float):
+                row[name] = f"{value:.6g}"
+    print(format_rows(rows))
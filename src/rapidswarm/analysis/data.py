@@ -0,0 +1,182 @@
+import csv
+import itertools
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rapidswarm.analysis.cache import ColumnCache
+from rapidswarm.columnar import ColumnStore
+
+# Lines of a CSV file parsed at a time, which bounds the memory used for
+# the raw text while keeping NumPy's parser busy.
+CSV_CHUNK_ROWS = 1_000_000
+
+
+class KeyColumn(NamedTuple):
+    """
+    A string column encoded as integer codes into its distinct labels, so
+    that grouping and sorting work on integers rather than strings.
+    """
+
+    codes: np.ndarray
+    labels: List[str]
+
+
+def encode_keys(values: Sequence, codes: Dict[str, int]) -> np.ndarray:
+    """Encodes strings as codes, adding unseen strings to `codes`."""
+    for value in dict.fromkeys(values):
+        if value not in codes:
+            codes[value] = len(codes)
+    return np.fromiter(
+        map(codes.__getitem__, values), dtype=np.int64, count=len(values)
+    )
+
+
+def ip_sort_key(label: str) -> Tuple:
+    """Sorts dotted IPv4 addresses numerically and other labels after them."""
+    parts = label.split(".")
+    if len(parts) == 4 and all(part.isdigit() for part in parts):
+        return (0, tuple(int(part) for part in parts), "")
+    return (1, (), label)
+
+
+def load_columns(
+    path: str,
+    keys: Sequence[str] = (),
+    values: Sequence[str] = (),
+    cache: Optional[ColumnCache] = None,
+) -> Tuple[Dict[str, KeyColumn], Dict[str, np.ndarray]]:
+    """
+    Loads columns of a results dataset into NumPy arrays.
+
+    Args:
+        path (str): A CSV file or a columnar result store directory.
+        keys (Sequence[str]): String columns to load as KeyColumns.
+        values (Sequence[str]): Numeric columns to load as float64 arrays,
+            with NaN for missing values.
+        cache (Optional[ColumnCache]): Keep columns parsed from CSV files
+            here and memory-map them from here when loaded again.
+
+    Returns:
+        Tuple[Dict[str, KeyColumn], Dict[str, np.ndarray]]: The key and value
+        columns by name.
+
+    Raises:
+        ValueError: If a column is missing from the dataset.
+    """
+    if os.path.isdir(path):
+        return _load_store(path, keys, values)
+    if cache is not None:
+        return _load_cached(path, keys, values, cache)
+    return _load_csv(path, keys, values)
+
+
+def _load_store(path: str, keys: Sequence[str], values: Sequence[str]):
+    store = ColumnStore(path)
+    missing = [name for name in (*keys, *values) if name not in store.columns]
+    if missing:
+        raise ValueError(f"Columns {missing} not in result store {path}.")
+    key_columns = {}
+    for name in keys:
+        # The store's codes index its shared string table, which also holds
+        # other columns' strings, so they are renumbered densely.
+        labels, codes = np.unique(store.column(name, decode=False), return_inverse=True)
+        table = store.strings + [""]
+        key_columns[name] = KeyColumn(codes, [table[label] for label in labels])
+    value_columns = {
+        name: store.column(name).astype(np.float64, copy=False) for name in values
+    }
+    return key_columns, value_columns
+
+
+def _load_cached(path: str, keys: Sequence[str], values: Sequence[str], cache):
+    names = [f"key/{name}/{part}" for name in keys for part in ("codes", "labels")]
+    names += [f"value/{name}" for name in values]
+    arrays = cache.get(path, names)
+    missing_keys = [name for name in keys if f"key/{name}/codes" not in arrays]
+    missing_values = [name for name in values if f"value/{name}" not in arrays]
+    if missing_keys or missing_values:
+        # Only the columns not cached yet are parsed, and added to the cache.
+        key_columns, value_columns = _load_csv(path, missing_keys, missing_values)
+        parsed = {}
+        for name, column in key_columns.items():
+            parsed[f"key/{name}/codes"] = column.codes
+            parsed[f"key/{name}/labels"] = np.array(column.labels, dtype=str)
+        for name, column in value_columns.items():
+            parsed[f"value/{name}"] = column
+        cache.put(path, parsed)
+        arrays.update(parsed)
+    key_columns = {
+        name: KeyColumn(
+            arrays[f"key/{name}/codes"], arrays[f"key/{name}/labels"].tolist()
+        )
+        for name in keys
+    }
+    value_columns = {name: arrays[f"value/{name}"] for name in values}
+    return key_columns, value_columns
+
+
+def _load_csv(path: str, keys: Sequence[str], values: Sequence[str]):
+    with open(path, newline="") as file:
+        header = next(csv.reader([file.readline()]), [])
+        missing = [name for name in (*keys, *values) if name not in header]
+        if missing:
+            raise ValueError(f"Columns {missing} not in {path}.")
+        usecols = [header.index(name) for name in (*keys, *values)]
+
+        codes = {name: {} for name in keys}
+        key_parts = {name: [] for name in keys}
+        value_parts = {name: [] for name in values}
+        while True:
+            lines = list(itertools.islice(file, CSV_CHUNK_ROWS))
+            if not lines:
+                break
+            chunk = _parse_chunk(lines, usecols, keys, values)
+            for name in keys:
+                key_parts[name].append(encode_keys(chunk[name].tolist(), codes[name]))
+            for name in values:
+                value_parts[name].append(chunk[name])
+
+    key_columns = {
+        name: KeyColumn(_concatenate(key_parts[name], np.int64), list(codes[name]))
+        for name in keys
+    }
+    value_columns = {
+        name: _concatenate(value_parts[name], np.float64) for name in values
+    }
+    return key_columns, value_columns
+
+
+def _parse_chunk(lines, usecols, keys, values) -> Dict[str, np.ndarray]:
+    fields = [(f"k{i}", object) for i in range(len(keys))]
+    fields += [(f"v{i}", np.float64) for i in range(len(values))]
+    try:
+        chunk = np.loadtxt(
+            lines,
+            delimiter=",",
+            quotechar='"',
+            usecols=usecols,
+            dtype=fields,
+            ndmin=1,
+        )
+    except ValueError:
+        # Empty fields, e.g. metrics of failed results, do not parse as
+        # floats, so this chunk's values are read as text first.
+        text = [(name, object if kind is object else "U32") for name, kind in fields]
+        chunk = np.loadtxt(
+            lines, delimiter=",", quotechar='"', usecols=usecols, dtype=text, ndmin=1
+        )
+        converted = np.empty(len(chunk), dtype=fields)
+        for name, kind in fields:
+            column = chunk[name]
+            if kind is not object:
+                column = np.where(column == "", "nan", column).astype(np.float64)
+            converted[name] = column
+        chunk = converted
+    names = [*keys, *values]
+    return {name: chunk[field] for name, (field, _) in zip(names, fields)}
+
+
+def _concatenate(parts: List[np.ndarray], dtype) -> np.ndarray:
+    return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
@@ -0,0 +1,368 @@
+import csv
+from enum import Enum
+from typing import Dict, List, NamedTuple, Optional, Sequence, TextIO
+
+import numpy as np
+
+from rapidswarm.analysis.cache import ColumnCache
+from rapidswarm.analysis.data import KeyColumn, ip_sort_key, load_columns
+from rapidswarm.analysis.groups import summarize
+
+DEFAULT_CLIENT = "client_ip"
+DEFAULT_SERVER = "server_ip"
+DEFAULT_METRICS = ("bw_average_mbps",)
+
+# Scales the median absolute deviation to match the standard deviation of
+# normally distributed data.
+MAD_SCALE = 1.4826
+
+
+class OutlierMethod(str, Enum):
+    ZSCORE = "zscore"
+    MAD = "mad"
+    IQR = "iqr"
+
+    def __str__(self):
+        return self.value
+
+
+# Thresholds in the customary units of each method: standard deviations
+# from the mean, scaled MADs from the median (the modified z-score), and
+# interquartile ranges beyond the quartiles (Tukey's fences).
+DEFAULT_THRESHOLDS = {
+    OutlierMethod.ZSCORE: 2.0,
+    OutlierMethod.MAD: 3.5,
+    OutlierMethod.IQR: 1.5,
+}
+
+
+class Fit(NamedTuple):
+    """
+    The normal range of a metric: values outside [low, high] are outliers.
+    Scores are (value - center) / scale.
+    """
+
+    center: float
+    scale: float
+    low: float
+    high: float
+
+    def scores(self, values: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (values - self.center) / self.scale
+
+    def outliers(self, values: np.ndarray) -> np.ndarray:
+        """Mask of values outside the range. NaNs are never outliers."""
+        return (values < self.low) | (values > self.high)
+
+
+def fit(
+    values: np.ndarray,
+    method: OutlierMethod = OutlierMethod.ZSCORE,
+    threshold: Optional[float] = None,
+    within: Optional[np.ndarray] = None,
+) -> Fit:
+    """
+    Fits the normal range of a metric.
+
+    Args:
+        values (np.ndarray): The metric's values.
+        method (OutlierMethod): How to measure the spread of the values.
+        threshold (Optional[float]): How far from the center, in units of
+            the spread, values are normal. Defaults to DEFAULT_THRESHOLDS.
+        within (Optional[np.ndarray]): Mask of the values to fit, e.g.
+            leaving out outliers found before. Defaults to all values.
+
+    Returns:
+        Fit: The normal range.
+    """
+    method = OutlierMethod(method)
+    threshold = DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+    statistics = {
+        OutlierMethod.ZSCORE: ("mean", "std"),
+        OutlierMethod.MAD: ("median",),
+        OutlierMethod.IQR: ("median", "q1", "q3"),
+    }[method]
+    selected = values if within is None else np.where(within, values, np.nan)
+    summary = {
+        name: float(value[0])
+        for name, value in summarize(None, selected, statistics=statistics).items()
+    }
+
+    if method == OutlierMethod.ZSCORE:
+        # The population standard deviation, as np.std computes it.
+        count = np.count_nonzero(~np.isnan(selected))
+        center = summary["mean"]
+        scale = summary["std"] * np.sqrt((count - 1) / count) if count > 1 else 0.0
+        return Fit(
+            center, scale, center - threshold * scale, center + threshold * scale
+        )
+    if method == OutlierMethod.MAD:
+        center = summary["median"]
+        deviations = np.abs(selected - center)
+        scale = MAD_SCALE * float(
+            summarize(None, deviations, statistics=["median"])["median"][0]
+        )
+        return Fit(
+            center, scale, center - threshold * scale, center + threshold * scale
+        )
+    q1, q3 = summary["q1"], summary["q3"]
+    scale = q3 - q1
+    return Fit(summary["median"], scale, q1 - threshold * scale, q3 + threshold * scale)
+
+
+class OutlierPass(NamedTuple):
+    """
+    The outliers found in one pass: first-order outliers in pass 1,
+    second-order outliers, found once those are left out, in pass 2, etc.
+    """
+
+    order: int
+    fits: Dict[str, Fit]
+    flagged: Dict[str, np.ndarray]
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Mask of the rows with an outlier in any metric."""
+        return np.logical_or.reduce(list(self.flagged.values()))
+
+
+def find_outliers(
+    values: Dict[str, np.ndarray],
+    method: OutlierMethod = OutlierMethod.ZSCORE,
+    threshold: Optional[float] = None,
+    orders: int = 2,
+) -> List[OutlierPass]:
+    """
+    Finds outliers of each metric, and then outliers among the remaining
+    values, up to `orders` times.
+
+    Every pass works on masks over the original arrays, so the data is never
+    copied and rows keep their index, and rows with equal values are
+    handled independently.
+
+    Args:
+        values (Dict[str, np.ndarray]): Columns of the metrics, all of the
+            same length.
+        method (OutlierMethod): How to measure the spread of each metric.
+        threshold (Optional[float]): See fit().
+        orders (int): Number of passes.
+
+    Returns:
+        List[OutlierPass]: One entry per pass.
+    """
+    remaining = {metric: ~np.isnan(column) for metric, column in values.items()}
+    passes = []
+    for order in range(1, orders + 1):
+        fits, flagged = {}, {}
+        for metric, column in values.items():
+            fits[metric] = fit(column, method, threshold, within=remaining[metric])
+            flagged[metric] = remaining[metric] & fits[metric].outliers(column)
+            remaining[metric] &= ~flagged[metric]
+        passes.append(OutlierPass(order, fits, flagged))
+    return passes
+
+
+def shared_codes(*keys: KeyColumn):
+    """
+    Re-encodes key columns, e.g. client and server addresses, against one
+    set of labels so the same address has the same code in every column.
+
+    Returns:
+        Tuple[List[np.ndarray], List[str]]: The codes of each column and
+        the shared labels.
+    """
+    labels: Dict[str, int] = {}
+    columns = []
+    for key in keys:
+        mapping = np.array(
+            [labels.setdefault(label, len(labels)) for label in key.labels],
+            dtype=np.int64,
+        )
+        columns.append(mapping[key.codes])
+    return columns, list(labels)
+
+
+def endpoint_counts(
+    clients: np.ndarray, servers: np.ndarray, rows: np.ndarray, size: int
+) -> np.ndarray:
+    """Counts how often each endpoint appears, as client or server, in rows."""
+    return np.bincount(clients[rows], minlength=size) + np.bincount(
+        servers[rows], minlength=size
+    )
+
+
+class OutlierReport:
+    """
+    Outliers of pairwise results and the endpoints involved in them.
+
+    Args:
+        clients (KeyColumn): Client of every row.
+        servers (KeyColumn): Server of every row.
+        values (Dict[str, np.ndarray]): Metrics of every row.
+        method (OutlierMethod): See find_outliers().
+        threshold (Optional[float]): See fit().
+        orders (int): Number of passes.
+        min_count (int): Endpoints appearing in more outlier rows than this
+            are reported as frequent.
+    """
+
+    def __init__(
+        self,
+        clients: KeyColumn,
+        servers: KeyColumn,
+        values: Dict[str, np.ndarray],
+        method: OutlierMethod = OutlierMethod.ZSCORE,
+        threshold: Optional[float] = None,
+        orders: int = 2,
+        min_count: int = 2,
+    ):
+        self.method = OutlierMethod(method)
+        self.threshold = (
+            DEFAULT_THRESHOLDS[self.method] if threshold is None else threshold
+        )
+        self.values = values
+        self.rows = len(next(iter(values.values())))
+        (self.clients, self.servers), self.labels = shared_codes(clients, servers)
+        self.passes = find_outliers(values, self.method, self.threshold, orders)
+        self.min_count = min_count
+
+    def counts(self, order: int) -> np.ndarray:
+        """How often each label appears in the outlier rows of a pass."""
+        rows = self.passes[order - 1].rows
+        return endpoint_counts(self.clients, self.servers, rows, len(self.labels))
+
+    def frequent(self, order: int) -> List[int]:
+        """
+        Codes of the labels in more than `min_count` outlier rows of a pass,
+        in address order.
+        """
+        codes = np.flatnonzero(self.counts(order) > self.min_count).tolist()
+        return sorted(codes, key=lambda code: ip_sort_key(self.labels[code]))
+
+    def table(self, order: int, indices: np.ndarray) -> List[List[str]]:
+        """The given rows with each metric's value and score in a pass, as text."""
+        fits = self.passes[order - 1].fits
+        labels = np.array(self.labels, dtype=object)
+        columns = [labels[self.clients[indices]], labels[self.servers[indices]]]
+        for metric, column in self.values.items():
+            values = column[indices]
+            columns.append([f"{value:.2f}" for value in values.tolist()])
+            scores = fits[metric].scores(values)
+            columns.append([f"{score:.2f}" for score in scores.tolist()])
+        return [list(row) for row in zip(*columns)]
+
+    def headers(self) -> List[str]:
+        headers = ["client", "server"]
+        for metric in self.values:
+            headers += [metric, f"{metric} score"]
+        return headers
+
+    def write_csv(self, file: TextIO, order: int):
+        writer = csv.writer(file)
+        writer.writerow(self.headers())
+        indices = np.flatnonzero(self.passes[order - 1].rows)
+        writer.writerows(self.table(order, indices))
+
+    def write_markdown(self, file: TextIO):
+        """Writes the report as Markdown."""
+        ordinals = {1: "First", 2: "Second", 3: "Third"}
+
+        def title(order):
+            return f"{ordinals.get(order, f'{order}th')}-Order"
+
+        def write_table(headers, rows):
+            file.write("| " + " | ".join(headers) + " |\n")
+            file.write("| " + " | ".join(["---"] * len(headers)) + " |\n")
+            for row in rows:
+                file.write("| " + " | ".join(row) + " |\n")
+            file.write("\n")
+
+        file.write("# Outlier Analysis Report\n\n")
+        file.write(
+            f"Method: {self.method}, threshold {self.threshold:g}. "
+            f"{self.rows} results.\n\n"
+        )
+        for outlier_pass in self.passes:
+            order = outlier_pass.order
+            file.write(f"## {title(order)} Outlier Report\n\n")
+            file.write(f"{np.count_nonzero(outlier_pass.rows)} outlier results.\n\n")
+            file.write(
+                f"### IPs Frequent in Outliers (More than {self.min_count} times "
+                "either as Client or Server)\n\n"
+            )
+            frequent = [self.labels[code] for code in self.frequent(order)]
+            file.write(f"{', '.join(frequent) or 'None'}\n\n")
+
+        last = self.passes[-1]
+        file.write(f"## {title(last.order)} Dataset Statistics\n\n")
+        file.write(
+            "Statistics of the values left once the outliers of the earlier "
+            "passes are removed.\n\n"
+        )
+        summaries = {}
+        for metric, column in self.values.items():
+            remaining = ~np.isnan(column)
+            for outlier_pass in self.passes[:-1]:
+                remaining &= ~outlier_pass.flagged[metric]
+            summaries[metric] = summarize(
+                None,
+                np.where(remaining, column, np.nan),
+                statistics=("mean", "median", "std"),
+            )
+        rows = []
+        for name, label in (
+            ("mean", "Mean"),
+            ("median", "Median"),
+            ("std", "Standard Deviation"),
+        ):
+            rows.append([label] + [f"{summaries[m][name][0]:.2f}" for m in self.values])
+        write_table(["Metric"] + list(self.values), rows)
+
+        file.write("## Detailed Outlier Data for Frequent IPs\n\n")
+        headers = self.headers()
+        for outlier_pass in self.passes:
+            order = outlier_pass.order
+            file.write(f"### {title(order)} Outliers\n\n")
+            # Outlier rows sorted by the address at either end, so each
+            # address's rows are one slice.
+            indices = np.flatnonzero(outlier_pass.rows)
+            ends = np.concatenate([self.clients[indices], self.servers[indices]])
+            order_by_end = np.argsort(ends, kind="stable")
+            ends = ends[order_by_end]
+            rows = np.concatenate([indices, indices])[order_by_end]
+            for code in self.frequent(order):
+                start, stop = np.searchsorted(ends, [code, code + 1])
+                # np.unique drops the repeat of rows with the same address at
+                # both ends and restores the row order.
+                involved = np.unique(rows[start:stop])
+                file.write(f"#### Outlier Data for IP {self.labels[code]}\n\n")
+                write_table(headers, self.table(order, involved))
+
+
+def outlier_report(
+    path: str,
+    client: str = DEFAULT_CLIENT,
+    server: str = DEFAULT_SERVER,
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    cache: Optional[ColumnCache] = None,
+    **options,
+) -> OutlierReport:
+    """
+    Loads pairwise results and finds their outliers.
+
+    Args:
+        path (str): A CSV file or columnar result store.
+        client (str): Column naming the client of each result.
+        server (str): Column naming the server of each result.
+        metrics (Sequence[str]): Numeric columns to check.
+        cache (Optional[ColumnCache]): See load_columns().
+        **options: Passed on to OutlierReport.
+
+    Returns:
+        OutlierReport: The outliers.
+    """
+    keys, values = load_columns(
+        path, keys=[client, server], values=metrics, cache=cache
+    )
+    return OutlierReport(keys[client], keys[server], values, **options)
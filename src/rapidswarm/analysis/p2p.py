@@ -0,0 +1,212 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from rapidswarm.analysis.cache import ColumnCache
+from rapidswarm.analysis.data import KeyColumn, ip_sort_key, load_columns
+from rapidswarm.analysis.groups import summarize
+
+DEFAULT_GROUP_BY = "client_ip"
+DEFAULT_METRICS = ("bw_average_mbps", "msg_rate_mpps")
+
+# Statistics of the whole dataset and of each group.
+OVERALL_STATISTICS = ("median", "iqr", "mean", "std", "p5", "p95")
+GROUP_STATISTICS = ("count", "min", "q1", "median", "q3", "max", "iqr")
+
+UNITS = {"bw_average_mbps": "Mbps", "bw_peak_mbps": "Mbps", "msg_rate_mpps": "Mpps"}
+LABELS = {
+    "median": "Median",
+    "iqr": "Interquartile Range",
+    "mean": "Mean",
+    "std": "Standard Deviation",
+    "p5": "5th Percentile",
+    "p95": "95th Percentile",
+}
+
+BOLD, CYAN, GREEN, RED, RESET = "\033[1m", "\033[96m", "\033[92m", "\033[91m", "\033[0m"
+PLOT_WIDTH = 100
+
+
+class P2PStats:
+    """
+    Statistics of pairwise results, e.g. bandwidth test runs between every
+    client and server, over the whole dataset and per group of results
+    sharing the `group_by` column.
+
+    Attributes:
+        overall (Dict[str, Dict[str, float]]): OVERALL_STATISTICS per metric.
+        groups (Dict[str, Dict[str, np.ndarray]]): GROUP_STATISTICS per
+            metric, with one entry per label.
+        labels (List[str]): The groups, sorted by IP address.
+    """
+
+    def __init__(
+        self,
+        group_by: str,
+        keys: KeyColumn,
+        values: Dict[str, np.ndarray],
+    ):
+        self.group_by = group_by
+        self.metrics = list(values)
+        order = sorted(
+            range(len(keys.labels)), key=lambda i: ip_sort_key(keys.labels[i])
+        )
+        # Renumber the groups so that code i is the i-th label in IP order.
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        codes = rank[keys.codes]
+        self.labels: List[str] = [keys.labels[i] for i in order]
+
+        self.overall: Dict[str, Dict[str, float]] = {}
+        self.groups: Dict[str, Dict[str, np.ndarray]] = {}
+        for metric, column in values.items():
+            overall = summarize(None, column, statistics=OVERALL_STATISTICS)
+            self.overall[metric] = {name: float(v[0]) for name, v in overall.items()}
+            self.groups[metric] = summarize(
+                codes, column, len(self.labels), statistics=GROUP_STATISTICS
+            )
+
+    def outlying(self, metric: str) -> np.ndarray:
+        """
+        Whether each group's median is further than the overall
+        interquartile range from the overall median.
+        """
+        overall = self.overall[metric]
+        distance = np.abs(self.groups[metric]["median"] - overall["median"])
+        return ~(distance <= overall["iqr"])
+
+
+def p2p_stats(
+    path: str,
+    group_by: str = DEFAULT_GROUP_BY,
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    cache: Optional[ColumnCache] = None,
+) -> P2PStats:
+    """
+    Loads a dataset and computes its P2PStats.
+
+    Args:
+        path (str): A CSV file or columnar result store.
+        group_by (str): Column to group results by.
+        metrics (Sequence[str]): Numeric columns to summarize.
+        cache (Optional[ColumnCache]): See load_columns().
+
+    Returns:
+        P2PStats: The statistics.
+    """
+    keys, values = load_columns(path, keys=[group_by], values=metrics, cache=cache)
+    return P2PStats(group_by, keys[group_by], values)
+
+
+def box_plots(
+    minimum: np.ndarray,
+    q1: np.ndarray,
+    median: np.ndarray,
+    q3: np.ndarray,
+    maximum: np.ndarray,
+    box_weight: float = 1.5,
+    width: int = PLOT_WIDTH,
+) -> List[str]:
+    """
+    Draws a text box-and-whiskers plot per group, each scaled to the group's
+    own range. Whiskers reach `box_weight` interquartile ranges beyond the
+    box and are drawn as `<` or `>` when values lie beyond them.
+    """
+    iqr = q3 - q1
+    low = np.maximum(minimum, q1 - box_weight * iqr)
+    high = np.minimum(maximum, q3 + box_weight * iqr)
+    span = maximum - minimum
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(span > 0, (width - 2) / span, 0.0)
+
+    def position(values):
+        offsets = np.nan_to_num((values - minimum) * scale).astype(np.int64) + 1
+        return offsets.tolist()
+
+    plots = []
+    for low_at, q1_at, median_at, q3_at, high_at, clipped_low, clipped_high in zip(
+        position(low),
+        position(q1),
+        position(median),
+        position(q3),
+        position(high),
+        (low > minimum).tolist(),
+        (high < maximum).tolist(),
+    ):
+        plot = ["-"] * width
+        plot[low_at] = "<" if clipped_low else "|"
+        plot[high_at] = ">" if clipped_high else "|"
+        plot[q1_at : q3_at + 1] = "=" * (q3_at - q1_at + 1)
+        plot[median_at] = "0"
+        plots.append("".join(plot))
+    return plots
+
+
+def format_p2p_stats(stats: P2PStats, color: bool = True, plots: bool = True) -> str:
+    """
+    Formats P2PStats as the text report printed by `rapidswarm analysis
+    p2p-stats`. Group medians outside the overall interquartile range are
+    shown in red when `color` is set.
+    """
+
+    def paint(text, code):
+        return f"{code}{text}{RESET}" if color else text
+
+    lines = [paint("Overall Statistics:", BOLD)]
+    for metric in stats.metrics:
+        unit = UNITS.get(metric, "")
+        for name in OVERALL_STATISTICS:
+            label = f"{LABELS[name]} of {metric}:"
+            value = paint(f"{stats.overall[metric][name]:.2f} {unit}".rstrip(), CYAN)
+            lines.append(f"{label:<40} {value}")
+    lines.append("---")
+
+    lines.append(paint(f"Statistics by {stats.group_by}:", BOLD))
+    header = f"{stats.group_by:<18}"
+    for metric in stats.metrics:
+        header += f" {'Median ' + metric:<25} {'IQR ' + metric:<25}"
+    lines.append(header)
+    columns = []
+    for metric in stats.metrics:
+        groups = stats.groups[metric]
+        outlying = stats.outlying(metric).tolist()
+        medians = groups["median"].tolist()
+        iqrs = groups["iqr"].tolist()
+        columns.append(
+            [
+                (f"{median:.2f}", f"{iqr:.2f}", RED if out else GREEN)
+                for median, iqr, out in zip(medians, iqrs, outlying)
+            ]
+        )
+    for index, label in enumerate(stats.labels):
+        line = f"{label:<18}"
+        for column in columns:
+            median, iqr, code = column[index]
+            # Pad before painting so escape codes do not upset the columns.
+            line += f" {paint(f'{median:<25}', code)} {paint(f'{iqr:<25}', code)}"
+        lines.append(line.rstrip())
+
+    if plots:
+        lines.append("---")
+        lines.append(paint("Box and Whiskers Plot:", BOLD))
+        header = f"{stats.group_by:<18}"
+        drawn = []
+        for metric in stats.metrics:
+            groups = stats.groups[metric]
+            header += f" {metric + ' plot':<{PLOT_WIDTH + 2}}"
+            drawn.append(
+                box_plots(
+                    groups["min"],
+                    groups["q1"],
+                    groups["median"],
+                    groups["q3"],
+                    groups["max"],
+                )
+            )
+        lines.append(header.rstrip())
+        for index, label in enumerate(stats.labels):
+            line = f"{label:<18}"
+            for plot in drawn:
+                line += f" {plot[index]:<{PLOT_WIDTH + 2}}"
+            lines.append(line.rstrip())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,610 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+import yaml
+from loguru import logger
+
+from rapidswarm import instrumentation, logs
+from rapidswarm.history import format_rows
+from rapidswarm.profiling import AllocationProfiler
+from rapidswarm.simulation import FabricTopology, SimulatedFabric
+from rapidswarm.synthetic import FakeExecutor, SyntheticCluster, ping_outputs
+
+DEFAULT_BENCHMARK_DIR = os.path.join(".rapidswarm", "benchmarks")
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+DEFAULT_MICRO_SIZE = 10000
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+
+# Memory is traced with tracemalloc, which slows a run down several times,
+# so only up to this many interfaces by default.
+DEFAULT_MEMORY_LIMIT = 10000
+
+# Managers are compared on a simulated fabric of this many nodes, the
+# ParallelManager with each of these numbers of workers.
+DEFAULT_FABRIC_NODES = 4096
+DEFAULT_FABRIC_WORKERS = (8, 32, 128)
+# Real seconds slept per modeled second, so that the workers of the
+# ParallelManager overlap in real time as they would on the fabric.
+FABRIC_TIME_SCALE = 0.01
+
+# Per-target log messages timed in each logging mode, and the rate limit
+# of the sampled mode.
+DEFAULT_LOG_TARGETS = 100000
+LOG_RATE = 100.0
+
+# Timings this short are too noisy to flag as regressions.
+MIN_SECONDS = 0.005
+
+
+def git_commit() -> str:
+    """The checked-out commit, with "-dirty" if the tree has changes."""
+    # The repository this package is in, wherever the benchmark is run from.
+    source = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short=12", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+            cwd=source,
+        ).strip()
+        dirty = subprocess.check_output(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+            cwd=source,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def pipeline_config(csv_file: str, directory: str) -> Dict:
+    """A run of the PingProbe over a CSV inventory, reported to a CSV file."""
+    return {
+        "scanners": [{"type": "CSVScanner", "config": {"csv_file": csv_file}}],
+        "managers": [
+            {
+                "type": "SequentialManager",
+                "config": {},
+                "probes": [{"type": "PingProbe", "config": {}}],
+            }
+        ],
+        "reporters": [
+            {
+                "type": "CSVReporter",
+                "config": {"output_file": os.path.join(directory, "results.csv")},
+            }
+        ],
+    }
+
+
+def run_pipeline(interfaces: int, directory: str, memory: bool = False) -> Dict:
+    """
+    Runs the whole RapidSwarm pipeline, from loading the configuration to
+    the last report, over a synthetic cluster answered by a FakeExecutor.
+
+    Args:
+        interfaces (int): Size of the cluster.
+        directory (str): Where to write the inventory, config and results.
+        memory (bool): Also trace the memory of each phase. This slows the
+            run down, so its times are not comparable with other runs.
+
+    Returns:
+        Dict: The run's time, the time of each span and, with `memory`, the
+        memory growth and peak of each phase.
+    """
+    # Imported here: rapidswarm.rapidswarm loads the plugins, which import
+    # this package.
+    from rapidswarm.rapidswarm import RapidSwarm
+
+    cluster = SyntheticCluster(interfaces)
+    csv_file = os.path.join(directory, "inventory.csv")
+    with open(csv_file, "w") as file:
+        file.write(cluster.csv())
+    config_file = os.path.join(directory, "config.yaml")
+    with open(config_file, "w") as file:
+        yaml.safe_dump(pipeline_config(csv_file, directory), file)
+
+    recorder = instrumentation.enable()
+    # Only totals are kept, so one frame per allocation is enough.
+    profiler = AllocationProfiler(os.path.join(directory, "alloc.txt"), frames=1)
+    if memory:
+        profiler.start()
+    try:
+        start = time.perf_counter()
+        with FakeExecutor() as executor:
+            rapidswarm = RapidSwarm(config_file)
+            rapidswarm.load_config()
+            rapidswarm.create_scanners()
+            rapidswarm.create_reporters()
+            results = rapidswarm.run_pipeline()
+        seconds = time.perf_counter() - start
+    finally:
+        if memory:
+            profiler.stop()
+        instrumentation.disable()
+
+    result = {
+        "name": f"pipeline/{interfaces}",
+        "interfaces": interfaces,
+        "nodes": len(cluster.nodes),
+        "switches": cluster.switch_count,
+        "pings": executor.calls,
+        "results": results,
+        "seconds": seconds,
+        "spans": {
+            f"{span['kind']}:{span['name']}": span["total_seconds"]
+            for span in recorder.summary()["spans"]
+        },
+    }
+    if memory:
+        result["peak_bytes"] = profiler.peak
+        result["memory"] = {
+            label: {"growth": section["growth"], "peak": section["peak"]}
+            for label, section in profiler.sections.items()
+        }
+    return result
+
+
+def measure(func: Callable[[], object], repeat: int = DEFAULT_REPEAT) -> float:
+    """The shortest of `repeat` timed calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def micro_benchmarks(
+    size: int = DEFAULT_MICRO_SIZE, repeat: int = DEFAULT_REPEAT
+) -> List[Dict]:
+    """
+    Times the parsers, model construction and reporters on `size`
+    interfaces' worth of input.
+
+    Returns:
+        List[Dict]: The name, best time and time per item of each.
+    """
+    from rapidswarm.models.node import Node
+    from rapidswarm.plugin_loader import load_plugins
+
+    plugins = load_plugins()
+    scanners, probes, reporters = (
+        plugins["scanners"],
+        plugins["probes"],
+        plugins["reporters"],
+    )
+    cluster = SyntheticCluster(size)
+    inventory = cluster.inventory()
+    csv_data = cluster.csv()
+    nmap_xml = cluster.nmap_xml()
+    arp_output = cluster.arp_scan()
+    node_data = [node.model_dump() for node in inventory]
+    outputs = ping_outputs(cluster, FakeExecutor(failure_rate=0.01))
+    # The arp-scan and nmap scanners check for their tools when validated.
+    arp_scanner = scanners["ARPScanner"].model_construct()
+    nmap_scanner = scanners["NmapScanner"].model_construct()
+    ping_probe = probes["PingProbe"](nodes=[])
+    results = ping_probe.parse_output(outputs)
+
+    cases = [
+        ("parse/csv", size, lambda: scanners["CSVScanner"](csv_data=csv_data).scan()),
+        ("parse/arp-scan", size, lambda: arp_scanner.parse_arp_output(arp_output)),
+        ("parse/nmap-xml", size, lambda: nmap_scanner.parse_nmap_output(nmap_xml)),
+        ("parse/ping", size, lambda: ping_probe.parse_output(outputs)),
+        (
+            "model/node",
+            len(node_data),
+            lambda: [Node.model_validate(data) for data in node_data],
+        ),
+        (
+            "model/node-dump",
+            len(inventory),
+            lambda: [n.model_dump() for n in inventory],
+        ),
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Reporter, the option naming its output, an extension and options.
+        reporter_options = [
+            ("CSVReporter", "output_file", ".csv", {}),
+            ("JSONLinesReporter", "output_file", ".jsonl", {}),
+            ("ColumnarReporter", "output_directory", ".cols", {}),
+            ("SketchReporter", "output_file", ".sketch.npz", {"merge_existing": False}),
+            ("SQLiteReporter", "database", ".sqlite", {}),
+        ]
+        for name, output, extension, options in reporter_options:
+
+            def report(
+                reporter_class=reporters[name],
+                output=output,
+                extension=extension,
+                options=options,
+            ):
+                # A new output every time, so no run moves aside the last.
+                path = os.path.join(
+                    directory, f"{len(os.listdir(directory))}{extension}"
+                )
+                reporter = reporter_class(**{output: path}, **options)
+                reporter.add_nodes(inventory)
+                for start in range(0, len(results), 1000):
+                    reporter.write(results[start : start + 1000])
+                reporter.close()
+
+            cases.append((f"report/{name}", len(results), report))
+
+        rows = []
+        for name, items, func in cases:
+            seconds = measure(func, repeat)
+            rows.append(
+                {
+                    "name": name,
+                    "items": items,
+                    "seconds": seconds,
+                    "us_per_item": 1e6 * seconds / items,
+                }
+            )
+            logger.info(f"{name}: {seconds:.4f}s")
+    return rows
+
+
+def fabric_benchmarks(
+    nodes: int = DEFAULT_FABRIC_NODES,
+    workers: Sequence[int] = DEFAULT_FABRIC_WORKERS,
+) -> List[Dict]:
+    """
+    Pings every node of a simulated fabric with the SequentialManager and
+    with the ParallelManager at each number of workers.
+
+    Returns:
+        List[Dict]: For each manager, how long the round would have taken
+        on the fabric, how long it took to simulate and how many of the
+        pings were answered.
+    """
+    from rapidswarm.plugin_loader import load_plugins
+
+    plugins = load_plugins()
+    managers, probes = plugins["managers"], plugins["probes"]
+    fabric = SimulatedFabric(FabricTopology(nodes=nodes), time_scale=FABRIC_TIME_SCALE)
+    inventory = fabric.inventory()
+    runs = [("SequentialManager", 1, {})] + [
+        ("ParallelManager", count, {"max_concurrent_tests": count}) for count in workers
+    ]
+
+    rows = []
+    for name, count, options in runs:
+        manager = managers[name](
+            name=name, probes=[probes["PingProbe"](nodes=inventory)], **options
+        )
+        fabric.reset()
+        start = time.perf_counter()
+        with fabric:
+            results = manager.run()
+        seconds = time.perf_counter() - start
+        label = name if not options else f"{name}-{count}"
+        rows.append(
+            {
+                "name": f"fabric/{label}",
+                "nodes": nodes,
+                "workers": count,
+                "modeled_seconds": fabric.elapsed(),
+                "seconds": seconds,
+                "answered": sum(1 for result in results if result.success),
+            }
+        )
+        logger.info(f"fabric/{label}: {fabric.elapsed():.3f}s modeled")
+    return rows
+
+
+def log_benchmarks(
+    targets: int = DEFAULT_LOG_TARGETS, repeat: int = DEFAULT_REPEAT
+) -> List[Dict]:
+    """
+    Times one per-target DEBUG message per target, as the PingProbe logs
+    for each ping, with no DEBUG sink, written as text, as JSON and as
+    JSON rate limited to LOG_RATE messages per second. The sinks write to
+    os.devnull and are added next to the current ones, which should not
+    take DEBUG messages themselves.
+
+    Only the time spent in the logging calls is counted, not the time
+    the JSON sink's thread takes to write the messages.
+
+    Returns:
+        List[Dict]: The name, best time and time per message of each.
+    """
+    output = FakeExecutor().ping("10.0.0.1")
+
+    def emit():
+        for index in range(targets):
+            logger.debug(
+                "Ping of {target} ({interface}) succeeded",
+                target=f"node{index:05d}",
+                interface="02:00:00:00:00:01",
+                output=output,
+            )
+
+    modes = [
+        ("log/off", None, None),
+        ("log/text", logs.TEXT, None),
+        ("log/json", logs.JSON, None),
+        ("log/json-sampled", logs.JSON, LOG_RATE),
+    ]
+    rows = []
+    with open(os.devnull, "w") as devnull:
+        for name, log_format, rate in modes:
+            handler = None
+            if log_format is not None:
+                handler, _ = logs.add_sink(devnull, "DEBUG", log_format, rate)
+            best = float("inf")
+            try:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    emit()
+                    best = min(best, time.perf_counter() - start)
+                    logs.finish()
+            finally:
+                if handler is not None:
+                    logger.remove(handler)
+            rows.append(
+                {
+                    "name": name,
+                    "items": targets,
+                    "seconds": best,
+                    "us_per_item": 1e6 * best / targets,
+                }
+            )
+            logger.info(f"{name}: {best:.4f}s")
+    return rows
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    micro_size: Optional[int] = DEFAULT_MICRO_SIZE,
+    repeat: int = DEFAULT_REPEAT,
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    fabric_nodes: Optional[int] = DEFAULT_FABRIC_NODES,
+    log_targets: Optional[int] = DEFAULT_LOG_TARGETS,
+) -> Dict:
+    """
+    Runs the pipeline at each size, tracing memory in a second run up to
+    `memory_limit` interfaces, then the micro-benchmarks unless
+    `micro_size` is None, the logging modes unless `log_targets` is 0 or
+    None and the managers on a simulated fabric unless `fabric_nodes` is
+    0 or None.
+    """
+    pipelines = []
+    for interfaces in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            result = run_pipeline(interfaces, directory)
+        if interfaces <= memory_limit:
+            with tempfile.TemporaryDirectory() as directory:
+                traced = run_pipeline(interfaces, directory, memory=True)
+            result["peak_bytes"] = traced["peak_bytes"]
+            result["memory"] = traced["memory"]
+        logger.info(f"pipeline/{interfaces}: {result['seconds']:.3f}s")
+        pipelines.append(result)
+    return {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="milliseconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pipelines": pipelines,
+        "micro": (
+            micro_benchmarks(micro_size, repeat) if micro_size is not None else []
+        )
+        + (log_benchmarks(log_targets, repeat) if log_targets else []),
+        "fabric": fabric_benchmarks(fabric_nodes) if fabric_nodes else [],
+    }
+
+
+def save_results(results: Dict, directory: str = DEFAULT_BENCHMARK_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    created = results["created"].replace(":", "").replace("-", "")
+    path = os.path.join(directory, f"{created}-{results['commit']}.json")
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+    return path
+
+
+def stored_results(directory: str = DEFAULT_BENCHMARK_DIR) -> List[str]:
+    """The stored result files, oldest first."""
+    return sorted(glob.glob(os.path.join(directory, "*.json")))
+
+
+def load_results(path: str) -> Dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def _measurements(results: Dict) -> Dict[str, float]:
+    values = {}
+    for pipeline in results["pipelines"]:
+        values[f"{pipeline['name']} seconds"] = pipeline["seconds"]
+        for span, seconds in pipeline["spans"].items():
+            if span.startswith(instrumentation.PHASE):
+                values[f"{pipeline['name']} {span}"] = seconds
+        if "peak_bytes" in pipeline:
+            values[f"{pipeline['name']} peak_bytes"] = pipeline["peak_bytes"]
+    for micro in results["micro"]:
+        values[f"{micro['name']} seconds"] = micro["seconds"]
+    for run in results.get("fabric", []):
+        values[f"{run['name']} seconds"] = run["seconds"]
+        values[f"{run['name']} modeled_seconds"] = run["modeled_seconds"]
+    return values
+
+
+def compare_results(
+    baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD
+) -> List[Dict]:
+    """
+    Compares the measurements two benchmark runs have in common.
+
+    A measurement regressed when it grew by more than `threshold`, as a
+    fraction of the baseline. Timings under MIN_SECONDS in both runs are
+    never flagged.
+    """
+    before, after = _measurements(baseline), _measurements(current)
+    rows = []
+    for name, value in after.items():
+        if name not in before:
+            continue
+        base = before[name]
+        change = (value - base) / base if base else 0.0
+        is_time = not name.endswith("peak_bytes")
+        noisy = is_time and max(base, value) < MIN_SECONDS
+        rows.append(
+            {
+                "measurement": name,
+                "baseline": f"{base:.4f}" if is_time else f"{base:.0f}",
+                "current": f"{value:.4f}" if is_time else f"{value:.0f}",
+                "change": f"{change:+.1%}",
+                "regressed": "yes" if change > threshold and not noisy else "",
+            }
+        )
+    return rows
+
+
+def _sizes(text: str) -> List[int]:
+    return [int(size) for size in text.split(",") if size]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="rapidswarm benchmark",
+        description="Time the pipeline and its parts on synthetic clusters and "
+        "compare with earlier runs.",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=_sizes,
+        default=list(DEFAULT_SIZES),
+        help="Comma-separated numbers of interfaces to run the pipeline over.",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        default=DEFAULT_MEMORY_LIMIT,
+        help="Largest size whose memory is traced, in a second, slower run.",
+    )
+    parser.add_argument(
+        "--micro-size",
+        type=int,
+        default=DEFAULT_MICRO_SIZE,
+        help="Interfaces' worth of input for the micro-benchmarks.",
+    )
+    parser.add_argument("--no-micro", action="store_true", help="Skip them.")
+    parser.add_argument(
+        "--log-targets",
+        type=int,
+        default=DEFAULT_LOG_TARGETS,
+        help="Per-target log messages timed in each logging mode, 0 to skip.",
+    )
+    parser.add_argument(
+        "--fabric-nodes",
+        type=int,
+        default=DEFAULT_FABRIC_NODES,
+        help="Nodes of the simulated fabric the managers are compared on, "
+        "0 to skip.",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--output-dir",
+        default=DEFAULT_BENCHMARK_DIR,
+        help="Directory the results are stored in, one JSON file per run.",
+    )
+    parser.add_argument(
+        "--baseline",
+        help="Results to compare with. Defaults to the previous stored run.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Growth, as a fraction, that counts as a regression.",
+    )
+    parser.add_argument(
+        "--exit-code",
+        action="store_true",
+        help="Exit with status 1 when anything regressed.",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logs.configure(level="INFO" if args.verbose else "WARNING")
+
+    previous = stored_results(args.output_dir)
+    results = run_benchmarks(
+        sizes=args.sizes,
+        micro_size=None if args.no_micro else args.micro_size,
+        repeat=args.repeat,
+        memory_limit=args.memory_limit,
+        fabric_nodes=args.fabric_nodes,
+        log_targets=args.log_targets,
+    )
+    path = save_results(results, args.output_dir)
+
+    print(
+        format_rows(
+            [
+                {
+                    "benchmark": pipeline["name"],
+                    "seconds": f"{pipeline['seconds']:.3f}",
+                    "us_per_interface": f"{1e6 * pipeline['seconds'] / pipeline['interfaces']:.1f}",
+                    "peak_MiB": (
+                        f"{pipeline['peak_bytes'] / 2**20:.1f}"
+                        if "peak_bytes" in pipeline
+                        else ""
+                    ),
+                }
+                for pipeline in results["pipelines"]
+            ]
+            + [
+                {
+                    "benchmark": micro["name"],
+                    "seconds": f"{micro['seconds']:.4f}",
+                    "us_per_interface": f"{micro['us_per_item']:.1f}",
+                    "peak_MiB": "",
+                }
+                for micro in results["micro"]
+            ]
+        )
+    )
+    if results["fabric"]:
+        sequential = results["fabric"][0]["modeled_seconds"]
+        print()
+        print(
+            format_rows(
+                [
+                    {
+                        "manager": run["name"],
+                        "nodes": run["nodes"],
+                        "modeled_seconds": f"{run['modeled_seconds']:.3f}",
+                        "speedup": f"{sequential / run['modeled_seconds']:.1f}x",
+                        "seconds": f"{run['seconds']:.3f}",
+                    }
+                    for run in results["fabric"]
+                ]
+            )
+        )
+    print(f"\nSaved to {path}")
+
+    baseline = args.baseline or (previous[-1] if previous else None)
+    if baseline is None:
+        return
+    rows = compare_results(load_results(baseline), results, args.threshold)
+    regressed = [row for row in rows if row["regressed"]]
+    print(f"\nCompared with {baseline}: {len(regressed)} of {len(rows)} regressed.")
+    print(format_rows(regressed or rows))
+    if args.exit_code and regressed:
+        sys.exit(1)
@@ -0,0 +1,422 @@
+import heapq
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from rapidswarm.analysis.outliers import OutlierMethod, fit
+from rapidswarm.history import ResultHistory
+from rapidswarm.models.node import Node
+
+DEFAULT_STALENESS_HORIZON = 7 * 86400.0
+
+
+class PriorityWeights(BaseModel):
+    """
+    Weights of the parts of a probe unit's priority. Every part is between
+    0 and 1, so the weights say how much each matters against the others.
+    """
+
+    staleness: float = Field(
+        1.0,
+        ge=0,
+        description="Time since the unit's nodes were last tested, as a share of "
+        "the staleness horizon. Nodes never tested count as fully stale.",
+    )
+    failure: float = Field(
+        2.0, ge=0, description="Whether a node of the unit failed in the last run."
+    )
+    outlier: float = Field(
+        1.5,
+        ge=0,
+        description="Whether a node of the unit was an outlier in the last run.",
+    )
+    coverage: float = Field(
+        1.0,
+        ge=0,
+        description="Share of the units of the unit's switch not yet started in "
+        "the round.",
+    )
+    suspect: float = Field(
+        1.0,
+        ge=0,
+        description="Share of the finished units of the unit's switch that failed "
+        "in the round.",
+    )
+
+
+class NodePriors:
+    """
+    What the result history knew about each node before a round: when it
+    was last tested, and whether it failed or was an outlier in the last
+    finished run. Nodes are looked up by id, then by hostname.
+
+    Args:
+        last_tested (Optional[Dict[str, float]]): Epoch seconds of the
+            latest result of each node.
+        failed (Optional[Set[str]]): Nodes that failed in the last run.
+        outliers (Optional[Set[str]]): Nodes that were outliers in it.
+        horizon (float): Seconds after which a node counts as fully stale.
+        now (Optional[float]): Epoch seconds to measure staleness at,
+            defaults to the current time.
+    """
+
+    def __init__(
+        self,
+        last_tested: Optional[Dict[str, float]] = None,
+        failed: Optional[Set[str]] = None,
+        outliers: Optional[Set[str]] = None,
+        horizon: float = DEFAULT_STALENESS_HORIZON,
+        now: Optional[float] = None,
+    ):
+        self.last_tested = last_tested or {}
+        self.failed = failed or set()
+        self.outliers = outliers or set()
+        self.horizon = horizon
+        self.now = time.time() if now is None else now
+
+    @classmethod
+    def from_history(
+        cls,
+        path: str,
+        metric: Optional[str] = None,
+        threshold: Optional[float] = None,
+        horizon: float = DEFAULT_STALENESS_HORIZON,
+    ) -> "NodePriors":
+        """
+        Reads the priors from a result database of the SQLiteReporter.
+
+        Args:
+            path (str): The database. Without one, every node is fully
+                stale and none failed.
+            metric (Optional[str]): Result field whose per-node mean in the
+                last run is checked for outliers, e.g. 'bw_average_mbps'.
+                No node is an outlier when not given.
+            threshold (Optional[float]): Scaled MADs from the median beyond
+                which a node is an outlier, 3.5 by default.
+            horizon (float): Seconds after which a node counts as fully
+                stale.
+
+        Returns:
+            NodePriors: The priors.
+        """
+        if not os.path.exists(path):
+            logger.warning(f"No result history at {path}, so every node is stale.")
+            return cls(horizon=horizon)
+        history = ResultHistory(path)
+        try:
+            last_tested = history.last_tested()
+            failed = set(history.failures())
+            means = history.node_means(metric) if metric else {}
+        finally:
+            history.close()
+
+        outliers = set()
+        if means:
+            names = list(means)
+            values = np.array([means[name] for name in names], dtype=float)
+            normal = fit(values, OutlierMethod.MAD, threshold)
+            # Without any spread every value differing from the median would
+            # be an outlier.
+            if normal.scale > 0:
+                outliers = {
+                    name
+                    for name, outlier in zip(names, normal.outliers(values))
+                    if outlier
+                }
+        return cls(last_tested, failed, outliers, horizon)
+
+    def staleness(self, node: Node) -> float:
+        last = _lookup(self.last_tested, node)
+        if last is None:
+            return 1.0
+        return min(max(self.now - last, 0.0) / self.horizon, 1.0)
+
+    def score(self, nodes: List[Node], weights: PriorityWeights) -> float:
+        """The part of the priority of a unit on the nodes known before a round."""
+        if not nodes:
+            return weights.staleness
+        staleness = max(self.staleness(node) for node in nodes)
+        failed = any(_lookup(self.failed, node) for node in nodes)
+        outlier = any(_lookup(self.outliers, node) for node in nodes)
+        return (
+            weights.staleness * staleness
+            + weights.failure * failed
+            + weights.outlier * outlier
+        )
+
+
+def _lookup(known, node: Node):
+    for name in (node.id, node.hostname):
+        if name is None:
+            continue
+        if isinstance(known, dict):
+            if name in known:
+                return known[name]
+        elif name in known:
+            return True
+    return None
+
+
+class BudgetCoverage(BaseModel):
+    """What a time-budgeted round covered."""
+
+    budget_seconds: float
+    elapsed_seconds: float
+    units: int
+    completed: int
+    failed: int
+    deferred: int
+    switches: int
+    switches_covered: int
+    nodes: int
+    nodes_covered: int
+
+    @property
+    def fraction(self) -> float:
+        return self.completed / self.units if self.units else 1.0
+
+
+class _SwitchQueue:
+    """
+    The units of a round grouped by the switches of their nodes, each group
+    ordered by the units' scores from the priors. The next unit is the top
+    one of the group whose top score plus its round score is highest. A
+    group's round score changes as its units start and finish, so groups
+    are kept in a heap with lazy deletion: a group is pushed again with a
+    new version whenever its score changes, and outdated entries are
+    skipped when they come up.
+    """
+
+    def __init__(self, units: List, scores: List[float], weights: PriorityWeights):
+        self.weights = weights
+        self._groups: Dict[Tuple[str, ...], List] = defaultdict(list)
+        for order, (unit, score) in enumerate(zip(units, scores)):
+            heapq.heappush(self._groups[_switches(unit)], (-score, order, unit))
+        self._order = {group: order for order, group in enumerate(self._groups)}
+        self._total = {group: len(queue) for group, queue in self._groups.items()}
+        self._started: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self._finished: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self._failed: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self._versions: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self._heap = []
+        for group in self._groups:
+            self._push(group)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def _score(self, group) -> float:
+        started = self._started[group]
+        finished = self._finished[group]
+        score = -self._groups[group][0][0]
+        score += self.weights.coverage * (1 - started / self._total[group])
+        if finished:
+            score += self.weights.suspect * self._failed[group] / finished
+        return score
+
+    def _push(self, group):
+        self._versions[group] += 1
+        if self._groups[group]:
+            heapq.heappush(
+                self._heap,
+                (
+                    -self._score(group),
+                    self._order[group],
+                    self._versions[group],
+                    group,
+                ),
+            )
+
+    def _top(self):
+        while self._heap:
+            _, _, version, group = self._heap[0]
+            if version == self._versions[group]:
+                return group
+            heapq.heappop(self._heap)
+        return None
+
+    def peek(self):
+        group = self._top()
+        return None if group is None else self._groups[group][0][2]
+
+    def pop(self):
+        group = self._top()
+        heapq.heappop(self._heap)
+        _, _, unit = heapq.heappop(self._groups[group])
+        self._started[group] += 1
+        self._push(group)
+        return unit
+
+    def finish(self, unit, failed: bool):
+        group = _switches(unit)
+        self._finished[group] += 1
+        self._failed[group] += failed
+        self._push(group)
+
+    def drain(self) -> List:
+        """Removes the units never started, in the order they were given."""
+        left = [entry for queue in self._groups.values() for entry in queue]
+        for queue in self._groups.values():
+            queue.clear()
+        self._heap.clear()
+        return [unit for _, _, unit in sorted(left, key=lambda entry: entry[1])]
+
+    def covered_switches(self) -> Tuple[int, int]:
+        switches = {switch for group in self._groups for switch in group}
+        covered = {
+            switch
+            for group, finished in self._finished.items()
+            if finished
+            for switch in group
+        }
+        return len(covered), len(switches)
+
+
+def _switches(unit) -> Tuple[str, ...]:
+    return tuple(
+        sorted({node.network_switch.id for node in unit.nodes if node.network_switch})
+    )
+
+
+class BudgetScheduler:
+    """
+    Runs the units of a round in order of priority until a time budget runs
+    out, as a drop-in for the RoundScheduler.
+
+    A unit's priority adds up, with the given weights, what the result
+    history knew before the round (how stale its nodes are, and whether they
+    failed or were outliers in the last run) and what the round has found so
+    far on its switch: how much of the switch is still untested, and how
+    many of the switch's units failed. Units are picked one at a time, so
+    every result re-prioritizes the rest, spreading the round over the
+    topology and returning to switches that show failures.
+
+    A unit is not started when it is not expected to finish before the
+    budget runs out, judging by the units of its probe finished so far.
+    Running units are waited for, then the units never started are yielded
+    with the results of `defer`, so that they are reported. Failed units
+    are not retried and start offsets are not jittered, as both would spend
+    the budget on fewer targets.
+
+    Args:
+        budget (float): Seconds the round may take.
+        load_priors (Callable[[], NodePriors]): Reads the priors when the
+            round starts.
+        defer (Callable[[object], List]): Results of a unit not run.
+        weights (Optional[PriorityWeights]): Weights of the priorities.
+        max_workers (int): Units run at the same time.
+        name (str): Name of the manager in the coverage log.
+        report (Optional[Callable[[BudgetCoverage], None]]): Called with
+            the coverage of the round when it ends.
+        clock (Callable[[], float]): Monotonic time in seconds.
+    """
+
+    def __init__(
+        self,
+        budget: float,
+        load_priors: Callable[[], NodePriors],
+        defer: Callable[[object], List],
+        weights: Optional[PriorityWeights] = None,
+        max_workers: int = 1,
+        name: str = "",
+        report: Optional[Callable[[BudgetCoverage], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.budget = budget
+        self.load_priors = load_priors
+        self.defer = defer
+        self.weights = weights or PriorityWeights()
+        self.max_workers = max_workers
+        self.name = name
+        self.report = report
+        self.clock = clock
+        self.coverage: Optional[BudgetCoverage] = None
+
+    def run(
+        self,
+        units: Iterable,
+        execute: Callable[[object], Tuple[List, bool]],
+        started: Optional[float] = None,
+    ) -> Iterator[Tuple[object, List]]:
+        start = self.clock() if started is None else started
+        deadline = start + self.budget
+        units = list(units)
+        priors = self.load_priors()
+        queue = _SwitchQueue(
+            units,
+            [priors.score(unit.nodes, self.weights) for unit in units],
+            self.weights,
+        )
+        # Seconds taken by the finished units of each probe, and their count.
+        durations: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        completed = failed_count = 0
+        covered_nodes = set()
+
+        def timed(unit):
+            started = self.clock()
+            return execute(unit), self.clock() - started
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            exhausted = False
+            while True:
+                while queue and not exhausted and len(running) < self.max_workers:
+                    total, count = durations[type(queue.peek()).__name__]
+                    expected = total / count if count else 0.0
+                    if self.clock() + expected > deadline:
+                        exhausted = True
+                        break
+                    unit = queue.pop()
+                    running[pool.submit(timed, unit)] = unit
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    unit = running.pop(future)
+                    (results, failed), seconds = future.result()
+                    spent = durations[type(unit).__name__]
+                    spent[0] += seconds
+                    spent[1] += 1
+                    queue.finish(unit, failed)
+                    completed += 1
+                    failed_count += failed
+                    covered_nodes.update(
+                        node.id or node.hostname for node in unit.nodes
+                    )
+                    yield unit, results
+
+        deferred = queue.drain()
+        switches_covered, switches = queue.covered_switches()
+        self.coverage = BudgetCoverage(
+            budget_seconds=self.budget,
+            elapsed_seconds=self.clock() - start,
+            units=len(units),
+            completed=completed,
+            failed=failed_count,
+            deferred=len(deferred),
+            switches=switches,
+            switches_covered=switches_covered,
+            nodes=len(
+                {node.id or node.hostname for unit in units for node in unit.nodes}
+            ),
+            nodes_covered=len(covered_nodes),
+        )
+        coverage = self.coverage
+        logger.info(
+            f"{self.name}: ran {coverage.completed}/{coverage.units} units "
+            f"({coverage.fraction:.0%}) in {coverage.elapsed_seconds:.1f}s of a "
+            f"{coverage.budget_seconds:.1f}s budget, covering "
+            f"{coverage.switches_covered}/{coverage.switches} switches and "
+            f"{coverage.nodes_covered}/{coverage.nodes} nodes; "
+            f"{coverage.failed} failed, {coverage.deferred} deferred"
+        )
+        if self.report is not None:
+            self.report(coverage)
+        for unit in deferred:
+            yield unit, self.defer(unit)
@@ -0,0 +1,206 @@
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from loguru import logger
+from pydantic import BaseModel, create_model
+
+from rapidswarm.models.node import Node
+
+JOURNAL_VERSION = 1
+DEFAULT_CHECKPOINT_DIR = os.path.join(".rapidswarm", "checkpoints")
+
+
+def compute_plan_id(config: BaseModel, nodes: List[Node]) -> str:
+    """
+    Returns a deterministic identifier for a run's execution plan.
+
+    The identifier only depends on the configuration and the identity of
+    the scanned nodes and interfaces, not on their current state, so
+    re-running the same campaign against the same inventory yields the same
+    id and finds its checkpoint journal again.
+    """
+    digest = hashlib.sha256()
+    digest.update(config.model_dump_json().encode())
+    for node in nodes:
+        digest.update(f"{node.id}|{node.hostname}".encode())
+        for interface in node.network_interfaces:
+            digest.update(f"|{interface.mac_address}|{interface.ip_address}".encode())
+    return digest.hexdigest()[:16]
+
+
+def dump_result(result: Any) -> Dict:
+    """Serializes a probe result together with the model it came from."""
+    if isinstance(result, BaseModel):
+        model_class = type(result)
+        return {
+            "model": f"{model_class.__module__}:{model_class.__qualname__}",
+            "data": result.model_dump(mode="json"),
+        }
+    return {"model": None, "data": result}
+
+
+def load_result(record: Dict) -> Any:
+    """
+    Rebuilds a probe result written by dump_result.
+
+    If the original model can no longer be imported, an equivalent model
+    with the same field names is created so reporters still see the same
+    columns.
+    """
+    if record.get("model") is None:
+        return record["data"]
+    module_name, _, qualname = record["model"].partition(":")
+    try:
+        model_class = importlib.import_module(module_name)
+        for part in qualname.split("."):
+            model_class = getattr(model_class, part)
+        return model_class.model_validate(record["data"])
+    except (ImportError, AttributeError, ValueError):
+        fields = {name: (Any, None) for name in record["data"]}
+        model_class = create_model(qualname.rsplit(".", 1)[-1], **fields)
+        return model_class(**record["data"])
+
+
+class CheckpointJournal:
+    """
+    Append-only journal of completed probe units.
+
+    Every unit that completed without failures is appended as one JSON line holding its key and
+    results. Writes go through a buffered file and are fsync'ed in batches,
+    after `fsync_every` records or `fsync_interval` seconds, whichever comes
+    first, so journaling stays cheap even for very many small units.
+
+    The first line records the plan id. Resuming checks it against the
+    current plan and refuses to mix results from a different campaign.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        plan_id: str,
+        resume: bool = False,
+        fsync_every: int = 100,
+        fsync_interval: float = 1.0,
+    ):
+        self.path = path
+        self.plan_id = plan_id
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.completed: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        if resume and os.path.exists(path):
+            end = self._load()
+            self._file = open(path, "a")
+            # Drops a partial last line, which the next entry would be
+            # appended to and lost with.
+            self._file.truncate(end)
+            logger.info(
+                f"Resuming plan {plan_id}: {len(self.completed)} units already completed"
+            )
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "w")
+            header = {
+                "version": JOURNAL_VERSION,
+                "plan_id": plan_id,
+                "created": datetime.now().isoformat(),
+            }
+            self._file.write(json.dumps(header) + "\n")
+            self._sync()
+
+    def _load(self) -> int:
+        """
+        Reads the completed units of the journal.
+
+        Returns:
+            int: The length of the journal up to its last complete line.
+
+        Raises:
+            ValueError: If the journal belongs to another plan or holds an
+                entry that is not a completed unit.
+        """
+        with open(self.path, "rb") as file:
+            line = file.readline()
+            try:
+                header = json.loads(line or "{}")
+            except json.JSONDecodeError as e:
+                raise ValueError(
+                    f"Checkpoint '{self.path}' has an invalid header: {e}"
+                ) from e
+            if header.get("plan_id") != self.plan_id:
+                raise ValueError(
+                    f"Checkpoint '{self.path}' belongs to plan {header.get('plan_id')}, "
+                    f"not {self.plan_id}."
+                )
+            end = file.tell()
+            for number, line in enumerate(file, start=2):
+                try:
+                    entry = json.loads(line) if line.endswith(b"\n") else None
+                except json.JSONDecodeError:
+                    entry = None
+                if entry is None:
+                    # A partial last line left behind by a crash mid-write.
+                    logger.warning(
+                        f"Ignoring truncated checkpoint entry in {self.path}"
+                    )
+                    continue
+                if (
+                    not isinstance(entry, dict)
+                    or "unit" not in entry
+                    or "results" not in entry
+                ):
+                    raise ValueError(
+                        f"Checkpoint '{self.path}' line {number} is not a completed "
+                        "unit, expected 'unit' and 'results'."
+                    )
+                self.completed[entry["unit"]] = entry["results"]
+                end = file.tell()
+        return end
+
+    def is_done(self, key: str) -> bool:
+        return key in self.completed
+
+    def results(self, key: str) -> List:
+        return [load_result(record) for record in self.completed[key]]
+
+    def record(self, key: str, results: List):
+        records = [dump_result(result) for result in results]
+        line = json.dumps({"unit": key, "results": records}) + "\n"
+        with self._lock:
+            self.completed[key] = records
+            self._file.write(line)
+            self._unsynced += 1
+            if (
+                self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync()
+            self._file.close()
+
+
+def open_journal(
+    checkpoint_dir: str, plan_id: str, resume: bool = False
+) -> CheckpointJournal:
+    path = os.path.join(checkpoint_dir, f"{plan_id}.jsonl")
+    return CheckpointJournal(path, plan_id, resume=resume)
@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import socket
+import sys
+from typing import Dict, Iterator, List, Optional
+
+import yaml
+
+# Only the standard library and yaml are imported here, so that submitting
+# a job with `python -m rapidswarm.client` starts quickly.
+
+DEFAULT_SOCKET = os.path.join(".rapidswarm", "rapidswarm.sock")
+
+
+def request(message: Dict, socket_path: str = DEFAULT_SOCKET) -> Iterator[Dict]:
+    """
+    Sends a request to a `rapidswarm serve` daemon and yields the events it
+    streams back until it closes the connection.
+
+    Raises:
+        OSError: If the daemon cannot be reached.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall((json.dumps(message) + "\n").encode())
+        with connection.makefile("rb") as stream:
+            for line in stream:
+                yield json.loads(line)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="rapidswarm submit",
+        description="Run a configuration on a `rapidswarm serve` daemon and print "
+        "its results as JSON lines.",
+    )
+    parser.add_argument(
+        "config_file",
+        nargs="?",
+        help="YAML configuration to run. Paths in it are relative to the "
+        "daemon's working directory.",
+    )
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument(
+        "--override",
+        type=json.loads,
+        help="JSON merged into the configuration, e.g. "
+        '\'{"preflight": {"mode": "tag"}}\'.',
+    )
+    parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help="Scan again instead of using the daemon's cached inventory.",
+    )
+    parser.add_argument(
+        "--status", action="store_true", help="Print the daemon's status instead."
+    )
+    args = parser.parse_args(argv)
+
+    if args.status:
+        message = {"command": "status"}
+    elif args.config_file is None:
+        parser.error("a configuration file is required")
+    else:
+        with open(args.config_file) as file:
+            message = {
+                "command": "run",
+                "config": yaml.safe_load(file),
+                "overrides": args.override,
+                "rescan": args.rescan,
+            }
+
+    failed = False
+    try:
+        for event in request(message, args.socket):
+            if event["event"] == "results":
+                for result in event["results"]:
+                    print(json.dumps(result))
+            elif event["event"] == "error":
+                print(f"Error: {event['message']}", file=sys.stderr)
+                failed = True
+            elif event["event"] == "status":
+                print(json.dumps(event))
+            elif event["event"] == "done":
+                # Kept apart from the results on stdout.
+                print(json.dumps(event), file=sys.stderr)
+    except OSError as e:
+        print(f"Cannot reach the daemon at {args.socket}: {e}", file=sys.stderr)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
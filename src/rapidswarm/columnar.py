@@ -0,0 +1,452 @@
+import glob
+import json
+import os
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from rapidswarm import instrumentation
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = None
+    pq = None
+
+STORE_VERSION = 1
+META_FILE = "meta.json"
+STRINGS_FILE = "strings.json"
+PART_PATTERN = "part-{:05d}.parquet"
+
+# Null markers for columns whose type has no natural missing value.
+INT_NULL = np.iinfo(np.int64).min
+BOOL_NULL = -1
+STRING_NULL = -1
+
+# Fixed size of the .npy headers written by the store, so the header can be
+# rewritten in place with the final row count.
+NPY_HEADER_SIZE = 128
+
+KIND_DTYPES = {
+    "float": np.dtype("<f8"),
+    "int": np.dtype("<i8"),
+    "bool": np.dtype("i1"),
+    "timestamp": np.dtype("<M8[us]"),
+    "string": np.dtype("<i4"),
+}
+KIND_NULLS = {
+    "float": np.nan,
+    "int": INT_NULL,
+    "bool": BOOL_NULL,
+    "timestamp": np.datetime64("NaT", "us"),
+    "string": STRING_NULL,
+}
+
+
+class StoreFormat(str, Enum):
+    AUTO = "auto"
+    PARQUET = "parquet"
+    NPY = "npy"
+
+    def __str__(self):
+        return self.value
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def value_kind(value) -> str:
+    """Returns the column kind used to store a Python value."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int) and not isinstance(value, Enum):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, datetime):
+        return "timestamp"
+    return "string"
+
+
+def as_text(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def npy_header(dtype: np.dtype, rows: int) -> bytes:
+    """Returns a .npy version 1.0 header padded to NPY_HEADER_SIZE bytes."""
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (rows,),
+        }
+    )
+    # Magic string, version and header length take ten bytes.
+    padding = NPY_HEADER_SIZE - 10 - len(header) - 1
+    header = header + " " * padding + "\n"
+    return (
+        np.lib.format.MAGIC_PREFIX
+        + bytes([1, 0])
+        + len(header).to_bytes(2, "little")
+        + header.encode("latin1")
+    )
+
+
+class _NpyColumn:
+    """One column of the NumPy store, appended to a .npy file."""
+
+    def __init__(self, path: str, kind: str):
+        self.path = path
+        self.kind = kind
+        self.dtype = KIND_DTYPES[kind]
+        self.rows = 0
+        self.file = open(path, "wb", buffering=1024 * 1024)
+        self.file.write(npy_header(self.dtype, 0))
+
+    def append(self, values: np.ndarray):
+        data = np.ascontiguousarray(values, dtype=self.dtype)
+        self.file.write(data.tobytes())
+        self.rows += len(values)
+        instrumentation.count(
+            instrumentation.BYTES_WRITTEN,
+            data.nbytes,
+            output=os.path.dirname(self.path),
+        )
+
+    def append_nulls(self, count: int, chunk: int = 65536):
+        while count > 0:
+            size = min(count, chunk)
+            self.append(np.full(size, KIND_NULLS[self.kind], dtype=self.dtype))
+            count -= size
+
+    def flush(self):
+        self.file.flush()
+        # Rewrite the header so the file is a valid .npy of the rows so far.
+        with open(self.path, "r+b") as header_file:
+            header_file.write(npy_header(self.dtype, self.rows))
+
+    def close(self):
+        self.file.close()
+
+
+class NpyStoreWriter:
+    """
+    Writes results as one .npy file per column.
+
+    Strings are dictionary encoded: the column holds int32 codes into a
+    string table shared by all columns, so an IP address repeated across
+    millions of rows, or used as both client and server, is stored once.
+    Numeric and timestamp columns hold their values directly.
+
+    Columns are typed by the first value seen for them. Columns that first
+    appear after some rows were written are back-filled with nulls: NaN for
+    floats, NaT for timestamps and the sentinels in KIND_NULLS otherwise.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.rows = 0
+        self.columns: Dict[str, _NpyColumn] = {}
+        self.untyped: Dict[str, None] = {}
+        self.strings: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def append(self, columns: Dict[str, list]):
+        count = len(next(iter(columns.values()), []))
+        for name, values in columns.items():
+            column = self.columns.get(name)
+            if column is None:
+                kind = next(
+                    (value_kind(value) for value in values if value is not None), None
+                )
+                if kind is None:
+                    self.untyped.setdefault(name)
+                    continue
+                column = self._add_column(name, kind)
+            column.append(self._encode(column.kind, values))
+        self.rows += count
+        for column in self.columns.values():
+            if column.rows < self.rows:
+                column.append_nulls(self.rows - column.rows)
+
+    def _add_column(self, name: str, kind: str) -> _NpyColumn:
+        self.untyped.pop(name, None)
+        column = _NpyColumn(os.path.join(self.directory, f"{name}.npy"), kind)
+        column.append_nulls(self.rows)
+        self.columns[name] = column
+        return column
+
+    def _encode(self, kind: str, values: list) -> np.ndarray:
+        if kind == "string":
+            codes = self.codes
+            encoded = []
+            for value in values:
+                text = value if value.__class__ is str else as_text(value)
+                if text is None:
+                    encoded.append(STRING_NULL)
+                    continue
+                code = codes.get(text)
+                if code is None:
+                    code = codes[text] = len(self.strings)
+                    self.strings.append(text)
+                encoded.append(code)
+            return np.array(encoded, dtype=KIND_DTYPES[kind])
+        if kind == "timestamp":
+            first = values[0]
+            if first is not None and all(value is first for value in values):
+                # The batch timestamp column repeats a single datetime.
+                return np.full(len(values), np.datetime64(as_utc(first), "us"))
+            values = [None if value is None else as_utc(value) for value in values]
+        null = KIND_NULLS[kind]
+        return np.array(
+            [null if value is None else value for value in values],
+            dtype=KIND_DTYPES[kind],
+        )
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+        with open(os.path.join(self.directory, STRINGS_FILE), "w") as file:
+            json.dump(self.strings, file)
+        meta = {
+            "version": STORE_VERSION,
+            "format": str(StoreFormat.NPY),
+            "rows": self.rows,
+            "columns": {name: column.kind for name, column in self.columns.items()},
+        }
+        # Replace the metadata atomically so readers never see it half written.
+        path = os.path.join(self.directory, META_FILE)
+        with open(path + ".tmp", "w") as file:
+            json.dump(meta, file)
+        os.replace(path + ".tmp", path)
+
+    def close(self):
+        # Columns that only ever held nulls are stored as all-NaN floats.
+        for name in list(self.untyped):
+            self._add_column(name, "float")
+        self.flush()
+        for column in self.columns.values():
+            column.close()
+
+
+class ParquetStoreWriter:
+    """
+    Writes results as Parquet files with pyarrow.
+
+    Each batch becomes a row group. When a batch does not fit the current
+    file's schema, e.g. because a new kind of result brings new fields, a
+    new part file is started with the wider schema.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.rows = 0
+        self.parts = 0
+        self.writer = None
+        self.schema = None
+
+    def append(self, columns: Dict[str, list]):
+        data = {
+            name: [
+                (
+                    as_utc(value)
+                    if isinstance(value, datetime)
+                    else (
+                        value
+                        if value is None or value_kind(value) != "string"
+                        else as_text(value)
+                    )
+                )
+                for value in values
+            ]
+            for name, values in columns.items()
+        }
+        table = None
+        if self.schema is not None and set(data) <= set(self.schema.names):
+            try:
+                table = pa.table(
+                    {name: data.get(name) for name in self.schema.names},
+                    schema=self.schema,
+                )
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+                table = None
+        if table is None:
+            table = pa.table(data)
+            if self.schema is not None:
+                table = self._widen(table)
+            self._start_part(table.schema)
+        self.writer.write_table(table)
+        self.rows += table.num_rows
+
+    def _widen(self, table):
+        """Adds the current schema's columns missing from the table."""
+        for field in self.schema:
+            if field.name not in table.schema.names:
+                table = table.append_column(
+                    field, pa.nulls(table.num_rows, type=field.type)
+                )
+        return table
+
+    def _start_part(self, schema):
+        if self.writer is not None:
+            self.writer.close()
+        path = os.path.join(self.directory, PART_PATTERN.format(self.parts))
+        self.writer = pq.ParquetWriter(path, schema)
+        self.schema = schema
+        self.parts += 1
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def open_writer(directory: str, store_format: StoreFormat = StoreFormat.AUTO):
+    if store_format == StoreFormat.AUTO:
+        store_format = StoreFormat.PARQUET if parquet_available() else StoreFormat.NPY
+    if store_format == StoreFormat.PARQUET:
+        if not parquet_available():
+            raise ValueError("The parquet store format requires pyarrow.")
+        return ParquetStoreWriter(directory)
+    return NpyStoreWriter(directory)
+
+
+def result_columns(batch: Iterable[BaseModel], timestamp: datetime) -> Dict[str, list]:
+    """
+    Turns a batch of results into columns.
+
+    Every result contributes its fields, plus `timestamp` and `type` (the
+    result's class name). Results lacking a field get None in that column.
+    """
+    batch = list(batch)
+    names = {}
+    for model_class in dict.fromkeys(type(item) for item in batch):
+        for field in model_class.model_fields:
+            names.setdefault(field)
+    columns = {
+        "timestamp": [timestamp] * len(batch),
+        "type": [type(item).__name__ for item in batch],
+    }
+    for name in names:
+        columns[name] = [getattr(item, name, None) for item in batch]
+    return columns
+
+
+class ColumnStore:
+    """
+    Read access to a columnar result store.
+
+    Only the requested columns are read. NumPy stores are memory-mapped, so
+    opening a column of millions of rows costs no I/O until it is used.
+    String columns are decoded to object arrays unless `decode=False`, in
+    which case their integer codes into `strings` are returned, which is
+    much cheaper for grouping and counting.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as file:
+                meta = json.load(file)
+            self.format = StoreFormat.NPY
+            self.rows = meta["rows"]
+            self.kinds = meta["columns"]
+            self._strings = None
+            self.parts = []
+        else:
+            self.parts = sorted(
+                glob.glob(os.path.join(directory, PART_PATTERN.replace("{:05d}", "*")))
+            )
+            if not self.parts:
+                raise FileNotFoundError(f"No result store found in '{directory}'.")
+            if not parquet_available():
+                raise ValueError("Reading a parquet result store requires pyarrow.")
+            self.format = StoreFormat.PARQUET
+            self.kinds = {}
+            self.rows = 0
+            for part in self.parts:
+                metadata = pq.read_metadata(part)
+                self.rows += metadata.num_rows
+                for name in metadata.schema.to_arrow_schema().names:
+                    self.kinds.setdefault(name, None)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.kinds)
+
+    @property
+    def strings(self) -> List[str]:
+        """The shared string table of a NumPy store."""
+        if self._strings is None:
+            with open(os.path.join(self.directory, STRINGS_FILE)) as file:
+                self._strings = json.load(file)
+        return self._strings
+
+    def column(self, name: str, decode: bool = True) -> np.ndarray:
+        if name not in self.kinds:
+            raise KeyError(f"Column '{name}' not in result store {self.directory}.")
+        if self.format == StoreFormat.PARQUET:
+            return self._parquet_column(name, decode)
+
+        values = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+        values = values[: self.rows]
+        if self.kinds[name] == "string" and decode:
+            # The null code -1 picks the None appended to the table.
+            table = np.array(self.strings + [None], dtype=object)
+            return table[values]
+        return values
+
+    def _parquet_column(self, name: str, decode: bool) -> np.ndarray:
+        arrays = []
+        for part in self.parts:
+            if name in pq.read_schema(part).names:
+                table = pq.read_table(part, columns=[name], memory_map=True)
+                arrays.append(table[name].combine_chunks())
+            else:
+                arrays.append(pa.nulls(pq.read_metadata(part).num_rows))
+        # Parts written before a column had values hold it as nulls.
+        target = next(
+            (array.type for array in arrays if not pa.types.is_null(array.type)),
+            pa.null(),
+        )
+        column = pa.chunked_array([array.cast(target) for array in arrays], target)
+        if not decode and pa.types.is_string(target):
+            indices = column.combine_chunks().dictionary_encode().indices
+            return indices.to_numpy(zero_copy_only=False)
+        return column.to_numpy()
+
+    def read(
+        self, columns: Optional[List[str]] = None, decode: bool = True
+    ) -> Dict[str, np.ndarray]:
+        """Returns the given columns, or all of them, as NumPy arrays."""
+        return {
+            name: self.column(name, decode=decode) for name in columns or self.columns
+        }
@@ -1,13 +1,18 @@
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import yaml
 from loguru import logger
 from pydantic import BaseModel, field_validator
 
+from . import instrumentation
+from .health import HealthTracker
 from .models.reporters import BaseReporter  # noqa: F401
 from .models.scanners import BaseScanner  # noqa: F401
 from .plugin_loader import load_plugins
+from .ratelimit import RateLimiter
+from .reachability import ReachabilityFilter
+from .selection import NodeSelector
 
 
 class ScannerConfig(BaseModel):
@@ -31,6 +36,7 @@ class ScannerConfig(BaseModel):
 class ProbeConfig(BaseModel):
     type: str
     config: Dict
+    select: Optional[NodeSelector] = None
 
     @field_validator("type")
     def validate_type(cls, v):
@@ -50,6 +56,7 @@ class ManagerConfig(BaseModel):
     type: str
     config: Dict
     probes: List[ProbeConfig]
+    select: Optional[NodeSelector] = None
 
     @field_validator("type")
     def validate_type(cls, v):
@@ -87,16 +94,39 @@ class Config(BaseModel):
     scanners: List[ScannerConfig]
     managers: List[ManagerConfig]
     reporters: List[ReporterConfig]
+    health: Optional[HealthTracker] = None
+    preflight: Optional[ReachabilityFilter] = None
+    rate_limits: Optional[RateLimiter] = None
+
+
+def merge_config(base: Dict, delta: Dict) -> Dict:
+    """
+    Returns the configuration data with a delta applied: mappings are
+    merged key by key, anything else in the delta, lists included,
+    replaces what the base has.
+    """
+    merged = dict(base)
+    for key, value in delta.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def parse_config(config_data: Dict) -> Config:
+    """Validates configuration data, e.g. as read from a YAML file."""
+    with instrumentation.span(instrumentation.PHASE, "load_config"):
+        config = Config(**config_data)
+    logger.debug(f"Loaded configuration: {config}")
+    return config
 
 
 def load_config(config_file):
     config_file_path = os.path.abspath(config_file)
     try:
         with open(config_file_path, "r") as file:
-            config_data = yaml.safe_load(file)
-            config = Config(**config_data)
-            logger.debug(f"Loaded configuration: {config}")
-            return config
+            return parse_config(yaml.safe_load(file))
     except FileNotFoundError as e:
         logger.error(f"Configuration file '{config_file_path}' not found.")
         raise FileNotFoundError(
@@ -129,7 +159,7 @@ def create_reporters(config):
     ]
 
 
-def create_managers(config, nodes):
+def create_managers(config, nodes, health=None, rate_limiter=None):
     logger.debug(f"Creating managers from config: {config}")
     loaded_plugins = load_plugins()
     logger.debug(f"Loaded plugins: {loaded_plugins}")
@@ -139,15 +169,27 @@ def create_managers(config, nodes):
     logger.debug(f"Loaded probes: {loaded_probes}")
 
     managers = []
-    for manager_config in config.managers:
+    for index, manager_config in enumerate(config.managers):
         probes = []
         for probe_config in manager_config.probes:
             probe_class = loaded_probes[probe_config.type]
-            probe = probe_class(nodes=nodes, **probe_config.config)
+            # A manager's selector applies to each of its probes.
+            select = [
+                selector
+                for selector in (manager_config.select, probe_config.select)
+                if selector is not None
+            ]
+            probe = probe_class(nodes=nodes, select=select, **probe_config.config)
             probes.append(probe)
 
         manager_class = loaded_managers[manager_config.type]
-        manager = manager_class(probes=probes, **manager_config.config)
+        manager = manager_class(
+            name=f"{index}-{manager_config.type}",
+            probes=probes,
+            health=health,
+            rate_limiter=rate_limiter,
+            **manager_config.config,
+        )
         managers.append(manager)
         logger.debug(f"Created manager: {manager}")
     return managers
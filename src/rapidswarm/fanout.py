@@ -0,0 +1,133 @@
+import queue
+import threading
+from typing import List, Optional
+
+from loguru import logger
+
+from rapidswarm import instrumentation
+from rapidswarm.models.reporters import BaseReporter
+
+DEFAULT_QUEUE_SIZE = 64
+
+# Commands sent to a reporter worker.
+NODES = "nodes"
+WRITE = "write"
+FLUSH = "flush"
+CLOSE = "close"
+
+
+class ReporterWorker:
+    """
+    Runs one reporter on its own thread.
+
+    Batches and flush requests are queued in order on a bounded queue, so
+    the reporter sees exactly the calls it would have seen if called
+    directly. When the queue is full, submit() waits, which holds back the
+    stages producing results rather than letting them pile up in memory.
+
+    If the reporter raises, the error is logged and kept, and everything
+    but the final close() is dropped, so one broken reporter neither stops
+    the run nor holds up the other reporters.
+    """
+
+    def __init__(self, reporter: BaseReporter, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.reporter = reporter
+        self.name = type(reporter).__name__
+        self.queue = queue.Queue(queue_size)
+        self.error: Optional[Exception] = None
+        self.thread = threading.Thread(
+            target=self._run, name=f"rapidswarm-reporter-{self.name}", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, command: str, batch: Optional[List] = None):
+        if self.error is None or command == CLOSE:
+            self.queue.put((command, batch))
+
+    def _run(self):
+        while True:
+            command, batch = self.queue.get()
+            if command == CLOSE:
+                self._close()
+                return
+            if self.error is not None:
+                continue
+            try:
+                with instrumentation.span(instrumentation.REPORTER, self.name):
+                    if command == WRITE:
+                        self.reporter.write(batch)
+                    elif command == NODES:
+                        self.reporter.add_nodes(batch)
+                    else:
+                        self.reporter.flush()
+            except Exception as e:
+                logger.exception(f"Reporter {self.name} failed: {e}")
+                self.error = e
+
+    def _close(self):
+        # A failed reporter is still closed to release its files, but only
+        # its first error is reported.
+        try:
+            with instrumentation.span(instrumentation.REPORTER, self.name):
+                self.reporter.close()
+        except Exception as e:
+            if self.error is None:
+                logger.exception(f"Reporter {self.name} failed: {e}")
+                self.error = e
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+
+class ReporterFanout:
+    """
+    Hands results to every reporter on a background worker each.
+
+    write() and flush() return as soon as the request is queued, so slow
+    reporters, e.g. ones compressing a large file, write while probing goes
+    on instead of delaying it. close() is the barrier at the end of a run:
+    it waits until every reporter has written, flushed and closed.
+
+    Args:
+        reporters (List[BaseReporter]): The reporters.
+        queue_size (int): How many batches each reporter may fall behind
+            before write() waits for it.
+    """
+
+    def __init__(
+        self, reporters: List[BaseReporter], queue_size: int = DEFAULT_QUEUE_SIZE
+    ):
+        self.workers = [ReporterWorker(reporter, queue_size) for reporter in reporters]
+        self.closed = False
+
+    def add_nodes(self, nodes: List):
+        for worker in self.workers:
+            worker.submit(NODES, nodes)
+
+    def write(self, batch: List):
+        for worker in self.workers:
+            worker.submit(WRITE, batch)
+
+    def flush(self):
+        for worker in self.workers:
+            worker.submit(FLUSH)
+
+    def close(self) -> List[Exception]:
+        """
+        Closes every reporter and waits for them to finish.
+
+        Returns:
+            List[Exception]: The errors raised by failed reporters.
+        """
+        if not self.closed:
+            self.closed = True
+            for worker in self.workers:
+                worker.submit(CLOSE)
+            for worker in self.workers:
+                worker.join()
+        return self.errors
+
+    @property
+    def errors(self) -> List[Exception]:
+        return [worker.error for worker in self.workers if worker.error is not None]
@@ -0,0 +1,119 @@
+import threading
+import time
+from enum import Enum
+from typing import Dict, Iterable, Optional
+
+from loguru import logger
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+
+from rapidswarm.scheduling import parse_duration
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __str__(self):
+        return self.value
+
+
+class NodeHealth(BaseModel):
+    state: CircuitState = CircuitState.CLOSED
+    consecutive_failures: int = 0
+    opened_at: Optional[float] = None
+    last_reason: Optional[str] = None
+
+
+class HealthTracker(BaseModel):
+    """
+    Per-node circuit breaker shared by all managers of a run.
+
+    A node that fails `failure_threshold` times in a row is marked open and
+    its remaining probe units are skipped instead of each waiting out its own
+    timeout. Once `reset_timeout` has passed the circuit is half-open: a
+    single trial unit is let through, and its outcome either closes the
+    circuit again or re-opens it for another `reset_timeout`.
+    """
+
+    failure_threshold: int = Field(
+        3, description="Consecutive failures after which a node's circuit opens."
+    )
+    reset_timeout: float = Field(
+        60.0, description="Time an open circuit waits before allowing a trial."
+    )
+
+    _nodes: Dict[str, NodeHealth] = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @field_validator("reset_timeout", mode="before")
+    def validate_reset_timeout(cls, v):
+        return parse_duration(v)
+
+    @field_validator("failure_threshold")
+    def validate_failure_threshold(cls, v):
+        if v < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        return v
+
+    def state(self, node_id: str) -> CircuitState:
+        with self._lock:
+            return self._nodes.get(node_id, NodeHealth()).state
+
+    def check(self, node_ids: Iterable[str]) -> Optional[str]:
+        """
+        Decides whether a unit targeting the given nodes may run.
+
+        Returns:
+            Optional[str]: None if the unit may run, otherwise the reason it
+            should be skipped.
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Every node is checked before any circuit turns half-open, so a
+            # unit skipped for one node does not leave a trial pending on
+            # another that never runs.
+            trials = []
+            for node_id in node_ids:
+                health = self._nodes.get(node_id)
+                if health is None or health.state == CircuitState.CLOSED:
+                    continue
+                if health.state == CircuitState.HALF_OPEN:
+                    return f"circuit half-open for {node_id}, trial already running"
+                if now - health.opened_at < self.reset_timeout:
+                    return (
+                        f"circuit open for {node_id} after "
+                        f"{health.consecutive_failures} consecutive failures"
+                        + (f": {health.last_reason}" if health.last_reason else "")
+                    )
+                trials.append((node_id, health))
+            for node_id, health in trials:
+                logger.info(f"Circuit for {node_id} is half-open, allowing a trial")
+                health.state = CircuitState.HALF_OPEN
+        return None
+
+    def record_success(self, node_id: str):
+        with self._lock:
+            health = self._nodes.get(node_id)
+            if health is None:
+                return
+            if health.state != CircuitState.CLOSED:
+                logger.info(f"Circuit for {node_id} closed")
+            self._nodes[node_id] = NodeHealth()
+
+    def record_failure(self, node_id: str, reason: Optional[str] = None):
+        with self._lock:
+            health = self._nodes.setdefault(node_id, NodeHealth())
+            health.consecutive_failures += 1
+            health.last_reason = reason
+            if (
+                health.state == CircuitState.HALF_OPEN
+                or health.consecutive_failures >= self.failure_threshold
+            ):
+                if health.state != CircuitState.OPEN:
+                    logger.warning(
+                        f"Circuit for {node_id} opened after "
+                        f"{health.consecutive_failures} consecutive failures"
+                    )
+                health.state = CircuitState.OPEN
+                health.opened_at = time.monotonic()
@@ -0,0 +1,458 @@
+import argparse
+import os
+import secrets
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from pydantic import BaseModel
+
+from rapidswarm.models.results import KEY_FIELDS, find_field, probe_name
+
+DEFAULT_DATABASE = "results.sqlite"
+
+# Node, interface, peer and probe names are stored once in `names` and
+# referenced by integer id, which keeps rows and indexes small and inserts
+# fast. Result ids grow with time, so the indexes on node and peer alone
+# also return a node's results in time order, and the index on run those of
+# a run. The `result_rows` view joins the names back for querying by hand.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL UNIQUE,
+    started TEXT NOT NULL,
+    finished TEXT,
+    results INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS names (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run INTEGER NOT NULL REFERENCES runs (id),
+    timestamp REAL NOT NULL,
+    node INTEGER REFERENCES names (id),
+    interface INTEGER REFERENCES names (id),
+    peer INTEGER REFERENCES names (id),
+    probe INTEGER NOT NULL REFERENCES names (id),
+    result_type INTEGER NOT NULL REFERENCES names (id),
+    success INTEGER,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_node ON results (node);
+CREATE INDEX IF NOT EXISTS results_by_peer ON results (peer) WHERE peer IS NOT NULL;
+CREATE INDEX IF NOT EXISTS results_by_run ON results (run);
+CREATE VIEW IF NOT EXISTS result_rows AS
+SELECT
+    results.id AS id,
+    runs.run_id AS run_id,
+    strftime('%Y-%m-%dT%H:%M:%f', results.timestamp, 'unixepoch', 'localtime')
+        AS timestamp,
+    node.name AS node,
+    interface.name AS interface,
+    peer.name AS peer,
+    probe.name AS probe,
+    results.success AS success,
+    results.status AS status,
+    results.data AS data
+FROM results
+JOIN runs ON runs.id = results.run
+LEFT JOIN names AS node ON node.id = results.node
+LEFT JOIN names AS interface ON interface.id = results.interface
+LEFT JOIN names AS peer ON peer.id = results.peer
+JOIN names AS probe ON probe.id = results.probe;
+"""
+
+INSERT = """
+INSERT INTO results (
+    run, timestamp, node, interface, peer, probe, result_type, success, status, data
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Columns of `result_rows` returned by the queries.
+COLUMNS = "run_id, timestamp, node, interface, peer, probe, success, status"
+
+
+def new_run_id() -> str:
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{secrets.token_hex(3)}"
+
+
+def _index_key(row: tuple) -> int:
+    return row[2] or 0
+
+
+def _text(value) -> Optional[str]:
+    if value is None or value.__class__ is str:
+        return value
+    return str(value)
+
+
+class ResultHistory:
+    """
+    SQLite database of results across runs.
+
+    Every result is stored with the run it came from, its node, interface,
+    peer and probe type, which are indexed, and the full result as JSON so
+    that any metric can be queried later.
+
+    The database is opened in WAL mode and results are inserted one batch
+    per transaction, so writing stays fast and readers, e.g. the `history`
+    command, can query it while a run is still writing.
+    """
+
+    def __init__(self, path: str = DEFAULT_DATABASE):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        # Checkpoint the WAL less often than the default 1000 pages, which
+        # otherwise takes a good part of the time spent on large inserts.
+        self.connection.execute("PRAGMA wal_autocheckpoint=10000")
+        self.connection.executescript(SCHEMA)
+        self._runs: Dict[str, int] = {}
+        self._names: Dict[str, int] = {}
+        self._builders = {}
+
+    def start_run(self, run_id: Optional[str] = None) -> str:
+        run_id = run_id or new_run_id()
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO runs (run_id, started) VALUES (?, ?)",
+                (run_id, datetime.now().isoformat()),
+            )
+        self._runs[run_id] = self.connection.execute(
+            "SELECT id FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()[0]
+        return run_id
+
+    def finish_run(self, run_id: str):
+        with self.connection:
+            self.connection.execute(
+                "UPDATE runs SET finished = ? WHERE run_id = ?",
+                (datetime.now().isoformat(), run_id),
+            )
+
+    def insert(
+        self, run_id: str, batch: Iterable[BaseModel], timestamp: Optional[float] = None
+    ) -> int:
+        """
+        Inserts a batch of results in a single transaction.
+
+        Args:
+            run_id (str): A run started with start_run().
+            batch (Iterable[BaseModel]): The results.
+            timestamp (Optional[float]): When the results were produced, in
+                seconds since the epoch. Defaults to now.
+
+        Returns:
+            int: The number of results inserted.
+        """
+        run = self._runs[run_id]
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.connection:
+            builders = self._builders
+            rows = []
+            for result in batch:
+                model_class = type(result)
+                build = builders.get(model_class)
+                if build is None:
+                    build = builders[model_class] = self._row_builder(model_class)
+                rows.append(build(run, timestamp, result))
+            # Inserting in index order touches far fewer index pages.
+            rows.sort(key=_index_key)
+            self.connection.executemany(INSERT, rows)
+            self.connection.execute(
+                "UPDATE runs SET results = results + ? WHERE id = ?", (len(rows), run)
+            )
+        return len(rows)
+
+    def _name_id(self, name) -> Optional[int]:
+        if name is None:
+            return None
+        if name.__class__ is not str:
+            name = str(name)
+        name_id = self._names.get(name)
+        if name_id is None:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO names (name) VALUES (?)", (name,)
+            )
+            name_id = self._names[name] = self.connection.execute(
+                "SELECT id FROM names WHERE name = ?", (name,)
+            ).fetchone()[0]
+        return name_id
+
+    def _lookup_name(self, name: str) -> Optional[int]:
+        row = self.connection.execute(
+            "SELECT id FROM names WHERE name = ?", (name,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def _row_builder(self, model_class):
+        """
+        Returns a function turning a result of the given class into a row.
+
+        Which fields the class has, and the ids of its type name and of the
+        probe that produced it, are worked out once per class. Results
+        without a probe field are stored under that probe's name, so a
+        probe's results and its ProbeFailures share one name. The returned
+        function reads the fields straight from the model's __dict__, as
+        getattr on pydantic models is comparatively slow and inserts are
+        dominated by building rows.
+        """
+        node_field, interface_field, peer_field = (
+            find_field(model_class, names) for names in KEY_FIELDS.values()
+        )
+        probe_field = find_field(model_class, ("probe",))
+        success_field = find_field(model_class, ("success",))
+        status_field = find_field(model_class, ("status",))
+        type_id = self._name_id(model_class.__name__)
+        probe_id = self._name_id(probe_name(model_class))
+        serialize = model_class.__pydantic_serializer__.to_json
+        names = self._names
+        name_id = self._name_id
+
+        def build(run: int, timestamp: float, result: BaseModel) -> tuple:
+            values = result.__dict__
+            node = values[node_field] if node_field else None
+            interface = values[interface_field] if interface_field else None
+            peer = values[peer_field] if peer_field else None
+            probe = values[probe_field] if probe_field else None
+            success = values[success_field] if success_field else None
+            status = values[status_field] if status_field else None
+            return (
+                run,
+                timestamp,
+                names.get(node) or name_id(node),
+                names.get(interface) or name_id(interface),
+                names.get(peer) or name_id(peer),
+                (names.get(probe) or name_id(probe)) if probe else probe_id,
+                type_id,
+                None if success is None else int(success),
+                _text(status),
+                serialize(result).decode(),
+            )
+
+        return build
+
+    def runs(self, limit: Optional[int] = None) -> List[Dict]:
+        query = "SELECT run_id, started, finished, results FROM runs ORDER BY id DESC"
+        if limit:
+            return self._query(query + " LIMIT ?", (limit,))
+        return self._query(query)
+
+    def node_history(
+        self,
+        node: str,
+        probe: Optional[str] = None,
+        metric: Optional[str] = None,
+        below: Optional[float] = None,
+        above: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Returns the results involving a node, as node or as peer, newest first.
+
+        Args:
+            node (str): The node, as identified in the results.
+            probe (Optional[str]): Only return results of this probe type.
+            metric (Optional[str]): A result field returned as `value`.
+            below (Optional[float]): Only return results whose metric is
+                below this value.
+            above (Optional[float]): Only return results whose metric is
+                above this value.
+            limit (Optional[int]): The maximum number of results.
+        """
+        if (below is not None or above is not None) and metric is None:
+            raise ValueError("A metric is required to filter on its value.")
+        node_id = self._lookup_name(node)
+        probe_id = None if probe is None else self._lookup_name(probe)
+        if node_id is None or (probe is not None and probe_id is None):
+            return []
+
+        value = "json_extract(data, '$.' || ?)"
+        matches = "SELECT id FROM results WHERE (node = ? OR peer = ?)"
+        params = [node_id, node_id]
+        if probe_id is not None:
+            matches += " AND probe = ?"
+            params.append(probe_id)
+        if below is not None:
+            matches += f" AND {value} < ?"
+            params += [metric, below]
+        if above is not None:
+            matches += f" AND {value} > ?"
+            params += [metric, above]
+        matches += " ORDER BY id DESC"
+        if limit:
+            matches += " LIMIT ?"
+            params.append(limit)
+        return self._rows(matches, params, metric)
+
+    def last_known_good(
+        self, node: str, probe: Optional[str] = None, metric: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Returns the latest successful result of a node for each of its
+        interfaces, peers and probe types. Results without a success flag,
+        such as bandwidth measurements, count as successful.
+        """
+        node_id = self._lookup_name(node)
+        probe_id = None if probe is None else self._lookup_name(probe)
+        if node_id is None or (probe is not None and probe_id is None):
+            return []
+
+        # The newest successful result per interface, peer and probe.
+        matches = (
+            "SELECT id FROM results WHERE node = ? AND IFNULL(success, 1) AND id = ("
+            "SELECT latest.id FROM results AS latest "
+            "WHERE latest.node = results.node AND IFNULL(latest.success, 1) "
+            "AND latest.interface IS results.interface "
+            "AND latest.peer IS results.peer AND latest.probe = results.probe "
+            "ORDER BY latest.id DESC LIMIT 1)"
+        )
+        params = [node_id]
+        if probe_id is not None:
+            matches += " AND probe = ?"
+            params.append(probe_id)
+        rows = self._rows(matches, params, metric)
+        return sorted(
+            rows,
+            key=lambda row: (row["interface"] or "", row["peer"] or "", row["probe"]),
+        )
+
+    def failures(self, run_id: Optional[str] = None) -> Dict[str, Set[Optional[str]]]:
+        """
+        Returns the nodes with failed or skipped results in a run, by default
+        the last finished one, with the interfaces of those results. Results
+        that name no interface are listed as None.
+        """
+        run_id = run_id or self.last_finished_run()
+        failures: Dict[str, Set[Optional[str]]] = {}
+        for row in self._query(
+            "SELECT DISTINCT node, interface FROM result_rows "
+            "WHERE run_id = ? AND success = 0 AND node IS NOT NULL",
+            (run_id,),
+        ):
+            failures.setdefault(row["node"], set()).add(row["interface"])
+        return failures
+
+    def node_means(self, metric: str, run_id: Optional[str] = None) -> Dict[str, float]:
+        """
+        Returns the mean of a metric per node in a run, by default the last
+        finished one, over the results that have it.
+        """
+        run_id = run_id or self.last_finished_run()
+        rows = self._query(
+            "SELECT node, AVG(json_extract(data, '$.' || ?)) AS value "
+            "FROM result_rows WHERE run_id = ? AND node IS NOT NULL "
+            "GROUP BY node HAVING value IS NOT NULL",
+            (metric, run_id),
+        )
+        return {row["node"]: row["value"] for row in rows}
+
+    def last_tested(self) -> Dict[str, float]:
+        """
+        Returns when each node last had a result, as the node or as the peer
+        of one, in seconds since the epoch.
+        """
+        rows = self._query(
+            "SELECT names.name AS node, MAX(tested.timestamp) AS timestamp FROM ("
+            "SELECT node AS name, timestamp FROM results WHERE node IS NOT NULL "
+            "UNION ALL "
+            "SELECT peer, timestamp FROM results WHERE peer IS NOT NULL"
+            ") AS tested JOIN names ON names.id = tested.name GROUP BY names.id"
+        )
+        return {row["node"]: row["timestamp"] for row in rows}
+
+    def last_finished_run(self) -> Optional[str]:
+        rows = self._query(
+            "SELECT run_id FROM runs WHERE finished IS NOT NULL "
+            "ORDER BY id DESC LIMIT 1"
+        )
+        return rows[0]["run_id"] if rows else None
+
+    def _rows(self, matches: str, params: list, metric: Optional[str]) -> List[Dict]:
+        """Returns the readable rows of the results selected by a subquery."""
+        query = f"SELECT {COLUMNS}"
+        if metric is not None:
+            query += ", json_extract(data, '$.' || ?) AS value"
+            params = [metric] + params
+        query += f" FROM result_rows WHERE id IN ({matches})"
+        query += " ORDER BY id DESC"
+        return self._query(query, params)
+
+    def _query(self, query: str, params=()) -> List[Dict]:
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    def close(self):
+        self.connection.close()
+
+
+def format_rows(rows: List[Dict]) -> str:
+    if not rows:
+        return "No results."
+    headers = list(rows[0])
+    table = [headers] + [
+        ["" if row[h] is None else str(row[h]) for h in headers] for row in rows
+    ]
+    widths = [max(len(line[i]) for line in table) for i in range(len(headers))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip()
+        for line in table
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="rapidswarm history",
+        description="Query results stored by the SQLiteReporter across runs.",
+    )
+    parser.add_argument(
+        "--database", default=DEFAULT_DATABASE, help="Path to the results database."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runs = commands.add_parser("runs", help="List recorded runs.")
+    runs.add_argument("--limit", type=int)
+
+    node = commands.add_parser("node", help="Show the results involving a node.")
+    node.add_argument("node")
+    node.add_argument("--probe", help="Only show results of this probe type.")
+    node.add_argument("--metric", help="Result field to show, e.g. ping_time.")
+    node.add_argument("--below", type=float, help="Only show metric values below this.")
+    node.add_argument("--above", type=float, help="Only show metric values above this.")
+    node.add_argument("--limit", type=int, default=50)
+
+    good = commands.add_parser(
+        "last-good", help="Show the latest successful results of a node."
+    )
+    good.add_argument("node")
+    good.add_argument("--probe", help="Only show results of this probe type.")
+    good.add_argument("--metric", help="Result field to show, e.g. ping_time.")
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.database):
+        parser.error(f"Database '{args.database}' not found.")
+    history = ResultHistory(args.database)
+    try:
+        if args.command == "runs":
+            rows = history.runs(limit=args.limit)
+        elif args.command == "node":
+            rows = history.node_history(
+                args.node,
+                probe=args.probe,
+                metric=args.metric,
+                below=args.below,
+                above=args.above,
+                limit=args.limit,
+            )
+        else:
+            rows = history.last_known_good(
+                args.node, probe=args.probe, metric=args.metric
+            )
+    finally:
+        history.close()
+    print(format_rows(rows))
@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Kinds of spans recorded during a run.
+PHASE = "phase"
+SCANNER = "scanner"
+MANAGER = "manager"
+PROBE = "probe"
+PARSE = "parse"
+WAIT = "wait"
+REPORTER = "reporter"
+
+# Counters recorded during a run.
+TARGETS = "targets"
+PROBE_EXECUTIONS = "probe_executions"
+SUBPROCESS_SPAWNS = "subprocess_spawns"
+BYTES_WRITTEN = "bytes_written"
+
+COUNTER_HELP = {
+    TARGETS: "Nodes probed, once per probe unit and node.",
+    PROBE_EXECUTIONS: "Individual probe executions, e.g. pings, per probe.",
+    SUBPROCESS_SPAWNS: "Subprocesses started by scanners, probes and sweeps.",
+    BYTES_WRITTEN: "Bytes written to output files, before compression.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class SpanHook:
+    """Called on the thread of a span when it starts and when it ends."""
+
+    def enter(self, kind: str, name: str):
+        pass
+
+    def exit(self, kind: str, name: str):
+        pass
+
+
+class SpanStats:
+    """Number, total, shortest and longest duration of the spans of a name."""
+
+    __slots__ = ("count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.minimum:
+            self.minimum = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+
+class Recorder:
+    """
+    Records where the time of a run goes, as spans timed with a monotonic
+    clock, and what it did, as counters.
+
+    Spans are aggregated per kind and name as they end, so a run of any
+    length takes constant memory. Spans and counters may be recorded from
+    any thread.
+
+    The spans open in each thread are kept, so that profilers can tell
+    which phase, manager or probe a thread is in. Hooks are told whenever
+    a span starts and ends, on the thread running it.
+
+    Args:
+        clock (Callable[[], float]): Monotonic clock, in seconds.
+    """
+
+    enabled = True
+
+    def __init__(self, clock: Optional[Callable[[], float]] = None):
+        self.clock = clock or time.perf_counter
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.started = self.clock()
+        self.spans: Dict[Tuple[str, str], SpanStats] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.hooks: List[SpanHook] = []
+        self._open: Dict[int, List[Tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, kind: str, name: str) -> Iterator[None]:
+        thread = threading.get_ident()
+        open_spans = self._open.get(thread)
+        if open_spans is None:
+            open_spans = self._open.setdefault(thread, [])
+        open_spans.append((kind, name))
+        for hook in self.hooks:
+            hook.enter(kind, name)
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.record(kind, name, self.clock() - start)
+            for hook in self.hooks:
+                hook.exit(kind, name)
+            open_spans.pop()
+
+    def open_spans(self, thread: int) -> List[Tuple[str, str]]:
+        """The kind and name of the spans open in a thread, outermost first."""
+        return list(self._open.get(thread, ()))
+
+    def record(self, kind: str, name: str, seconds: float):
+        with self._lock:
+            stats = self.spans.get((kind, name))
+            if stats is None:
+                stats = self.spans[(kind, name)] = SpanStats()
+            stats.add(seconds)
+
+    def count(self, name: str, amount: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def summary(self) -> Dict:
+        """Returns the spans and counters so far as a JSON-serializable dict."""
+        with self._lock:
+            spans = sorted(self.spans.items(), key=lambda item: -item[1].total)
+            counters = sorted(self.counters.items())
+        return {
+            "started": self.started_at,
+            "wall_seconds": self.clock() - self.started,
+            "spans": [
+                {
+                    "kind": kind,
+                    "name": name,
+                    "count": stats.count,
+                    "total_seconds": stats.total,
+                    "mean_seconds": stats.total / stats.count,
+                    "min_seconds": stats.minimum,
+                    "max_seconds": stats.maximum,
+                }
+                for (kind, name), stats in spans
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in counters
+            ],
+        }
+
+    def prometheus(self, prefix: str = "rapidswarm") -> str:
+        """Returns the spans and counters in the Prometheus text format."""
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_wall_seconds Time since the run started.",
+            f"# TYPE {prefix}_wall_seconds gauge",
+            f"{prefix}_wall_seconds {summary['wall_seconds']:.6f}",
+            f"# HELP {prefix}_span_seconds Time spent per phase, scanner, manager, "
+            "probe, parse, wait and reporter.",
+            f"# TYPE {prefix}_span_seconds summary",
+        ]
+        for span in summary["spans"]:
+            labels = _labels({"kind": span["kind"], "name": span["name"]})
+            lines.append(
+                f"{prefix}_span_seconds_sum{labels} {span['total_seconds']:.6f}"
+            )
+            lines.append(f"{prefix}_span_seconds_count{labels} {span['count']}")
+        for name in sorted({counter["name"] for counter in summary["counters"]}):
+            metric = f"{prefix}_{name}_total"
+            if name in COUNTER_HELP:
+                lines.append(f"# HELP {metric} {COUNTER_HELP[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            for counter in summary["counters"]:
+                if counter["name"] == name:
+                    value = counter["value"]
+                    lines.append(f"{metric}{_labels(counter['labels'])} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str):
+        _write_atomically(path, json.dumps(self.summary(), indent=2) + "\n")
+
+    def write_prometheus(self, path: str):
+        _write_atomically(path, self.prometheus())
+
+
+class NullRecorder:
+    """Records nothing, for runs without instrumentation."""
+
+    enabled = False
+
+    def span(self, kind: str, name: str):
+        return _NULL_SPAN
+
+    def record(self, kind: str, name: str, seconds: float):
+        pass
+
+    def count(self, name: str, amount: float = 1, **labels: str):
+        pass
+
+    def open_spans(self, thread: int) -> List[Tuple[str, str]]:
+        return []
+
+
+_NULL_SPAN = nullcontext()
+_recorder = NullRecorder()
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for value in labels.values()
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    """A counter value in full, e.g. 123456789 rather than 1.23457e+08."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _write_atomically(path: str, text: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path + ".tmp", "w") as file:
+        file.write(text)
+    os.replace(path + ".tmp", path)
+
+
+def enable(clock: Optional[Callable[[], float]] = None) -> Recorder:
+    """Starts recording spans and counters for the rest of the process."""
+    global _recorder
+    _recorder = Recorder(clock)
+    return _recorder
+
+
+def disable():
+    global _recorder
+    _recorder = NullRecorder()
+
+
+def recorder():
+    return _recorder
+
+
+def span(kind: str, name: str):
+    """
+    Times a block as a span of the given kind and name:
+
+        with instrumentation.span(instrumentation.PROBE, "PingProbe"):
+            ...
+
+    Costs one function call when instrumentation is disabled.
+    """
+    return _recorder.span(kind, name)
+
+
+def count(name: str, amount: float = 1, **labels: str):
+    _recorder.count(name, amount, **labels)
+
+
+def top_spans(limit: int = 10) -> List[Dict]:
+    """The spans that took longest in total, for logging."""
+    if not _recorder.enabled:
+        return []
+    return _recorder.summary()["spans"][:limit]
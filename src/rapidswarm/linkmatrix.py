@@ -0,0 +1,308 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+from pydantic import BaseModel
+
+from rapidswarm.models.results import KEY_FIELDS, find_field, numeric_fields
+
+MATRIX_VERSION = 1
+META_FILE = "meta.json"
+DEFAULT_CAPACITY = 1024
+
+VALUE_DTYPE = np.dtype("<f4")
+COUNT_DTYPE = np.dtype("<u4")
+
+
+class LinkMatrix:
+    """
+    Pairwise results stored as dense N×N matrices in memory-mapped files.
+
+    Every endpoint (node, interface or address, whatever the results use to
+    name the ends of a link) is given a dense index in the order it is first
+    seen. For each metric the directory holds two .npy matrices indexed by
+    [source, target]: the running mean of the samples as float32, and the
+    number of samples as uint32. Adding a sample updates one cell, and rows,
+    columns and submatrices are plain slices of the mapped files, so 4096
+    endpoints take 128MB of disk per metric rather than millions of result
+    objects in memory.
+
+    Matrices are created `capacity` endpoints wide and doubled in size when
+    more endpoints appear.
+
+    Args:
+        directory (str): Directory holding the matrices. Created if missing.
+        capacity (int): Initial number of endpoints for a new matrix.
+        readonly (bool): Open an existing matrix without allowing updates.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        capacity: int = DEFAULT_CAPACITY,
+        readonly: bool = False,
+    ):
+        self.directory = directory
+        self.readonly = readonly
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as file:
+                meta = json.load(file)
+            self.capacity = meta["capacity"]
+            self.endpoints: List[str] = meta["endpoints"]
+            self.metrics: List[str] = meta["metrics"]
+        elif readonly:
+            raise FileNotFoundError(f"No link matrix found in '{directory}'.")
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.capacity = capacity
+            self.endpoints = []
+            self.metrics = []
+        self.indices: Dict[str, int] = {
+            name: index for index, name in enumerate(self.endpoints)
+        }
+        self._values: Dict[str, np.memmap] = {}
+        self._counts: Dict[str, np.memmap] = {}
+        self._links = {}
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _path(self, metric: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{metric}.{kind}.npy")
+
+    def _matrices(self, metric: str) -> Tuple[np.memmap, np.memmap]:
+        values = self._values.get(metric)
+        if values is None:
+            if metric not in self.metrics:
+                if self.readonly:
+                    raise KeyError(f"Metric '{metric}' not in link matrix.")
+                self._create(metric)
+            mode = "r" if self.readonly else "r+"
+            values = self._values[metric] = open_memmap(
+                self._path(metric, "values"), mode=mode
+            )
+            self._counts[metric] = open_memmap(self._path(metric, "counts"), mode=mode)
+        return values, self._counts[metric]
+
+    def _create(self, metric: str):
+        shape = (self.capacity, self.capacity)
+        # New files are sparse, so untouched cells take no disk space.
+        for kind, dtype in (("values", VALUE_DTYPE), ("counts", COUNT_DTYPE)):
+            open_memmap(self._path(metric, kind), mode="w+", dtype=dtype, shape=shape)
+        self.metrics.append(metric)
+
+    def index(self, name, add: bool = False) -> int:
+        """
+        Returns the dense index of an endpoint.
+
+        Raises:
+            KeyError: If the endpoint is unknown and `add` is False.
+        """
+        name = name if name.__class__ is str else str(name)
+        index = self.indices.get(name)
+        if index is None:
+            if not add or self.readonly:
+                raise KeyError(f"Endpoint '{name}' not in link matrix.")
+            index = self.indices[name] = len(self.endpoints)
+            self.endpoints.append(name)
+            if index >= self.capacity:
+                self._grow(max(2 * self.capacity, index + 1))
+        return index
+
+    def _grow(self, capacity: int):
+        """Copies every matrix into larger files."""
+        old = self.capacity
+        for metric in self.metrics:
+            values, counts = self._matrices(metric)
+            for kind, matrix in (("values", values), ("counts", counts)):
+                path = self._path(metric, kind)
+                grown = open_memmap(
+                    path + ".tmp", mode="w+", dtype=matrix.dtype, shape=(capacity,) * 2
+                )
+                grown[:old, :old] = matrix
+                grown.flush()
+                del grown
+                os.replace(path + ".tmp", path)
+            del values, counts
+            self._values.pop(metric)
+            self._counts.pop(metric)
+        self.capacity = capacity
+
+    def add(self, source, target, metric: str, value: float):
+        """Adds one sample for the link from source to target."""
+        self.add_samples(
+            np.array([self.index(source, add=True)]),
+            np.array([self.index(target, add=True)]),
+            metric,
+            np.array([value], dtype=np.float64),
+        )
+
+    def add_samples(
+        self, sources: np.ndarray, targets: np.ndarray, metric: str, values: np.ndarray
+    ):
+        """
+        Adds samples given as arrays of endpoint indices and values.
+
+        Samples for the same link are combined first, so each touched cell
+        is read and written once per call.
+        """
+        if self.readonly:
+            raise ValueError("Link matrix was opened read-only.")
+        matrix, counts = self._matrices(metric)
+        cells = sources.astype(np.int64) * self.capacity + targets
+        cells, inverse = np.unique(cells, return_inverse=True)
+        added = np.bincount(inverse)
+        sums = np.bincount(inverse, weights=values)
+
+        flat_values = matrix.reshape(-1)
+        flat_counts = counts.reshape(-1)
+        previous = flat_counts[cells].astype(np.int64)
+        total = previous + added
+        mean = flat_values[cells].astype(np.float64)
+        flat_values[cells] = mean + (sums - added * mean) / total
+        flat_counts[cells] = np.minimum(total, np.iinfo(COUNT_DTYPE).max)
+
+    def add_results(
+        self, batch: Iterable[BaseModel], metrics: Optional[Sequence[str]] = None
+    ) -> int:
+        """
+        Adds the numeric fields of pairwise results as samples.
+
+        Args:
+            batch (Iterable[BaseModel]): Results. Those without a source and
+                a target field are skipped, as are None values.
+            metrics (Optional[Sequence[str]]): Fields to record. Defaults to
+                every int and float field of the results.
+
+        Returns:
+            int: The number of results added.
+        """
+        samples: Dict[str, Tuple[list, list, list]] = {}
+        selected = None if metrics is None else tuple(metrics)
+        added = 0
+        for result in batch:
+            key = (type(result), selected)
+            link = self._links.get(key)
+            if link is None:
+                link = self._links[key] = self._link_fields(type(result), selected)
+            source_field, target_field, fields = link
+            if source_field is None or target_field is None:
+                continue
+            data = result.__dict__
+            source, target = data[source_field], data[target_field]
+            if source is None or target is None:
+                continue
+            source = self.index(source, add=True)
+            target = self.index(target, add=True)
+            for field in fields:
+                value = data[field]
+                if value is not None:
+                    sources, targets, values = samples.setdefault(field, ([], [], []))
+                    sources.append(source)
+                    targets.append(target)
+                    values.append(value)
+            added += 1
+        for metric, (sources, targets, values) in samples.items():
+            self.add_samples(
+                np.array(sources),
+                np.array(targets),
+                metric,
+                np.array(values, dtype=np.float64),
+            )
+        return added
+
+    @staticmethod
+    def _link_fields(model_class, metrics: Optional[Sequence[str]]):
+        # Results without both ends, e.g. per-node ping results, have no
+        # place in the matrix and are ignored.
+        source = find_field(model_class, KEY_FIELDS["node"])
+        target = find_field(model_class, KEY_FIELDS["peer"])
+        numeric = numeric_fields(model_class)
+        if metrics is not None:
+            numeric = [name for name in numeric if name in metrics]
+        return source, target, numeric
+
+    def _masked(self, values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        return np.where(counts > 0, values, np.float32(np.nan))
+
+    def row(self, source, metric: str) -> np.ndarray:
+        """Mean values from source to every endpoint, NaN where never measured."""
+        values, counts = self._matrices(metric)
+        index, size = self.index(source), len(self)
+        return self._masked(values[index, :size], counts[index, :size])
+
+    def column(self, target, metric: str) -> np.ndarray:
+        """Mean values from every endpoint to target, NaN where never measured."""
+        values, counts = self._matrices(metric)
+        index, size = self.index(target), len(self)
+        return self._masked(values[:size, index], counts[:size, index])
+
+    def submatrix(
+        self, sources: Sequence, targets: Sequence, metric: str
+    ) -> np.ndarray:
+        """Mean values between the given endpoints, NaN where never measured."""
+        values, counts = self._matrices(metric)
+        rows = np.array([self.index(name) for name in sources], dtype=np.intp)
+        columns = np.array([self.index(name) for name in targets], dtype=np.intp)
+        cells = np.ix_(rows, columns)
+        return self._masked(values[cells], counts[cells])
+
+    def matrix(self, metric: str) -> np.ndarray:
+        """The full matrix of mean values, NaN where never measured."""
+        values, counts = self._matrices(metric)
+        size = len(self)
+        return self._masked(values[:size, :size], counts[:size, :size])
+
+    def counts(self, metric: str) -> np.ndarray:
+        """The sample counts, as a read-only view of the mapped file."""
+        size = len(self)
+        view = self._matrices(metric)[1][:size, :size]
+        view.flags.writeable = False
+        return view
+
+    def value(self, source, target, metric: str) -> Optional[float]:
+        values, counts = self._matrices(metric)
+        cell = self.index(source), self.index(target)
+        return float(values[cell]) if counts[cell] else None
+
+    def links(self, metric: str) -> Iterator[Tuple[str, str, float, int]]:
+        """Yields (source, target, mean, count) for every measured link."""
+        values, counts = self._matrices(metric)
+        size = len(self)
+        counts = counts[:size, :size]
+        sources, targets = np.nonzero(counts)
+        means = values[:size, :size][sources, targets]
+        for source, target, mean, count in zip(
+            sources.tolist(),
+            targets.tolist(),
+            means.tolist(),
+            counts[sources, targets].tolist(),
+        ):
+            yield self.endpoints[source], self.endpoints[target], mean, count
+
+    def flush(self):
+        if self.readonly:
+            return
+        for metric in self.metrics:
+            values, counts = self._matrices(metric)
+            values.flush()
+            counts.flush()
+        meta = {
+            "version": MATRIX_VERSION,
+            "capacity": self.capacity,
+            "metrics": self.metrics,
+            "endpoints": self.endpoints,
+        }
+        # Replace the metadata atomically so readers never see it half written.
+        path = os.path.join(self.directory, META_FILE)
+        with open(path + ".tmp", "w") as file:
+            json.dump(meta, file)
+        os.replace(path + ".tmp", path)
+
+    def close(self):
+        self.flush()
+        self._values.clear()
+        self._counts.clear()
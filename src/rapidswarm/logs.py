@@ -0,0 +1,197 @@
+import json
+import queue
+import sys
+import threading
+import traceback
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from rapidswarm.ratelimit import TokenBucket
+
+TEXT = "text"
+JSON = "json"
+LOG_FORMATS = (TEXT, JSON)
+
+# The extra field that marks a message as one of many, one per target, and
+# names the target. Only these messages are subject to the rate limit.
+TARGET = "target"
+
+
+class TargetSampler:
+    """
+    Filter that lets through at most `rate` per-target messages per second
+    from each line of code, and counts the ones it drops.
+
+    Per-target messages are those logged with a `target` keyword, e.g.
+    `logger.debug("Pinging {target}", target=node.id)`, or with a
+    rapidswarm.models.node.Targets for messages about several nodes. Other
+    messages always pass.
+
+    Args:
+        rate (float): Messages per second from each line of code.
+        burst (float): Seconds worth of messages let through at once.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0, clock=None):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.suppressed: Counter = Counter()
+        self._buckets: Dict[Tuple[str, int], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record) -> bool:
+        if TARGET not in record["extra"]:
+            return True
+        key = (record["name"], record["line"])
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(
+                    self.rate, max(self.rate * self.burst, 1.0), self.clock
+                )
+                self._buckets[key] = bucket
+            if bucket.take(1):
+                return True
+            self.suppressed[key] += 1
+            return False
+
+
+class JSONSink:
+    """
+    Writes each message as a JSON object on a line of its own, with the
+    message's extra fields, such as its target, as fields of the object.
+
+    Logging only puts the record on a queue. A background thread
+    serializes and writes it, so a slow output never holds up the run.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._write_loop, name="rapidswarm-log", daemon=True
+        )
+        self._thread.start()
+        _json_sinks.append(self)
+
+    def write(self, message):
+        self._queue.put(message.record)
+
+    def drain(self):
+        """Waits until every queued record is written."""
+        self._queue.join()
+
+    def stop(self):
+        """Called by loguru when the sink is removed."""
+        self._queue.put(None)
+        self._thread.join()
+        _json_sinks.remove(self)
+
+    def _write_loop(self):
+        while True:
+            record = self._queue.get()
+            try:
+                if record is None:
+                    return
+                self.stream.write(
+                    json.dumps(self.serialize(record), default=str) + "\n"
+                )
+                if self._queue.empty():
+                    self.stream.flush()
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def serialize(record) -> Dict:
+        data = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "message": record["message"],
+            "name": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "thread": record["thread"].name,
+        }
+        data.update(record["extra"])
+        if record["exception"] is not None:
+            data["exception"] = "".join(
+                traceback.format_exception(*record["exception"])
+            )
+        return data
+
+
+_json_sinks: List[JSONSink] = []
+
+
+def add_sink(
+    sink=None,
+    level: str = "INFO",
+    log_format: str = TEXT,
+    rate: Optional[float] = None,
+) -> Tuple[int, Optional[TargetSampler]]:
+    """
+    Adds a log sink.
+
+    Text is written as it is logged. JSON records are written by a
+    JSONSink on a background thread, so logging never blocks on the
+    output.
+
+    Args:
+        sink: Stream to write to, stderr by default.
+        level (str): Lowest level written.
+        log_format (str): TEXT or JSON.
+        rate (Optional[float]): Per-target messages written per second from
+            each line of code, see TargetSampler. Unlimited when unset.
+
+    Returns:
+        Tuple[int, Optional[TargetSampler]]: The loguru handler id and the
+        sampler, if there is a rate.
+
+    Raises:
+        ValueError: If the format is not one of LOG_FORMATS.
+    """
+    if log_format not in LOG_FORMATS:
+        raise ValueError(
+            f"Unknown log format '{log_format}', expected one of {', '.join(LOG_FORMATS)}."
+        )
+    sink = sink or sys.stderr
+    sampler = TargetSampler(rate) if rate else None
+    if log_format == JSON:
+        handler = logger.add(
+            JSONSink(sink), level=level, format="{message}", filter=sampler
+        )
+    else:
+        handler = logger.add(sink, level=level, filter=sampler)
+    return handler, sampler
+
+
+def configure(
+    level: str = "INFO",
+    log_format: str = TEXT,
+    rate: Optional[float] = None,
+    sink=None,
+) -> Optional[TargetSampler]:
+    """Replaces all log sinks with one added by add_sink()."""
+    logger.remove()
+    return add_sink(sink, level, log_format, rate)[1]
+
+
+def finish(sampler: Optional[TargetSampler] = None):
+    """Reports the messages the sampler dropped and waits for queued ones."""
+    if sampler is not None and sampler.suppressed:
+        total = sum(sampler.suppressed.values())
+        (name, line), most = sampler.suppressed.most_common(1)[0]
+        logger.info(
+            "Suppressed {} per-target log messages over the rate limit, "
+            "{} of them from {}:{}",
+            total,
+            most,
+            name,
+            line,
+        )
+    logger.complete()
+    for sink in list(_json_sinks):
+        sink.drain()
@@ -1,10 +1,249 @@
-from typing import Any, Dict, Optional
+import time
+from collections import Counter
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Tuple
 
-from pydantic import BaseModel
+from loguru import logger
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from rapidswarm import instrumentation
+from rapidswarm.checkpoint import CheckpointJournal
+from rapidswarm.health import HealthTracker
+from rapidswarm.models.node import Node, Targets
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.models.results import ProbeFailure, ProbeStatus, record_probe
+from rapidswarm.ratelimit import RateLimiter
+from rapidswarm.scheduling import RoundScheduler, parse_duration
+from rapidswarm.selection import NodeIndex
 
 
 class BaseManager(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # Whether a streaming run may probe the nodes in batches as they are
+    # scanned. Managers that plan a round over all of its units, such as a
+    # time budget, wait for the scan to finish instead.
+    streams: ClassVar[bool] = True
+
+    name: str = Field("", description="Identifies the manager within a run.")
     config: Optional[Dict[str, Any]] = None
+    interval: Optional[float] = Field(
+        None,
+        description="Time between the starts of consecutive rounds, e.g. '5m'. "
+        "Only a single round is run when unset.",
+    )
+    rounds: Optional[int] = Field(
+        None,
+        description="Number of rounds to run when an interval is set. "
+        "Runs until interrupted when unset.",
+    )
+    jitter: float = Field(
+        0.0,
+        description="Window over which the start of each target is randomly "
+        "spread within a round, e.g. '10s'.",
+    )
+    retry_on_failure: bool = False
+    max_retries: int = 3
+    backoff: float = Field(1.0, description="Delay before the first retry.")
+    max_backoff: float = Field(60.0, description="Longest delay between retries.")
+    health: Optional[HealthTracker] = Field(
+        None, description="Circuit breaker shared with the other managers of a run."
+    )
+    rate_limiter: Optional[RateLimiter] = Field(
+        None, description="Traffic limits shared with the other managers of a run."
+    )
+    checkpoint: Optional[CheckpointJournal] = Field(
+        None, description="Journal of completed units used to resume a run."
+    )
+
+    @field_validator("interval", "jitter", "backoff", "max_backoff", mode="before")
+    def validate_duration(cls, v):
+        return parse_duration(v)
 
     def run(self):
         raise NotImplementedError("Subclasses must implement the 'run' method.")
+
+    def units(
+        self, nodes: Optional[List[Node]] = None, index: Optional[NodeIndex] = None
+    ) -> List[BaseProbe]:
+        """
+        Returns the single-target probe units that make up one round, for the
+        given nodes or, by default, for the nodes the probes were created with.
+        An index of the given nodes speeds up the probes' selectors.
+        """
+        raise NotImplementedError("Subclasses must implement the 'units' method.")
+
+    def run_unit(self, unit: BaseProbe) -> Tuple[List, bool]:
+        """
+        Runs a single probe unit.
+
+        Units targeting a node whose circuit is open are skipped, the others
+        wait for the rate limiter before they execute. Errors and skips are
+        returned as ProbeFailure results so that they are reported.
+
+        Returns:
+            Tuple[List, bool]: The unit's results and whether it failed.
+        """
+        probe_name = type(unit).__name__
+        node_ids = [node.id or node.hostname for node in unit.nodes]
+        if self.health is not None:
+            reason = self.health.check(node_ids)
+            if reason is not None:
+                logger.debug(
+                    "Skipping probe {} on {target}: {}",
+                    probe_name,
+                    reason,
+                    target=Targets(unit.nodes),
+                )
+                return self._failures(unit, ProbeStatus.SKIPPED, reason), False
+
+        if self.rate_limiter is not None:
+            with instrumentation.span(instrumentation.WAIT, "rate_limit"):
+                self.rate_limiter.acquire(unit)
+
+        instrumentation.count(instrumentation.TARGETS, len(unit.nodes))
+        instrumentation.count(
+            instrumentation.PROBE_EXECUTIONS, unit.probe_count(), probe=probe_name
+        )
+        reason = f"{probe_name} failed"
+        try:
+            results = unit.run()
+        except Exception as e:
+            logger.error(f"Error running probe {probe_name}: {e}")
+            reason = str(e)
+            results = self._failures(unit, ProbeStatus.FAILED, reason)
+        else:
+            if not isinstance(results, list):
+                results = [results]
+            record_probe(results, probe_name)
+        logger.debug(
+            "Results of {} on {target}: {}",
+            probe_name,
+            results,
+            target=Targets(unit.nodes),
+        )
+
+        if self.health is not None:
+            # A node only counts as down when nothing at all succeeded, so one
+            # bad interface does not cut off the rest of the node.
+            down = bool(results) and all(
+                getattr(result, "success", True) is False for result in results
+            )
+            for node_id in node_ids:
+                if down:
+                    self.health.record_failure(node_id, reason)
+                else:
+                    self.health.record_success(node_id)
+        return results, unit.failed(results)
+
+    def _failures(self, unit: BaseProbe, status: ProbeStatus, reason: str):
+        return [
+            ProbeFailure(
+                node=node.id or node.hostname,
+                probe=type(unit).__name__,
+                status=status,
+                reason=reason,
+            )
+            for node in unit.nodes
+        ]
+
+    def scheduler(self) -> RoundScheduler:
+        """Returns the scheduler used to run each round."""
+        return RoundScheduler(
+            jitter=self.jitter,
+            max_retries=self.max_retries if self.retry_on_failure else 0,
+            backoff=self.backoff,
+            max_backoff=self.max_backoff,
+        )
+
+    def run_round(
+        self,
+        round_index: int = 0,
+        nodes: Optional[List[Node]] = None,
+        units: Optional[List[BaseProbe]] = None,
+        started: Optional[float] = None,
+    ) -> Iterator[Tuple[BaseProbe, List]]:
+        """
+        Runs every unit once, yielding each unit with its final results.
+
+        The units are those of the given nodes, or the units of a compiled
+        plan when given. A round run in batches passes the monotonic time it
+        started to every batch, see RoundScheduler.
+
+        With a checkpoint journal, units it already holds are not run again;
+        their recorded results are yielded instead. Newly completed units
+        are added to the journal when none of their results failed, so that
+        failed, skipped and deferred units are retried by a resumed run.
+        """
+        if units is None:
+            units = self.units(nodes)
+        if self.checkpoint is None:
+            yield from self.scheduler().run(units, self.run_unit, started)
+            return
+
+        keys = {}
+        pending = []
+        for key, unit in self.unit_keys(units, round_index):
+            if self.checkpoint.is_done(key):
+                yield unit, self.checkpoint.results(key)
+            else:
+                keys[id(unit)] = key
+                pending.append(unit)
+        if len(pending) < len(units):
+            logger.info(
+                f"{self.name or type(self).__name__}: skipping "
+                f"{len(units) - len(pending)} units completed in a previous run"
+            )
+        for unit, results in self.scheduler().run(pending, self.run_unit, started):
+            # Units that failed, were skipped by the circuit breaker or were
+            # deferred by a time budget are run again when resuming.
+            if not unit.failed(results):
+                self.checkpoint.record(keys[id(unit)], results)
+            yield unit, results
+
+    def unit_keys(
+        self, units: List[BaseProbe], round_index: int
+    ) -> Iterator[Tuple[str, BaseProbe]]:
+        """Yields each unit with the key it is journaled under in the round."""
+        seen = Counter()
+        for unit in units:
+            key = f"{self.name}/{round_index}/{unit.unit_key()}"
+            seen[key] += 1
+            if seen[key] > 1:
+                key = f"{key}#{seen[key]}"
+            yield key, unit
+
+    def run_rounds(
+        self,
+        nodes: Optional[List[Node]] = None,
+        first_round: int = 0,
+        units: Optional[List[BaseProbe]] = None,
+    ) -> Iterator[List]:
+        """
+        Runs rounds on a fixed-rate schedule, yielding the results of each.
+
+        Rounds start every `interval` seconds measured start to start, so a
+        slow round shortens the following pause rather than drifting the
+        schedule. Without an interval a single round is run. When continuing
+        from `first_round` above zero, the interval is waited out before the
+        first of the remaining rounds. Every round runs the given units,
+        when there are any, instead of those of the nodes.
+        """
+        round_index = first_round
+        next_start = time.monotonic()
+        while True:
+            if round_index > 0:
+                if self.interval is None:
+                    return
+                if self.rounds is not None and round_index >= self.rounds:
+                    return
+                next_start += self.interval
+                delay = next_start - time.monotonic()
+                if delay > 0:
+                    logger.debug(f"Next round of {type(self).__name__} in {delay:.1f}s")
+                    time.sleep(delay)
+
+            round_results = []
+            for _, unit_results in self.run_round(round_index, nodes, units):
+                round_results.extend(unit_results)
+            yield round_results
+            round_index += 1
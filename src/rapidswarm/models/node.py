@@ -18,4 +18,21 @@ class Node(BaseModel):
     gpus: List[GPU] = Field([], description="List of GPUs associated with the node")
     network_switch: Optional[NetworkSwitch] = Field(
         None, description="Associated network switch for the node"
-    )
\ No newline at end of file
+    )
+
+
+class Targets:
+    """
+    The nodes a per-target log message is about, given as its `target` and
+    joined by commas only when the message is written, so that messages
+    below the log level or dropped by the rate limit cost no formatting,
+    e.g. `logger.debug("Running on {target}", target=Targets(unit.nodes))`.
+    """
+
+    __slots__ = ("nodes",)
+
+    def __init__(self, nodes: List[Node]):
+        self.nodes = nodes
+
+    def __str__(self):
+        return ",".join(node.id or node.hostname for node in self.nodes)
@@ -1,16 +1,26 @@
-from typing import List, Union
+import hashlib
+from typing import List, Optional, Union
 
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
+from rapidswarm import instrumentation
 from rapidswarm.models.network_interface import NetworkInterface
-from rapidswarm.models.node import Node
+from rapidswarm.models.node import Node, Targets
+from rapidswarm.selection import NodeIndex, NodeSelector
 
 
 class BaseProbe(BaseModel):
     nodes: List[Node]
     interface: Union[NetworkInterface, None] = None
     command: str
+    select: List[NodeSelector] = Field(
+        [], description="Selectors the targets must all match, see NodeSelector."
+    )
+
+    @field_validator("select", mode="before")
+    def validate_select(cls, v):
+        return [v] if isinstance(v, (dict, NodeSelector)) else v
 
     def validate_nodes(self):
         if len(self.nodes) < 1 or len(self.nodes) > 2:
@@ -27,6 +37,69 @@ class BaseProbe(BaseModel):
             )
             raise ValueError("A probe with two nodes must specify a network interface.")
 
+    def units(
+        self, nodes: Optional[List[Node]] = None, index: Optional[NodeIndex] = None
+    ) -> List["BaseProbe"]:
+        """
+        Splits the probe into single-target units that can be scheduled,
+        retried and reported on independently.
+
+        A probe between two nodes over a given interface is already a single
+        unit. Otherwise one copy of the probe is made per node, either for
+        the probe's own nodes or, when given, for the nodes passed in. Only
+        nodes the probe's selectors select are targeted.
+
+        Args:
+            nodes (Optional[List[Node]]): The nodes to target.
+            index (Optional[NodeIndex]): An index of `nodes`, to resolve the
+                selectors with.
+        """
+        if self.interface is not None:
+            if nodes is not None and not all(node in nodes for node in self.nodes):
+                return []
+            if len(self.selected(self.nodes)) < len(self.nodes):
+                return []
+            return [self]
+        if nodes is None:
+            targets = self.selected(self.nodes)
+        else:
+            targets = self.selected(nodes, index)
+        return [self.model_copy(update={"nodes": [node]}) for node in targets]
+
+    def selected(
+        self, nodes: List[Node], index: Optional[NodeIndex] = None
+    ) -> List[Node]:
+        """The nodes all of the probe's selectors select, narrowed by them."""
+        for number, selector in enumerate(self.select):
+            # The first selector narrows the nodes, so only it can use the index.
+            nodes = selector.select(nodes, index if number == 0 else None)
+        return nodes
+
+    def unit_key(self) -> str:
+        """Identifies the unit by probe type, probe settings and targets."""
+        exclude = {"nodes", "interface"}
+        if not self.select:
+            # Keeps the keys of probes without selectors as they always were.
+            exclude.add("select")
+        settings = self.model_dump_json(exclude=exclude)
+        digest = hashlib.sha1(settings.encode()).hexdigest()[:8]
+        targets = ",".join(node.id or node.hostname for node in self.nodes)
+        if self.interface is not None:
+            targets += f"@{self.interface.mac_address}"
+        return f"{type(self).__name__}:{digest}:{targets}"
+
+    def probe_count(self) -> int:
+        """Number of individual probe executions the probe performs."""
+        return 1
+
+    def estimated_bytes(self) -> int:
+        """Approximate number of bytes the probe puts on the wire."""
+        return 0
+
+    def failed(self, results: List) -> bool:
+        """Returns True when any of the parsed results reports a failure."""
+        return any(getattr(result, "success", True) is False for result in results)
+
     def parse_output(self, output: str):
         """Placeholder for parsing output. Must be implemented by subclasses."""
         raise NotImplementedError(
@@ -35,11 +108,18 @@ class BaseProbe(BaseModel):
 
     def run(self):
         """Runs the probe, including validation, command execution, and output parsing."""
-        logger.info("Running probe with command: {}", self.command)
+        logger.debug(
+            "Running probe with command: {} on {target}",
+            self.command,
+            target=Targets(self.nodes),
+        )
         self.validate_nodes()
         self.validate_interface()
-        output = self.execute_command()
-        return self.parse_output(output)
+        name = type(self).__name__
+        with instrumentation.span(instrumentation.PROBE, name):
+            output = self.execute_command()
+        with instrumentation.span(instrumentation.PARSE, name):
+            return self.parse_output(output)
 
     def execute_command(self) -> str:
         """Placeholder for executing command. Must be implemented by subclasses."""
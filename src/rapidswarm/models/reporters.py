@@ -1,6 +1,111 @@
-from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+
+from rapidswarm.output import DEFAULT_BUFFER_SIZE, Compression, RotatingFile
+from rapidswarm.scheduling import parse_duration
 
 
 class BaseReporter(BaseModel):
+    _pending: List = PrivateAttr(default_factory=list)
+
     def report(self, data) -> any:
         raise NotImplementedError("Subclasses must implement the 'report' method.")
+
+    def add_nodes(self, nodes: List):
+        """
+        Called with each batch of nodes before they are probed, for reporters
+        that describe results by node attributes such as the switch.
+        """
+
+    def write(self, batch: List):
+        """
+        Accepts a batch of results as they are produced.
+
+        By default results are held until the next flush and then handed to
+        report() together. Reporters that can write incrementally override
+        this to write each batch straight away.
+        """
+        self._pending.extend(batch)
+
+    def flush(self):
+        """Called at the end of every round of results."""
+        if self._pending:
+            data, self._pending = self._pending, []
+            self.report(data)
+
+    def close(self):
+        """Called once after the last results of a run."""
+        self.flush()
+
+
+class StreamingReporter(BaseReporter):
+    """
+    Base class for reporters that append each batch of results to a file.
+
+    Nothing is kept in memory between batches, so memory use does not grow
+    with the number of results. Output goes through a RotatingFile, which
+    provides the buffering, compression and rotation options.
+
+    Subclasses implement encode(), turning a batch into the text to append.
+    """
+
+    output_file: str
+    compression: Optional[Compression] = Field(
+        None, description="Compress the output with 'gzip' or 'zstd'."
+    )
+    buffer_size: int = Field(DEFAULT_BUFFER_SIZE, description="Write buffer in bytes.")
+    flush_interval: Optional[float] = Field(
+        5.0, description="Longest time written results stay in the buffer."
+    )
+    max_bytes: Optional[int] = Field(
+        None, description="Rotate the file once it holds this many bytes."
+    )
+    rotate_interval: Optional[float] = Field(
+        None, description="Rotate the file after this long, e.g. '1h'."
+    )
+
+    _file: Optional[RotatingFile] = PrivateAttr(None)
+
+    @field_validator("flush_interval", "rotate_interval", mode="before")
+    def validate_duration(cls, v):
+        return parse_duration(v)
+
+    def open_file(self, keep_existing: bool = True) -> RotatingFile:
+        return RotatingFile(
+            self.output_file,
+            compression=self.compression,
+            buffer_size=self.buffer_size,
+            flush_interval=self.flush_interval,
+            max_bytes=self.max_bytes,
+            rotate_interval=self.rotate_interval,
+            keep_existing=keep_existing,
+        )
+
+    @property
+    def file(self) -> RotatingFile:
+        if self._file is None:
+            self._file = self.open_file()
+        return self._file
+
+    def encode(self, batch: List, timestamp: str) -> str:
+        raise NotImplementedError("Subclasses must implement the 'encode' method.")
+
+    def report(self, data):
+        """Appends one result or a list of results and flushes them."""
+        self.write(data if isinstance(data, list) else [data])
+        self.flush()
+
+    def write(self, batch: List):
+        if batch:
+            # One timestamp per batch: results in a batch arrive together.
+            self.file.write(self.encode(batch, datetime.now().isoformat()))
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
@@ -0,0 +1,75 @@
+import typing
+from enum import Enum
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Result fields that identify the node, interface and peer of a result, in
+# order of preference. Probes name these differently, e.g. pairwise
+# bandwidth results have a client and a server.
+KEY_FIELDS = {
+    "node": ("node", "client", "client_ip", "source"),
+    "interface": ("interface", "device"),
+    "peer": ("peer", "server", "server_ip", "target"),
+}
+
+
+# The probe that produced each result class, recorded as probes run, so that
+# results of a probe are stored under its name like its ProbeFailures are.
+_PROBE_NAMES: Dict[type, str] = {}
+
+
+def record_probe(results: Iterable, probe: str):
+    """Records `probe` as the producer of the classes of `results`."""
+    for result_class in {type(result) for result in results}:
+        _PROBE_NAMES.setdefault(result_class, probe)
+
+
+def probe_name(model_class) -> str:
+    """The probe that produced results of a class, or else the class name."""
+    return _PROBE_NAMES.get(model_class, model_class.__name__)
+
+
+def find_field(model_class, names) -> Optional[str]:
+    """Returns the first of the given fields that a result class has."""
+    return next((name for name in names if name in model_class.model_fields), None)
+
+
+def numeric_fields(model_class) -> List[str]:
+    """Returns the int and float fields of a result class, excluding bools."""
+    fields = []
+    for name, field in model_class.model_fields.items():
+        types = typing.get_args(field.annotation) or (field.annotation,)
+        types = [t for t in types if t is not type(None)]
+        if types and all(t in (int, float) for t in types):
+            fields.append(name)
+    return fields
+
+
+class ProbeStatus(str, Enum):
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    # Not run because the time budget of the round ran out.
+    DEFERRED = "deferred"
+
+    def __str__(self):
+        return self.value
+
+
+class ProbeFailure(BaseModel):
+    """
+    Result recorded for a probe unit that produced no results of its own,
+    because it raised an error, was skipped or was deferred. It is
+    reported alongside regular probe results so that reporters show why a
+    node has no measurements.
+    """
+
+    node: str = Field(..., description="Identifier of the node that was targeted")
+    probe: str = Field(..., description="Type of the probe that was not completed")
+    success: bool = False
+    status: ProbeStatus = Field(
+        ..., description="Whether the unit failed, was skipped or was deferred"
+    )
+    reason: Optional[str] = Field(
+        None, description="Why the unit failed or was skipped"
+    )
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterator, List
 
 from pydantic import BaseModel
 
@@ -15,5 +15,15 @@ class BaseScanner(BaseModel):
         """
         raise NotImplementedError("Subclasses must implement the 'scan' method.")
 
+    def iter_scan(self) -> Iterator[Node]:
+        """
+        Yields nodes as they are discovered.
+
+        Scanners that discover nodes one at a time override this so that
+        probing can start before the scan has finished. By default the
+        result of scan() is yielded once it is complete.
+        """
+        yield from self.scan()
+
     def validate(self):
         raise NotImplementedError("Subclasses must implement the 'validate' method.")
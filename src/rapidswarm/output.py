@@ -0,0 +1,257 @@
+import gzip
+import io
+import os
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Iterable, Optional, TextIO
+
+from loguru import logger
+
+from rapidswarm import instrumentation
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+class Compression(str, Enum):
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+    def __str__(self):
+        return self.value
+
+    @property
+    def suffix(self) -> str:
+        return {Compression.GZIP: ".gz", Compression.ZSTD: ".zst"}[self]
+
+
+def open_zstd(path: str, buffer_size: int):
+    """
+    Opens a zstd stream for appending, using the standard library module on
+    Python 3.14+ and the zstandard package otherwise.
+    """
+    try:
+        from compression import zstd
+
+        return zstd.open(path, "ab")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ValueError(
+            "zstd compression requires Python 3.14 or the 'zstandard' package."
+        ) from e
+    raw = open(path, "ab", buffering=buffer_size)
+    return zstandard.ZstdCompressor().stream_writer(raw)
+
+
+def open_zstd_reader(path: str):
+    """Opens a zstd file for reading, like open_zstd()."""
+    try:
+        from compression import zstd
+
+        return zstd.open(path, "rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ValueError(
+            "zstd compression requires Python 3.14 or the 'zstandard' package."
+        ) from e
+    return zstandard.ZstdDecompressor().stream_reader(
+        open(path, "rb"), read_across_frames=True, closefd=True
+    )
+
+
+def move_aside(path: str, suffix: str = "") -> str:
+    """
+    Renames a file or directory by adding a timestamp before its extension,
+    e.g. `report.csv.gz` becomes `report.20240101T120000.csv.gz`.
+
+    Args:
+        path (str): The file or directory to rename.
+        suffix (str): A trailing suffix, such as a compression suffix, to
+            keep at the end of the name.
+
+    Returns:
+        str: The new path.
+    """
+    plain = path[: -len(suffix)] if suffix else path
+    root, extension = os.path.splitext(plain)
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    target = f"{root}.{stamp}{extension}{suffix}"
+    counter = 1
+    while os.path.exists(target):
+        target = f"{root}.{stamp}-{counter}{extension}{suffix}"
+        counter += 1
+    os.replace(path, target)
+    logger.info(f"Moved {path} to {target}")
+    return target
+
+
+class RotatingFile:
+    """
+    Buffered, append-only output file with optional compression and rotation.
+
+    Text is appended through a large write buffer and only pushed to the
+    operating system every `flush_interval` seconds or when flush() is
+    called, so writing many small batches stays cheap.
+
+    When the current file has grown past `max_bytes` (counting uncompressed
+    bytes) or has been open for `rotate_interval` seconds, it is renamed
+    with a timestamp, e.g. `report.20240101T120000.csv.gz`, and a new file is
+    started under the original name. `header`, if set, is written at the
+    top of every new file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compression: Optional[Compression] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        flush_interval: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        rotate_interval: Optional[float] = None,
+        keep_existing: bool = True,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        self.compression = compression
+        self.path = path
+        if compression is not None and not path.endswith(compression.suffix):
+            self.path = path + compression.suffix
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.clock = clock or time.monotonic
+        self.header = ""
+        self.size = 0
+        self._file = None
+
+        if not keep_existing and os.path.isfile(self.path):
+            if os.path.getsize(self.path) > 0:
+                self._rename_current()
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        if self.compression == Compression.GZIP:
+            raw = open(self.path, "ab", buffering=self.buffer_size)
+            self._file = gzip.GzipFile(fileobj=raw, mode="ab")
+            self._raw = raw
+        elif self.compression == Compression.ZSTD:
+            self._file = open_zstd(self.path, self.buffer_size)
+            self._raw = None
+        else:
+            self._file = open(self.path, "ab", buffering=self.buffer_size)
+            self._raw = None
+        self.size = self._existing_size()
+        self.opened = self.clock()
+        self.flushed = self.opened
+
+    def _reader(self):
+        if self.compression == Compression.GZIP:
+            return gzip.open(self.path, "rb")
+        if self.compression == Compression.ZSTD:
+            return open_zstd_reader(self.path)
+        return open(self.path, "rb")
+
+    def _existing_size(self) -> int:
+        """The uncompressed size of what the file held when it was opened."""
+        size = os.path.getsize(self.path)
+        if self.compression is None or size == 0:
+            return size
+        try:
+            size = 0
+            with self._reader() as file:
+                while chunk := file.read(self.buffer_size):
+                    size += len(chunk)
+            return size
+        except (EOFError, OSError) as e:
+            # E.g. the last stream of a crashed run was never finished.
+            logger.warning(f"Cannot read {self.path} back, counting its size: {e}")
+            return os.path.getsize(self.path)
+
+    def rewrite(self, transform: Callable[[TextIO], Iterable[str]]):
+        """
+        Replaces the text of the current file with the chunks of text that
+        transform(file) yields while reading the current file, keeping its
+        name, e.g. to give the rows written so far a wider header. The file
+        is streamed through a temporary file that is then moved over the
+        current one, so memory does not grow with the size of the file.
+        """
+        self.close()
+        replacement = RotatingFile(
+            self.path + ".tmp", self.compression, self.buffer_size
+        )
+        with self._text_reader() as file:
+            for chunk in transform(file):
+                replacement.write(chunk)
+        replacement.close()
+        os.replace(replacement.path, self.path)
+        self._open()
+
+    def _text_reader(self) -> TextIO:
+        if not os.path.isfile(self.path) or os.path.getsize(self.path) == 0:
+            return io.StringIO()
+        return io.TextIOWrapper(self._reader(), newline="")
+
+    def due_for_rotation(self) -> bool:
+        if self._file is None or self.size == 0:
+            return False
+        if self.max_bytes is not None and self.size >= self.max_bytes:
+            return True
+        return (
+            self.rotate_interval is not None
+            and self.clock() - self.opened >= self.rotate_interval
+        )
+
+    def write(self, text: str):
+        """Appends text to the current file, rotating it first if it is due."""
+        if self.due_for_rotation():
+            self.rotate()
+        if self._file is None:
+            self._open()
+        if self.size == 0 and self.header:
+            text = self.header + text
+        data = text.encode()
+        self._file.write(data)
+        self.size += len(data)
+        instrumentation.count(
+            instrumentation.BYTES_WRITTEN, len(data), output=self.path
+        )
+        if (
+            self.flush_interval is not None
+            and self.clock() - self.flushed >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        if self._raw is not None:
+            self._raw.flush()
+        self.flushed = self.clock()
+
+    def rotate(self):
+        """Closes the current file and moves it aside under a timestamped name."""
+        self.close()
+        self._rename_current()
+
+    def _rename_current(self):
+        suffix = self.compression.suffix if self.compression is not None else ""
+        move_aside(self.path, suffix)
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+            if self._raw is not None:
+                self._raw.close()
+        finally:
+            self._file = None
+            self.size = 0
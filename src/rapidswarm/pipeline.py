@@ -0,0 +1,366 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional
+
+from loguru import logger
+
+from rapidswarm import instrumentation
+from rapidswarm.fanout import DEFAULT_QUEUE_SIZE, ReporterFanout
+from rapidswarm.models.manager import BaseManager
+from rapidswarm.models.node import Node
+from rapidswarm.models.reporters import BaseReporter
+from rapidswarm.models.scanners import BaseScanner
+from rapidswarm.plan import ExecutionPlan
+from rapidswarm.reachability import ReachabilityFilter
+
+# Marks the end of a stream of nodes.
+END = object()
+
+# Events sent from the managers to the reporting stage.
+RESULTS = "results"
+ROUND_DONE = "round_done"
+FINISHED = "finished"
+
+
+class PipelineStopped(Exception):
+    """Raised inside pipeline threads when another stage has failed."""
+
+
+class Pipeline:
+    """
+    Streams nodes from the scanners through the managers to the reporters.
+
+    Each scanner runs on its own thread and puts nodes on a bounded queue as
+    it discovers them. A dispatcher thread applies the pre-flight filter and
+    hands every node to each manager's own bounded queue. Managers run on
+    their own threads and start probing whatever nodes have arrived so far,
+    in small batches, while the scan is still going. The batches of a round
+    share one jitter window, measured from when the round's first batch
+    started. Managers that do not stream, see BaseManager.streams, run the
+    round once every node has arrived. Results flow back over a bounded
+    queue to the reporting stage, which hands them in batches to the
+    reporters as results arrive and flushes them at the end of each round.
+    Each reporter runs on its own worker thread with its own bounded queue,
+    so slow reporters write while probing goes on, and a reporter that
+    fails is set aside without stopping the run. Its error is raised once
+    the run is over and the other reporters have been closed.
+
+    Because every queue is bounded, a slow stage holds back the stages
+    feeding it instead of letting nodes or results pile up in memory.
+
+    With a compiled execution plan, each manager runs the units the plan
+    holds for it once its nodes have all arrived, rather than units of the
+    nodes as they arrive.
+    """
+
+    def __init__(
+        self,
+        managers: List[BaseManager],
+        reporters: List[BaseReporter],
+        scanners: Optional[List[BaseScanner]] = None,
+        preflight: Optional[ReachabilityFilter] = None,
+        queue_size: int = 1024,
+        batch_size: int = 256,
+        collect: bool = False,
+        reporter_queue_size: int = DEFAULT_QUEUE_SIZE,
+        plan: Optional[ExecutionPlan] = None,
+    ):
+        self.managers = managers
+        self.reporters = reporters
+        self.scanners = scanners or []
+        self.preflight = preflight
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.collect = collect
+        self.reporter_queue_size = reporter_queue_size
+        self.plan = plan
+        self.nodes: List[Node] = []
+        self.results: List = []
+        self.result_count = 0
+
+    def run(self, nodes: Optional[List[Node]] = None) -> List:
+        """
+        Runs the pipeline to completion.
+
+        Args:
+            nodes (Optional[List[Node]]): Nodes to probe. When given, the
+                scanners are not run.
+
+        Returns:
+            List: All results if the pipeline collects them, otherwise an
+            empty list.
+        """
+        self._stop = threading.Event()
+        self._errors = []
+        self._events = queue.Queue(self.queue_size)
+        node_queue = queue.Queue(self.queue_size)
+        manager_queues = [queue.Queue(self.queue_size) for _ in self.managers]
+        self._reporting = ReporterFanout(self.reporters, self.reporter_queue_size)
+
+        if nodes is None:
+            sources = [(self._scan, (scanner, node_queue)) for scanner in self.scanners]
+        else:
+            sources = [(self._feed, (nodes, node_queue))]
+        threads = [
+            self._start(target, args, name=f"source-{i}")
+            for i, (target, args) in enumerate(sources)
+        ]
+        threads.append(
+            self._start(
+                self._dispatch,
+                (node_queue, len(sources), manager_queues),
+                name="dispatcher",
+            )
+        )
+        threads.extend(
+            self._start(
+                self._manage,
+                (index, manager, manager_queues[index]),
+                name=f"manager-{index}",
+            )
+            for index, manager in enumerate(self.managers)
+        )
+
+        try:
+            with instrumentation.span(instrumentation.PHASE, "report"):
+                self._report()
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=1.0)
+            # Waits for the reporters to write everything handed to them,
+            # also when the run failed, so the results so far are kept.
+            reporter_errors = self._reporting.close()
+        if self._errors:
+            raise self._errors[0]
+        if reporter_errors:
+            raise reporter_errors[0]
+        return self.results
+
+    def _start(self, target, args, name) -> threading.Thread:
+        def guarded():
+            try:
+                target(*args)
+            except PipelineStopped:
+                pass
+            except Exception as e:
+                logger.exception(f"Pipeline stage {name} failed: {e}")
+                self._errors.append(e)
+                self._stop.set()
+
+        thread = threading.Thread(
+            target=guarded, name=f"rapidswarm-{name}", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _put(self, target: queue.Queue, item):
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source: queue.Queue):
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _next_batch(self, source: queue.Queue):
+        """
+        Waits for at least one item and then takes whatever else is already
+        queued, up to the batch size.
+
+        Returns:
+            Tuple[List, bool]: The items and whether the end was reached.
+        """
+        items = []
+        item = self._get(source)
+        while item is not END:
+            items.append(item)
+            if len(items) >= self.batch_size:
+                return items, False
+            try:
+                item = source.get_nowait()
+            except queue.Empty:
+                return items, False
+        return items, True
+
+    def _scan(self, scanner: BaseScanner, node_queue: queue.Queue):
+        name = type(scanner).__name__
+        try:
+            logger.info(f"Running scanner: {name}")
+            # Includes time spent waiting for the managers to take the nodes.
+            with instrumentation.span(instrumentation.SCANNER, name):
+                for node in scanner.iter_scan():
+                    self._put(node_queue, node)
+        finally:
+            if not self._stop.is_set():
+                self._put(node_queue, END)
+
+    def _feed(self, nodes: List[Node], node_queue: queue.Queue):
+        for node in nodes:
+            self._put(node_queue, node)
+        self._put(node_queue, END)
+
+    def _dispatch(self, node_queue: queue.Queue, sources: int, manager_queues):
+        if self.preflight is not None:
+            self._dispatch_swept(node_queue, sources, manager_queues)
+        else:
+            remaining = sources
+            while remaining:
+                nodes, ended = self._next_batch(node_queue)
+                if ended:
+                    remaining -= 1
+                if nodes:
+                    self._hand_out(nodes, manager_queues)
+        for manager_queue in manager_queues:
+            self._put(manager_queue, END)
+
+    def _dispatch_swept(self, node_queue: queue.Queue, sources: int, manager_queues):
+        """
+        Hands out the nodes after the pre-flight sweep. One sweep runs at a
+        time, over every node that arrived while the previous one ran, so
+        the sweeps take about one timeout more than the scan, however many
+        nodes it finds.
+        """
+        remaining = sources
+        arrived = []
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="rapidswarm-preflight"
+        ) as pool:
+            sweep = None
+            while remaining or arrived or sweep is not None:
+                if self._stop.is_set():
+                    raise PipelineStopped()
+                if sweep is not None and sweep.done():
+                    self._hand_out(sweep.result(), manager_queues)
+                    sweep = None
+                if sweep is None and arrived:
+                    sweep = pool.submit(self.preflight.apply, arrived)
+                    arrived = []
+                if not remaining:
+                    if sweep is not None:
+                        wait([sweep], timeout=0.1)
+                    continue
+                try:
+                    item = node_queue.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                while True:
+                    if item is END:
+                        remaining -= 1
+                    else:
+                        arrived.append(item)
+                    try:
+                        item = node_queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+    def _hand_out(self, nodes: List[Node], manager_queues):
+        self.nodes.extend(nodes)
+        # Queued ahead of any results of these nodes.
+        self._reporting.add_nodes(nodes)
+        logger.debug(f"Dispatching {len(nodes)} nodes ({len(self.nodes)} so far)")
+        for node in nodes:
+            for manager_queue in manager_queues:
+                self._put(manager_queue, node)
+
+    def _manage(self, index: int, manager: BaseManager, node_queue: queue.Queue):
+        name = manager.name or type(manager).__name__
+        units = None
+        if self.plan is not None:
+            units = self.plan.managers[index].probe_units()
+        try:
+            with instrumentation.span(instrumentation.MANAGER, name):
+                seen = []
+                ended = False
+                started = None
+                while not ended:
+                    nodes, ended = self._next_batch(node_queue)
+                    seen.extend(nodes)
+                    if nodes and units is None and manager.streams:
+                        # Every batch of the round shares its jitter window.
+                        if started is None:
+                            started = time.monotonic()
+                        for _, results in manager.run_round(0, nodes, started=started):
+                            self._put(self._events, (RESULTS, index, results))
+                if units is None and not manager.streams:
+                    # Prioritized and budgeted over the whole round at once.
+                    units = manager.units(seen)
+                if units is not None:
+                    for _, results in manager.run_round(0, units=units):
+                        self._put(self._events, (RESULTS, index, results))
+                self._put(self._events, (ROUND_DONE, index, 0))
+
+                # Any further rounds run over every node seen in the first one.
+                rounds = manager.run_rounds(nodes=seen, first_round=1, units=units)
+                for round_index, results in enumerate(rounds, start=1):
+                    self._put(self._events, (RESULTS, index, results))
+                    self._put(self._events, (ROUND_DONE, index, round_index))
+        finally:
+            self._events.put((FINISHED, index, None))
+
+    def _report(self):
+        completed = [-1] * len(self.managers)
+        finished = [False] * len(self.managers)
+        flushed = -1
+        batch = []
+        while not all(finished):
+            try:
+                kind, index, payload = self._events.get(timeout=0.1)
+            except queue.Empty:
+                # Nothing new arriving, so hand over what has piled up.
+                self._write(batch)
+                batch = []
+                continue
+
+            if kind == RESULTS:
+                batch.extend(payload)
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+                continue
+            if kind == ROUND_DONE:
+                completed[index] = payload
+            else:
+                finished[index] = True
+            self._write(batch)
+            batch = []
+            flushed = self._flush_rounds(completed, finished, flushed)
+
+        self._write(batch)
+        self._flush_rounds(completed, finished, flushed)
+
+    def _write(self, batch: List):
+        if not batch:
+            return
+        self.result_count += len(batch)
+        if self.collect:
+            self.results.extend(batch)
+        self._reporting.write(batch)
+
+    def _flush_rounds(self, completed, finished, flushed) -> int:
+        """
+        Flushes the reporters for every round that all managers still
+        running have completed, and returns the last round flushed.
+        """
+        while True:
+            next_round = flushed + 1
+            if not any(done >= next_round for done in completed):
+                return flushed
+            if not all(
+                done >= next_round or ended for done, ended in zip(completed, finished)
+            ):
+                return flushed
+            self._reporting.flush()
+            flushed = next_round
@@ -0,0 +1,401 @@
+import heapq
+import json
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from rapidswarm import instrumentation
+from rapidswarm.history import format_rows
+from rapidswarm.models.manager import BaseManager
+from rapidswarm.models.node import Node
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.ratelimit import GLOBAL_SCOPE, NODE_SCOPE, SWITCH_SCOPE, RateLimiter
+from rapidswarm.selection import NodeIndex
+
+# Assumed duration of a probe execution, e.g. one ping, for probes without
+# recorded durations.
+DEFAULT_PROBE_SECONDS = 1.0
+
+
+class PlanUnit(BaseModel):
+    """
+    One unit of work: a probe run against its targets, as the manager
+    schedules, retries and journals it.
+    """
+
+    key: str = Field(..., description="Key of the unit in the checkpoint journal.")
+    probe: str
+    targets: List[str] = Field(..., description="Ids of the target nodes.")
+    interface: Optional[str] = Field(
+        None, description="MAC address of the interface, for pairwise probes."
+    )
+    switches: List[str] = Field(
+        [], description="Switches of the targets, claimed under per-switch limits."
+    )
+    probes: int = Field(..., description="Individual probe executions.")
+    bytes: int = Field(..., description="Estimated bytes put on the wire.")
+    seconds: Optional[float] = Field(None, description="Estimated duration.")
+
+
+class ManagerPlan(BaseModel):
+    """
+    The units one manager runs every round, and how it runs them.
+
+    The units of a round do not depend on each other. Rounds run one after
+    the other, every `interval` seconds.
+    """
+
+    name: str
+    type: str
+    workers: int = Field(..., description="Units run at the same time.")
+    jitter: float = 0.0
+    interval: Optional[float] = None
+    rounds: Optional[int] = Field(
+        1, description="Rounds to run, None when running until interrupted."
+    )
+    units: List[PlanUnit]
+    budget: Optional[float] = Field(
+        None, description="Time a round may take, for time-budgeted managers."
+    )
+    round_seconds: Optional[float] = None
+    total_seconds: Optional[float] = None
+
+    _probe_units: Optional[List[BaseProbe]] = PrivateAttr(None)
+
+    def probe_units(self) -> List[BaseProbe]:
+        """
+        The probe units the plan was compiled from, in the order of `units`.
+
+        Raises:
+            ValueError: If the plan was loaded rather than compiled.
+        """
+        if self._probe_units is None:
+            raise ValueError(
+                f"The plan of {self.name} was not compiled in this process, "
+                "compile it again to run it."
+            )
+        return self._probe_units
+
+    @property
+    def probe_count(self) -> int:
+        return sum(unit.probes for unit in self.units)
+
+
+class ExecutionPlan(BaseModel):
+    """
+    What a run will do: the units of work of every manager over the scanned
+    inventory. The pipeline runs a compiled plan's units as they are, so
+    that what is planned and estimated is what is executed.
+
+    Plans serialize to JSON with model_dump_json(). A plan read back can be
+    inspected and estimated, but only a compiled plan can be run.
+    """
+
+    plan_id: str
+    nodes: int
+    interfaces: int
+    managers: List[ManagerPlan]
+    wall_seconds: Optional[float] = Field(
+        None,
+        description="Estimated duration of the run, None when it runs until "
+        "interrupted.",
+    )
+    durations: Dict[str, float] = Field(
+        {}, description="Seconds per probe execution used for the estimate."
+    )
+    assumed: List[str] = Field(
+        [], description="Probes without recorded durations, given the default."
+    )
+
+    @property
+    def unit_count(self) -> int:
+        return sum(len(manager.units) for manager in self.managers)
+
+    @property
+    def probe_count(self) -> int:
+        return sum(manager.probe_count for manager in self.managers)
+
+    def estimate(
+        self,
+        durations: Optional["ProbeDurations"] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> "ExecutionPlan":
+        """
+        Estimates how long the plan takes and records it in the plan.
+
+        Every unit takes the recorded seconds per execution of its probe
+        times its number of executions. The units of a round are spread over
+        the jitter window and handed to the manager's workers in order, as
+        the scheduler does, and a round takes at least as long as the rate
+        limits allow for its probes and bytes, but no longer than the time
+        budget of a budgeted manager. Managers run side by side.
+        Retries and skips by the circuit breaker are not accounted for.
+
+        Args:
+            durations (Optional[ProbeDurations]): Recorded durations, the
+                default for every probe when not given.
+            rate_limiter (Optional[RateLimiter]): Limits of the run.
+
+        Returns:
+            ExecutionPlan: The plan itself.
+        """
+        durations = durations or ProbeDurations()
+        self.durations = {}
+        assumed = set()
+        for manager in self.managers:
+            for unit in manager.units:
+                seconds, recorded = durations.seconds(unit.probe)
+                self.durations[unit.probe] = seconds
+                if not recorded:
+                    assumed.add(unit.probe)
+                unit.seconds = seconds * unit.probes
+        self.assumed = sorted(assumed)
+
+        # Global limits are shared by all managers.
+        shared = _limited_seconds(
+            [unit for manager in self.managers for unit in manager.units],
+            rate_limiter,
+            scopes=(GLOBAL_SCOPE,),
+        )
+        totals = []
+        for manager in self.managers:
+            manager.round_seconds = max(
+                _makespan(manager), _limited_seconds(manager.units, rate_limiter)
+            )
+            if manager.budget is not None:
+                manager.round_seconds = min(manager.round_seconds, manager.budget)
+            if manager.rounds is None:
+                manager.total_seconds = None
+            else:
+                period = max(manager.interval or 0.0, manager.round_seconds)
+                manager.total_seconds = (
+                    manager.rounds - 1
+                ) * period + manager.round_seconds
+            totals.append(manager.total_seconds)
+        if None in totals:
+            self.wall_seconds = None
+        else:
+            self.wall_seconds = max(totals + [shared])
+        return self
+
+
+class ProbeDurations:
+    """
+    Seconds per probe execution of each probe, from the metrics of earlier
+    runs written with `--metrics-json`.
+
+    Args:
+        seconds (Optional[Dict[str, float]]): Seconds per execution by probe.
+        default (float): Seconds assumed for other probes.
+    """
+
+    def __init__(
+        self,
+        seconds: Optional[Dict[str, float]] = None,
+        default: float = DEFAULT_PROBE_SECONDS,
+    ):
+        self.per_probe = dict(seconds or {})
+        self.default = default
+
+    @classmethod
+    def from_metrics(
+        cls, paths: Iterable[str], default: float = DEFAULT_PROBE_SECONDS
+    ) -> "ProbeDurations":
+        """
+        Reads the probe and parse spans of metrics files. The time of each
+        probe is divided by its executions, or by its units in files
+        written before executions were counted. Files are pooled, so runs
+        with more executions weigh more.
+
+        Raises:
+            OSError: If a file cannot be read.
+            ValueError: If a file is not a metrics file.
+        """
+        totals: Dict[str, float] = defaultdict(float)
+        counts: Dict[str, float] = defaultdict(float)
+        for path in paths:
+            with open(path) as file:
+                try:
+                    summary = json.load(file)
+                    spans = summary["spans"]
+                except (ValueError, KeyError) as e:
+                    raise ValueError(f"'{path}' is not a metrics file: {e}") from e
+            executions = {
+                counter["labels"].get("probe"): counter["value"]
+                for counter in summary.get("counters", [])
+                if counter["name"] == instrumentation.PROBE_EXECUTIONS
+            }
+            units = {}
+            for span in spans:
+                if span["kind"] in (instrumentation.PROBE, instrumentation.PARSE):
+                    totals[span["name"]] += span["total_seconds"]
+                if span["kind"] == instrumentation.PROBE:
+                    units[span["name"]] = span["count"]
+            for name, count in units.items():
+                counts[name] += executions.get(name, count)
+        return cls(
+            {name: totals[name] / counts[name] for name in counts if counts[name]},
+            default,
+        )
+
+    def seconds(self, probe: str) -> Tuple[float, bool]:
+        """The seconds per execution of a probe and whether they were recorded."""
+        if probe in self.per_probe:
+            return self.per_probe[probe], True
+        return self.default, False
+
+
+def compile_plan(
+    managers: List[BaseManager],
+    nodes: List[Node],
+    plan_id: str,
+    index: Optional[NodeIndex] = None,
+) -> ExecutionPlan:
+    """
+    Compiles the managers' units over the nodes into an execution plan.
+
+    Args:
+        managers (List[BaseManager]): The managers of the run.
+        nodes (List[Node]): The inventory, after any pre-flight sweep.
+        plan_id (str): Id of the plan, see compute_plan_id().
+        index (Optional[NodeIndex]): An index of the nodes to resolve the
+            probes' selectors with, built when needed by default.
+
+    Returns:
+        ExecutionPlan: The plan, without estimates.
+    """
+    index = index or NodeIndex(nodes)
+    manager_plans = []
+    for manager in managers:
+        probe_units = manager.units(nodes, index)
+        scheduler = manager.scheduler()
+        manager_plan = ManagerPlan(
+            name=manager.name or type(manager).__name__,
+            type=type(manager).__name__,
+            workers=scheduler.max_workers,
+            jitter=manager.jitter,
+            interval=manager.interval,
+            rounds=1 if manager.interval is None else manager.rounds,
+            budget=getattr(manager, "budget", None),
+            units=[
+                _plan_unit(key, unit) for key, unit in manager.unit_keys(probe_units, 0)
+            ],
+        )
+        manager_plan._probe_units = probe_units
+        manager_plans.append(manager_plan)
+    return ExecutionPlan(
+        plan_id=plan_id,
+        nodes=len(nodes),
+        interfaces=sum(len(node.network_interfaces) for node in nodes),
+        managers=manager_plans,
+    )
+
+
+def _plan_unit(key: str, unit: BaseProbe) -> PlanUnit:
+    return PlanUnit(
+        key=key,
+        probe=type(unit).__name__,
+        targets=[node.id or node.hostname for node in unit.nodes],
+        interface=None if unit.interface is None else str(unit.interface.mac_address),
+        switches=sorted(
+            {node.network_switch.id for node in unit.nodes if node.network_switch}
+        ),
+        probes=unit.probe_count(),
+        bytes=unit.estimated_bytes(),
+    )
+
+
+def _makespan(manager: ManagerPlan) -> float:
+    """Time for the workers to run the units, started evenly over the jitter."""
+    if not manager.units:
+        return 0.0
+    workers = [0.0] * manager.workers
+    end = 0.0
+    step = manager.jitter / len(manager.units)
+    for index, unit in enumerate(manager.units):
+        start = max(heapq.heappop(workers), index * step)
+        finish = start + unit.seconds
+        heapq.heappush(workers, finish)
+        end = max(end, finish)
+    return end
+
+
+def _limited_seconds(
+    units: List[PlanUnit],
+    rate_limiter: Optional[RateLimiter],
+    scopes: Tuple[str, ...] = (GLOBAL_SCOPE, SWITCH_SCOPE, NODE_SCOPE),
+) -> float:
+    """The least time the rate limits allow for the units' probes and bytes."""
+    if rate_limiter is None:
+        return 0.0
+    limits = {
+        GLOBAL_SCOPE: rate_limiter.global_limit,
+        SWITCH_SCOPE: rate_limiter.per_switch,
+        NODE_SCOPE: rate_limiter.per_node,
+    }
+    amounts: Dict[Tuple[str, str, str], float] = defaultdict(float)
+    for unit in units:
+        keys = {
+            GLOBAL_SCOPE: [""],
+            SWITCH_SCOPE: unit.switches,
+            NODE_SCOPE: unit.targets,
+        }
+        for scope in scopes:
+            if limits[scope] is None:
+                continue
+            for key in keys[scope]:
+                amounts[scope, key, "probes_per_second"] += unit.probes
+                amounts[scope, key, "bytes_per_second"] += unit.bytes
+    longest = 0.0
+    for (scope, _, metric), amount in amounts.items():
+        rate = getattr(limits[scope], metric)
+        if rate:
+            # The bucket starts full, so a burst goes out without waiting.
+            burst = max(rate * limits[scope].burst, 1.0)
+            longest = max(longest, (amount - burst) / rate)
+    return longest
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "until interrupted"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    return f"{minutes}m{seconds:02d}s"
+
+
+def format_plan(plan: ExecutionPlan) -> str:
+    """A summary of the plan and its estimates, as printed by `--dry-run`."""
+    lines = [
+        f"Plan {plan.plan_id}: {plan.nodes} nodes, {plan.interfaces} interfaces, "
+        f"{plan.unit_count} units, {plan.probe_count} probe executions",
+        "",
+        format_rows(
+            [
+                {
+                    "manager": manager.name,
+                    "units": len(manager.units),
+                    "probes": manager.probe_count,
+                    "workers": manager.workers,
+                    "round": format_duration(manager.round_seconds),
+                    "rounds": "-" if manager.rounds is None else manager.rounds,
+                    "total": format_duration(manager.total_seconds),
+                }
+                for manager in plan.managers
+            ]
+        ),
+        "",
+        f"Estimated wall time: {format_duration(plan.wall_seconds)}",
+    ]
+    if plan.assumed:
+        lines.append(
+            f"No recorded durations for {', '.join(plan.assumed)}, assumed "
+            f"{plan.durations[plan.assumed[0]]:g}s per probe execution. Pass --durations "
+            "with the --metrics-json file of an earlier run."
+        )
+    return "\n".join(lines)
@@ -2,9 +2,11 @@ import importlib.util
 import inspect
 import os
 import sys
+import threading
 
 from loguru import logger
 
+from . import instrumentation
 from .models.manager import BaseManager
 from .models.probes import BaseProbe
 from .models.reporters import BaseReporter
@@ -16,6 +18,10 @@ if project_root not in sys.path:
 
 PLUGIN_DIRECTORY = os.path.join(project_root, "plugins")
 
+# The plugins found by the first load_plugins(), kept for the process.
+_registry = None
+_registry_lock = threading.Lock()
+
 
 def discover_plugins(plugin_type, base_class):
     # TODO: This is the broken part
@@ -38,6 +44,9 @@ def discover_plugins(plugin_type, base_class):
             spec.loader.exec_module(module)
             logger.info(f"Loaded module: {module_name}")
             for name, obj in inspect.getmembers(module, inspect.isclass):
+                # Skip base classes imported into the plugin module.
+                if obj.__module__ != module_name:
+                    continue
                 if issubclass(obj, base_class) and obj is not base_class:
                     logger.info(f"Found plugin class: {name}")
                     plugins[name] = obj
@@ -49,18 +58,32 @@ def discover_plugins(plugin_type, base_class):
     return plugins
 
 
-def load_plugins():
-    reporters = discover_plugins("reporters", BaseReporter)
-    logger.debug(f"Loaded reporters: {reporters}")
-    scanners = discover_plugins("scanners", BaseScanner)
-    logger.debug(f"Loaded scanners: {scanners}")
-    probes = discover_plugins("probes", BaseProbe)
-    logger.debug(f"Loaded probes: {probes}")
-    managers = discover_plugins("managers", BaseManager)
-    logger.debug(f"Loaded managers: {managers}")
-    return {
-        "managers": managers,
-        "reporters": reporters,
-        "scanners": scanners,
-        "probes": probes,
-    }
+def load_plugins(reload: bool = False):
+    """
+    Returns the plugin classes by type and name.
+
+    The plugin directory is only searched and its modules executed on the
+    first call, or with `reload`. Later calls return the same classes,
+    which the configuration validators and the daemon call for every
+    configuration.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is not None and not reload:
+            return _registry
+        with instrumentation.span(instrumentation.PHASE, "load_plugins"):
+            reporters = discover_plugins("reporters", BaseReporter)
+            logger.debug(f"Loaded reporters: {reporters}")
+            scanners = discover_plugins("scanners", BaseScanner)
+            logger.debug(f"Loaded scanners: {scanners}")
+            probes = discover_plugins("probes", BaseProbe)
+            logger.debug(f"Loaded probes: {probes}")
+            managers = discover_plugins("managers", BaseManager)
+            logger.debug(f"Loaded managers: {managers}")
+        _registry = {
+            "managers": managers,
+            "reporters": reporters,
+            "scanners": scanners,
+            "probes": probes,
+        }
+        return _registry
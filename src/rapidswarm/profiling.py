@@ -0,0 +1,409 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from rapidswarm import instrumentation
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_FRAMES = 16
+TOP_ALLOCATIONS = 25
+
+# From Python 3.12 cProfile profiles through sys.monitoring, which sees every
+# thread and which only one profile in the process can use at a time.
+PROCESS_WIDE = sys.version_info >= (3, 12)
+
+
+def span_label(kind: str, name: str) -> str:
+    return f"{kind}:{name}"
+
+
+def matches(phase: Optional[str], kind: str, name: str) -> bool:
+    """
+    Whether a span is selected by a --profile-phase value: a kind such as
+    "probe", a name such as "PingProbe", or both, as in "probe:PingProbe".
+    """
+    return phase is None or phase in (kind, name, span_label(kind, name))
+
+
+def _frame_label(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_qualname}"
+
+
+class Profiler(instrumentation.SpanHook):
+    """
+    Profiles a run, or only the spans selected by `phase`, and writes the
+    profile to `output`.
+
+    Spans are those of rapidswarm.instrumentation, which is enabled for the
+    run if it is not already, so that profiles can name the phase, manager,
+    probe or reporter that was running.
+
+    Args:
+        output (str): File to write the profile to.
+        phase (Optional[str]): Spans to profile, see matches(). The whole
+            run is profiled when unset.
+    """
+
+    default_output = "rapidswarm.profile"
+
+    def __init__(self, output: Optional[str] = None, phase: Optional[str] = None):
+        self.output = output or self.default_output
+        self.phase = phase
+        self.recorder = None
+
+    def start(self):
+        self.recorder = instrumentation.recorder()
+        if not self.recorder.enabled:
+            self.recorder = instrumentation.enable()
+        self.recorder.hooks.append(self)
+
+    def stop(self):
+        self.recorder.hooks.remove(self)
+
+    def write(self):
+        raise NotImplementedError("Subclasses must implement the 'write' method.")
+
+
+class CPUProfiler(Profiler):
+    """
+    Deterministic CPU profile of every thread with cProfile, written as a
+    pstats file for `python -m pstats`, snakeviz or gprof2dot.
+
+    The function names in the profile include their module, e.g.
+    probe_ping_plugin.py, which ties hot spots to their plugin. With a
+    phase, each thread is only profiled while inside a matching span.
+
+    From Python 3.12, where a profile covers every thread and only one can
+    be enabled at a time, a single profile is used instead. With a phase it
+    runs while any thread is inside a matching span, so threads running
+    alongside one are profiled too.
+    """
+
+    default_output = "rapidswarm.pstats"
+
+    def __init__(self, output: Optional[str] = None, phase: Optional[str] = None):
+        super().__init__(output, phase)
+        self.profiles: List[cProfile.Profile] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Threads inside a matching span, with a process-wide profile.
+        self._active = 0
+
+    def _enable(self) -> cProfile.Profile:
+        profile = cProfile.Profile()
+        with self._lock:
+            self.profiles.append(profile)
+        profile.enable()
+        return profile
+
+    def _bootstrap(self, frame, event, arg):
+        # Runs once in every new thread, then hands over to cProfile.
+        self._enable()
+
+    def start(self):
+        super().start()
+        if self.phase is None:
+            if not PROCESS_WIDE:
+                threading.setprofile(self._bootstrap)
+            self._main = self._enable()
+
+    def stop(self):
+        super().stop()
+        if self.phase is None:
+            if not PROCESS_WIDE:
+                threading.setprofile(None)
+            self._main.disable()
+        elif PROCESS_WIDE and self._active:
+            self._active = 0
+            self.profiles[0].disable()
+
+    def enter(self, kind: str, name: str):
+        if self.phase is None or not matches(self.phase, kind, name):
+            return
+        if PROCESS_WIDE:
+            with self._lock:
+                self._active += 1
+                if self._active == 1:
+                    if not self.profiles:
+                        self.profiles.append(cProfile.Profile())
+                    self.profiles[0].enable()
+            return
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self._local.profile = self._enable()
+        self._local.depth = depth + 1
+
+    def exit(self, kind: str, name: str):
+        if self.phase is None or not matches(self.phase, kind, name):
+            return
+        if PROCESS_WIDE:
+            with self._lock:
+                self._active -= 1
+                if self._active == 0:
+                    self.profiles[0].disable()
+            return
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            self._local.profile.disable()
+
+    def write(self):
+        if not self.profiles:
+            logger.warning(f"No spans matched {self.phase}, no CPU profile written.")
+            return
+        stats = pstats.Stats(*self.profiles)
+        stats.dump_stats(self.output)
+        logger.info(f"Wrote the CPU profile to {self.output}")
+
+
+class WallProfiler(Profiler):
+    """
+    Sampling wall-clock profiler: every `interval` seconds the stack of
+    every thread is recorded, waiting or not, so time blocked on
+    subprocesses, sockets and queues shows up as well as time computing.
+
+    Samples are written in the collapsed-stack format of flamegraph.pl and
+    speedscope, one "frame;frame;... count" line per distinct stack. Each
+    stack starts with the spans open in its thread, e.g.
+    "manager:ping;probe:PingProbe", or the thread's name outside of any
+    span. With a phase, only threads inside a matching span are sampled.
+    """
+
+    default_output = "rapidswarm.collapsed"
+
+    def __init__(
+        self,
+        output: Optional[str] = None,
+        phase: Optional[str] = None,
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        super().__init__(output, phase)
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        super().start()
+        self._thread = threading.Thread(
+            target=self._sample_loop, name="rapidswarm-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        super().stop()
+
+    def _sample_loop(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == threading.get_ident():
+                continue
+            spans = self.recorder.open_spans(ident)
+            if self.phase is not None and not any(
+                matches(self.phase, kind, name) for kind, name in spans
+            ):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            roots = [span_label(kind, name) for kind, name in spans]
+            if not roots:
+                roots = [names.get(ident, f"thread-{ident}")]
+            self.samples[";".join(roots + stack)] += 1
+
+    def write(self):
+        with open(self.output, "w") as file:
+            for stack, count in sorted(self.samples.items()):
+                file.write(f"{stack} {count}\n")
+        logger.info(
+            f"Wrote {sum(self.samples.values())} wall-clock samples to {self.output}"
+        )
+
+
+class AllocationProfiler(Profiler):
+    """
+    Traces memory allocations with tracemalloc and reports how much memory
+    each phase added and peaked at, and where the memory held at the end
+    of the run was allocated.
+
+    A phase is measured from the start to the end of its outermost
+    matching span; by default the spans of kind "phase" are measured.
+    Memory is traced for the whole process, so allocations by other
+    threads at the same time are included. With a phase, the top
+    allocation sites of each phase are also reported, from snapshots
+    taken when it starts and ends, which takes a second or more per
+    snapshot in a large process. Each site is shown with the innermost
+    RapidSwarm or plugin frame that led to it.
+
+    Args:
+        frames (int): Frames kept per allocation traceback.
+    """
+
+    default_output = "rapidswarm.alloc.txt"
+
+    def __init__(
+        self,
+        output: Optional[str] = None,
+        phase: Optional[str] = None,
+        frames: int = DEFAULT_FRAMES,
+    ):
+        super().__init__(output, phase)
+        self.frames = frames
+        self.sections: Dict[str, Dict] = {}
+        self.final: Dict[tracemalloc.Traceback, List[int]] = {}
+        self.peak = 0
+        self._depth = 0
+        self._window = None
+        self._lock = threading.Lock()
+
+    def _selected(self, kind: str, name: str) -> bool:
+        if self.phase is None:
+            return kind == instrumentation.PHASE
+        return matches(self.phase, kind, name)
+
+    def start(self):
+        tracemalloc.start(self.frames)
+        super().start()
+
+    def stop(self):
+        super().stop()
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        self.final = self._sites()
+        tracemalloc.stop()
+
+    def _sites(self) -> Dict[tracemalloc.Traceback, List[int]]:
+        """The size and number of the blocks traced, per allocation site."""
+        return {
+            stat.traceback: [stat.size, stat.count]
+            for stat in tracemalloc.take_snapshot().statistics("traceback")
+        }
+
+    def enter(self, kind: str, name: str):
+        if not self._selected(kind, name):
+            return
+        with self._lock:
+            self._depth += 1
+            if self._depth > 1:
+                return
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            tracemalloc.reset_peak()
+            sites = self._sites() if self.phase is not None else None
+            self._window = (span_label(kind, name), current, sites)
+
+    def exit(self, kind: str, name: str):
+        if not self._selected(kind, name):
+            return
+        with self._lock:
+            self._depth -= 1
+            if self._depth:
+                return
+            label, start, before = self._window
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            section = self.sections.setdefault(
+                label, {"spans": 0, "growth": 0, "peak": 0, "sites": {}}
+            )
+            section["spans"] += 1
+            section["growth"] += current - start
+            section["peak"] = max(section["peak"], peak - start)
+            if before is not None:
+                for traceback, (size, count) in self._sites().items():
+                    size -= before.get(traceback, (0, 0))[0]
+                    count -= before.get(traceback, (0, 0))[1]
+                    if size > 0:
+                        totals = section["sites"].setdefault(traceback, [0, 0])
+                        totals[0] += size
+                        totals[1] += count
+
+    def write(self):
+        lines = [f"Peak traced memory: {_size(self.peak)}", ""]
+        for label, section in self.sections.items():
+            lines.append(
+                f"== {label} ({section['spans']} spans): "
+                f"held {'+' if section['growth'] >= 0 else ''}{_size(section['growth'])}, "
+                f"peak +{_size(section['peak'])} =="
+            )
+            lines.extend(_top_sites(section["sites"]))
+            lines.append("")
+        total = sum(size for size, _ in self.final.values())
+        lines.append(f"== held at the end of the run: {_size(total)} ==")
+        lines.extend(_top_sites(self.final))
+        with open(self.output, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        logger.info(f"Wrote the allocation report to {self.output}")
+
+
+def _top_sites(sites: Dict[tracemalloc.Traceback, List[int]]) -> List[str]:
+    top = sorted(sites.items(), key=lambda item: -item[1][0])[:TOP_ALLOCATIONS]
+    return [_site(traceback, size, count) for traceback, (size, count) in top]
+
+
+def _size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _site(traceback: tracemalloc.Traceback, size: int, count: int) -> str:
+    """One line per allocation site: its size, blocks and where it comes from."""
+    frames = list(traceback)
+    innermost = frames[-1]
+    line = (
+        f"{_size(size):>12} {count:>9} blocks  {innermost.filename}:{innermost.lineno}"
+    )
+    # The directory holding the rapidswarm and plugins packages.
+    source = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for index in range(len(frames) - 1, -1, -1):
+        frame = frames[index]
+        if frame.filename.startswith(source):
+            if index != len(frames) - 1:
+                path = os.path.relpath(frame.filename, source)
+                line += f"  via {path}:{frame.lineno}"
+            break
+    return line
+
+
+PROFILERS = {
+    "cpu": CPUProfiler,
+    "wall": WallProfiler,
+    "alloc": AllocationProfiler,
+}
+
+
+def create_profiler(
+    mode: str,
+    output: Optional[str] = None,
+    phase: Optional[str] = None,
+    interval: float = DEFAULT_INTERVAL,
+) -> Profiler:
+    """
+    Creates the profiler for a --profile mode.
+
+    Raises:
+        ValueError: If the mode is not one of PROFILERS.
+    """
+    if mode not in PROFILERS:
+        raise ValueError(
+            f"Unknown profile mode '{mode}', expected one of {', '.join(PROFILERS)}."
+        )
+    if mode == "wall":
+        return WallProfiler(output, phase, interval=interval)
+    return PROFILERS[mode](output, phase)
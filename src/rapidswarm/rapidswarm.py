@@ -4,16 +4,20 @@ from pydantic import ValidationError
 
 from loguru import logger
 
+from rapidswarm import instrumentation
+from rapidswarm.checkpoint import compute_plan_id, open_journal
 from rapidswarm.config import (
     load_config,
     create_scanners,
     create_managers,
     create_reporters,
 )
+from rapidswarm.pipeline import Pipeline
+from rapidswarm.plan import ProbeDurations, compile_plan
 
 
 class RapidSwarm:
-    def __init__(self, config_file, verbose=False):
+    def __init__(self, config_file, verbose=False, checkpoint_dir=None, resume=False):
         self.config_file = config_file
         self.config = None
         self.scanners = []
@@ -21,6 +25,11 @@ class RapidSwarm:
         self.reporters = []
         self.scanned_nodes = []
         self.verbose = verbose
+        self.checkpoint_dir = checkpoint_dir
+        self.resume = resume
+        self.checkpoint = None
+        self.plan_id = None
+        self.plan = None
 
     def load_config(self):
         try:
@@ -37,7 +46,8 @@ class RapidSwarm:
 
     def create_scanners(self):
         try:
-            self.scanners = create_scanners(self.config)
+            with instrumentation.span(instrumentation.PHASE, "create_scanners"):
+                self.scanners = create_scanners(self.config)
             logger.debug(f"Created scanners: {self.scanners}")
         except ValidationError as e:
             logger.error(f"Invalid scanner configuration: {e}")
@@ -45,7 +55,8 @@ class RapidSwarm:
 
     def create_reporters(self):
         try:
-            self.reporters = create_reporters(self.config)
+            with instrumentation.span(instrumentation.PHASE, "create_reporters"):
+                self.reporters = create_reporters(self.config)
             logger.debug(f"Created reporters: {self.reporters}")
         except ValidationError as e:
             logger.error(f"Invalid reporter configuration: {e}")
@@ -54,31 +65,127 @@ class RapidSwarm:
     def run_scanners(self):
         scanned_nodes = []
         for scanner in self.scanners:
-            logger.info(f"Running scanner: {type(scanner).__name__}")
-            nodes = scanner.scan()
+            name = type(scanner).__name__
+            logger.info(f"Running scanner: {name}")
+            with instrumentation.span(instrumentation.SCANNER, name):
+                nodes = scanner.scan()
             scanned_nodes.extend(nodes)
-            logger.info("Scanned nodes:")
+            logger.info(f"{name} found {len(nodes)} nodes")
             for node in nodes:
-                logger.info(node)
-            logger.info("")
+                logger.debug(
+                    "Scanned {target}: {}", node, target=node.id or node.hostname
+                )
         self.scanned_nodes = scanned_nodes
+        # Identify the plan by the full inventory, before any pre-flight
+        # filtering, so that a resumed run finds the same journal.
+        self.plan_id = compute_plan_id(self.config, scanned_nodes)
+
+    def run_preflight(self):
+        """Drops or tags unreachable interfaces when a preflight sweep is configured."""
+        if self.config.preflight is None:
+            return
+        with instrumentation.span(instrumentation.PHASE, "preflight"):
+            self.scanned_nodes = self.config.preflight.apply(self.scanned_nodes)
 
     def create_managers(self):
         try:
-            self.managers = create_managers(self.config, self.scanned_nodes)
+            with instrumentation.span(instrumentation.PHASE, "create_managers"):
+                self.managers = create_managers(
+                    self.config,
+                    self.scanned_nodes,
+                    health=self.config.health,
+                    rate_limiter=self.config.rate_limits,
+                )
             logger.debug(f"Created managers: {self.managers}")
         except ValidationError as e:
             logger.error(f"Invalid manager configuration: {e}")
             raise ValidationError(f"Invalid manager configuration: {e}") from e
 
-    def run_managers(self):
-        results = []
+    def compile_plan(self):
+        """Compiles the managers' units over the scanned nodes into a plan."""
+        with instrumentation.span(instrumentation.PHASE, "plan"):
+            self.plan = compile_plan(self.managers, self.scanned_nodes, self.plan_id)
+        logger.info(
+            f"Plan {self.plan_id}: {self.plan.unit_count} units, "
+            f"{self.plan.probe_count} probe executions"
+        )
+
+    def dry_run(self, durations: ProbeDurations = None):
+        """
+        Scans the inventory and compiles and estimates the plan of a run,
+        without probing anything. The pre-flight sweep is not run, since it
+        sends traffic, so the plan covers every scanned interface.
+
+        Returns:
+            ExecutionPlan: The estimated plan.
+        """
+        self.run_scanners()
+        self.create_managers()
+        self.compile_plan()
+        return self.plan.estimate(durations, self.config.rate_limits)
+
+    def open_checkpoint(self):
+        """
+        Opens the checkpoint journal for this run's plan and attaches it to
+        the managers. When resuming, units recorded in the journal are not
+        run again and their recorded results are reported instead.
+        """
+        if self.checkpoint_dir is None:
+            return
+        self.checkpoint = open_journal(
+            self.checkpoint_dir, self.plan_id, resume=self.resume
+        )
+        logger.info(f"Checkpointing plan {self.plan_id} to {self.checkpoint.path}")
         for manager in self.managers:
-            manager_results = manager.run()
-            results.extend(manager_results)
+            manager.checkpoint = self.checkpoint
+
+    def run_managers(self):
+        """
+        Runs the managers over the scanned nodes and hands their results to
+        the reporters.
 
-        # Run the reporters after the managers have finished
-        for reporter in self.reporters:
-            reporter.report(results)
+        Reporters receive results in batches while the managers are running
+        and are flushed at the end of every round, so a single-round run is
+        reported once at the end while continuous managers are reported
+        every round.
+
+        Returns:
+            List: All results of the run.
+        """
+        pipeline = Pipeline(self.managers, self.reporters, collect=True)
+        try:
+            return pipeline.run(nodes=self.scanned_nodes)
+        finally:
+            self._finish_run()
+
+    def run_pipeline(self) -> int:
+        """
+        Scans the inventory, compiles the plan of the run and executes it,
+        streaming results to the reporters as the units complete.
+
+        The plan is the one `--dry-run` estimates, compiled over the nodes
+        left by the pre-flight sweep, so planning and execution share one
+        representation. Checkpointed runs journal its units as they finish.
+
+        Returns:
+            int: The number of results reported.
+        """
+        self.run_scanners()
+        self.run_preflight()
+        self.create_managers()
+        self.compile_plan()
+        self.open_checkpoint()
+        pipeline = Pipeline(self.managers, self.reporters, plan=self.plan)
+
+        try:
+            pipeline.run(nodes=self.scanned_nodes)
+        finally:
+            self.scanned_nodes = pipeline.nodes
+            self._finish_run()
+        return pipeline.result_count
 
-        return results
+    def _finish_run(self):
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        if self.config is not None and self.config.rate_limits is not None:
+            logger.info(f"Rate limiting: {self.config.rate_limits.metrics()}")
@@ -0,0 +1,153 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from rapidswarm.models.node import Targets
+from rapidswarm.models.probes import BaseProbe
+
+GLOBAL_SCOPE = "global"
+SWITCH_SCOPE = "switch"
+NODE_SCOPE = "node"
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second up to `capacity`.
+
+    Tokens are reserved rather than waited for: a reservation always
+    succeeds, possibly driving the balance negative, and returns how long
+    the caller must wait before using what it reserved. That lets a caller
+    reserve from several buckets at once and then sleep only for the
+    longest of the waits, and lets a single request larger than the
+    capacity through after a proportionally longer wait.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock or time.monotonic
+        self.tokens = capacity
+        self.updated = self.clock()
+
+    def reserve(self, amount: float) -> float:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def take(self, amount: float) -> bool:
+        """Takes the tokens if they are available now, without reserving."""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+
+class RateLimit(BaseModel):
+    probes_per_second: Optional[float] = Field(
+        None, description="Probe executions allowed per second."
+    )
+    bytes_per_second: Optional[float] = Field(
+        None, description="Probe traffic allowed per second, in bytes."
+    )
+    burst: float = Field(
+        1.0, description="Seconds worth of traffic that may be sent at once."
+    )
+
+
+class RateLimiter(BaseModel):
+    """
+    Token-bucket limits on probe traffic, shared by all managers of a run.
+
+    Limits can be set globally, per network switch and per node, each for
+    probes per second and bytes per second. Before a probe unit runs, its
+    cost is reserved from every bucket that applies to it and the unit
+    waits for the slowest of them, so concurrent managers and workers can
+    never exceed any configured limit. Time spent waiting is recorded per
+    scope.
+    """
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    global_limit: Optional[RateLimit] = Field(None, alias="global")
+    per_switch: Optional[RateLimit] = None
+    per_node: Optional[RateLimit] = None
+
+    _buckets: Dict[Tuple[str, str, str], TokenBucket] = PrivateAttr(
+        default_factory=dict
+    )
+    _throttled: Dict[str, float] = PrivateAttr(default_factory=dict)
+    _acquisitions: int = PrivateAttr(0)
+    _throttled_acquisitions: int = PrivateAttr(0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def acquire(self, unit: BaseProbe) -> float:
+        """
+        Blocks until the unit may run under every applicable limit.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        costs = {
+            "probes_per_second": unit.probe_count(),
+            "bytes_per_second": unit.estimated_bytes(),
+        }
+        with self._lock:
+            waits = {}
+            for scope, key, limit in self._scopes(unit):
+                for metric, amount in costs.items():
+                    rate = getattr(limit, metric)
+                    if rate is None or amount <= 0:
+                        continue
+                    bucket = self._bucket(scope, key, metric, rate, limit.burst)
+                    waits[scope] = max(waits.get(scope, 0.0), bucket.reserve(amount))
+            self._acquisitions += 1
+            delay = max(waits.values(), default=0.0)
+            if delay > 0:
+                # Attribute the wait to the scope that imposed it.
+                scope = max(waits, key=waits.get)
+                self._throttled[scope] = self._throttled.get(scope, 0.0) + delay
+                self._throttled_acquisitions += 1
+
+        if delay > 0:
+            logger.debug(
+                "Throttling {} for {:.3f}s",
+                type(unit).__name__,
+                delay,
+                target=Targets(unit.nodes),
+            )
+            time.sleep(delay)
+        return delay
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "acquisitions": self._acquisitions,
+                "throttled_acquisitions": self._throttled_acquisitions,
+                "throttled_seconds": dict(self._throttled),
+            }
+
+    def _scopes(self, unit: BaseProbe) -> List[Tuple[str, str, RateLimit]]:
+        scopes = []
+        if self.global_limit is not None:
+            scopes.append((GLOBAL_SCOPE, "", self.global_limit))
+        for node in unit.nodes:
+            if self.per_switch is not None and node.network_switch is not None:
+                scopes.append((SWITCH_SCOPE, node.network_switch.id, self.per_switch))
+            if self.per_node is not None:
+                scopes.append((NODE_SCOPE, node.id or node.hostname, self.per_node))
+        return scopes
+
+    def _bucket(self, scope, key, metric, rate, burst) -> TokenBucket:
+        bucket = self._buckets.get((scope, key, metric))
+        if bucket is None:
+            bucket = TokenBucket(rate, max(rate * burst, 1.0))
+            self._buckets[(scope, key, metric)] = bucket
+        return bucket
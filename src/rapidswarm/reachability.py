@@ -0,0 +1,273 @@
+import errno
+import ipaddress
+import math
+import selectors
+import socket
+import subprocess
+import time
+from enum import Enum
+from typing import Dict, Iterable, List, Set, Tuple
+
+from loguru import logger
+from pydantic import BaseModel, Field, field_validator
+
+from rapidswarm import instrumentation
+from rapidswarm.models.node import Node
+from rapidswarm.scheduling import parse_duration
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+# Errors that still prove a host is up: something answered the connection.
+ALIVE_ERRNOS = {0, errno.ECONNREFUSED, errno.ECONNRESET}
+# Errors of running out of file descriptors, in the process or the system.
+DESCRIPTOR_ERRNOS = {errno.EMFILE, errno.ENFILE}
+ARP_FLAG_COMPLETE = 0x2
+# File descriptors left to the rest of the run by a sweep: reporters, the
+# checkpoint journal, log files and the probes of other managers.
+RESERVED_DESCRIPTORS = 128
+
+
+class ReachabilityMethod(str, Enum):
+    ICMP = "icmp"
+    TCP = "tcp"
+    ARP = "arp"
+
+    def __str__(self):
+        return self.value
+
+
+class UnreachableAction(str, Enum):
+    DROP = "drop"
+    TAG = "tag"
+
+    def __str__(self):
+        return self.value
+
+
+class ReachabilityFilter(BaseModel):
+    """
+    Pre-flight liveness sweep run between scanning and probing.
+
+    Every interface address is checked concurrently, so the sweep takes
+    about one `timeout` no matter how many nodes were scanned (up to
+    `max_concurrency` checks are in flight at once, fewer when the limit on
+    open files would not allow as many). Unreachable interfaces
+    are either marked inactive (`tag`) or removed together with nodes that
+    are left without interfaces (`drop`).
+    """
+
+    method: ReachabilityMethod = ReachabilityMethod.TCP
+    port: int = Field(22, description="Port used by the TCP connect check.")
+    timeout: float = Field(1.0, description="How long to wait for any one address.")
+    action: UnreachableAction = UnreachableAction.TAG
+    max_concurrency: int = Field(
+        1024,
+        ge=1,
+        description="Upper bound on checks in flight at once, lowered to fit "
+        "the limit on open files.",
+    )
+    command: str = Field(
+        "ping -c 1 -W {timeout}", description="Command used by the ICMP check."
+    )
+    arp_cache: str = Field(
+        "/proc/net/arp", description="ARP table consulted by the ARP check."
+    )
+
+    @field_validator("timeout", mode="before")
+    def validate_timeout(cls, v):
+        return parse_duration(v)
+
+    def apply(self, nodes: List[Node]) -> List[Node]:
+        """
+        Sweeps all interfaces of the given nodes and filters out the
+        unreachable ones according to `action`.
+
+        Returns:
+            List[Node]: The nodes to hand on to the managers.
+        """
+        addresses = {
+            str(interface.ip_address)
+            for node in nodes
+            for interface in node.network_interfaces
+            if interface.ip_address is not None and interface.is_active
+        }
+        started = time.monotonic()
+        reachable = self.sweep(addresses)
+        logger.info(
+            f"Pre-flight {self.method} sweep: {len(reachable)}/{len(addresses)} "
+            f"addresses reachable in {time.monotonic() - started:.2f}s"
+        )
+
+        filtered = []
+        for node in nodes:
+            if self.action == UnreachableAction.TAG:
+                for interface in node.network_interfaces:
+                    if str(interface.ip_address) not in reachable:
+                        interface.is_active = False
+                filtered.append(node)
+                continue
+            interfaces = [
+                interface
+                for interface in node.network_interfaces
+                if str(interface.ip_address) in reachable
+            ]
+            if interfaces:
+                filtered.append(
+                    node.model_copy(update={"network_interfaces": interfaces})
+                )
+            else:
+                logger.info(
+                    "Dropping unreachable node: {target}",
+                    target=node.id or node.hostname,
+                )
+        return filtered
+
+    def sweep(self, addresses: Iterable[str]) -> Set[str]:
+        """Returns the subset of the given addresses that answered."""
+        addresses = list(addresses)
+        if not addresses:
+            return set()
+        if self.method == ReachabilityMethod.ARP:
+            return self._sweep_arp(addresses)
+        if self.method == ReachabilityMethod.ICMP:
+            return self._sweep_icmp(addresses)
+        return self._sweep_tcp(addresses)
+
+    def concurrency(self) -> int:
+        """
+        Returns how many checks may be in flight at once: `max_concurrency`,
+        but no more than the open files limit (`ulimit -n`) leaves after
+        RESERVED_DESCRIPTORS for the rest of the run.
+        """
+        if resource is None:
+            return self.max_concurrency
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft == resource.RLIM_INFINITY:
+            return self.max_concurrency
+        return max(1, min(self.max_concurrency, soft - RESERVED_DESCRIPTORS))
+
+    def _back_off(self, error: OSError, in_flight: int) -> int:
+        """
+        Returns the concurrency to continue with after running out of file
+        descriptors with `in_flight` checks running.
+
+        Raises:
+            OSError: If the error is another one, or no check is running
+                that would give a descriptor back.
+        """
+        if error.errno not in DESCRIPTOR_ERRNOS or in_flight == 0:
+            raise error
+        logger.warning(
+            f"Out of file descriptors during the pre-flight sweep, continuing "
+            f"with {in_flight} checks in flight"
+        )
+        return in_flight
+
+    def _sweep_arp(self, addresses: List[str]) -> Set[str]:
+        complete = set()
+        try:
+            with open(self.arp_cache, "r") as file:
+                next(file, None)  # Header line
+                for line in file:
+                    parts = line.split()
+                    if len(parts) >= 3 and int(parts[2], 16) & ARP_FLAG_COMPLETE:
+                        complete.add(parts[0])
+        except IOError as e:
+            raise IOError(f"Error reading ARP cache '{self.arp_cache}': {e}")
+        return complete.intersection(addresses)
+
+    def _sweep_icmp(self, addresses: List[str]) -> Set[str]:
+        command = self.command.format(timeout=max(1, math.ceil(self.timeout))).split()
+        pending = list(reversed(addresses))
+        running: Dict[str, Tuple[subprocess.Popen, float]] = {}
+        reachable = set()
+        # Leave ping a little slack over its own timeout before killing it.
+        limit = self.timeout + 1.0
+        concurrency = self.concurrency()
+        while pending or running:
+            while pending and len(running) < concurrency:
+                address = pending.pop()
+                try:
+                    process = subprocess.Popen(
+                        command + [address],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                    )
+                except OSError as e:
+                    concurrency = self._back_off(e, len(running))
+                    pending.append(address)
+                    break
+                instrumentation.count(
+                    instrumentation.SUBPROCESS_SPAWNS, source="preflight"
+                )
+                running[address] = (process, time.monotonic())
+            now = time.monotonic()
+            for address, (process, started) in list(running.items()):
+                if process.poll() is None:
+                    if now - started < limit:
+                        continue
+                    process.kill()
+                    process.wait()
+                elif process.returncode == 0:
+                    reachable.add(address)
+                del running[address]
+            if running:
+                time.sleep(0.01)
+        return reachable
+
+    def _sweep_tcp(self, addresses: List[str]) -> Set[str]:
+        pending = list(reversed(addresses))
+        reachable = set()
+        concurrency = self.concurrency()
+        with selectors.DefaultSelector() as selector:
+            while pending or selector.get_map():
+                while pending and len(selector.get_map()) < concurrency:
+                    address = pending.pop()
+                    try:
+                        sock = self._connect(address)
+                    except OSError as e:
+                        concurrency = self._back_off(e, len(selector.get_map()))
+                        pending.append(address)
+                        break
+                    if sock is None:
+                        continue
+                    selector.register(
+                        sock, selectors.EVENT_WRITE, (address, time.monotonic())
+                    )
+                for key, _ in selector.select(timeout=0.05):
+                    address, _ = key.data
+                    error = key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if error in ALIVE_ERRNOS:
+                        reachable.add(address)
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                now = time.monotonic()
+                for key in list(selector.get_map().values()):
+                    if now - key.data[1] > self.timeout:
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+        return reachable
+
+    def _connect(self, address: str):
+        family = (
+            socket.AF_INET6
+            if ipaddress.ip_address(address).version == 6
+            else socket.AF_INET
+        )
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        result = sock.connect_ex((address, self.port))
+        # In-progress, connected and refused sockets all become writable and
+        # are classified from SO_ERROR once selected.
+        if result in (errno.EINPROGRESS, errno.EWOULDBLOCK) or result in ALIVE_ERRNOS:
+            return sock
+        logger.debug(
+            "Pre-flight connect to {target} failed: {}",
+            errno.errorcode.get(result, result),
+            target=address,
+        )
+        sock.close()
+        return None
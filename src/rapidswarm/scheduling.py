@@ -0,0 +1,162 @@
+import heapq
+import itertools
+import random
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, "d": 86400.0}
+DURATION_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h|d)?\s*$")
+
+
+def parse_duration(value: Union[str, int, float, None]) -> Optional[float]:
+    """
+    Converts a duration such as "250ms", "30s", "5m" or "1h" to seconds.
+
+    Plain numbers (or numeric strings without a unit) are taken as seconds.
+
+    Args:
+        value: The duration to convert, or None.
+
+    Returns:
+        Optional[float]: The duration in seconds, or None if value is None.
+
+    Raises:
+        ValueError: If the value is negative or cannot be parsed.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        if value < 0:
+            raise ValueError(f"Duration must not be negative: {value}")
+        return float(value)
+    match = DURATION_PATTERN.match(str(value))
+    if not match:
+        raise ValueError(
+            f"Invalid duration: '{value}'. Expected seconds or a value like '30s', '5m' or '1h'."
+        )
+    return float(match.group(1)) * DURATION_UNITS[match.group(2) or "s"]
+
+
+def backoff_delay(
+    attempt: int, base: float, cap: Optional[float] = None, factor: float = 2.0
+) -> float:
+    """
+    Returns the exponential backoff delay before the given retry attempt.
+
+    Args:
+        attempt (int): The retry number, starting at 1 for the first retry.
+        base (float): The delay before the first retry, in seconds.
+        cap (Optional[float]): The longest delay ever returned, in seconds.
+        factor (float): The growth factor between consecutive retries.
+    """
+    delay = base * factor ** max(attempt - 1, 0)
+    return min(delay, cap) if cap is not None else delay
+
+
+class RoundScheduler:
+    """
+    Runs one round of probe units.
+
+    Each unit is given a random start offset inside the jitter window so that
+    large inventories are not all probed in the same instant. A unit whose
+    execution fails is put back on the schedule after an exponential backoff
+    instead of being retried in place, so one failing target never holds up
+    the rest of the round.
+
+    With max_workers above one, up to that many units execute at once on a
+    thread pool; otherwise units run inline in start-time order.
+
+    The execute callable receives a unit and returns a tuple of
+    (results, failed). A (unit, results) tuple is yielded for each unit as
+    its results become final, i.e. after success or after the last
+    permitted retry.
+
+    A round run in batches, as nodes arrive, passes the time the round
+    started to every batch, so that the jitter window is the round's rather
+    than starting over for each batch.
+    """
+
+    def __init__(
+        self,
+        jitter: float = 0.0,
+        max_retries: int = 0,
+        backoff: float = 1.0,
+        max_backoff: Optional[float] = None,
+        max_workers: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+    ):
+        self.jitter = jitter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_workers = max_workers
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+
+    def run(
+        self,
+        units: Iterable,
+        execute: Callable[[object], Tuple[List, bool]],
+        started: Optional[float] = None,
+    ) -> Iterator[Tuple[object, List]]:
+        sequence = itertools.count()
+        start = self.clock() if started is None else started
+        queue = []
+        for unit in units:
+            offset = self.rng.uniform(0, self.jitter) if self.jitter else 0.0
+            heapq.heappush(queue, (start + offset, next(sequence), 0, unit))
+
+        if self.max_workers > 1:
+            return self._run_concurrently(queue, sequence, execute)
+        return self._run_inline(queue, sequence, execute)
+
+    def _requeue(self, queue, sequence, attempt, unit, failed) -> bool:
+        """Puts a failed unit back on the schedule if it has retries left."""
+        if not failed or attempt >= self.max_retries:
+            return False
+        retry_at = self.clock() + backoff_delay(
+            attempt + 1, self.backoff, self.max_backoff
+        )
+        heapq.heappush(queue, (retry_at, next(sequence), attempt + 1, unit))
+        return True
+
+    def _run_inline(self, queue, sequence, execute) -> Iterator[Tuple[object, List]]:
+        while queue:
+            due, _, attempt, unit = heapq.heappop(queue)
+            delay = due - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+            results, failed = execute(unit)
+            if not self._requeue(queue, sequence, attempt, unit, failed):
+                yield unit, results
+
+    def _run_concurrently(
+        self, queue, sequence, execute
+    ) -> Iterator[Tuple[object, List]]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while queue or running:
+                now = self.clock()
+                while queue and len(running) < self.max_workers and queue[0][0] <= now:
+                    _, _, attempt, unit = heapq.heappop(queue)
+                    running[pool.submit(execute, unit)] = (attempt, unit)
+                if not running:
+                    self.sleep(queue[0][0] - now)
+                    continue
+
+                # Wake up for the next completion, or for the next due unit
+                # when there is a free worker to start it on.
+                timeout = None
+                if queue and len(running) < self.max_workers:
+                    timeout = max(queue[0][0] - now, 0)
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    attempt, unit = running.pop(future)
+                    results, failed = future.result()
+                    if not self._requeue(queue, sequence, attempt, unit, failed):
+                        yield unit, results
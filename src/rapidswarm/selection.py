@@ -0,0 +1,277 @@
+import bisect
+import os
+import re
+import threading
+from collections import defaultdict
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+from pydantic import BaseModel, Field, IPvAnyNetwork, PrivateAttr
+
+from rapidswarm.history import DEFAULT_DATABASE, ResultHistory
+from rapidswarm.models.network_interface import NetworkInterface
+from rapidswarm.models.network_interface_type import NetworkInterfaceType
+from rapidswarm.models.node import Node
+
+# The characters that make a hostname pattern a glob.
+GLOB_CHARACTERS = re.compile(r"[*?\[]")
+
+
+class NodeSelector(BaseModel):
+    """
+    Selects the nodes, and the interfaces of them, that a probe targets, e.g.
+    to re-test one rack after a cable swap without writing a new inventory:
+
+        select:
+          switches: [leaf-07]
+          interface_types: [infiniband]
+
+    A node is selected when it matches every criterion given, and any of
+    the values of each. Criteria on interfaces narrow the selected nodes to
+    their matching interfaces, and nodes without any are left out.
+
+    `failed_in_last_run` selects the nodes with failed or skipped results in
+    the last finished run recorded in the `history` database by the
+    SQLiteReporter, narrowed to the failed interfaces when the results name
+    them.
+    """
+
+    switches: List[str] = Field([], description="Ids of the nodes' switches.")
+    hostnames: List[str] = Field(
+        [], description="Hostnames or hostname globs, e.g. 'gpu-1??'."
+    )
+    cidrs: List[IPvAnyNetwork] = Field(
+        [], description="Networks of the interfaces' addresses, e.g. 10.1.7.0/24."
+    )
+    interface_types: List[NetworkInterfaceType] = []
+    failed_in_last_run: bool = False
+    history: str = Field(
+        DEFAULT_DATABASE, description="Result database of `failed_in_last_run`."
+    )
+
+    _failures: Optional[Dict[str, Set[Optional[str]]]] = PrivateAttr(None)
+
+    def select(self, nodes: List[Node], index: Optional["NodeIndex"] = None):
+        """
+        Returns the selected nodes, in the order given.
+
+        Args:
+            nodes (List[Node]): The nodes to select from.
+            index (Optional[NodeIndex]): An index of the same nodes, which
+                makes selecting take time in proportion to the matches
+                rather than to the nodes.
+
+        Returns:
+            List[Node]: The selected nodes. Nodes narrowed to some of their
+            interfaces are copies.
+        """
+        if index is not None:
+            return index.select(self)
+        return [
+            selected
+            for selected in (self.apply(node) for node in nodes)
+            if selected is not None
+        ]
+
+    def failures(self) -> Dict[str, Set[Optional[str]]]:
+        """The failed nodes of the last run and their interfaces, read once."""
+        if self._failures is None:
+            if not os.path.exists(self.history):
+                logger.warning(
+                    f"No result history at {self.history}, so no node failed "
+                    "in the last run."
+                )
+                self._failures = {}
+            else:
+                history = ResultHistory(self.history)
+                try:
+                    self._failures = history.failures()
+                finally:
+                    history.close()
+        return self._failures
+
+    def apply(self, node: Node) -> Optional[Node]:
+        """The node narrowed to the selected interfaces, or None if not selected."""
+        if self.switches and (
+            node.network_switch is None or node.network_switch.id not in self.switches
+        ):
+            return None
+        if self.hostnames and not any(
+            fnmatchcase(node.hostname, pattern) for pattern in self.hostnames
+        ):
+            return None
+        failed = None
+        if self.failed_in_last_run:
+            failures = self.failures()
+            failed = failures.get(node.hostname)
+            if failed is None and node.id is not None:
+                failed = failures.get(node.id)
+            if failed is None:
+                return None
+            if None in failed:
+                # A result without an interface failed, e.g. the whole unit.
+                failed = None
+
+        if not (self.cidrs or self.interface_types or failed):
+            return node
+        interfaces = [
+            interface
+            for interface in node.network_interfaces
+            if self._selects_interface(interface, failed)
+        ]
+        if not interfaces:
+            return None
+        if len(interfaces) == len(node.network_interfaces):
+            return node
+        return node.model_copy(update={"network_interfaces": interfaces})
+
+    def _selects_interface(
+        self, interface: NetworkInterface, failed: Optional[Set[Optional[str]]]
+    ) -> bool:
+        if self.interface_types and interface.interface_type not in (
+            self.interface_types
+        ):
+            return False
+        if self.cidrs and not (
+            interface.ip_address is not None
+            and any(interface.ip_address in network for network in self.cidrs)
+        ):
+            return False
+        if failed and str(interface.mac_address) not in failed:
+            return False
+        return True
+
+
+class NodeIndex:
+    """
+    Indexes of a set of nodes for selecting some of them quickly, built on
+    first use: a hash of the nodes by switch, by name and of the interfaces
+    by type, the hostnames in sorted order and the interface addresses as
+    sorted integers per IP version.
+
+    A selection looks up each of its criteria, a CIDR with two binary
+    searches and a hostname glob by the range of its literal prefix, and
+    only checks the candidates of the most selective one against the rest.
+    It takes O(log n + k) for k candidates instead of a pass over all n
+    nodes, which matters for re-tests of a rack on 100,000 interfaces.
+
+    Args:
+        nodes (List[Node]): The nodes, typically a scanned inventory. They
+            must not change while the index is in use.
+    """
+
+    def __init__(self, nodes: List[Node]):
+        self.nodes = nodes
+        self._built = False
+        self._lock = threading.Lock()
+
+    def _build(self):
+        self._by_switch: Dict[str, List[int]] = defaultdict(list)
+        self._by_name: Dict[str, List[int]] = defaultdict(list)
+        self._by_type: Dict[NetworkInterfaceType, List[int]] = defaultdict(list)
+        hostnames = []
+        addresses: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        for position, node in enumerate(self.nodes):
+            if node.network_switch is not None:
+                self._by_switch[node.network_switch.id].append(position)
+            self._by_name[node.hostname].append(position)
+            if node.id is not None and node.id != node.hostname:
+                self._by_name[node.id].append(position)
+            hostnames.append((node.hostname, position))
+            for interface in node.network_interfaces:
+                self._by_type[interface.interface_type].append(position)
+                address = interface.ip_address
+                if address is not None:
+                    addresses[address.version].append((int(address), position))
+        hostnames.sort()
+        self._hostnames = [hostname for hostname, _ in hostnames]
+        self._hostname_positions = [position for _, position in hostnames]
+        self._addresses = {}
+        for version, entries in addresses.items():
+            entries.sort()
+            self._addresses[version] = (
+                [address for address, _ in entries],
+                [position for _, position in entries],
+            )
+        self._built = True
+
+    def select(self, selector: NodeSelector) -> List[Node]:
+        """Returns the nodes the selector selects, in the indexed order."""
+        with self._lock:
+            if not self._built:
+                self._build()
+        candidates = None
+        for lookup in (
+            self._switch_candidates,
+            self._failure_candidates,
+            self._cidr_candidates,
+            self._hostname_candidates,
+            self._type_candidates,
+        ):
+            found = lookup(selector)
+            if found is not None and (
+                candidates is None or len(found) < len(candidates)
+            ):
+                candidates = found
+        if candidates is None:
+            candidates = range(len(self.nodes))
+        else:
+            candidates = sorted(set(candidates))
+        return [
+            selected
+            for selected in (selector.apply(self.nodes[i]) for i in candidates)
+            if selected is not None
+        ]
+
+    def _switch_candidates(self, selector: NodeSelector) -> Optional[List[int]]:
+        if not selector.switches:
+            return None
+        return [
+            position
+            for switch in selector.switches
+            for position in self._by_switch.get(switch, ())
+        ]
+
+    def _failure_candidates(self, selector: NodeSelector) -> Optional[List[int]]:
+        if not selector.failed_in_last_run:
+            return None
+        return [
+            position
+            for name in selector.failures()
+            for position in self._by_name.get(name, ())
+        ]
+
+    def _cidr_candidates(self, selector: NodeSelector) -> Optional[List[int]]:
+        if not selector.cidrs:
+            return None
+        candidates = []
+        for network in selector.cidrs:
+            addresses, positions = self._addresses[network.version]
+            low = bisect.bisect_left(addresses, int(network.network_address))
+            high = bisect.bisect_right(addresses, int(network.broadcast_address))
+            candidates.extend(positions[low:high])
+        return candidates
+
+    def _hostname_candidates(self, selector: NodeSelector) -> Optional[List[int]]:
+        if not selector.hostnames:
+            return None
+        candidates = []
+        for pattern in selector.hostnames:
+            prefix = GLOB_CHARACTERS.split(pattern, 1)[0]
+            if not prefix:
+                return None
+            low = bisect.bisect_left(self._hostnames, prefix)
+            # Every hostname starting with the prefix sorts before this.
+            high = bisect.bisect_left(self._hostnames, prefix + "\U0010ffff")
+            candidates.extend(self._hostname_positions[low:high])
+        return candidates
+
+    def _type_candidates(self, selector: NodeSelector) -> Optional[List[int]]:
+        if not selector.interface_types:
+            return None
+        return [
+            position
+            for interface_type in selector.interface_types
+            for position in self._by_type.get(interface_type, ())
+        ]
@@ -0,0 +1,377 @@
+import argparse
+import itertools
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import yaml
+from loguru import logger
+from pydantic import BaseModel, PrivateAttr
+
+from rapidswarm import instrumentation, logs
+from rapidswarm.client import DEFAULT_SOCKET
+from rapidswarm.config import (
+    Config,
+    create_managers,
+    create_reporters,
+    create_scanners,
+    merge_config,
+    parse_config,
+)
+from rapidswarm.health import HealthTracker
+from rapidswarm.models.reporters import BaseReporter
+from rapidswarm.pipeline import Pipeline
+from rapidswarm.plan import compile_plan
+from rapidswarm.plugin_loader import load_plugins
+from rapidswarm.ratelimit import RateLimiter
+from rapidswarm.scheduling import parse_duration
+from rapidswarm.selection import NodeIndex
+
+DEFAULT_MAX_JOBS = 4
+DEFAULT_INVENTORY_TTL = 300.0
+
+
+class ServerLimits(BaseModel):
+    """
+    Limits shared by every job of a daemon, in the format of the
+    `health` and `rate_limits` sections of a configuration. They replace
+    the jobs' own sections, so that concurrent jobs together stay within
+    them.
+    """
+
+    health: Optional[HealthTracker] = None
+    rate_limits: Optional[RateLimiter] = None
+
+
+def encode_result(result) -> Dict:
+    """A result as JSON data, with the name of its type."""
+    if isinstance(result, BaseModel):
+        return {"type": type(result).__name__, **result.model_dump(mode="json")}
+    return result
+
+
+class SocketReporter(BaseReporter):
+    """Streams each batch of a job's results back to the client of the job."""
+
+    _send: Callable[[Dict], None] = PrivateAttr()
+
+    def __init__(self, send: Callable[[Dict], None], **data):
+        super().__init__(**data)
+        self._send = send
+
+    def report(self, data):
+        self.write(data if isinstance(data, list) else [data])
+
+    def write(self, batch: List):
+        if batch:
+            self._send(
+                {"event": "results", "results": [encode_result(r) for r in batch]}
+            )
+
+
+class InventoryCache:
+    """
+    The nodes found by each distinct set of scanners, with an index of them
+    for the probes' selectors, scanned again once they are older than `ttl`
+    seconds. Jobs with the same scanners wait for one scan rather than each
+    running their own.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_INVENTORY_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.scans = 0
+        self._entries: Dict[str, Tuple[float, NodeIndex]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def index(self, config: Config, rescan: bool = False) -> NodeIndex:
+        """The index of the nodes the configuration's scanners find."""
+        key = json.dumps(
+            [scanner.model_dump() for scanner in config.scanners],
+            sort_keys=True,
+            default=str,
+        )
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            entry = self._entries.get(key)
+            if entry is not None and not rescan and self.clock() - entry[0] < self.ttl:
+                return entry[1]
+            nodes = []
+            for scanner in create_scanners(config):
+                name = type(scanner).__name__
+                with instrumentation.span(instrumentation.SCANNER, name):
+                    nodes.extend(scanner.scan())
+            index = NodeIndex(nodes)
+            self._entries[key] = (self.clock(), index)
+            self.scans += 1
+            logger.info(f"Scanned {len(nodes)} nodes")
+            return index
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.rapidswarm.handle(self.rfile, self.wfile)
+
+
+class RapidSwarmDaemon:
+    """
+    Runs configurations sent over a Unix socket, keeping what every run
+    would otherwise set up again warm between them: the interpreter, the
+    plugin registry and the scanned inventory.
+
+    A client sends one JSON request per connection and reads JSON events
+    back, one per line:
+
+    - `{"command": "run", "config": {...}}` runs a configuration, given
+      as the data of a YAML file. `"config_file"` names a file to read
+      instead, `"overrides"` is merged into the configuration with
+      merge_config() and `"rescan": true` skips the inventory cache. The
+      daemon answers `accepted`, then `results` events with batches of
+      results as they are produced, then `done` or `error`.
+    - `{"command": "status"}` answers one `status` event.
+
+    Up to `max_jobs` jobs run at once, the rest wait for a free slot. All
+    jobs share the circuit breaker and rate limits of `limits`.
+
+    Args:
+        socket_path (str): Where to listen.
+        max_jobs (int): Jobs run at the same time.
+        inventory_ttl (float): Seconds a scanned inventory is reused for.
+        limits (Optional[ServerLimits]): Limits shared by all jobs.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        inventory_ttl: float = DEFAULT_INVENTORY_TTL,
+        limits: Optional[ServerLimits] = None,
+    ):
+        self.socket_path = socket_path
+        self.max_jobs = max_jobs
+        self.limits = limits or ServerLimits()
+        self.inventory = InventoryCache(inventory_ttl)
+        self.started = time.time()
+        self.jobs_done = 0
+        self.jobs_failed = 0
+        self.jobs_running = 0
+        self.server = None
+        self._job_ids = itertools.count(1)
+        self._slots = threading.BoundedSemaphore(max_jobs)
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Loads the plugins and starts listening."""
+        load_plugins()
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            if _listening(self.socket_path):
+                raise RuntimeError(
+                    f"A daemon is already listening on {self.socket_path}"
+                )
+            os.unlink(self.socket_path)
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, _Handler)
+        self.server.daemon_threads = True
+        self.server.rapidswarm = self
+        # Only the owner may submit jobs.
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Listening on {self.socket_path}")
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def shutdown(self):
+        """Stops listening. Call from another thread than serve_forever()."""
+        self.server.shutdown()
+
+    def close(self):
+        if self.server is not None:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "event": "status",
+                "pid": os.getpid(),
+                "uptime_seconds": time.time() - self.started,
+                "max_jobs": self.max_jobs,
+                "jobs_running": self.jobs_running,
+                "jobs_done": self.jobs_done,
+                "jobs_failed": self.jobs_failed,
+                "inventories": len(self.inventory),
+                "scans": self.inventory.scans,
+            }
+
+    def handle(self, rfile, wfile):
+        """Serves the request of one connection."""
+        lock = threading.Lock()
+
+        def send(event: Dict):
+            line = (json.dumps(event, default=str) + "\n").encode()
+            with lock:
+                wfile.write(line)
+                wfile.flush()
+
+        try:
+            request = json.loads(rfile.readline())
+        except ValueError as e:
+            send({"event": "error", "message": f"Invalid request: {e}"})
+            return
+        command = request.get("command", "run")
+        if command == "status":
+            send(self.status())
+        elif command == "run":
+            self.run_job(request, send)
+        else:
+            send({"event": "error", "message": f"Unknown command '{command}'"})
+
+    def job_config(self, request: Dict) -> Config:
+        """
+        Raises:
+            ValueError: If the request has no configuration or it is invalid.
+            OSError: If the configuration file cannot be read.
+        """
+        if request.get("config") is not None:
+            data = request["config"]
+        elif request.get("config_file") is not None:
+            with open(request["config_file"]) as file:
+                data = yaml.safe_load(file)
+        else:
+            raise ValueError("A run request needs a 'config' or a 'config_file'.")
+        if request.get("overrides"):
+            data = merge_config(data, request["overrides"])
+        return parse_config(data)
+
+    def run_job(self, request: Dict, send: Callable[[Dict], None]):
+        job = next(self._job_ids)
+        try:
+            config = self.job_config(request)
+        except (ValueError, OSError) as e:
+            send({"event": "error", "job": job, "message": str(e)})
+            return
+        send({"event": "accepted", "job": job})
+
+        with self._slots:
+            with self._lock:
+                self.jobs_running += 1
+            start = time.perf_counter()
+            try:
+                count, nodes = self._run(
+                    job, config, request.get("rescan", False), send
+                )
+            except Exception as e:
+                logger.exception(f"Job {job} failed: {e}")
+                with self._lock:
+                    self.jobs_failed += 1
+                send({"event": "error", "job": job, "message": str(e)})
+            else:
+                with self._lock:
+                    self.jobs_done += 1
+                send(
+                    {
+                        "event": "done",
+                        "job": job,
+                        "results": count,
+                        "nodes": nodes,
+                        "seconds": time.perf_counter() - start,
+                    }
+                )
+            finally:
+                with self._lock:
+                    self.jobs_running -= 1
+
+    def _run(self, job: int, config: Config, rescan: bool, send) -> Tuple[int, int]:
+        index = self.inventory.index(config, rescan)
+        nodes = index.nodes
+        if config.preflight is not None:
+            # Tagging marks interfaces of the nodes, which other jobs share.
+            nodes = config.preflight.apply([n.model_copy(deep=True) for n in nodes])
+            index = NodeIndex(nodes)
+        managers = create_managers(
+            config,
+            nodes,
+            health=self.limits.health or config.health,
+            rate_limiter=self.limits.rate_limits or config.rate_limits,
+        )
+        # Selectors are resolved against the cached index, so a re-test of a
+        # few nodes of a large inventory only touches those nodes.
+        plan = compile_plan(managers, nodes, f"job-{job}", index)
+        reporters = create_reporters(config) + [SocketReporter(send)]
+        pipeline = Pipeline(managers, reporters, plan=plan)
+        pipeline.run(nodes=nodes)
+        return pipeline.result_count, len(nodes)
+
+
+def _listening(socket_path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="rapidswarm serve",
+        description="Run configurations sent over a Unix socket, keeping the "
+        "plugins and scanned inventories warm between runs.",
+    )
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=DEFAULT_MAX_JOBS,
+        help="Jobs run at the same time, the rest wait.",
+    )
+    parser.add_argument(
+        "--inventory-ttl",
+        type=parse_duration,
+        default=DEFAULT_INVENTORY_TTL,
+        help="How long a scanned inventory is reused, e.g. '10m'.",
+    )
+    parser.add_argument(
+        "--limits",
+        help="YAML file with `health` and `rate_limits` sections shared by all "
+        "jobs, replacing their own.",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--log-format", choices=logs.LOG_FORMATS, default=logs.TEXT)
+    args = parser.parse_args(argv)
+
+    sampler = logs.configure(
+        level="DEBUG" if args.verbose else "INFO", log_format=args.log_format
+    )
+    limits = None
+    if args.limits:
+        with open(args.limits) as file:
+            limits = ServerLimits(**(yaml.safe_load(file) or {}))
+    daemon = RapidSwarmDaemon(
+        args.socket,
+        max_jobs=args.max_jobs,
+        inventory_ttl=args.inventory_ttl,
+        limits=limits,
+    )
+    try:
+        daemon.start()
+        daemon.serve_forever()
+    except RuntimeError as e:
+        logger.error(str(e))
+    except KeyboardInterrupt:
+        logger.info("Interrupted, stopping.")
+    finally:
+        daemon.close()
+        logs.finish(sampler)
@@ -0,0 +1,292 @@
+import math
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field, field_validator
+
+from rapidswarm.models.node import Node
+from rapidswarm.scheduling import parse_duration
+from rapidswarm.synthetic import FakeExecutor, SyntheticCluster
+
+
+class LinkProfile(BaseModel):
+    latency: float = Field(
+        0.02, ge=0, description="Median one-way latency, in milliseconds."
+    )
+    jitter: float = Field(
+        0.1,
+        ge=0,
+        description="Spread of the log-normal latency and bandwidth draws.",
+    )
+    bandwidth: float = Field(100.0, gt=0, description="Capacity, in Gbit/s.")
+    loss: float = Field(0.0, ge=0, le=1, description="Chance of dropping each packet.")
+
+
+class FabricFault(BaseModel):
+    """
+    A fault injected into the links of some nodes or the uplinks of some
+    switches. A fault on a switch affects traffic to and from its nodes
+    that crosses the uplink, not traffic between nodes on the switch.
+    """
+
+    nodes: List[str] = Field([], description="Hostnames of the faulty nodes.")
+    switches: List[str] = Field([], description="Ids of the faulty switches.")
+    down: bool = Field(False, description="Drop all traffic.")
+    loss: float = Field(
+        0.0, ge=0, le=1, description="Additional chance of dropping each packet."
+    )
+    latency: float = Field(0.0, ge=0, description="Added one-way latency, in ms.")
+    congestion: float = Field(
+        0.0,
+        ge=0,
+        lt=1,
+        description="Share of the capacity taken by background traffic.",
+    )
+
+
+class FabricTopology(BaseModel):
+    """
+    A leaf-switch fabric: `nodes` nodes, `nodes_per_switch` to a leaf, each
+    leaf connected to the core by an uplink. Probes run from a host at the
+    core, so their traffic crosses the uplink of the target's leaf.
+    """
+
+    nodes: int = Field(4096, ge=1)
+    interfaces_per_node: int = Field(1, ge=1)
+    nodes_per_switch: int = Field(32, ge=1)
+    host_link: LinkProfile = LinkProfile()
+    uplink: LinkProfile = LinkProfile(latency=0.1, bandwidth=400.0)
+    spawn_overhead: float = Field(
+        0.002, description="Time to start a probe's command, e.g. '2ms'."
+    )
+    timeout: float = Field(
+        1.0, description="Time a probe waits for an answer that never comes."
+    )
+    seed: int = 0
+    faults: List[FabricFault] = []
+
+    @field_validator("spawn_overhead", "timeout", mode="before")
+    def validate_duration(cls, v):
+        return parse_duration(v)
+
+
+class _Link:
+    __slots__ = ("latency", "jitter", "bandwidth", "loss", "down", "congestion")
+
+    def __init__(self, profile: LinkProfile):
+        self.latency = profile.latency
+        self.jitter = profile.jitter
+        self.bandwidth = profile.bandwidth
+        self.loss = profile.loss
+        self.down = False
+        self.congestion = 0.0
+
+    def inject(self, fault: FabricFault):
+        self.down = self.down or fault.down
+        self.loss = 1 - (1 - self.loss) * (1 - fault.loss)
+        self.latency += fault.latency
+        self.congestion = max(self.congestion, fault.congestion)
+
+
+class SimulatedFabric(FakeExecutor):
+    """
+    Answers probes with results and durations modeled on a FabricTopology,
+    so managers and their settings can be compared on thousands of nodes
+    without a cluster.
+
+    Used as a context manager, it answers the PingProbe's ping commands
+    like the FakeExecutor. TCP connects and bandwidth tests are modeled by
+    tcp_connect() and bandwidth(). Round-trip times add up the log-normal
+    latency of each link on the path, inflated by 1 / (1 - congestion) for
+    queueing. Concurrent bandwidth tests share the capacity of the links
+    they cross. Every draw depends only on the seed, the probe and how
+    often the same probe ran before, so repeated runs get the same
+    results.
+
+    Time is virtual: every probe advances the clock of the thread running
+    it by its modeled duration, and elapsed() is the latest of those
+    clocks, i.e. how long the run would have taken on the fabric. With a
+    `time_scale` above zero each probe also sleeps for its duration times
+    the scale, so that concurrent probes overlap in real time as well.
+
+    Args:
+        topology (Optional[FabricTopology]): The fabric, by default 4096
+            nodes on 128 leaf switches.
+        time_scale (float): Real seconds slept per modeled second.
+    """
+
+    def __init__(
+        self, topology: Optional[FabricTopology] = None, time_scale: float = 0.0
+    ):
+        super().__init__()
+        self.topology = topology or FabricTopology()
+        self.time_scale = time_scale
+        self.cluster = SyntheticCluster(
+            self.topology.nodes * self.topology.interfaces_per_node,
+            interfaces_per_node=self.topology.interfaces_per_node,
+            nodes_per_switch=self.topology.nodes_per_switch,
+        )
+        self.host_links: Dict[str, _Link] = {}
+        self.uplinks: Dict[str, _Link] = {}
+        # Address: (hostname, switch id).
+        self._addresses: Dict[str, Tuple[str, str]] = {}
+        for node in self.cluster.nodes:
+            switch = self.cluster.switch(node.switch).id
+            self.host_links[node.hostname] = _Link(self.topology.host_link)
+            self.uplinks.setdefault(switch, _Link(self.topology.uplink))
+            for interface in node.interfaces:
+                self._addresses[interface.ip_address] = (node.hostname, switch)
+        for fault in self.topology.faults:
+            for hostname in fault.nodes:
+                self.host_links[hostname].inject(fault)
+            for switch in fault.switches:
+                self.uplinks[switch].inject(fault)
+        self.probes: Counter = Counter()
+        self._draws: Counter = Counter()
+        self._clocks: Dict[int, float] = {}
+        # Start and end times of the bandwidth tests on each link.
+        self._flows: Dict[int, List[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def inventory(self) -> List[Node]:
+        """The fabric's nodes, as a scanner would return them."""
+        return self.cluster.inventory()
+
+    def elapsed(self) -> float:
+        """Modeled seconds since the start, or the last reset()."""
+        with self._lock:
+            return max(self._clocks.values(), default=0.0)
+
+    def reset(self):
+        """Restarts the clock and the draws, for another run on the fabric."""
+        with self._lock:
+            self.probes.clear()
+            self._draws.clear()
+            self._clocks.clear()
+            self._flows.clear()
+
+    def _path(self, address: str, source: Optional[str]) -> Optional[List[_Link]]:
+        """The links from the source address, or the core, to the address."""
+        address, source = str(address), source and str(source)
+        if address not in self._addresses:
+            return None
+        hostname, switch = self._addresses[address]
+        if source is None:
+            return [self.uplinks[switch], self.host_links[hostname]]
+        if source not in self._addresses:
+            return None
+        source_hostname, source_switch = self._addresses[source]
+        if source_switch == switch:
+            return [self.host_links[source_hostname], self.host_links[hostname]]
+        return [
+            self.host_links[source_hostname],
+            self.uplinks[source_switch],
+            self.uplinks[switch],
+            self.host_links[hostname],
+        ]
+
+    def _rng(self, kind: str, address: str, source: Optional[str]) -> random.Random:
+        key = (kind, str(address), source and str(source))
+        with self._lock:
+            self._draws[key] += 1
+            self.probes[kind] += 1
+            draw = self._draws[key]
+        return random.Random(f"{self.topology.seed}/{kind}/{key[2]}/{key[1]}/{draw}")
+
+    def _round_trip(self, path: List[_Link], rng: random.Random) -> Optional[float]:
+        """A round trip over the path in milliseconds, or None if it was lost."""
+        total = 0.0
+        for link in path:
+            # The request and the reply each cross the link once.
+            if link.down or rng.random() < link.loss or rng.random() < link.loss:
+                return None
+            total += (
+                link.latency
+                * math.exp(link.jitter * rng.gauss(0, 1))
+                / (1 - link.congestion)
+            )
+        return 2 * total
+
+    def _now(self) -> float:
+        with self._lock:
+            return self._clocks.get(threading.get_ident(), 0.0)
+
+    def _advance(self, seconds: float):
+        ident = threading.get_ident()
+        with self._lock:
+            self._clocks[ident] = self._clocks.get(ident, 0.0) + seconds
+        if self.time_scale:
+            time.sleep(seconds * self.time_scale)
+
+    def reply(self, address: str) -> Optional[float]:
+        """Pings the address from the core: the round-trip time in ms, or None."""
+        path = self._path(address, None)
+        rtt = (
+            None
+            if path is None
+            else self._round_trip(path, self._rng("ping", address, None))
+        )
+        timing = self.topology.timeout if rtt is None else rtt / 1000
+        self._advance(self.topology.spawn_overhead + timing)
+        return rtt
+
+    def tcp_connect(
+        self, address: str, source: Optional[str] = None
+    ) -> Optional[float]:
+        """
+        Connects to the address from the source address, or from the core.
+
+        Returns:
+            Optional[float]: The connect time in ms, or None on a timeout.
+        """
+        path = self._path(address, source)
+        rtt = (
+            None
+            if path is None
+            else self._round_trip(path, self._rng("tcp", address, source))
+        )
+        self._advance(self.topology.timeout if rtt is None else rtt / 1000)
+        return rtt
+
+    def bandwidth(
+        self, address: str, source: Optional[str] = None, seconds: float = 10.0
+    ) -> Optional[float]:
+        """
+        Runs a bandwidth test of `seconds` to the address from the source
+        address, or from the core. The test gets the free capacity of the
+        busiest link on its path, split evenly with the other tests on the
+        link at the time.
+
+        Returns:
+            Optional[float]: The throughput in Gbit/s, or None if the test
+            could not connect.
+        """
+        path = self._path(address, source)
+        rng = self._rng("bandwidth", address, source)
+        rtt = None if path is None else self._round_trip(path, rng)
+        if rtt is None:
+            self._advance(self.topology.spawn_overhead + self.topology.timeout)
+            return None
+
+        start = self._now()
+        end = start + self.topology.spawn_overhead + rtt / 1000 + seconds
+        throughput = float("inf")
+        with self._lock:
+            horizon = min(self._clocks.values(), default=start)
+            for link in path:
+                flows = [
+                    flow
+                    for flow in self._flows.get(id(link), [])
+                    if flow[1] > min(horizon, start)
+                ]
+                sharing = 1 + sum(1 for flow in flows if flow[0] <= start < flow[1])
+                flows.append((start, end))
+                self._flows[id(link)] = flows
+                free = link.bandwidth * (1 - link.congestion) / sharing
+                throughput = min(throughput, free)
+        throughput *= math.exp(-path[0].jitter * abs(rng.gauss(0, 1)))
+        self._advance(end - start)
+        return throughput
@@ -0,0 +1,308 @@
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from rapidswarm.models.results import KEY_FIELDS, find_field, numeric_fields
+
+DEFAULT_COMPRESSION = 100
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+# Groupings of results that get their own sketches. "switch" is looked up
+# from the node of a result, the other names are result fields.
+DEFAULT_GROUPINGS = (("node", "interface"), ("switch",))
+
+
+class TDigest:
+    """
+    Merging t-digest: an approximation of a distribution in a bounded
+    number of weighted centroids, accurate to a small fraction of a percent
+    near the tails, where p99 lives, and coarser around the median.
+
+    Values are buffered and merged into the centroids in bulk. Merging
+    sorts centroids and buffered values together and bins them by the k1
+    scale function, k(q) = compression / π · asin(2q - 1), so that each
+    centroid covers at most one unit of k. That keeps at most `compression`
+    centroids whatever the number of values.
+
+    Args:
+        compression (int): The most centroids kept.
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self._buffer: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._buffered = 0
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum()) + sum(w.sum() for _, w in self._buffer)
+
+    def add(self, values: np.ndarray, weights: Optional[np.ndarray] = None):
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.ones(len(values)) if weights is None else weights
+        present = ~np.isnan(values)
+        values, weights = values[present], weights[present]
+        if not len(values):
+            return
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self._buffer.append((values, weights))
+        self._buffered += len(values)
+        if self._buffered >= 10 * self.compression:
+            self.compress()
+
+    def merge(self, other: "TDigest"):
+        """Adds the centroids of another digest, e.g. of another shard."""
+        other.compress()
+        if len(other.means):
+            self.add(other.means, other.weights)
+            self.minimum = min(self.minimum, other.minimum)
+            self.maximum = max(self.maximum, other.maximum)
+
+    def compress(self):
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means] + [v for v, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [w for _, w in self._buffer])
+        self._buffer, self._buffered = [], 0
+
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        before = (np.cumsum(weights) - weights) / total
+        k = self.compression / np.pi * np.arcsin(2 * before - 1)
+        bins = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.diff(bins, prepend=-1))
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q) -> np.ndarray:
+        """Estimates one or more quantiles, q in [0, 1]."""
+        self.compress()
+        q = np.asarray(q, dtype=np.float64)
+        if not len(self.means):
+            return np.full(q.shape, np.nan)
+        total = self.weights.sum()
+        # Each centroid's mean sits at the middle of its weight, and the
+        # extremes at the ends of the distribution.
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate(([0.0], centers, [total]))
+        values = np.concatenate(([self.minimum], self.means, [self.maximum]))
+        return np.interp(q * total, positions, values)
+
+
+class StreamingSummary:
+    """
+    Constant-memory summary of a metric: count, mean and variance, kept
+    exactly with Welford's algorithm in Chan's batched form, plus a t-digest
+    for quantiles. Summaries of disjoint samples merge into the summary of
+    their union.
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.digest = TDigest(compression)
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        self._combine(len(values), mean, m2)
+        self.digest.add(values)
+
+    def merge(self, other: "StreamingSummary"):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+            self.digest.merge(other.digest)
+
+    def _combine(self, count: int, mean: float, m2: float):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else float("nan")
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    def quantile(self, q) -> np.ndarray:
+        return self.digest.quantile(q)
+
+
+# A sketch is identified by its grouping, e.g. "node+interface", the
+# group's label, e.g. "node=n1,interface=eth0", and the metric.
+SketchKey = Tuple[str, str, str]
+
+
+class SketchSet:
+    """
+    StreamingSummaries of result metrics per group, e.g. per interface and
+    per switch, for runs too long to keep every result.
+
+    Args:
+        groupings (Sequence[Sequence[str]]): Each grouping is a list of key
+            names: result fields such as "node" or "interface", or
+            "switch", the switch of the result's node.
+        metrics (Optional[Sequence[str]]): Result fields to summarize.
+            Defaults to every int and float field.
+        compression (int): t-digest compression, see TDigest.
+    """
+
+    def __init__(
+        self,
+        groupings: Sequence[Sequence[str]] = DEFAULT_GROUPINGS,
+        metrics: Optional[Sequence[str]] = None,
+        compression: int = DEFAULT_COMPRESSION,
+    ):
+        self.groupings = [tuple(grouping) for grouping in groupings]
+        self.metrics = None if metrics is None else list(metrics)
+        self.compression = compression
+        self.summaries: Dict[SketchKey, StreamingSummary] = {}
+        self.switches: Dict[str, str] = {}
+        self._layouts = {}
+
+    def add_nodes(self, nodes: Iterable):
+        """Records the switch of each node, for the "switch" grouping."""
+        for node in nodes:
+            if node.network_switch is not None:
+                # Results name their node by hostname or by id.
+                self.switches[node.hostname] = node.network_switch.id
+                if node.id:
+                    self.switches[node.id] = node.network_switch.id
+
+    def _layout(self, model_class):
+        """Finds the key fields and metrics of a result class once."""
+        layout = self._layouts.get(model_class)
+        if layout is None:
+            keys = {
+                name: find_field(model_class, KEY_FIELDS.get(name, (name,)))
+                for grouping in self.groupings
+                for name in grouping
+                if name != "switch"
+            }
+            node = find_field(model_class, KEY_FIELDS["node"])
+            metrics = numeric_fields(model_class)
+            if self.metrics is not None:
+                metrics = [name for name in metrics if name in self.metrics]
+            layout = self._layouts[model_class] = (keys, node, metrics)
+        return layout
+
+    def add_results(self, batch: Iterable[BaseModel]):
+        samples: Dict[SketchKey, list] = {}
+        for result in batch:
+            keys, node_field, metrics = self._layout(type(result))
+            if not metrics:
+                continue
+            data = result.__dict__
+            values = {name: data[field] for name, field in keys.items() if field}
+            if node_field is not None:
+                values["switch"] = self.switches.get(str(data[node_field]))
+            for grouping in self.groupings:
+                if any(values.get(name) is None for name in grouping):
+                    continue
+                label = ",".join(f"{name}={values[name]}" for name in grouping)
+                for metric in metrics:
+                    value = data[metric]
+                    if value is not None:
+                        key = ("+".join(grouping), label, metric)
+                        samples.setdefault(key, []).append(value)
+        for key, values in samples.items():
+            self.summary(key).add(np.array(values, dtype=np.float64))
+
+    def summary(self, key: SketchKey) -> StreamingSummary:
+        summary = self.summaries.get(key)
+        if summary is None:
+            summary = self.summaries[key] = StreamingSummary(self.compression)
+        return summary
+
+    def merge(self, other: "SketchSet"):
+        """Merges the summaries of another set, e.g. of another shard or run."""
+        for key, summary in other.summaries.items():
+            self.summary(key).merge(summary)
+
+    def query(
+        self,
+        metric: Optional[str] = None,
+        grouping: Optional[str] = None,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ) -> List[Dict]:
+        """
+        Returns count, mean, std, min, the given quantiles and max of each
+        matching sketch, sorted by grouping, label and metric.
+        """
+        rows = []
+        for key in sorted(self.summaries):
+            if (grouping is not None and key[0] != grouping) or (
+                metric is not None and key[2] != metric
+            ):
+                continue
+            summary = self.summaries[key]
+            row = {"grouping": key[0], "group": key[1], "metric": key[2]}
+            row.update(count=summary.count, mean=summary.mean, std=summary.std)
+            row["min"] = summary.digest.minimum
+            for q, value in zip(quantiles, summary.quantile(quantiles).tolist()):
+                row[f"p{q * 100:g}"] = value
+            row["max"] = summary.digest.maximum
+            rows.append(row)
+        return rows
+
+    def save(self, path: str):
+        """Writes the set to a .npz file, replacing it atomically."""
+        keys = list(self.summaries)
+        summaries = [self.summaries[key] for key in keys]
+        for summary in summaries:
+            summary.digest.compress()
+        sizes = [len(summary.digest.means) for summary in summaries]
+        arrays = {
+            "keys": np.array(keys, dtype=str).reshape(len(keys), 3),
+            "compression": np.array(self.compression),
+            "stats": np.array(
+                [
+                    (s.count, s.mean, s.m2, s.digest.minimum, s.digest.maximum)
+                    for s in summaries
+                ],
+                dtype=np.float64,
+            ).reshape(len(keys), 5),
+            "offsets": np.cumsum([0] + sizes),
+            "means": np.concatenate([s.digest.means for s in summaries] + [[]]),
+            "weights": np.concatenate([s.digest.weights for s in summaries] + [[]]),
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str, **options) -> "SketchSet":
+        with np.load(path) as data:
+            compression = int(data["compression"])
+            sketches = cls(compression=compression, **options)
+            offsets = data["offsets"]
+            means, weights = data["means"], data["weights"]
+            for index, (key, stats) in enumerate(zip(data["keys"], data["stats"])):
+                summary = sketches.summary(tuple(str(part) for part in key))
+                count, summary.mean, summary.m2, minimum, maximum = stats.tolist()
+                summary.count = int(count)
+                digest = summary.digest
+                digest.minimum, digest.maximum = minimum, maximum
+                start, stop = offsets[index], offsets[index + 1]
+                digest.means = means[start:stop].copy()
+                digest.weights = weights[start:stop].copy()
+        return sketches
@@ -0,0 +1,286 @@
+import hashlib
+import subprocess
+import threading
+from typing import Dict, List, Optional
+
+from rapidswarm.models.network_interface import NetworkInterface
+from rapidswarm.models.network_interface_type import NetworkInterfaceType
+from rapidswarm.models.node import NetworkSwitch, Node
+
+# The CSVScanner types interfaces with this MAC prefix as InfiniBand.
+INFINIBAND_MAC_PREFIX = "00:02:c9"
+ETHERNET_MAC_PREFIX = "02:00:00"
+
+CSV_HEADER = (
+    "node_name,interface_name,mac_address,ip_address,switch,switch_model,switch_ip"
+)
+SWITCH_MODEL = "synthetic-leaf"
+
+
+class SyntheticInterface:
+    __slots__ = ("name", "mac_address", "ip_address", "interface_type")
+
+    def __init__(self, name, mac_address, ip_address, interface_type):
+        self.name = name
+        self.mac_address = mac_address
+        self.ip_address = ip_address
+        self.interface_type = interface_type
+
+
+class SyntheticNode:
+    __slots__ = ("hostname", "switch", "interfaces")
+
+    def __init__(self, hostname, switch, interfaces):
+        self.hostname = hostname
+        self.switch = switch
+        self.interfaces = interfaces
+
+
+def _address(prefix: str, index: int) -> str:
+    return f"{prefix}:{index >> 16 & 255:02x}:{index >> 8 & 255:02x}:{index & 255:02x}"
+
+
+class SyntheticCluster:
+    """
+    A made-up cluster of nodes spread over leaf switches, for tests and
+    benchmarks. It renders the inventory as the CSVScanner's CSV, nmap XML
+    and arp-scan output, and pairs with FakeExecutor to be probed without
+    a network.
+
+    Nodes are named node00000, node00001, ... and the n-th switch holds
+    nodes n * nodes_per_switch onwards. Every node's first interface is
+    Ethernet, any further ones are InfiniBand. Addresses are unique up to
+    2**24 interfaces.
+
+    Args:
+        interfaces (int): Total number of interfaces.
+        interfaces_per_node (int): Interfaces of each node; the last node
+            gets what is left over.
+        nodes_per_switch (int): Nodes on each leaf switch.
+    """
+
+    def __init__(
+        self,
+        interfaces: int,
+        interfaces_per_node: int = 2,
+        nodes_per_switch: int = 32,
+    ):
+        self.interface_count = interfaces
+        self.interfaces_per_node = interfaces_per_node
+        self.nodes_per_switch = nodes_per_switch
+        self.nodes: List[SyntheticNode] = []
+        for index in range(0, interfaces, interfaces_per_node):
+            number = index // interfaces_per_node
+            node_interfaces = []
+            for port in range(min(interfaces_per_node, interfaces - index)):
+                address = index + port + 1
+                ip_address = ".".join(
+                    str(part)
+                    for part in (
+                        10,
+                        address >> 16 & 255,
+                        address >> 8 & 255,
+                        address & 255,
+                    )
+                )
+                if port == 0:
+                    interface = SyntheticInterface(
+                        "eth0",
+                        _address(ETHERNET_MAC_PREFIX, address),
+                        ip_address,
+                        NetworkInterfaceType.ETHERNET,
+                    )
+                else:
+                    interface = SyntheticInterface(
+                        f"ib{port - 1}",
+                        _address(INFINIBAND_MAC_PREFIX, address),
+                        ip_address,
+                        NetworkInterfaceType.INFINIBAND,
+                    )
+                node_interfaces.append(interface)
+            self.nodes.append(
+                SyntheticNode(
+                    hostname=f"node{number:05d}",
+                    switch=number // nodes_per_switch,
+                    interfaces=node_interfaces,
+                )
+            )
+
+    @property
+    def switch_count(self) -> int:
+        return self.nodes[-1].switch + 1 if self.nodes else 0
+
+    def switch(self, number: int) -> NetworkSwitch:
+        return NetworkSwitch(
+            id=f"leaf{number:03d}",
+            model=SWITCH_MODEL,
+            ip_address=f"10.255.{number >> 8 & 255}.{number & 255}",
+        )
+
+    def inventory(self) -> List[Node]:
+        """The cluster as the Nodes a scanner would return."""
+        switches = [self.switch(number) for number in range(self.switch_count)]
+        return [
+            Node(
+                id=node.hostname,
+                hostname=node.hostname,
+                network_switch=switches[node.switch],
+                network_interfaces=[
+                    NetworkInterface(
+                        mac_address=interface.mac_address,
+                        ip_address=interface.ip_address,
+                        interface_type=interface.interface_type,
+                    )
+                    for interface in node.interfaces
+                ],
+            )
+            for node in self.nodes
+        ]
+
+    def csv(self) -> str:
+        """The inventory in the CSVScanner's format, with switch columns."""
+        lines = [CSV_HEADER]
+        for node in self.nodes:
+            switch = self.switch(node.switch)
+            for interface in node.interfaces:
+                lines.append(
+                    f"{node.hostname},{interface.name},{interface.mac_address},"
+                    f"{interface.ip_address},{switch.id},{switch.model},"
+                    f"{switch.ip_address}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def nmap_xml(self) -> bytes:
+        """`nmap -sn -oX -` output with every interface as an up host."""
+        hosts = [
+            f'<host><status state="up" reason="arp-response"/>'
+            f'<address addr="{interface.ip_address}" addrtype="ipv4"/>'
+            f'<address addr="{interface.mac_address.upper()}" addrtype="mac"/>'
+            f'<hostnames><hostname name="{node.hostname}" type="PTR"/></hostnames>'
+            f"</host>"
+            for node in self.nodes
+            for interface in node.interfaces
+        ]
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<nmaprun scanner="nmap" args="nmap -sn 10.0.0.0/8 -oX -">\n'
+            + "\n".join(hosts)
+            + f'\n<runstats><hosts up="{len(hosts)}" down="0"/></runstats>'
+            "\n</nmaprun>\n"
+        ).encode()
+
+    def arp_scan(self) -> str:
+        """`arp-scan` output with a line per interface."""
+        lines = [
+            "Interface: eth0, type: EN10MB, MAC: 02:00:00:ff:ff:ff, IPv4: 10.0.0.254",
+            "Starting arp-scan 1.10.0 with 16777216 hosts "
+            "(https://github.com/royhills/arp-scan)",
+        ]
+        lines.extend(
+            f"{interface.ip_address}\t{interface.mac_address}\t(Unknown)"
+            for node in self.nodes
+            for interface in node.interfaces
+        )
+        lines.append("")
+        lines.append(
+            f"Ending arp-scan 1.10.0: 16777216 hosts scanned. "
+            f"{self.interface_count} responded"
+        )
+        return "\n".join(lines) + "\n"
+
+
+def _unit_hash(text: str) -> float:
+    """A number in [0, 1) that depends only on the text."""
+    digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
+
+
+class FakeExecutor:
+    """
+    Answers the ping commands of probes without a network, so runs over a
+    SyntheticCluster can be timed without sending a packet.
+
+    Used as a context manager, it replaces subprocess.check_output, which
+    the PingProbe calls once per interface. Commands other than ping are
+    passed on to the real function. Round-trip times and failures depend
+    only on the address, so every run gets the same results.
+
+    Args:
+        latency (float): Typical round-trip time in milliseconds.
+        failure_rate (float): Fraction of addresses that do not answer.
+    """
+
+    def __init__(self, latency: float = 0.2, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._original = None
+        self._calls_lock = threading.Lock()
+
+    def reply(self, address: str) -> Optional[float]:
+        """The round-trip time of an address, or None if it does not answer."""
+        draw = _unit_hash(address)
+        if draw < self.failure_rate:
+            return None
+        return self.latency * (0.5 + draw)
+
+    def ping(self, address: str) -> str:
+        rtt = self.reply(address)
+        received = 0 if rtt is None else 1
+        lines = [f"PING {address} ({address}): 56 data bytes"]
+        if rtt is not None:
+            lines.append(
+                f"64 bytes from {address}: icmp_seq=0 ttl=64 time={rtt:.3f} ms"
+            )
+        lines.extend(
+            [
+                "",
+                f"--- {address} ping statistics ---",
+                f"1 packets transmitted, {received} packets received, "
+                f"{100.0 * (1 - received):.1f}% packet loss",
+            ]
+        )
+        if rtt is not None:
+            lines.append(
+                f"round-trip min/avg/max/stddev = {rtt:.3f}/{rtt:.3f}/{rtt:.3f}/0.000 ms"
+            )
+        output = "\n".join(lines) + "\n"
+        if rtt is None:
+            raise subprocess.CalledProcessError(2, ["ping", address], output=output)
+        return output
+
+    def check_output(self, command, *args, **kwargs):
+        if isinstance(command, str):
+            command = command.split()
+        if command and command[0] == "ping":
+            with self._calls_lock:
+                self.calls += 1
+            return self.ping(command[-1])
+        return self._original(command, *args, **kwargs)
+
+    def __enter__(self) -> "FakeExecutor":
+        self._original = subprocess.check_output
+        subprocess.check_output = self.check_output
+        return self
+
+    def __exit__(self, *exc_info):
+        subprocess.check_output = self._original
+
+
+def ping_outputs(cluster: SyntheticCluster, executor: FakeExecutor) -> List[Dict]:
+    """The PingProbe's raw outputs for every interface, for its parser."""
+    outputs = []
+    for node in cluster.nodes:
+        for interface in node.interfaces:
+            try:
+                output = executor.ping(interface.ip_address)
+            except subprocess.CalledProcessError as e:
+                output = e.output
+            outputs.append(
+                {
+                    "node": node.hostname,
+                    "interface": interface.mac_address,
+                    "output": output,
+                }
+            )
+    return outputs
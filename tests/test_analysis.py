@@ -0,0 +1,123 @@
+import math
+
+import numpy as np
+import pytest
+
+from rapidswarm.analysis import load_columns, main, p2p_stats, summarize
+from rapidswarm.columnar import NpyStoreWriter
+
+HEADER = "test_name,client_ip,server_ip,bw_average_mbps,msg_rate_mpps\n"
+
+
+def write_csv(path, rows):
+    with open(path, "w") as file:
+        file.write(HEADER)
+        for client, server, bandwidth, rate in rows:
+            file.write(f"ib_write_bw,{client},{server},{bandwidth},{rate}\n")
+    return str(path)
+
+
+def test_summarize_matches_numpy_per_group():
+    rng = np.random.default_rng(1)
+    codes = rng.integers(0, 5, 1000)
+    values = rng.normal(100, 10, 1000)
+    values[::7] = np.nan
+
+    summary = summarize(codes, values, groups=6)
+
+    for group in range(5):
+        group_values = values[(codes == group) & ~np.isnan(values)]
+        assert summary["count"][group] == len(group_values)
+        assert summary["median"][group] == pytest.approx(np.median(group_values))
+        assert summary["p95"][group] == pytest.approx(np.percentile(group_values, 95))
+        assert summary["std"][group] == pytest.approx(np.std(group_values, ddof=1))
+        iqr = np.percentile(group_values, 75) - np.percentile(group_values, 25)
+        assert summary["iqr"][group] == pytest.approx(iqr)
+    # A group without values.
+    assert summary["count"][5] == 0
+    assert math.isnan(summary["median"][5])
+
+
+def test_summarize_whole_dataset():
+    summary = summarize(None, np.array([3.0, 1.0, 2.0, np.nan]))
+    assert summary["median"].tolist() == [2.0]
+    assert summary["min"].tolist() == [1.0]
+    assert summary["max"].tolist() == [3.0]
+
+
+def test_load_columns_from_csv_with_missing_values(tmpdir):
+    path = write_csv(
+        tmpdir.join("data.csv"),
+        [("10.0.0.2", "10.0.0.1", 100.0, 1.5), ("10.0.0.1", "10.0.0.2", "", 2.5)],
+    )
+
+    keys, values = load_columns(path, keys=["client_ip"], values=["bw_average_mbps"])
+
+    assert keys["client_ip"].labels == ["10.0.0.2", "10.0.0.1"]
+    assert keys["client_ip"].codes.tolist() == [0, 1]
+    assert values["bw_average_mbps"][0] == 100.0
+    assert math.isnan(values["bw_average_mbps"][1])
+
+
+def test_load_columns_rejects_missing_columns(tmpdir):
+    path = write_csv(tmpdir.join("data.csv"), [("a", "b", 1, 2)])
+    with pytest.raises(ValueError, match="peak"):
+        load_columns(path, values=["peak"])
+
+
+def test_load_columns_from_result_store(tmpdir):
+    directory = str(tmpdir.join("report.cols"))
+    writer = NpyStoreWriter(directory)
+    writer.append(
+        {
+            "server_ip": ["10.0.0.9", "10.0.0.9"],
+            "client_ip": ["10.0.0.1", "10.0.0.2"],
+            "bw_average_mbps": [10.0, None],
+        }
+    )
+    writer.close()
+
+    keys, values = load_columns(
+        directory, keys=["client_ip"], values=["bw_average_mbps"]
+    )
+
+    client = keys["client_ip"]
+    assert [client.labels[code] for code in client.codes] == ["10.0.0.1", "10.0.0.2"]
+    assert values["bw_average_mbps"][0] == 10.0
+    assert math.isnan(values["bw_average_mbps"][1])
+
+
+def test_p2p_stats_groups_by_client_in_address_order(tmpdir):
+    rows = [("10.0.0.10", "s", 100.0 + i, 1.0) for i in range(5)]
+    rows += [("10.0.0.9", "s", 10.0 + i, 2.0) for i in range(4)]
+    path = write_csv(tmpdir.join("data.csv"), rows)
+
+    stats = p2p_stats(path)
+
+    assert stats.labels == ["10.0.0.9", "10.0.0.10"]
+    bandwidth = stats.groups["bw_average_mbps"]
+    assert bandwidth["median"].tolist() == [11.5, 102.0]
+    assert bandwidth["count"].tolist() == [4, 5]
+    assert stats.overall["msg_rate_mpps"]["median"] == 1.0
+
+
+def test_p2p_stats_command(tmpdir, monkeypatch, capsys):
+    # The column cache goes to the working directory.
+    monkeypatch.chdir(tmpdir)
+    rows = [(f"10.0.0.{i % 3}", "s", 100.0 + i, 1.0 + i) for i in range(30)]
+    path = write_csv(tmpdir.join("data.csv"), rows)
+
+    main(["p2p-stats", path, "--no-color"])
+
+    output = capsys.readouterr().out
+    assert "Median of bw_average_mbps:" in output
+    assert "\033[" not in output
+    plots = output.split("Box and Whiskers Plot:")[1].splitlines()[2:]
+    assert [line.split()[0] for line in plots] == ["10.0.0.0", "10.0.0.1", "10.0.0.2"]
+    assert all("0" in line.split()[1] for line in plots)
+
+
+def test_p2p_stats_command_reports_missing_columns(tmpdir):
+    path = write_csv(tmpdir.join("data.csv"), [("a", "b", 1, 2)])
+    with pytest.raises(SystemExit):
+        main(["p2p-stats", path, "--metric", "bw_peak_mbps"])
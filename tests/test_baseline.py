@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+
+from rapidswarm.analysis import Baseline, RegressionReport, compare, main
+from rapidswarm.analysis.baseline import Moments, compare_moments, significant
+from rapidswarm.analysis.data import KeyColumn
+
+NODES = [f"10.0.0.{i}" for i in range(1, 9)]
+
+
+def all_pairs(bandwidth, repeats=1, seed=0, order=NODES):
+    """Summarizes an all-pairs run of NODES with the given link means."""
+    rng = np.random.default_rng(seed)
+    size = len(order)
+    clients = np.repeat(np.arange(size), size * repeats)
+    servers = np.tile(np.repeat(np.arange(size), repeats), size)
+    keep = clients != servers
+    clients, servers = clients[keep], servers[keep]
+    means = np.array([bandwidth(order[c], order[s]) for c, s in zip(clients, servers)])
+    values = means + rng.normal(0, 1, len(means))
+    return Baseline.from_columns(
+        KeyColumn(clients, list(order)),
+        KeyColumn(servers, list(order)),
+        {"bw_average_mbps": values, "latency": 1000 / values},
+    )
+
+
+def normal(client, server):
+    return 100.0
+
+
+def slow_link(client, server):
+    return 70.0 if (client, server) == ("10.0.0.3", "10.0.0.5") else 100.0
+
+
+def test_baseline_keeps_link_and_node_moments(tmpdir):
+    # 10.0.0.2 -> 10.0.0.1 twice, then 10.0.0.1 -> 10.0.0.3 twice.
+    baseline = Baseline.from_columns(
+        KeyColumn(np.array([0, 0, 1, 1]), ["10.0.0.2", "10.0.0.1"]),
+        KeyColumn(np.array([0, 0, 1, 1]), ["10.0.0.1", "10.0.0.3"]),
+        {"bw": np.array([10.0, 14.0, np.nan, 20.0])},
+    )
+    path = str(tmpdir.join("base.npz"))
+    baseline.save(path)
+    baseline = Baseline.load(path)
+
+    assert baseline.labels == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    links = baseline.stats["link"]["bw"]
+    assert links.count.tolist() == [1, 2]
+    assert links.mean.tolist() == [20.0, 12.0]
+    assert links.variance[1] == 8.0
+    nodes = baseline.stats["node"]["bw"]
+    assert nodes.count.tolist() == [3, 2, 1]
+    assert nodes.mean[0] == pytest.approx(44 / 3)
+    assert nodes.variance[0] == pytest.approx(np.var([10, 14, 20], ddof=1))
+
+
+def test_unchanged_run_has_no_regressions():
+    baseline = all_pairs(normal, seed=1)
+    run = all_pairs(normal, seed=2)
+    assert RegressionReport(baseline, run).count() == 0
+
+
+def test_slow_link_is_ranked_first_in_both_directions():
+    baseline = all_pairs(normal, repeats=5, seed=1)
+    # The same nodes listed in another order still match.
+    run = all_pairs(slow_link, repeats=5, seed=2, order=NODES[::-1])
+
+    report = RegressionReport(baseline, run)
+
+    rows = report.rows(level="link")
+    assert [(row["name"], row["metric"]) for row in rows] == [
+        ("10.0.0.3 -> 10.0.0.5", "latency"),
+        ("10.0.0.3 -> 10.0.0.5", "bw_average_mbps"),
+    ]
+    assert rows[1]["worse_by"] == pytest.approx(0.3, abs=0.02)
+    assert report.compared("link") == len(NODES) * (len(NODES) - 1)
+
+
+def test_tolerance_hides_small_regressions():
+    baseline = all_pairs(normal, repeats=20, seed=1)
+    run = all_pairs(lambda c, s: 97.0, repeats=20, seed=2)
+
+    assert compare(baseline, run, tolerance=0.05)[0].keys.size == 0
+    flagged = compare(baseline, run, tolerance=0.01, lower_better=[])[0]
+    assert flagged.level == "link" and flagged.metric == "bw_average_mbps"
+    assert len(flagged.keys) == len(NODES) * (len(NODES) - 1)
+
+
+def test_significant_controls_the_false_discovery_rate():
+    p = np.array([0.001, 0.008, 0.039, 0.041, 0.042, 0.06, 0.074, 0.205, 0.212, 0.216])
+    assert significant(p, 0.05).tolist() == [True, True] + [False] * 8
+    assert not significant(p, 0.05, tests=1000).any()
+
+
+def test_groups_without_a_variance_are_untested():
+    # A single link measured once per run leaves no variance to pool.
+    single = compare_moments(
+        Moments(np.array([1]), np.array([100.0]), np.array([0.0])),
+        Moments(np.array([1]), np.array([50.0]), np.array([0.0])),
+        lower_better=False,
+        tolerance=0.1,
+    )
+    # Repeated values without any spread.
+    constant = compare_moments(
+        Moments(np.array([3]), np.array([100.0]), np.array([0.0])),
+        Moments(np.array([3]), np.array([50.0]), np.array([0.0])),
+        lower_better=False,
+        tolerance=0.1,
+    )
+
+    _, _, z, p = single
+    assert np.isnan(z).all() and np.isnan(p).all()
+    assert not significant(p, 0.05).any()
+    _, _, z, p = constant
+    assert np.isinf(z).all() and (p == 0).all()
+
+
+def test_baseline_and_compare_commands(tmpdir, monkeypatch, capsys):
+    # The column cache goes to the working directory.
+    monkeypatch.chdir(tmpdir)
+
+    def write(name, slow):
+        lines = ["client_ip,server_ip,bw_average_mbps,msg_rate_mpps"]
+        for i, client in enumerate(NODES):
+            for j, server in enumerate(NODES):
+                if client != server:
+                    bandwidth = 50 if slow and client == "10.0.0.4" else 100
+                    lines.append(f"{client},{server},{bandwidth + (i + j) % 3},10")
+        path = tmpdir.join(name)
+        path.write("\n".join(lines) + "\n")
+        return str(path)
+
+    base = str(tmpdir.join("base.npz"))
+    main(["baseline", write("good.csv", False), "--output", base])
+    bad = write("bad.csv", True)
+    main(["compare", bad, "--baseline", base])
+    output = str(tmpdir.join("regressions.csv"))
+    args = ["compare", bad, "--baseline", base, "--level", "node", "--csv", output]
+    with pytest.raises(SystemExit) as raised:
+        main(args + ["--exit-code"])
+
+    assert raised.value.code == 1
+    printed = capsys.readouterr().out
+    assert "Saved statistics of 56 links and 8 nodes" in printed
+    assert "Regressions against" in printed and "1 of 8 nodes." in printed
+    assert "10.0.0.4" in printed.splitlines()[-1]
+    rows = open(output).read().splitlines()
+    assert rows[0] == "level,name,metric,baseline,current,worse_by,z,p"
+    assert rows[1].startswith("node,10.0.0.4,bw_average_mbps,")
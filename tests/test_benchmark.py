@@ -0,0 +1,73 @@
+import json
+
+from rapidswarm import benchmark
+
+
+def test_pipeline_benchmark_times_and_traces_each_phase(tmpdir):
+    result = benchmark.run_pipeline(40, str(tmpdir), memory=True)
+
+    assert result["results"] == result["pings"] == 40
+    assert result["nodes"] == 20
+    assert result["spans"]["probe:PingProbe"] > 0
+    assert "phase:load_config" in result["spans"]
+    assert result["memory"]["phase:load_config"]["peak"] > 0
+    assert result["peak_bytes"] > 0
+
+
+def test_benchmark_command_stores_and_compares_runs(tmpdir, capsys):
+    directory = str(tmpdir.join("benchmarks"))
+    options = [
+        "--sizes", "10,20", "--micro-size", "50", "--repeat", "1",
+        "--memory-limit", "10", "--fabric-nodes", "64", "--log-targets", "100",
+        "--output-dir", directory,
+    ]  # fmt: skip
+
+    benchmark.main(options)
+    benchmark.main(options)
+
+    stored = benchmark.stored_results(directory)
+    assert len(stored) == 2
+    results = json.load(open(stored[-1]))
+    assert [p["name"] for p in results["pipelines"]] == ["pipeline/10", "pipeline/20"]
+    assert "peak_bytes" in results["pipelines"][0]
+    assert "peak_bytes" not in results["pipelines"][1]
+    assert {m["name"] for m in results["micro"]} >= {
+        "parse/csv",
+        "parse/nmap-xml",
+        "model/node",
+        "report/CSVReporter",
+        "report/SQLiteReporter",
+        "log/off",
+        "log/json-sampled",
+    }
+    assert [run["name"] for run in results["fabric"]] == [
+        "fabric/SequentialManager",
+        "fabric/ParallelManager-8",
+        "fabric/ParallelManager-32",
+        "fabric/ParallelManager-128",
+    ]
+    assert all(run["answered"] == 64 for run in results["fabric"])
+    output = capsys.readouterr().out
+    assert f"Compared with {stored[0]}" in output
+
+
+def test_compare_flags_regressions_past_the_threshold():
+    def run(seconds, peak, parse):
+        return {
+            "pipelines": [
+                {
+                    "name": "pipeline/10",
+                    "seconds": seconds,
+                    "spans": {"phase:load_config": 0.001, "probe:PingProbe": 0.5},
+                    "peak_bytes": peak,
+                }
+            ],
+            "micro": [{"name": "parse/csv", "seconds": parse}],
+        }
+
+    rows = benchmark.compare_results(run(1.0, 1000, 0.001), run(1.2, 1050, 0.004))
+    regressed = {row["measurement"] for row in rows if row["regressed"]}
+
+    # The parse time quadrupled, but is too short to tell.
+    assert regressed == {"pipeline/10 seconds"}
+    assert len(rows) == 4
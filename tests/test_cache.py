@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pytest
+
+from rapidswarm.analysis import data, load_columns
+from rapidswarm.analysis.cache import ColumnCache
+
+HEADER = "client_ip,server_ip,bw_average_mbps\n"
+
+
+def write_csv(path, rows):
+    path.write(HEADER + "".join(f"{c},{s},{bw}\n" for c, s, bw in rows))
+    return str(path)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Records the columns parsed from CSV files."""
+    calls = []
+    parse = data._load_csv
+
+    def recording_parse(path, keys, values):
+        calls.append((list(keys), list(values)))
+        return parse(path, keys, values)
+
+    monkeypatch.setattr(data, "_load_csv", recording_parse)
+    return calls
+
+
+def test_cached_columns_are_loaded_without_parsing(tmpdir, parses):
+    path = write_csv(tmpdir.join("a.csv"), [("b", "a", 1.5), ("a", "b", "")])
+    cache = ColumnCache(str(tmpdir.join("cache")))
+
+    first = load_columns(path, ["client_ip"], ["bw_average_mbps"], cache=cache)
+    second = load_columns(path, ["client_ip"], ["bw_average_mbps"], cache=cache)
+
+    assert parses == [(["client_ip"], ["bw_average_mbps"])]
+    keys, values = second
+    assert keys["client_ip"].labels == first[0]["client_ip"].labels == ["b", "a"]
+    assert keys["client_ip"].codes.tolist() == [0, 1]
+    assert isinstance(values["bw_average_mbps"], np.memmap)
+    assert np.array_equal(
+        values["bw_average_mbps"], first[1]["bw_average_mbps"], equal_nan=True
+    )
+
+
+def test_only_missing_columns_are_parsed(tmpdir, parses):
+    path = write_csv(tmpdir.join("a.csv"), [("b", "a", 1.5)])
+    cache = ColumnCache(str(tmpdir.join("cache")))
+
+    load_columns(path, ["client_ip"], [], cache=cache)
+    keys, _ = load_columns(path, ["client_ip", "server_ip"], [], cache=cache)
+
+    assert parses == [(["client_ip"], []), (["server_ip"], [])]
+    assert keys["server_ip"].labels == ["a"]
+
+
+def test_changed_file_is_parsed_again(tmpdir, parses):
+    path = write_csv(tmpdir.join("a.csv"), [("b", "a", 1.5)])
+    cache = ColumnCache(str(tmpdir.join("cache")))
+    load_columns(path, [], ["bw_average_mbps"], cache=cache)
+    stat = os.stat(path)
+
+    # Same size and modification time, different contents.
+    write_csv(tmpdir.join("a.csv"), [("b", "a", 2.5)])
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    _, values = load_columns(path, [], ["bw_average_mbps"], cache=cache)
+
+    assert len(parses) == 2
+    assert values["bw_average_mbps"].tolist() == [2.5]
+
+
+def test_least_recently_used_files_are_evicted(tmpdir):
+    cache = ColumnCache(str(tmpdir.join("cache")))
+    paths = [write_csv(tmpdir.join(f"{i}.csv"), [("b", "a", i)]) for i in range(3)]
+    array = np.zeros(1000)
+
+    cache.put(paths[0], {"value": array})
+    cache.put(paths[1], {"value": array})
+    os.utime(os.path.join(cache.entry(paths[1]), "meta.json"), (0, 0))
+    entry_size = max(size for _, size, _ in cache.entries())
+    cache.max_bytes = 2 * entry_size
+    cache.put(paths[2], {"value": array})
+
+    assert cache.get(paths[0], ["value"])
+    assert cache.get(paths[1], ["value"]) == {}
+    assert cache.get(paths[2], ["value"])
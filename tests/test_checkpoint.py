@@ -0,0 +1,206 @@
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from plugins.managers.manager_sequential_plugin import SequentialManager
+from rapidswarm.checkpoint import (
+    CheckpointJournal,
+    compute_plan_id,
+    dump_result,
+    load_result,
+)
+from rapidswarm.health import HealthTracker
+from rapidswarm.models.network_interface import NetworkInterface
+from rapidswarm.models.node import Node
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.models.results import ProbeFailure
+
+
+class CountResult(BaseModel):
+    node: str
+    success: bool = True
+
+
+class CountingProbe(BaseProbe):
+    command: str = "count"
+    calls: list = []
+
+    def execute_command(self):
+        self.calls.append(self.nodes[0].id)
+        return self.nodes[0].id
+
+    def parse_output(self, output):
+        return [CountResult(node=output)]
+
+
+class PlanConfig(BaseModel):
+    setting: str
+
+
+def make_nodes(count):
+    return [
+        Node(
+            id=f"node{i}",
+            hostname=f"node{i}",
+            network_interfaces=[
+                NetworkInterface(
+                    mac_address=f"00:11:22:33:44:{i:02x}", ip_address=f"10.0.0.{i}"
+                )
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+def test_plan_id_is_deterministic():
+    nodes = make_nodes(3)
+    plan_id = compute_plan_id(PlanConfig(setting="a"), nodes)
+
+    assert plan_id == compute_plan_id(PlanConfig(setting="a"), make_nodes(3))
+    assert plan_id != compute_plan_id(PlanConfig(setting="b"), nodes)
+    assert plan_id != compute_plan_id(PlanConfig(setting="a"), nodes[:2])
+
+    # Interface state does not change the plan.
+    nodes[0].network_interfaces[0].is_active = False
+    assert plan_id == compute_plan_id(PlanConfig(setting="a"), nodes)
+
+
+def test_result_round_trip():
+    failure = ProbeFailure(node="n1", probe="PingProbe", status="skipped", reason="x")
+    assert load_result(dump_result(failure)) == failure
+
+
+def test_unknown_result_model_keeps_its_fields():
+    record = {"model": "no_such_module:Result", "data": {"node": "n1", "value": 2}}
+    result = load_result(record)
+    assert type(result).__name__ == "Result"
+    assert result.model_dump() == {"node": "n1", "value": 2}
+
+
+def test_journal_resume(tmpdir):
+    path = str(tmpdir.join("plan.jsonl"))
+    journal = CheckpointJournal(path, "plan1")
+    journal.record("unit1", [CountResult(node="node0")])
+    journal.close()
+
+    resumed = CheckpointJournal(path, "plan1", resume=True)
+    assert resumed.is_done("unit1")
+    assert not resumed.is_done("unit2")
+    assert resumed.results("unit1") == [CountResult(node="node0")]
+    resumed.record("unit2", [])
+    resumed.close()
+
+    with open(path) as file:
+        lines = [json.loads(line) for line in file]
+    assert lines[0]["plan_id"] == "plan1"
+    assert [line["unit"] for line in lines[1:]] == ["unit1", "unit2"]
+
+
+def test_journal_without_resume_starts_over(tmpdir):
+    path = str(tmpdir.join("plan.jsonl"))
+    journal = CheckpointJournal(path, "plan1")
+    journal.record("unit1", [])
+    journal.close()
+
+    assert not CheckpointJournal(path, "plan1").is_done("unit1")
+
+
+def test_journal_ignores_truncated_entry(tmpdir):
+    path = str(tmpdir.join("plan.jsonl"))
+    journal = CheckpointJournal(path, "plan1")
+    journal.record("unit1", [])
+    journal.close()
+    with open(path, "a") as file:
+        file.write('{"unit": "unit2", "res')
+
+    assert CheckpointJournal(path, "plan1", resume=True).completed.keys() == {"unit1"}
+
+
+def test_journal_resumes_after_truncated_entry(tmpdir):
+    path = str(tmpdir.join("plan.jsonl"))
+    journal = CheckpointJournal(path, "plan1")
+    journal.record("unit1", [])
+    journal.close()
+    with open(path, "a") as file:
+        file.write('{"unit": "unit2", "res')
+
+    journal = CheckpointJournal(path, "plan1", resume=True)
+    journal.record("unit3", [])
+    journal.close()
+
+    resumed = CheckpointJournal(path, "plan1", resume=True)
+    assert resumed.completed.keys() == {"unit1", "unit3"}
+
+
+def test_journal_rejects_invalid_entry(tmpdir):
+    path = str(tmpdir.join("plan.jsonl"))
+    CheckpointJournal(path, "plan1").close()
+    with open(path, "a") as file:
+        file.write('{"results": []}\n')
+
+    with pytest.raises(ValueError, match="line 2"):
+        CheckpointJournal(path, "plan1", resume=True)
+
+
+def test_journal_rejects_other_plan(tmpdir):
+    path = str(tmpdir.join("plan.jsonl"))
+    CheckpointJournal(path, "plan1").close()
+    with pytest.raises(ValueError):
+        CheckpointJournal(path, "plan2", resume=True)
+
+
+def test_journal_batches_fsync(tmpdir, monkeypatch):
+    syncs = []
+    monkeypatch.setattr("os.fsync", syncs.append)
+    journal = CheckpointJournal(
+        str(tmpdir.join("plan.jsonl")), "plan1", fsync_every=10, fsync_interval=3600
+    )
+    syncs.clear()
+
+    for i in range(25):
+        journal.record(f"unit{i}", [])
+    assert len(syncs) == 2
+    journal.close()
+    assert len(syncs) == 3
+
+
+def test_manager_resume_skips_completed_units(tmpdir):
+    path = str(tmpdir.join("plan.jsonl"))
+    nodes = make_nodes(4)
+
+    first = CountingProbe(nodes=nodes[:2], calls=[])
+    journal = CheckpointJournal(path, "plan1")
+    SequentialManager(name="0-seq", probes=[first], checkpoint=journal).run()
+    journal.close()
+
+    second = CountingProbe(nodes=nodes, calls=[])
+    journal = CheckpointJournal(path, "plan1", resume=True)
+    results = SequentialManager(name="0-seq", probes=[second], checkpoint=journal).run()
+    journal.close()
+
+    assert second.calls == ["node2", "node3"]
+    assert sorted(r.node for r in results) == ["node0", "node1", "node2", "node3"]
+
+
+def test_manager_resume_retries_failed_units(tmpdir):
+    path = str(tmpdir.join("plan.jsonl"))
+    nodes = make_nodes(3)
+
+    first = CountingProbe(nodes=nodes, calls=[])
+    journal = CheckpointJournal(path, "plan1")
+    health = HealthTracker(failure_threshold=1)
+    health.record_failure("node1")
+    SequentialManager(
+        name="0-seq", probes=[first], checkpoint=journal, health=health
+    ).run()
+    journal.close()
+
+    second = CountingProbe(nodes=nodes, calls=[])
+    journal = CheckpointJournal(path, "plan1", resume=True)
+    SequentialManager(name="0-seq", probes=[second], checkpoint=journal).run()
+    journal.close()
+
+    # node1 was skipped by the open circuit, so it is run when resuming.
+    assert first.calls == ["node0", "node2"]
+    assert second.calls == ["node1"]
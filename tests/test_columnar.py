@@ -0,0 +1,130 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from pydantic import BaseModel
+
+from rapidswarm.columnar import (
+    ColumnStore,
+    NpyStoreWriter,
+    npy_header,
+    result_columns,
+)
+from rapidswarm.models.results import ProbeFailure, ProbeStatus
+
+
+class PairResult(BaseModel):
+    client: str
+    server: str
+    bandwidth: float
+    iterations: int
+    success: bool = True
+
+
+def write_store(directory, batches):
+    writer = NpyStoreWriter(str(directory))
+    for batch in batches:
+        writer.append(result_columns(batch, datetime(2024, 1, 1, 12)))
+    writer.close()
+    return ColumnStore(str(directory))
+
+
+def test_npy_header_is_readable_by_numpy(tmp_path):
+    path = tmp_path / "column.npy"
+    path.write_bytes(npy_header(np.dtype("<f8"), 3) + np.arange(3.0).tobytes())
+
+    assert np.load(path).tolist() == [0.0, 1.0, 2.0]
+
+
+def test_store_round_trips_columns(tmp_path):
+    store = write_store(
+        tmp_path / "store",
+        [
+            [
+                PairResult(
+                    client="10.0.0.1", server="10.0.0.2", bandwidth=1.5, iterations=3
+                )
+            ],
+            [
+                PairResult(
+                    client="10.0.0.2", server="10.0.0.1", bandwidth=2.5, iterations=4
+                )
+            ],
+        ],
+    )
+
+    assert len(store) == 2
+    assert store.columns[:2] == ["timestamp", "type"]
+    columns = store.read(["client", "server", "bandwidth", "iterations"])
+    assert columns["client"].tolist() == ["10.0.0.1", "10.0.0.2"]
+    assert columns["bandwidth"].dtype == np.float64
+    assert columns["bandwidth"].tolist() == [1.5, 2.5]
+    assert columns["iterations"].tolist() == [3, 4]
+    assert store.column("timestamp")[0] == np.datetime64("2024-01-01T12:00")
+
+
+def test_store_memory_maps_numeric_columns(tmp_path):
+    store = write_store(
+        tmp_path / "store",
+        [[PairResult(client="a", server="b", bandwidth=1.0, iterations=1)]],
+    )
+
+    assert isinstance(store.column("bandwidth").base, np.memmap)
+
+
+def test_store_shares_one_string_table(tmp_path):
+    store = write_store(
+        tmp_path / "store",
+        [
+            [
+                PairResult(client="a", server="b", bandwidth=1.0, iterations=1),
+                PairResult(client="b", server="a", bandwidth=1.0, iterations=1),
+            ]
+        ],
+    )
+
+    clients = store.column("client", decode=False)
+    servers = store.column("server", decode=False)
+    assert clients.dtype == np.int32
+    assert clients.tolist() == servers[::-1].tolist()
+    assert [store.strings[code] for code in clients] == ["a", "b"]
+
+
+def test_store_backfills_columns_that_appear_later(tmp_path):
+    store = write_store(
+        tmp_path / "store",
+        [
+            [PairResult(client="a", server="b", bandwidth=1.0, iterations=1)],
+            [
+                ProbeFailure(
+                    node="a", probe="Pair", status=ProbeStatus.SKIPPED, reason=None
+                )
+            ],
+        ],
+    )
+
+    # A column that never held a value is stored as all-NaN floats.
+    assert np.isnan(store.column("reason")).all()
+    assert store.column("status").tolist() == [None, "skipped"]
+    assert np.isnan(store.column("bandwidth")[1])
+    assert store.column("success").tolist() == [1, 0]
+    assert store.column("type").tolist() == ["PairResult", "ProbeFailure"]
+
+
+def test_store_is_readable_after_flush(tmp_path):
+    writer = NpyStoreWriter(str(tmp_path / "store"))
+    writer.append(
+        result_columns(
+            [PairResult(client="a", server="b", bandwidth=1.0, iterations=1)],
+            datetime.now(),
+        )
+    )
+    writer.flush()
+
+    assert ColumnStore(str(tmp_path / "store")).column("client").tolist() == ["a"]
+    writer.close()
+
+
+def test_store_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ColumnStore(str(tmp_path))
@@ -0,0 +1,39 @@
+import os
+
+from pydantic import BaseModel
+
+from plugins.reporters.reporter_columnar_plugin import ColumnarReporter
+from rapidswarm.columnar import ColumnStore
+
+
+class DummyData(BaseModel):
+    name: str
+    value: int
+
+
+def test_columnar_reporter_writes_batches(tmpdir):
+    output_directory = str(tmpdir.join("report.cols"))
+    reporter = ColumnarReporter(output_directory=output_directory, format="npy")
+
+    reporter.write([DummyData(name="a", value=1), DummyData(name="b", value=2)])
+    reporter.flush()
+    reporter.write([DummyData(name="c", value=3)])
+    reporter.close()
+
+    store = ColumnStore(output_directory)
+    assert store.column("name").tolist() == ["a", "b", "c"]
+    assert store.column("value").tolist() == [1, 2, 3]
+
+
+def test_columnar_reporter_moves_previous_store_aside(tmpdir):
+    output_directory = str(tmpdir.join("report.cols"))
+    ColumnarReporter(output_directory=output_directory, format="npy").report(
+        DummyData(name="old", value=1)
+    )
+
+    reporter = ColumnarReporter(output_directory=output_directory, format="npy")
+    reporter.report(DummyData(name="new", value=2))
+    reporter.close()
+
+    assert ColumnStore(output_directory).column("name").tolist() == ["new"]
+    assert len(os.listdir(tmpdir)) == 2
@@ -1,4 +1,5 @@
 import csv
+import gzip
 import os
 from datetime import datetime
 
@@ -60,3 +61,104 @@ def test_csv_reporter_io_error(tmpdir):
     # Assert that an IOError is raised when attempting to write to a directory
     with pytest.raises(IOError):
         reporter.report(data)
+
+
+class OtherData(BaseModel):
+    name: str
+    reason: str
+
+
+def test_csv_reporter_mixed_result_types(tmpdir):
+    output_file = str(tmpdir.join("test_report.csv"))
+    reporter = CSVReporter(output_file=output_file)
+
+    reporter.report(
+        [DummyData(name="test", value=42), OtherData(name="down", reason="skipped")]
+    )
+
+    with open(output_file, "r") as file:
+        reader = csv.DictReader(file)
+        rows = list(reader)
+
+    assert reader.fieldnames == ["timestamp", "name", "value", "reason"]
+    assert rows[0]["value"] == "42" and rows[0]["reason"] == ""
+    assert rows[1]["value"] == "" and rows[1]["reason"] == "skipped"
+
+
+def test_csv_reporter_appends_batches(tmpdir):
+    output_file = str(tmpdir.join("test_report.csv"))
+    reporter = CSVReporter(output_file=output_file)
+
+    reporter.write([DummyData(name="a", value=1), DummyData(name="b", value=2)])
+    reporter.write([DummyData(name="c", value=3)])
+    reporter.close()
+
+    with open(output_file, "r") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["name"] for row in rows] == ["a", "b", "c"]
+    # Results in a batch share one timestamp.
+    assert rows[0]["timestamp"] == rows[1]["timestamp"]
+
+
+def test_csv_reporter_widens_the_file_for_new_columns(tmpdir):
+    output_file = str(tmpdir.join("test_report.csv"))
+    reporter = CSVReporter(output_file=output_file)
+
+    reporter.write([DummyData(name="a", value=1)])
+    reporter.write([OtherData(name="down", reason="skipped")])
+    reporter.write([DummyData(name="b", value=2)])
+    reporter.close()
+
+    assert os.listdir(tmpdir) == ["test_report.csv"]
+    with open(output_file, "r") as file:
+        reader = csv.DictReader(file)
+        rows = list(reader)
+    assert reader.fieldnames == ["timestamp", "name", "value", "reason"]
+    assert [(row["name"], row["value"], row["reason"]) for row in rows] == [
+        ("a", "1", ""),
+        ("down", "", "skipped"),
+        ("b", "2", ""),
+    ]
+
+
+def test_csv_reporter_widens_compressed_files(tmpdir):
+    output_file = str(tmpdir.join("test_report.csv"))
+    reporter = CSVReporter(output_file=output_file, compression="gzip")
+
+    reporter.write([DummyData(name="a", value=1)])
+    reporter.write([OtherData(name="down", reason="skipped")])
+    reporter.close()
+
+    with gzip.open(output_file + ".gz", "rt", newline="") as file:
+        reader = csv.DictReader(file)
+        rows = list(reader)
+    assert reader.fieldnames == ["timestamp", "name", "value", "reason"]
+    assert [row["name"] for row in rows] == ["a", "down"]
+
+
+def test_csv_reporter_widens_large_files_row_by_row(tmpdir):
+    output_file = str(tmpdir.join("test_report.csv"))
+    reporter = CSVReporter(output_file=output_file, compression="gzip")
+
+    reporter.write([DummyData(name=f"line\n{i}", value=i) for i in range(2500)])
+    reporter.write([OtherData(name="down", reason="skipped")])
+    reporter.close()
+
+    with gzip.open(output_file + ".gz", "rt", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == 2501
+    assert [row["name"] for row in rows[:2]] == ["line\n0", "line\n1"]
+    assert [row["value"] for row in rows[-2:]] == ["2499", ""]
+    assert rows[-1]["reason"] == "skipped"
+
+
+def test_csv_reporter_moves_previous_run_aside(tmpdir):
+    output_file = str(tmpdir.join("test_report.csv"))
+    CSVReporter(output_file=output_file).report(DummyData(name="old", value=1))
+
+    CSVReporter(output_file=output_file).report(DummyData(name="new", value=2))
+
+    with open(output_file, "r") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["name"] for row in rows] == ["new"]
+    assert len(os.listdir(tmpdir)) == 2
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from rapidswarm.fanout import ReporterFanout
+from rapidswarm.models.reporters import BaseReporter
+
+
+class RecordingReporter(BaseReporter):
+    calls: list = []
+
+    def add_nodes(self, nodes):
+        self.calls.append(("nodes", list(nodes)))
+
+    def write(self, batch):
+        self.calls.append(("write", list(batch)))
+
+    def flush(self):
+        self.calls.append(("flush", None))
+
+    def close(self):
+        self.calls.append(("close", None))
+
+
+class BlockedReporter(RecordingReporter):
+    released: list = []
+
+    def write(self, batch):
+        assert self.released[0].wait(timeout=5)
+        super().write(batch)
+
+
+def test_fanout_calls_reporters_in_order_and_waits_on_close():
+    reporter = RecordingReporter(calls=[])
+    fanout = ReporterFanout([reporter])
+
+    fanout.add_nodes(["n1"])
+    fanout.write([1, 2])
+    fanout.flush()
+    fanout.write([3])
+
+    assert fanout.close() == []
+    assert reporter.calls == [
+        ("nodes", ["n1"]),
+        ("write", [1, 2]),
+        ("flush", None),
+        ("write", [3]),
+        ("close", None),
+    ]
+
+
+def test_slow_reporter_does_not_hold_up_the_others():
+    released = threading.Event()
+    slow = BlockedReporter(calls=[], released=[released])
+    fast = RecordingReporter(calls=[])
+    fanout = ReporterFanout([slow, fast], queue_size=4)
+
+    fanout.write([1])
+    fanout.flush()
+    for _ in range(50):
+        if len(fast.calls) == 2:
+            break
+        time.sleep(0.01)
+
+    assert fast.calls == [("write", [1]), ("flush", None)]
+    assert slow.calls == []
+    released.set()
+    fanout.close()
+    assert slow.calls[0] == ("write", [1])
+
+
+def test_failed_reporter_is_isolated_and_still_closed():
+    class FailingReporter(RecordingReporter):
+        def write(self, batch):
+            raise IOError("disk full")
+
+    failing = FailingReporter(calls=[])
+    healthy = RecordingReporter(calls=[])
+    fanout = ReporterFanout([failing, healthy])
+
+    fanout.write([1])
+    fanout.write([2])
+    errors = fanout.close()
+
+    assert [str(e) for e in errors] == ["disk full"]
+    assert failing.calls == [("close", None)]
+    assert healthy.calls[:2] == [("write", [1]), ("write", [2])]
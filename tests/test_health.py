@@ -0,0 +1,79 @@
+import pytest
+from pydantic import ValidationError
+
+from rapidswarm.health import CircuitState, HealthTracker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    return now
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    tracker = HealthTracker(failure_threshold=3, reset_timeout="30s")
+
+    for _ in range(2):
+        tracker.record_failure("node1", "timeout")
+        assert tracker.check(["node1"]) is None
+    tracker.record_failure("node1", "timeout")
+
+    assert tracker.state("node1") == CircuitState.OPEN
+    reason = tracker.check(["node1"])
+    assert "3 consecutive failures" in reason
+    assert "timeout" in reason
+    assert tracker.check(["node2"]) is None
+
+
+def test_success_resets_failure_count(clock):
+    tracker = HealthTracker(failure_threshold=2)
+    tracker.record_failure("node1")
+    tracker.record_success("node1")
+    tracker.record_failure("node1")
+    assert tracker.state("node1") == CircuitState.CLOSED
+
+
+def test_half_open_allows_a_single_trial(clock):
+    tracker = HealthTracker(failure_threshold=1, reset_timeout=30)
+    tracker.record_failure("node1")
+    clock[0] += 31
+
+    assert tracker.check(["node1"]) is None
+    assert tracker.state("node1") == CircuitState.HALF_OPEN
+    assert "trial already running" in tracker.check(["node1"])
+
+    tracker.record_success("node1")
+    assert tracker.state("node1") == CircuitState.CLOSED
+    assert tracker.check(["node1"]) is None
+
+
+def test_failed_trial_reopens_circuit(clock):
+    tracker = HealthTracker(failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        tracker.record_failure("node1")
+    clock[0] += 31
+    assert tracker.check(["node1"]) is None
+
+    tracker.record_failure("node1")
+
+    assert tracker.state("node1") == CircuitState.OPEN
+    clock[0] += 10
+    assert tracker.check(["node1"]) is not None
+
+
+def test_invalid_failure_threshold():
+    with pytest.raises(ValidationError):
+        HealthTracker(failure_threshold=0)
+
+
+def test_skipped_unit_leaves_no_trial_pending(clock):
+    tracker = HealthTracker(failure_threshold=1, reset_timeout=30)
+    tracker.record_failure("a")
+    clock[0] += 31
+    tracker.record_failure("b")
+
+    assert "circuit open for b" in tracker.check(["a", "b"])
+    assert tracker.state("a") == CircuitState.OPEN
+    assert tracker.check(["a"]) is None
+    assert tracker.state("a") == CircuitState.HALF_OPEN
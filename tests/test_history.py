@@ -0,0 +1,165 @@
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from plugins.managers.manager_sequential_plugin import SequentialManager
+from plugins.reporters.reporter_sqlite_plugin import SQLiteReporter
+from rapidswarm import history
+from rapidswarm.history import ResultHistory
+from rapidswarm.models.node import Node
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.models.results import ProbeFailure, ProbeStatus
+
+
+class PingResult(BaseModel):
+    node: str
+    interface: str
+    success: bool
+    ping_time: Optional[float] = None
+
+
+class PairResult(BaseModel):
+    client: str
+    server: str
+    bw_average_mbps: float
+
+
+def record_run(database, run_id, batches):
+    reporter = SQLiteReporter(database=database, run_id=run_id)
+    for batch in batches:
+        reporter.write(batch)
+    reporter.close()
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    record_run(
+        path,
+        "run-1",
+        [
+            [
+                PingResult(node="n1", interface="eth0", success=True, ping_time=0.5),
+                PingResult(node="n2", interface="eth0", success=True, ping_time=0.4),
+            ],
+            [PairResult(client="n1", server="n2", bw_average_mbps=9000.0)],
+        ],
+    )
+    record_run(
+        path,
+        "run-2",
+        [
+            [
+                PingResult(node="n1", interface="eth0", success=False),
+                ProbeFailure(node="n2", probe="PingProbe", status=ProbeStatus.SKIPPED),
+            ],
+            [PairResult(client="n3", server="n1", bw_average_mbps=200.0)],
+        ],
+    )
+    return path
+
+
+def test_runs_are_recorded(database):
+    runs = ResultHistory(database).runs()
+
+    assert [run["run_id"] for run in runs] == ["run-2", "run-1"]
+    assert all(run["results"] == 3 and run["finished"] for run in runs)
+
+
+def test_node_history_covers_node_and_peer_roles(database):
+    rows = ResultHistory(database).node_history("n1")
+
+    assert [(row["run_id"], row["probe"]) for row in rows] == [
+        ("run-2", "PairResult"),
+        ("run-2", "PingResult"),
+        ("run-1", "PairResult"),
+        ("run-1", "PingResult"),
+    ]
+
+
+def test_node_history_filters_on_metric(database):
+    rows = ResultHistory(database).node_history(
+        "n1", metric="bw_average_mbps", below=1000
+    )
+
+    assert [(row["node"], row["peer"], row["value"]) for row in rows] == [
+        ("n3", "n1", 200.0)
+    ]
+
+
+def test_node_history_requires_metric_for_value_filters(database):
+    with pytest.raises(ValueError):
+        ResultHistory(database).node_history("n1", below=1)
+
+
+def test_last_known_good(database):
+    rows = ResultHistory(database).last_known_good("n1", metric="ping_time")
+
+    ping = [row for row in rows if row["probe"] == "PingResult"]
+    assert [(row["run_id"], row["value"]) for row in ping] == [("run-1", 0.5)]
+
+
+def test_failures_keep_their_probe_and_status(database):
+    rows = ResultHistory(database).node_history("n2", probe="PingProbe")
+
+    assert [(row["status"], row["success"]) for row in rows] == [("skipped", 0)]
+
+
+class EchoResult(BaseModel):
+    node: str
+    success: bool = True
+
+
+class EchoProbe(BaseProbe):
+    command: str = "echo"
+
+    def execute_command(self):
+        if self.nodes[0].hostname == "down":
+            raise RuntimeError("unreachable")
+        return self.nodes[0].hostname
+
+    def parse_output(self, output):
+        return [EchoResult(node=output)]
+
+
+def test_results_and_failures_share_the_probe_name(tmp_path):
+    database = str(tmp_path / "results.sqlite")
+    nodes = [Node(hostname="up"), Node(hostname="down")]
+    manager = SequentialManager(probes=[EchoProbe(nodes=nodes)])
+    record_run(database, "run-1", [manager.run()])
+
+    results = ResultHistory(database)
+    up = results.node_history("up", probe="EchoProbe")
+    down = results.node_history("down", probe="EchoProbe")
+
+    assert [(row["probe"], row["success"]) for row in up] == [("EchoProbe", 1)]
+    assert [(row["probe"], row["status"]) for row in down] == [("EchoProbe", "failed")]
+
+
+def test_history_command(database, capsys):
+    history.main(["--database", database, "node", "n1", "--metric", "ping_time"])
+
+    output = capsys.readouterr().out
+    assert output.splitlines()[0].split()[-1] == "value"
+    assert "0.5" in output
+
+
+def test_history_command_missing_database(tmp_path):
+    with pytest.raises(SystemExit):
+        history.main(["--database", str(tmp_path / "missing.sqlite"), "runs"])
+
+
+def test_node_means_of_the_last_run(database):
+    means = ResultHistory(database).node_means("ping_time", run_id="run-1")
+
+    assert means == {"n1": 0.5, "n2": 0.4}
+    assert ResultHistory(database).node_means("ping_time") == {}
+
+
+def test_last_tested(database):
+    last_tested = ResultHistory(database).last_tested()
+
+    # n3 was only ever a client, and n2 a server, of a pair test.
+    assert set(last_tested) == {"n1", "n2", "n3"}
+    assert last_tested["n1"] >= last_tested["n2"]
@@ -0,0 +1,142 @@
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from plugins.managers.manager_sequential_plugin import SequentialManager
+from rapidswarm import instrumentation
+from rapidswarm.models.network_interface import NetworkInterface
+from rapidswarm.models.node import Node
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.models.reporters import BaseReporter
+from rapidswarm.output import RotatingFile
+from rapidswarm.pipeline import Pipeline
+
+
+class DummyResult(BaseModel):
+    node: str
+
+
+class DummyProbe(BaseProbe):
+    command: str = "dummy"
+
+    def execute_command(self):
+        return self.nodes[0].id
+
+    def parse_output(self, output):
+        return [DummyResult(node=output)]
+
+
+class RecordingReporter(BaseReporter):
+    def report(self, data):
+        pass
+
+
+def make_nodes(count):
+    return [
+        Node(
+            id=f"node{i}",
+            hostname=f"node{i}",
+            network_interfaces=[
+                NetworkInterface(
+                    mac_address=f"00:11:22:33:44:{i:02x}", ip_address=f"10.0.0.{i}"
+                )
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def recorder():
+    yield instrumentation.enable()
+    instrumentation.disable()
+
+
+def test_spans_are_aggregated_per_kind_and_name():
+    clock = FakeClock()
+    recorder = instrumentation.Recorder(clock)
+    for seconds in (1.0, 3.0):
+        with recorder.span(instrumentation.PROBE, "PingProbe"):
+            clock.now += seconds
+    recorder.count(instrumentation.TARGETS, 4)
+    recorder.count(instrumentation.TARGETS, 2)
+
+    summary = recorder.summary()
+
+    assert summary["wall_seconds"] == 4.0
+    assert summary["spans"] == [
+        {
+            "kind": "probe",
+            "name": "PingProbe",
+            "count": 2,
+            "total_seconds": 4.0,
+            "mean_seconds": 2.0,
+            "min_seconds": 1.0,
+            "max_seconds": 3.0,
+        }
+    ]
+    assert summary["counters"] == [{"name": "targets", "labels": {}, "value": 6}]
+
+
+def test_disabled_instrumentation_records_nothing():
+    with instrumentation.span(instrumentation.PHASE, "anything"):
+        instrumentation.count(instrumentation.TARGETS)
+    assert not instrumentation.recorder().enabled
+    assert instrumentation.top_spans() == []
+
+
+def test_prometheus_export(tmpdir):
+    recorder = instrumentation.Recorder(FakeClock())
+    recorder.record(instrumentation.REPORTER, "CSVReporter", 0.5)
+    recorder.count(instrumentation.BYTES_WRITTEN, 100, output='out "a".csv')
+    recorder.count(instrumentation.BYTES_WRITTEN, 123456789, output="big.csv")
+    recorder.count(instrumentation.TARGETS, 0.25)
+
+    path = str(tmpdir.join("metrics", "run.prom"))
+    recorder.write_prometheus(path)
+    with open(path) as file:
+        text = file.read()
+
+    assert "# TYPE rapidswarm_span_seconds summary" in text
+    assert (
+        'rapidswarm_span_seconds_sum{kind="reporter",name="CSVReporter"} 0.500000'
+    ) in text
+    assert 'rapidswarm_span_seconds_count{kind="reporter",name="CSVReporter"} 1' in text
+    assert "# TYPE rapidswarm_bytes_written_total counter" in text
+    assert 'rapidswarm_bytes_written_total{output="out \\"a\\".csv"} 100' in text
+    assert 'rapidswarm_bytes_written_total{output="big.csv"} 123456789' in text
+    assert "rapidswarm_targets_total 0.25" in text
+
+
+def test_pipeline_run_is_instrumented(recorder, tmpdir):
+    probe = DummyProbe(nodes=make_nodes(3))
+    manager = SequentialManager(name="ping", probes=[probe])
+    reporter = RecordingReporter()
+    Pipeline([manager], [reporter]).run(nodes=make_nodes(3))
+    output = RotatingFile(str(tmpdir.join("out.txt")))
+    output.write("hello\n")
+    output.close()
+
+    path = str(tmpdir.join("run.json"))
+    recorder.write_json(path)
+    with open(path) as file:
+        summary = json.load(file)
+
+    spans = {(span["kind"], span["name"]): span for span in summary["spans"]}
+    assert spans[("probe", "DummyProbe")]["count"] == 3
+    assert spans[("parse", "DummyProbe")]["count"] == 3
+    assert spans[("manager", "ping")]["count"] == 1
+    assert spans[("phase", "report")]["count"] == 1
+    assert ("reporter", "RecordingReporter") in spans
+    counters = {counter["name"]: counter for counter in summary["counters"]}
+    assert counters["targets"]["value"] == 3
+    assert counters["bytes_written"]["value"] == 6
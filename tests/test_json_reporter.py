@@ -56,3 +56,14 @@ def test_json_reporter_io_error(tmpdir):
     # Assert that an IOError is raised when attempting to write to a directory
     with pytest.raises(IOError):
         reporter.report(data)
+
+
+def test_json_reporter_list(tmpdir):
+    output_file = str(tmpdir.join("test_report.json"))
+    reporter = JSONReporter(output_file=output_file)
+
+    reporter.report([DummyData(name="a", value=1), DummyData(name="b", value=2)])
+
+    with open(output_file, "r") as file:
+        report = json.load(file)
+    assert [item["name"] for item in report["data"]] == ["a", "b"]
@@ -0,0 +1,113 @@
+import gzip
+import json
+import os
+
+import pytest
+from pydantic import BaseModel
+
+from plugins.reporters.reporter_jsonl_plugin import JSONLinesReporter
+from rapidswarm.output import Compression, RotatingFile
+
+
+class DummyData(BaseModel):
+    name: str
+    value: int
+
+
+class EmptyData(BaseModel):
+    pass
+
+
+def read_lines(path, opener=open):
+    with opener(path, "rt") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_jsonl_reporter_appends_one_line_per_result(tmpdir):
+    output_file = str(tmpdir.join("report.jsonl"))
+    reporter = JSONLinesReporter(output_file=output_file)
+
+    reporter.write([DummyData(name="a", value=1), EmptyData()])
+    reporter.write([DummyData(name="b", value=2)])
+    reporter.close()
+
+    lines = read_lines(output_file)
+    assert [line.get("name") for line in lines] == ["a", None, "b"]
+    assert all("timestamp" in line for line in lines)
+
+
+def test_jsonl_reporter_appends_across_runs(tmpdir):
+    output_file = str(tmpdir.join("report.jsonl"))
+    JSONLinesReporter(output_file=output_file).report(DummyData(name="a", value=1))
+    JSONLinesReporter(output_file=output_file).report(DummyData(name="b", value=2))
+
+    assert [line["name"] for line in read_lines(output_file)] == ["a", "b"]
+
+
+def test_jsonl_reporter_gzip(tmpdir):
+    output_file = str(tmpdir.join("report.jsonl"))
+    reporter = JSONLinesReporter(output_file=output_file, compression="gzip")
+
+    reporter.write([DummyData(name="a", value=1)])
+    reporter.flush()
+    reporter.write([DummyData(name="b", value=2)])
+    reporter.close()
+
+    lines = read_lines(output_file + ".gz", opener=gzip.open)
+    assert [line["name"] for line in lines] == ["a", "b"]
+
+
+def test_gzip_file_size_counts_uncompressed_bytes_on_reopen(tmpdir):
+    path = str(tmpdir.join("report.jsonl"))
+    written = RotatingFile(path, compression=Compression.GZIP)
+    written.write("x" * 10000 + "\n")
+    written.close()
+
+    reopened = RotatingFile(path, compression=Compression.GZIP)
+    reopened.write("y\n")
+
+    assert reopened.size == 10003
+    reopened.close()
+
+
+def test_jsonl_reporter_rotates_by_size(tmpdir):
+    output_file = str(tmpdir.join("report.jsonl"))
+    reporter = JSONLinesReporter(output_file=output_file, max_bytes=100)
+
+    for i in range(10):
+        reporter.write([DummyData(name=f"n{i}", value=i)])
+    reporter.close()
+
+    files = sorted(os.listdir(tmpdir))
+    assert len(files) > 1
+    names = [
+        line["name"]
+        for name in files
+        for line in read_lines(os.path.join(tmpdir, name))
+    ]
+    assert sorted(names) == sorted(f"n{i}" for i in range(10))
+    for name in files:
+        assert os.path.getsize(os.path.join(tmpdir, name)) < 200
+
+
+def test_jsonl_reporter_rotates_by_time(tmpdir, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    output_file = str(tmpdir.join("report.jsonl"))
+    reporter = JSONLinesReporter(output_file=output_file, rotate_interval="1h")
+
+    reporter.write([DummyData(name="a", value=1)])
+    now[0] += 3600
+    reporter.write([DummyData(name="b", value=2)])
+    reporter.close()
+
+    assert len(os.listdir(tmpdir)) == 2
+    assert [line["name"] for line in read_lines(output_file)] == ["b"]
+
+
+def test_jsonl_reporter_io_error(tmpdir):
+    output_dir = str(tmpdir.mkdir("test_dir"))
+    reporter = JSONLinesReporter(output_file=output_dir)
+
+    with pytest.raises(IOError):
+        reporter.report(DummyData(name="test", value=42))
@@ -0,0 +1,100 @@
+import math
+from typing import Optional
+
+import numpy as np
+import pytest
+from pydantic import BaseModel
+
+from plugins.reporters.reporter_linkmatrix_plugin import LinkMatrixReporter
+from rapidswarm.linkmatrix import LinkMatrix
+from rapidswarm.models.results import numeric_fields
+
+
+class PairResult(BaseModel):
+    client: str
+    server: str
+    success: bool = True
+    latency: Optional[float] = None
+    retries: int = 0
+
+
+class NodeResult(BaseModel):
+    node: str
+    ping_time: float
+
+
+def test_numeric_fields_skip_bools_and_strings():
+    assert numeric_fields(PairResult) == ["latency", "retries"]
+
+
+def test_add_keeps_running_mean_and_count(tmpdir):
+    matrix = LinkMatrix(str(tmpdir.join("links")))
+    for value in (1.0, 2.0, 6.0):
+        matrix.add("a", "b", "latency", value)
+
+    assert matrix.value("a", "b", "latency") == pytest.approx(3.0)
+    assert matrix.counts("latency")[0, 1] == 3
+    assert matrix.value("b", "a", "latency") is None
+
+
+def test_add_results_combines_samples_and_skips_single_nodes(tmpdir):
+    matrix = LinkMatrix(str(tmpdir.join("links")))
+    added = matrix.add_results(
+        [
+            PairResult(client="a", server="b", latency=1.0),
+            PairResult(client="a", server="b", latency=3.0),
+            PairResult(client="b", server="c", latency=None, retries=2),
+            NodeResult(node="a", ping_time=0.1),
+        ]
+    )
+
+    assert added == 3
+    assert matrix.endpoints == ["a", "b", "c"]
+    assert matrix.value("a", "b", "latency") == pytest.approx(2.0)
+    assert matrix.value("b", "c", "latency") is None
+    assert matrix.value("b", "c", "retries") == 2
+    assert "ping_time" not in matrix.metrics
+
+
+def test_reads_rows_columns_and_submatrices(tmpdir):
+    matrix = LinkMatrix(str(tmpdir.join("links")))
+    for source in "abc":
+        for target in "abc":
+            if source != target:
+                matrix.add(source, target, "latency", ord(source) * 10 + ord(target))
+
+    row = matrix.row("a", "latency")
+    assert math.isnan(row[0])
+    assert row[1:].tolist() == [ord("a") * 10 + ord("b"), ord("a") * 10 + ord("c")]
+    assert matrix.column("c", "latency")[1] == ord("b") * 10 + ord("c")
+    assert matrix.submatrix(["c"], ["a", "b"], "latency").shape == (1, 2)
+    assert np.isnan(np.diag(matrix.matrix("latency"))).all()
+    assert len(list(matrix.links("latency"))) == 6
+
+
+def test_grows_past_capacity_and_reopens(tmpdir):
+    directory = str(tmpdir.join("links"))
+    matrix = LinkMatrix(directory, capacity=2)
+    matrix.add("a", "b", "latency", 1.5)
+    matrix.add("c", "d", "latency", 2.5)
+    matrix.close()
+
+    reopened = LinkMatrix(directory, readonly=True)
+    assert reopened.capacity == 4
+    assert reopened.value("a", "b", "latency") == 1.5
+    assert reopened.value("c", "d", "latency") == 2.5
+    with pytest.raises(KeyError):
+        reopened.index("e", add=True)
+
+
+def test_link_matrix_reporter(tmpdir):
+    directory = str(tmpdir.join("report.links"))
+    reporter = LinkMatrixReporter(output_directory=directory, metrics=["latency"])
+    reporter.write([PairResult(client="a", server="b", latency=4.0, retries=1)])
+    reporter.flush()
+    reporter.write([PairResult(client="a", server="b", latency=2.0)])
+    reporter.close()
+
+    matrix = LinkMatrix(directory, readonly=True)
+    assert matrix.metrics == ["latency"]
+    assert matrix.value("a", "b", "latency") == 3.0
@@ -0,0 +1,112 @@
+import io
+import json
+import sys
+
+import pytest
+from loguru import logger
+
+from plugins.probes.probe_ping_plugin import PingProbe
+from rapidswarm import logs
+from rapidswarm.models.node import Targets
+from rapidswarm.synthetic import FakeExecutor, SyntheticCluster
+
+
+@pytest.fixture(autouse=True)
+def restore_logger():
+    yield
+    logger.remove()
+    logger.add(sys.stderr)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_per_target_messages_are_rate_limited_per_line():
+    clock = FakeClock()
+    sampler = logs.TargetSampler(rate=2, clock=clock)
+    stream = io.StringIO()
+    logger.remove()
+    logger.add(stream, format="{message}", filter=sampler)
+
+    for second in range(2):
+        for index in range(5):
+            logger.info("Probing {target}", target=f"node{index}")
+        logger.info("Round {} done", second)
+        clock.now += 1.0
+
+    assert stream.getvalue().splitlines() == [
+        "Probing node0",
+        "Probing node1",
+        "Round 0 done",
+        "Probing node0",
+        "Probing node1",
+        "Round 1 done",
+    ]
+    assert sum(sampler.suppressed.values()) == 6
+
+
+def test_json_records_carry_the_extra_fields():
+    stream = io.StringIO()
+    sampler = logs.configure("DEBUG", logs.JSON, rate=1, sink=stream)
+
+    for index in range(3):
+        logger.debug("Ping of {target} failed", target=f"node{index}", output="lost")
+    logs.finish(sampler)
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(records) == 2
+    assert records[0]["message"] == "Ping of node0 failed"
+    assert records[0]["level"] == "DEBUG"
+    assert records[0]["target"] == "node0"
+    assert records[0]["output"] == "lost"
+    assert records[0]["function"] == "test_json_records_carry_the_extra_fields"
+    assert records[1]["message"].startswith("Suppressed 2 per-target log messages")
+
+
+def test_probing_logs_nothing_per_target_at_info():
+    stream = io.StringIO()
+    logs.configure("INFO", sink=stream)
+    probe = PingProbe(nodes=SyntheticCluster(20).inventory())
+
+    with FakeExecutor(failure_rate=0.5):
+        for unit in probe.units():
+            unit.run()
+
+    assert stream.getvalue() == ""
+
+
+class CountingNode:
+    def __init__(self, hostname):
+        self.hostname = hostname
+        self.reads = 0
+
+    @property
+    def id(self):
+        self.reads += 1
+        return None
+
+
+def test_targets_are_joined_only_when_written():
+    nodes = [CountingNode("node0"), CountingNode("node1")]
+    stream = io.StringIO()
+    sampler = logs.configure("INFO", logs.JSON, sink=stream)
+
+    logger.debug("Probing {target}", target=Targets(nodes))
+    assert nodes[0].reads == 0
+
+    logger.info("Probing {target}", target=Targets(nodes))
+    logs.finish(sampler)
+
+    [record] = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert record["message"] == "Probing node0,node1"
+    assert record["target"] == "node0,node1"
+
+
+def test_unknown_log_format():
+    with pytest.raises(ValueError):
+        logs.configure(log_format="xml")
@@ -0,0 +1,95 @@
+import csv
+import json
+import sys
+
+import pytest
+import yaml
+
+from rapidswarm import instrumentation
+from rapidswarm.__main__ import main
+from rapidswarm.benchmark import pipeline_config
+from rapidswarm.synthetic import FakeExecutor, SyntheticCluster
+
+
+def test_main_runs_a_config_end_to_end(tmpdir, monkeypatch):
+    cluster = SyntheticCluster(30)
+    inventory = tmpdir.join("inventory.csv")
+    inventory.write(cluster.csv())
+    config_file = tmpdir.join("config.yaml")
+    config_file.write(yaml.safe_dump(pipeline_config(str(inventory), str(tmpdir))))
+    metrics = tmpdir.join("metrics.json")
+    monkeypatch.setattr(
+        sys, "argv", ["rapidswarm", str(config_file), "--metrics-json", str(metrics)]
+    )
+
+    try:
+        with FakeExecutor(failure_rate=0.1):
+            main()
+    finally:
+        instrumentation.disable()
+
+    with open(tmpdir.join("results.csv")) as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == 30
+    assert {row["node"] for row in rows} == {node.hostname for node in cluster.nodes}
+    assert 0 < sum(row["success"] == "False" for row in rows) < 30
+    summary = json.loads(metrics.read())
+    counters = {counter["name"]: counter["value"] for counter in summary["counters"]}
+    assert counters["targets"] == 15
+    assert counters["subprocess_spawns"] == 30
+
+
+def test_dry_run_prints_the_plan_without_probing(tmpdir, monkeypatch, capsys):
+    inventory = tmpdir.join("inventory.csv")
+    inventory.write(SyntheticCluster(30).csv())
+    config_file = tmpdir.join("config.yaml")
+    config_file.write(yaml.safe_dump(pipeline_config(str(inventory), str(tmpdir))))
+    metrics = tmpdir.join("metrics.json")
+    metrics.write(
+        json.dumps(
+            {
+                "spans": [
+                    {
+                        "kind": "probe",
+                        "name": "PingProbe",
+                        "count": 10,
+                        "total_seconds": 4.0,
+                    }
+                ],
+                "counters": [
+                    {
+                        "name": "probe_executions",
+                        "labels": {"probe": "PingProbe"},
+                        "value": 20,
+                    }
+                ],
+            }
+        )
+    )
+    plan_file = tmpdir.join("plan.json")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "rapidswarm",
+            str(config_file),
+            "--dry-run",
+            "--durations",
+            str(metrics),
+            "--plan-output",
+            str(plan_file),
+        ],
+    )
+
+    with FakeExecutor() as executor:
+        main()
+
+    assert executor.calls == 0
+    assert not tmpdir.join("results.csv").exists()
+    output = capsys.readouterr().out
+    assert "15 nodes, 30 interfaces, 15 units, 30 probe executions" in output
+    # 30 pings of 0.2s each, one at a time.
+    assert "Estimated wall time: 6.0s" in output
+    plan = json.loads(plan_file.read())
+    assert plan["wall_seconds"] == pytest.approx(6.0)
+    assert len(plan["managers"][0]["units"]) == 15
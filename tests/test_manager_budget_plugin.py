@@ -0,0 +1,208 @@
+from typing import Any, List
+
+import pytest
+from pydantic import BaseModel, Field
+
+from plugins.managers.manager_budget_plugin import BudgetedManager
+from plugins.reporters.reporter_sqlite_plugin import SQLiteReporter
+from rapidswarm.budget import NodePriors
+from rapidswarm.checkpoint import CheckpointJournal
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.models.results import ProbeFailure, ProbeStatus
+from rapidswarm.pipeline import Pipeline
+from rapidswarm.plan import compile_plan
+from rapidswarm.synthetic import SyntheticCluster
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class UnitResult(BaseModel):
+    node: str
+    success: bool = True
+    bw_average_mbps: float = 9000.0
+
+
+class TimedProbe(BaseProbe):
+    command: str = "timed"
+    seconds: float = 10.0
+    clock: Any = Field(None, exclude=True)
+    failing: List[str] = []
+    calls: List[str] = []
+
+    def execute_command(self):
+        if self.clock is not None:
+            self.clock.now += self.seconds
+        self.calls.append(self.nodes[0].hostname)
+        return self.nodes[0].hostname
+
+    def parse_output(self, output):
+        return [UnitResult(node=output, success=output not in self.failing)]
+
+
+@pytest.fixture
+def nodes():
+    # 16 nodes on 4 switches of 4 nodes each.
+    return SyntheticCluster(16, interfaces_per_node=1, nodes_per_switch=4).inventory()
+
+
+def switch_of(nodes, hostname):
+    return next(n.network_switch.id for n in nodes if n.hostname == hostname)
+
+
+def make_manager(nodes, tmp_path, **fields):
+    probe = TimedProbe(
+        nodes=nodes,
+        clock=fields.pop("clock", None),
+        failing=fields.pop("failing", []),
+        calls=[],
+    )
+    fields.setdefault("budget", "1h")
+    return BudgetedManager(
+        probes=[probe], history=str(tmp_path / "results.sqlite"), **fields
+    )
+
+
+def run_round(manager, clock=None, priors=None):
+    scheduler = manager.scheduler()
+    if clock is not None:
+        scheduler.clock = clock
+    if priors is not None:
+        scheduler.load_priors = lambda: priors
+    return list(scheduler.run(manager.units(), manager.run_unit))
+
+
+def test_untested_switches_come_first(nodes, tmp_path):
+    manager = make_manager(nodes, tmp_path)
+
+    run_round(manager)
+
+    calls = manager.probes[0].calls
+    assert len(calls) == 16
+    assert len({switch_of(nodes, hostname) for hostname in calls[:4]}) == 4
+
+
+def test_units_are_ordered_by_history(nodes, tmp_path):
+    names = [node.hostname for node in nodes]
+    priors = NodePriors(
+        last_tested={name: 1000.0 for name in names if name != "node00009"},
+        failed={"node00013"},
+        outliers={"node00005"},
+        now=1000.0,
+    )
+    manager = make_manager(nodes, tmp_path)
+
+    run_round(manager, priors=priors)
+
+    # A failure outweighs an outlier, which outweighs a node never tested.
+    assert manager.probes[0].calls[:3] == ["node00013", "node00005", "node00009"]
+
+
+def test_failures_pull_their_switch_forward(nodes, tmp_path):
+    leaf = [node.hostname for node in nodes if node.network_switch.id == "leaf002"]
+    manager = make_manager(nodes, tmp_path, failing=leaf)
+
+    run_round(manager, priors=NodePriors(failed={leaf[0]}))
+
+    assert manager.probes[0].calls[:4] == leaf
+
+
+def test_budget_stops_cleanly_with_coverage(nodes, tmp_path):
+    clock = Clock()
+    manager = make_manager(nodes, tmp_path, clock=clock, budget="35s")
+
+    results = [
+        result
+        for _, unit_results in run_round(manager, clock)
+        for result in unit_results
+    ]
+
+    # After three 10s units the next one would end past the budget.
+    assert clock.now == 30.0
+    assert len(manager.probes[0].calls) == 3
+    deferred = [r for r in results if isinstance(r, ProbeFailure)]
+    assert len(deferred) == 13
+    assert {(r.status, r.reason) for r in deferred} == {
+        (ProbeStatus.DEFERRED, "time budget exhausted")
+    }
+    [coverage] = manager.coverage
+    assert (coverage.completed, coverage.deferred, coverage.units) == (3, 13, 16)
+    assert (coverage.switches_covered, coverage.switches) == (3, 4)
+    assert coverage.nodes_covered == 3
+    assert coverage.fraction == pytest.approx(3 / 16)
+
+
+def test_concurrent_units_share_the_budget(nodes, tmp_path):
+    manager = make_manager(nodes, tmp_path, budget="0.5s", max_concurrent_tests=4)
+    manager.probes[0].clock = None
+
+    results = manager.run()
+
+    assert len(results) == 16
+    assert manager.coverage[0].completed == 16
+    assert manager.coverage[0].elapsed_seconds < 0.5
+
+
+def test_deferred_units_are_not_journaled(nodes, tmp_path, monkeypatch):
+    clock = Clock()
+    manager = make_manager(nodes, tmp_path, clock=clock, budget="35s")
+    manager.checkpoint = CheckpointJournal(str(tmp_path / "plan.jsonl"), "plan1")
+    scheduler = BudgetedManager.scheduler
+
+    def scheduler_on_clock(self):
+        budgeted = scheduler(self)
+        budgeted.clock = clock
+        return budgeted
+
+    monkeypatch.setattr(BudgetedManager, "scheduler", scheduler_on_clock)
+
+    assert len(list(manager.run_round())) == 16
+    assert len(manager.checkpoint.completed) == 3
+
+
+def test_priors_are_read_from_history(tmp_path):
+    database = str(tmp_path / "results.sqlite")
+    reporter = SQLiteReporter(database=database, run_id="run-1")
+    reporter.write(
+        [UnitResult(node=f"n{i}", bw_average_mbps=9000.0 + i) for i in range(10)]
+        + [UnitResult(node="slow", bw_average_mbps=200.0)]
+        + [UnitResult(node="down", success=False)]
+    )
+    reporter.close()
+
+    priors = NodePriors.from_history(database, metric="bw_average_mbps")
+
+    assert priors.failed == {"down"}
+    assert priors.outliers == {"slow"}
+    assert set(priors.last_tested) == {f"n{i}" for i in range(10)} | {"slow", "down"}
+    assert NodePriors.from_history(str(tmp_path / "missing.sqlite")).last_tested == {}
+
+
+def test_plan_estimate_is_capped_by_the_budget(nodes, tmp_path):
+    manager = make_manager(nodes, tmp_path, budget="10s")
+
+    plan = compile_plan([manager], nodes, "plan1").estimate()
+
+    # 16 units of the default second each.
+    assert plan.managers[0].budget == 10.0
+    assert plan.managers[0].round_seconds == 10.0
+
+
+def test_streamed_rounds_are_budgeted_once(tmp_path):
+    nodes = SyntheticCluster(
+        1024, interfaces_per_node=1, nodes_per_switch=32
+    ).inventory()
+    manager = make_manager([], tmp_path)
+
+    results = Pipeline([manager], [], batch_size=256, collect=True).run(nodes=nodes)
+
+    # One round over every node, not one per batch of 256.
+    assert len(results) == 1024
+    [coverage] = manager.coverage
+    assert (coverage.completed, coverage.units) == (1024, 1024)
+    assert (coverage.switches_covered, coverage.switches) == (32, 32)
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from pydantic import BaseModel
+
+from plugins.managers.manager_parallel_plugin import ParallelManager
+from rapidswarm.models.network_interface import NetworkInterface
+from rapidswarm.models.node import Node
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.ratelimit import RateLimiter
+
+
+class SleepResult(BaseModel):
+    node: str
+    success: bool = True
+
+
+class SleepProbe(BaseProbe):
+    command: str = "sleep"
+    delay: float = 0.05
+    state: dict = {}
+
+    def execute_command(self):
+        lock = self.state.setdefault("lock", threading.Lock())
+        with lock:
+            self.state["running"] = self.state.get("running", 0) + 1
+            self.state["peak"] = max(self.state.get("peak", 0), self.state["running"])
+        time.sleep(self.delay)
+        with lock:
+            self.state["running"] -= 1
+        return self.nodes[0].id
+
+    def parse_output(self, output):
+        return [SleepResult(node=output)]
+
+
+def make_nodes(count):
+    return [
+        Node(
+            id=f"node{i}",
+            hostname=f"node{i}",
+            network_interfaces=[
+                NetworkInterface(
+                    mac_address=f"00:11:22:33:44:{i:02x}", ip_address=f"10.0.0.{i}"
+                )
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+def test_parallel_manager_runs_units_concurrently():
+    probe = SleepProbe(nodes=make_nodes(20), state={})
+    manager = ParallelManager(probes=[probe], max_concurrent_tests=10)
+
+    started = time.monotonic()
+    results = manager.run()
+
+    assert time.monotonic() - started < 0.5
+    assert sorted(r.node for r in results) == sorted(f"node{i}" for i in range(20))
+    assert probe.state["peak"] == 10
+
+
+def test_parallel_manager_respects_rate_limits():
+    probe = SleepProbe(nodes=make_nodes(6), delay=0.0, state={})
+    limiter = RateLimiter(**{"global": {"probes_per_second": 20, "burst": 0.1}})
+    manager = ParallelManager(
+        probes=[probe], max_concurrent_tests=6, rate_limiter=limiter
+    )
+
+    started = time.monotonic()
+    manager.run()
+
+    # Two tokens of burst, then four more at 20 per second.
+    assert time.monotonic() - started >= 0.15
+    assert limiter.metrics()["throttled_acquisitions"] == 4
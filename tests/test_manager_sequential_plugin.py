@@ -0,0 +1,149 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from plugins.managers.manager_sequential_plugin import SequentialManager
+from rapidswarm.health import HealthTracker
+from rapidswarm.models.network_interface import NetworkInterface
+from rapidswarm.models.node import Node
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.models.results import ProbeFailure, ProbeStatus
+
+
+class DummyResult(BaseModel):
+    node: str
+    success: bool
+    value: Optional[int] = None
+
+
+class DummyProbe(BaseProbe):
+    command: str = "dummy"
+    failures: dict = {}
+    calls: list = []
+
+    def execute_command(self):
+        node = self.nodes[0].id
+        self.calls.append(node)
+        remaining = self.failures.get(node, 0)
+        if remaining:
+            self.failures[node] = remaining - 1
+            return {"node": node, "success": False}
+        return {"node": node, "success": True, "value": 1}
+
+    def parse_output(self, output):
+        return [DummyResult(**output)]
+
+
+def make_nodes(count):
+    return [
+        Node(
+            id=f"node{i}",
+            hostname=f"node{i}",
+            network_interfaces=[
+                NetworkInterface(
+                    mac_address=f"00:11:22:33:44:{i:02x}", ip_address=f"10.0.0.{i}"
+                )
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+def test_sequential_manager_runs_one_unit_per_node():
+    probe = DummyProbe(nodes=make_nodes(3), calls=[])
+    manager = SequentialManager(probes=[probe])
+
+    results = manager.run()
+
+    assert [r.node for r in results] == ["node0", "node1", "node2"]
+    assert all(r.success for r in results)
+    assert probe.calls == ["node0", "node1", "node2"]
+
+
+def test_sequential_manager_retries_failed_units(monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    probe = DummyProbe(nodes=make_nodes(2), failures={"node0": 2}, calls=[])
+    manager = SequentialManager(
+        probes=[probe], retry_on_failure=True, max_retries=3, backoff="10ms"
+    )
+
+    results = manager.run()
+
+    assert probe.calls == ["node0", "node1", "node0", "node0"]
+    assert {r.node: r.success for r in results} == {"node0": True, "node1": True}
+
+
+def test_sequential_manager_without_retry_reports_failure():
+    probe = DummyProbe(nodes=make_nodes(1), failures={"node0": 1}, calls=[])
+    manager = SequentialManager(probes=[probe], max_retries=3)
+
+    results = manager.run()
+
+    assert probe.calls == ["node0"]
+    assert [r.success for r in results] == [False]
+
+
+def test_sequential_manager_runs_rounds_on_interval(monkeypatch):
+    now = [0.0]
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    monkeypatch.setattr("time.sleep", fake_sleep)
+    probe = DummyProbe(nodes=make_nodes(2), calls=[])
+    manager = SequentialManager(probes=[probe], interval="5m", rounds=3)
+
+    rounds = list(manager.run_rounds())
+
+    assert len(rounds) == 3
+    assert all(len(round_results) == 2 for round_results in rounds)
+    assert sleeps == [300.0, 300.0]
+
+
+def test_sequential_manager_parses_config_durations():
+    manager = SequentialManager(
+        probes=[], interval="5m", jitter="10s", backoff="500ms", max_backoff=30
+    )
+    assert manager.interval == 300.0
+    assert manager.jitter == 10.0
+    assert manager.backoff == 0.5
+    assert manager.max_backoff == 30.0
+
+
+class RaisingProbe(DummyProbe):
+    def execute_command(self):
+        self.calls.append(self.nodes[0].id)
+        raise RuntimeError("host unreachable")
+
+
+def test_sequential_manager_reports_errors_as_failures():
+    probe = RaisingProbe(nodes=make_nodes(1), calls=[])
+    manager = SequentialManager(probes=[probe])
+
+    results = manager.run()
+
+    assert len(results) == 1
+    assert isinstance(results[0], ProbeFailure)
+    assert results[0].status == ProbeStatus.FAILED
+    assert results[0].reason == "host unreachable"
+
+
+def test_sequential_manager_skips_nodes_with_open_circuit():
+    nodes = make_nodes(2)
+    dead = RaisingProbe(nodes=[nodes[0]], calls=[])
+    alive = DummyProbe(nodes=nodes, calls=[])
+    health = HealthTracker(failure_threshold=2)
+    manager = SequentialManager(probes=[dead, dead, alive], health=health)
+
+    results = manager.run()
+
+    # The third probe against node0 is short-circuited, node1 is unaffected.
+    assert dead.calls == ["node0", "node0"]
+    assert alive.calls == ["node1"]
+    skipped = [r for r in results if getattr(r, "status", None) == "skipped"]
+    assert len(skipped) == 1
+    assert skipped[0].node == "node0"
+    assert "circuit open" in skipped[0].reason
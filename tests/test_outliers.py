@@ -0,0 +1,96 @@
+import io
+
+import numpy as np
+import pytest
+
+from rapidswarm.analysis import OutlierReport, find_outliers, fit, main
+from rapidswarm.analysis.data import KeyColumn
+
+
+def make_values(outliers=(), size=50):
+    values = np.full(size, 100.0)
+    values[::2] = 101.0
+    for index, value in outliers:
+        values[index] = value
+    return values
+
+
+@pytest.mark.parametrize("method", ["zscore", "mad", "iqr"])
+def test_each_method_flags_an_extreme_value(method):
+    values = make_values([(3, 10.0)])
+    assert np.flatnonzero(fit(values, method).outliers(values)).tolist() == [3]
+
+
+def test_mad_is_robust_to_a_cluster_of_outliers():
+    values = make_values([(i, 1000.0) for i in range(8)])
+    assert fit(values, "mad").outliers(values).sum() == 8
+    # The outliers inflate the standard deviation enough to hide some.
+    assert fit(values, "zscore", threshold=3).outliers(values).sum() == 0
+
+
+def test_metrics_are_filtered_independently():
+    client = make_values([(0, 10.0)])
+    server = make_values([(1, 10.0)])
+    first, second = find_outliers({"client": client, "server": server})
+    assert np.flatnonzero(first.flagged["client"]).tolist() == [0]
+    assert np.flatnonzero(first.flagged["server"]).tolist() == [1]
+    assert np.flatnonzero(first.rows).tolist() == [0, 1]
+    # Outliers are flagged once, in the pass that found them.
+    assert not (first.rows & second.rows).any()
+
+
+def test_second_order_outliers_leave_out_the_first_order():
+    values = make_values([(0, -1000.0), (1, 90.0)])
+    first, second = find_outliers({"value": values})
+    assert np.flatnonzero(first.rows).tolist() == [0]
+    assert np.flatnonzero(second.rows).tolist() == [1]
+    assert second.fits["value"].center > first.fits["value"].center
+
+
+def test_report_counts_addresses_in_either_role():
+    clients = KeyColumn(np.array([0, 0, 1] + [2] * 20), ["a", "b", "c"])
+    servers = KeyColumn(np.array([0, 1, 1] + [1] * 20), ["c", "a"])
+    values = {"bw": np.array([1.0, 1.0, 1.0] + [100.0] * 20)}
+    report = OutlierReport(clients, servers, values, method="iqr", orders=1)
+
+    # The outliers are a->c, a->a and b->a.
+    assert report.labels == ["a", "b", "c"]
+    assert report.counts(1).tolist() == [4, 1, 1]
+    assert [report.labels[code] for code in report.frequent(1)] == ["a"]
+
+
+def test_markdown_report_lists_frequent_addresses():
+    size = 60
+    clients = KeyColumn(np.arange(size) % 6, [f"10.0.0.{i}" for i in range(6)])
+    servers = KeyColumn(np.zeros(size, dtype=np.int64), ["10.0.1.1"])
+    values = make_values([(i, 10.0) for i in range(0, size, 6)], size=size)
+    report = OutlierReport(clients, servers, {"bw": values}, method="mad")
+
+    output = io.StringIO()
+    report.write_markdown(output)
+    markdown = output.getvalue()
+
+    assert "## First-Order Outlier Report\n\n10 outlier results." in markdown
+    assert "10.0.0.0, 10.0.1.1" in markdown
+    assert "#### Outlier Data for IP 10.0.0.0" in markdown
+    assert "| 10.0.0.0 | 10.0.1.1 | 10.00 |" in markdown
+
+
+def test_outliers_command_writes_reports(tmpdir, monkeypatch):
+    # The column cache goes to the working directory.
+    monkeypatch.chdir(tmpdir)
+    path = tmpdir.join("data.csv")
+    lines = ["client_ip,server_ip,bw_average_mbps"]
+    lines += [f"10.0.0.{i % 4},10.0.1.1,{100 + i % 2}" for i in range(40)]
+    lines += ["10.0.0.9,10.0.1.1,5"]
+    path.write("\n".join(lines) + "\n")
+    prefix = str(tmpdir.join("outliers"))
+    output = str(tmpdir.join("report.md"))
+
+    main(["outliers", str(path), "--output", output, "--csv-prefix", prefix])
+
+    assert "1 outlier results." in open(output).read()
+    rows = open(f"{prefix}-1.csv").read().splitlines()
+    assert rows[0] == "client,server,bw_average_mbps,bw_average_mbps score"
+    assert rows[1].startswith("10.0.0.9,10.0.1.1,5.00,")
+    assert len(open(f"{prefix}-2.csv").read().splitlines()) == 1
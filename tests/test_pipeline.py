@@ -0,0 +1,204 @@
+import threading
+import time
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from plugins.managers.manager_sequential_plugin import SequentialManager
+from rapidswarm.models.network_interface import NetworkInterface
+from rapidswarm.models.node import Node
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.models.reporters import BaseReporter
+from rapidswarm.models.scanners import BaseScanner
+from rapidswarm.pipeline import Pipeline
+
+
+class DummyResult(BaseModel):
+    node: str
+    success: bool = True
+
+
+class DummyProbe(BaseProbe):
+    command: str = "dummy"
+    calls: list = []
+
+    def execute_command(self):
+        self.calls.append(self.nodes[0].id)
+        return self.nodes[0].id
+
+    def parse_output(self, output):
+        return [DummyResult(node=output)]
+
+
+class BrokenProbe(DummyProbe):
+    def run(self):
+        raise RuntimeError("unexpected")
+
+
+class RecordingReporter(BaseReporter):
+    reports: list = []
+
+    def report(self, data):
+        self.reports.append([result.node for result in data])
+
+
+class SlowScanner(BaseScanner):
+    """Discovers one node at a time and waits until told to go on."""
+
+    count: int
+    released: list = []
+
+    def scan(self) -> List[Node]:
+        return list(self.iter_scan())
+
+    def iter_scan(self):
+        for node in make_nodes(self.count):
+            yield node
+            event = self.released[0]
+            assert event.wait(timeout=5)
+
+    def validate(self):
+        pass
+
+
+def make_nodes(count):
+    return [
+        Node(
+            id=f"node{i}",
+            hostname=f"node{i}",
+            network_interfaces=[
+                NetworkInterface(
+                    mac_address=f"00:11:22:33:44:{i:02x}", ip_address=f"10.0.0.{i}"
+                )
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+def test_pipeline_reports_every_result_once_per_round():
+    probe = DummyProbe(nodes=make_nodes(5), calls=[])
+    manager = SequentialManager(probes=[probe])
+    reporter = RecordingReporter(reports=[])
+
+    results = Pipeline([manager], [reporter], batch_size=2, collect=True).run(
+        nodes=make_nodes(5)
+    )
+
+    assert sorted(r.node for r in results) == [f"node{i}" for i in range(5)]
+    assert len(reporter.reports) == 1
+    assert sorted(reporter.reports[0]) == [f"node{i}" for i in range(5)]
+
+
+def test_pipeline_probes_nodes_before_the_scan_finishes():
+    released = threading.Event()
+    scanner = SlowScanner(count=3, released=[released])
+    probe = DummyProbe(nodes=[], calls=[])
+    manager = SequentialManager(probes=[probe])
+    reporter = RecordingReporter(reports=[])
+    pipeline = Pipeline([manager], [reporter], scanners=[scanner])
+
+    runner = threading.Thread(target=pipeline.run)
+    runner.start()
+    deadline = time.monotonic() + 5
+    while not probe.calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The first node is probed while the scanner is still blocked on it.
+    assert probe.calls == ["node0"]
+
+    released.set()
+    runner.join(timeout=5)
+    assert not runner.is_alive()
+    assert probe.calls == ["node0", "node1", "node2"]
+    assert [node.id for node in pipeline.nodes] == ["node0", "node1", "node2"]
+    assert pipeline.result_count == 3
+
+
+def test_pipeline_reports_each_round_of_continuous_managers(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    probe = DummyProbe(nodes=[], calls=[])
+    manager = SequentialManager(probes=[probe], interval=60, rounds=3)
+    reporter = RecordingReporter(reports=[])
+
+    Pipeline([manager], [reporter]).run(nodes=make_nodes(2))
+
+    assert reporter.reports == [["node0", "node1"]] * 3
+
+
+def test_pipeline_applies_backpressure_to_the_source():
+    probe = DummyProbe(nodes=[], calls=[])
+    manager = SequentialManager(probes=[probe])
+    reporter = RecordingReporter(reports=[])
+    pipeline = Pipeline([manager], [reporter], queue_size=1, batch_size=1)
+
+    pipeline.run(nodes=make_nodes(20))
+
+    assert pipeline.result_count == 20
+    assert sorted(reporter.reports[0]) == sorted(f"node{i}" for i in range(20))
+
+
+def test_pipeline_raises_errors_from_its_stages():
+    class FailingReporter(RecordingReporter):
+        def write(self, batch):
+            raise IOError("disk full")
+
+    probe = DummyProbe(nodes=[], calls=[])
+    manager = SequentialManager(probes=[probe])
+
+    with pytest.raises(IOError, match="disk full"):
+        Pipeline([manager], [FailingReporter(reports=[])]).run(nodes=make_nodes(3))
+
+
+def test_pipeline_reports_probe_errors_as_failures():
+    probe = BrokenProbe(nodes=[], calls=[])
+    manager = SequentialManager(probes=[probe])
+    reporter = RecordingReporter(reports=[])
+
+    results = Pipeline([manager], [reporter], collect=True).run(nodes=make_nodes(2))
+
+    assert [r.status for r in results] == ["failed", "failed"]
+
+
+def test_pipeline_keeps_reporting_when_a_reporter_fails():
+    class FailingReporter(RecordingReporter):
+        def write(self, batch):
+            raise IOError("disk full")
+
+    probe = DummyProbe(nodes=[], calls=[])
+    manager = SequentialManager(probes=[probe])
+    reporter = RecordingReporter(reports=[])
+
+    with pytest.raises(IOError, match="disk full"):
+        Pipeline([manager], [FailingReporter(reports=[]), reporter]).run(
+            nodes=make_nodes(3)
+        )
+
+    assert sorted(reporter.reports[0]) == ["node0", "node1", "node2"]
+
+
+def test_pipeline_sweeps_batches_together():
+    class SlowSweep:
+        sweeps = []
+
+        def apply(self, nodes):
+            time.sleep(0.05)
+            self.sweeps.append(len(nodes))
+            return nodes
+
+    preflight = SlowSweep()
+    probe = DummyProbe(nodes=[], calls=[])
+    manager = SequentialManager(probes=[probe])
+    pipeline = Pipeline(
+        [manager],
+        [RecordingReporter(reports=[])],
+        preflight=preflight,
+        batch_size=10,
+    )
+
+    pipeline.run(nodes=make_nodes(200))
+
+    # One sweep per batch of 10 would take 20 sweeps.
+    assert sum(preflight.sweeps) == 200
+    assert len(preflight.sweeps) <= 3
+    assert sorted(probe.calls) == sorted(f"node{i}" for i in range(200))
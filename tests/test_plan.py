@@ -0,0 +1,153 @@
+import pytest
+import yaml
+
+from plugins.managers.manager_parallel_plugin import ParallelManager
+from plugins.managers.manager_sequential_plugin import SequentialManager
+from plugins.probes.probe_ping_plugin import PingProbe
+from rapidswarm import instrumentation
+from rapidswarm.benchmark import pipeline_config
+from rapidswarm.checkpoint import CheckpointJournal
+from rapidswarm.pipeline import Pipeline
+from rapidswarm.plan import (
+    ExecutionPlan,
+    ProbeDurations,
+    compile_plan,
+    format_plan,
+)
+from rapidswarm.ratelimit import RateLimiter
+from rapidswarm.synthetic import FakeExecutor, SyntheticCluster
+
+
+@pytest.fixture
+def nodes():
+    # 20 nodes with two interfaces each.
+    return SyntheticCluster(40).inventory()
+
+
+def managers(nodes, **parallel):
+    return [
+        SequentialManager(name="0-seq", probes=[PingProbe(nodes=nodes)]),
+        ParallelManager(
+            name="1-par",
+            probes=[PingProbe(nodes=nodes)],
+            max_concurrent_tests=4,
+            **parallel,
+        ),
+    ]
+
+
+def test_compile_plan_lists_the_units_the_managers_run(nodes, tmpdir):
+    seq, par = managers(nodes)
+    plan = compile_plan([seq, par], nodes, "abc")
+
+    assert (plan.nodes, plan.interfaces, plan.unit_count) == (20, 40, 40)
+    assert plan.probe_count == 80
+    assert [m.workers for m in plan.managers] == [1, 4]
+    unit = plan.managers[0].units[0]
+    assert (unit.targets, unit.probes, unit.switches) == (
+        [nodes[0].hostname],
+        2,
+        [nodes[0].network_switch.id],
+    )
+
+    # Units are journaled under the keys of the plan.
+    seq.checkpoint = CheckpointJournal(str(tmpdir.join("plan.jsonl")), "abc")
+    with FakeExecutor():
+        list(seq.run_round(0, units=plan.managers[0].probe_units()))
+    seq.checkpoint.close()
+    assert set(seq.checkpoint.completed) == {u.key for u in plan.managers[0].units}
+
+
+def test_estimate_accounts_for_workers_rounds_and_rate_limits(nodes):
+    durations = ProbeDurations({"PingProbe": 0.5})
+    plan = compile_plan(managers(nodes, interval=60, rounds=3), nodes, "abc")
+
+    plan.estimate(durations)
+    seq, par = plan.managers
+    # 20 units of two pings each, one at a time or four at a time.
+    assert seq.round_seconds == pytest.approx(20.0)
+    assert par.round_seconds == pytest.approx(5.0)
+    assert par.total_seconds == pytest.approx(2 * 60 + 5.0)
+    assert plan.wall_seconds == pytest.approx(125.0)
+    assert plan.assumed == []
+
+    limits = RateLimiter(**{"global": {"probes_per_second": 2}})
+    plan.estimate(durations, limits)
+    # 40 pings a round at 2 per second, less the burst of 2.
+    assert par.round_seconds == pytest.approx(19.0)
+    assert plan.wall_seconds == pytest.approx(2 * 60 + 19.0)
+    plan.managers[1].rounds = 1
+    # Both managers' 80 pings share the global limit.
+    assert plan.estimate(durations, limits).wall_seconds == pytest.approx(39.0)
+
+    plan.managers[1].rounds = None
+    assert plan.estimate().wall_seconds is None
+    assert plan.assumed == ["PingProbe"]
+    assert "until interrupted" in format_plan(plan)
+
+
+def test_probe_durations_come_from_run_metrics(nodes, tmpdir):
+    recorder = instrumentation.enable()
+    try:
+        recorder.record(instrumentation.PROBE, "PingProbe", 3.0)
+        recorder.record(instrumentation.PROBE, "PingProbe", 1.0)
+        recorder.record(instrumentation.PARSE, "PingProbe", 0.2)
+        recorder.count(instrumentation.PROBE_EXECUTIONS, 8, probe="PingProbe")
+        recorder.record(instrumentation.PROBE, "OtherProbe", 2.0)
+        recorder.write_json(str(tmpdir.join("metrics.json")))
+    finally:
+        instrumentation.disable()
+
+    durations = ProbeDurations.from_metrics([str(tmpdir.join("metrics.json"))])
+
+    assert durations.seconds("PingProbe") == (pytest.approx(0.525), True)
+    # Without counted executions, per unit.
+    assert durations.seconds("OtherProbe") == (2.0, True)
+    assert durations.seconds("Unknown") == (1.0, False)
+    tmpdir.join("bad.json").write("{}")
+    with pytest.raises(ValueError):
+        ProbeDurations.from_metrics([str(tmpdir.join("bad.json"))])
+
+
+def test_pipeline_runs_the_units_of_a_plan(nodes):
+    run_managers = managers(nodes)
+    plan = compile_plan(run_managers, nodes[:5], "abc")
+
+    with FakeExecutor() as executor:
+        pipeline = Pipeline(run_managers, [], collect=True, plan=plan)
+        results = pipeline.run(nodes=nodes[:5])
+
+    # Only the planned units ran, even though the probes target every node.
+    assert executor.calls == plan.probe_count == 20
+    assert {result.node for result in results} == {n.hostname for n in nodes[:5]}
+
+    loaded = ExecutionPlan.model_validate_json(plan.model_dump_json())
+    assert loaded.unit_count == plan.unit_count
+    with pytest.raises(ValueError):
+        loaded.managers[0].probe_units()
+
+
+def test_run_executes_the_plan_the_dry_run_estimates(tmpdir):
+    inventory = tmpdir.join("inventory.csv")
+    inventory.write(SyntheticCluster(30).csv())
+    config_file = tmpdir.join("config.yaml")
+    config_file.write(yaml.safe_dump(pipeline_config(str(inventory), str(tmpdir))))
+    # Imported here: rapidswarm.rapidswarm loads the plugins.
+    from rapidswarm.rapidswarm import RapidSwarm
+
+    dry = RapidSwarm(str(config_file))
+    dry.load_config()
+    dry.create_scanners()
+    planned = dry.dry_run()
+
+    run = RapidSwarm(str(config_file))
+    run.load_config()
+    run.create_scanners()
+    run.create_reporters()
+    with FakeExecutor() as executor:
+        result_count = run.run_pipeline()
+
+    assert run.plan.plan_id == planned.plan_id
+    assert run.plan.unit_count == planned.unit_count == 15
+    assert executor.calls == planned.probe_count == 30
+    assert result_count == 30
@@ -0,0 +1,130 @@
+import pstats
+import threading
+import time
+
+import pytest
+
+from rapidswarm import instrumentation, profiling
+
+
+@pytest.fixture(autouse=True)
+def disable_instrumentation():
+    yield
+    instrumentation.disable()
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def unprofiled():
+    return sum(range(1000))
+
+
+def test_cpu_profile_of_a_phase(tmpdir):
+    path = str(tmpdir.join("run.pstats"))
+    profiler = profiling.create_profiler("cpu", path, phase="probe:PingProbe")
+    profiler.start()
+    unprofiled()
+    with instrumentation.span(instrumentation.PROBE, "PingProbe"):
+        busy(0.01)
+    profiler.stop()
+    profiler.write()
+
+    functions = {name for _, _, name in pstats.Stats(path).stats}
+    assert "busy" in functions
+    assert "unprofiled" not in functions
+
+
+def test_wall_profile_names_the_open_spans(tmpdir):
+    path = str(tmpdir.join("run.collapsed"))
+    profiler = profiling.create_profiler("wall", path, phase="manager", interval=0.001)
+    profiler.start()
+
+    def manage():
+        with instrumentation.span(instrumentation.MANAGER, "ping"):
+            with instrumentation.span(instrumentation.PROBE, "PingProbe"):
+                time.sleep(0.1)
+
+    thread = threading.Thread(target=manage)
+    thread.start()
+    thread.join()
+    busy(0.02)
+    profiler.stop()
+    profiler.write()
+
+    with open(path) as file:
+        lines = file.read().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith("manager:ping;probe:PingProbe;")
+        assert int(count) > 0
+    assert any(
+        "test_profiling:test_wall_profile_names_the_open_spans.<locals>.manage" in line
+        for line in lines
+    )
+
+
+def test_allocation_report_per_phase(tmpdir):
+    path = str(tmpdir.join("run.alloc.txt"))
+    profiler = profiling.create_profiler("alloc", path, phase="load_config")
+    profiler.start()
+    with instrumentation.span(instrumentation.PHASE, "load_config"):
+        kept = [bytearray(1000) for _ in range(1000)]
+    profiler.stop()
+    profiler.write()
+
+    with open(path) as file:
+        report = file.read()
+    section = report.split("== ")[1]
+    assert section.startswith("phase:load_config (1 spans): held +1.0 MiB")
+    assert "test_profiling.py:76" in section
+    assert len(kept) == 1000
+
+
+def test_unknown_profile_mode():
+    with pytest.raises(ValueError):
+        profiling.create_profiler("gpu")
+
+
+def test_cpu_profile_of_a_run_with_threads(tmpdir):
+    path = str(tmpdir.join("run.pstats"))
+    profiler = profiling.create_profiler("cpu", path)
+    profiler.start()
+    thread = threading.Thread(target=busy, args=(0.01,))
+    thread.start()
+    thread.join()
+    profiler.stop()
+    profiler.write()
+
+    functions = {name for _, _, name in pstats.Stats(path).stats}
+    assert "busy" in functions
+
+
+def test_cpu_profile_of_overlapping_phase_spans(tmpdir):
+    path = str(tmpdir.join("run.pstats"))
+    profiler = profiling.create_profiler("cpu", path, phase="probe")
+    profiler.start()
+    inside = threading.Barrier(4)
+
+    def probe():
+        with instrumentation.span(instrumentation.PROBE, "PingProbe"):
+            # Every thread is inside its span before any of them leaves.
+            inside.wait(timeout=5)
+            busy(0.01)
+
+    threads = [threading.Thread(target=probe) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    unprofiled()
+    profiler.stop()
+    profiler.write()
+
+    functions = {name for _, _, name in pstats.Stats(path).stats}
+    assert "busy" in functions
+    assert "unprofiled" not in functions
@@ -0,0 +1,108 @@
+import pytest
+
+from rapidswarm.models.network_interface import NetworkInterface
+from rapidswarm.models.node import NetworkSwitch, Node
+from rapidswarm.models.probes import BaseProbe
+from rapidswarm.ratelimit import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SizedProbe(BaseProbe):
+    command: str = "sized"
+    size: int = 1000
+
+    def estimated_bytes(self):
+        return self.size
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("time.monotonic", clock)
+    monkeypatch.setattr("time.sleep", clock.sleep)
+    return clock
+
+
+def make_node(node_id, switch_id=None):
+    switch = None
+    if switch_id is not None:
+        switch = NetworkSwitch(id=switch_id, model="test", ip_address="10.0.0.254")
+    return Node(
+        id=node_id,
+        hostname=node_id,
+        network_interfaces=[
+            NetworkInterface(mac_address="00:11:22:33:44:55", ip_address="10.0.0.1")
+        ],
+        network_switch=switch,
+    )
+
+
+def test_token_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=2, clock=clock)
+
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == pytest.approx(0.1)
+    assert bucket.reserve(1) == pytest.approx(0.2)
+
+    clock.now += 1.0
+    assert bucket.reserve(1) == 0
+
+
+def test_token_bucket_lets_oversized_requests_through_eventually():
+    bucket = TokenBucket(rate=100, capacity=100, clock=FakeClock())
+    assert bucket.reserve(300) == pytest.approx(2.0)
+
+
+def test_global_probe_rate(clock):
+    limiter = RateLimiter(**{"global": {"probes_per_second": 5}})
+    probe = SizedProbe(nodes=[make_node("node1")])
+
+    for _ in range(25):
+        limiter.acquire(probe)
+
+    # Five go out as a burst, the remaining twenty at five per second.
+    assert clock.now == pytest.approx(4.0)
+    metrics = limiter.metrics()
+    assert metrics["acquisitions"] == 25
+    assert metrics["throttled_acquisitions"] == 20
+    assert metrics["throttled_seconds"]["global"] > 0
+
+
+def test_per_node_limits_are_independent(clock):
+    limiter = RateLimiter(per_node={"probes_per_second": 1})
+    node1 = SizedProbe(nodes=[make_node("node1")])
+    node2 = SizedProbe(nodes=[make_node("node2")])
+
+    assert limiter.acquire(node1) == 0
+    assert limiter.acquire(node2) == 0
+    assert limiter.acquire(node1) == pytest.approx(1.0)
+    assert limiter.metrics()["throttled_seconds"] == {"node": pytest.approx(1.0)}
+
+
+def test_per_switch_bytes_rate(clock):
+    limiter = RateLimiter(per_switch={"bytes_per_second": 1000})
+    probe_a = SizedProbe(nodes=[make_node("node1", "sw1")], size=1000)
+    probe_b = SizedProbe(nodes=[make_node("node2", "sw1")], size=1000)
+    probe_c = SizedProbe(nodes=[make_node("node3", "sw2")], size=1000)
+
+    assert limiter.acquire(probe_a) == 0
+    assert limiter.acquire(probe_c) == 0
+    assert limiter.acquire(probe_b) == pytest.approx(1.0)
+
+
+def test_no_limits_never_waits(clock):
+    limiter = RateLimiter()
+    probe = SizedProbe(nodes=[make_node("node1", "sw1")])
+    assert all(limiter.acquire(probe) == 0 for _ in range(100))
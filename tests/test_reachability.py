@@ -0,0 +1,158 @@
+import errno
+import socket
+import time
+
+import pytest
+
+from rapidswarm.models.network_interface import NetworkInterface
+from rapidswarm.models.node import Node
+from rapidswarm import reachability
+from rapidswarm.reachability import ReachabilityFilter
+
+
+@pytest.fixture
+def listener():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    yield server.getsockname()[1]
+    server.close()
+
+
+@pytest.fixture
+def unresponsive(listener):
+    """
+    Loopback addresses whose listeners have a full accept backlog, so new
+    connections to them hang just like connections to a powered-off host.
+    """
+    sockets = []
+    addresses = []
+    for i in range(2, 52):
+        address = f"127.0.0.{i}"
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind((address, listener))
+        server.listen(0)
+        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        client.connect((address, listener))
+        sockets.extend([server, client])
+        addresses.append(address)
+    yield addresses
+    for sock in sockets:
+        sock.close()
+
+
+def make_node(node_id, *addresses):
+    return Node(
+        id=node_id,
+        hostname=node_id,
+        network_interfaces=[
+            NetworkInterface(mac_address=f"00:11:22:33:44:{i:02x}", ip_address=address)
+            for i, address in enumerate(addresses)
+        ],
+    )
+
+
+def test_tcp_sweep_finds_listening_host(listener, unresponsive):
+    preflight = ReachabilityFilter(method="tcp", port=listener, timeout="200ms")
+    assert preflight.sweep(["127.0.0.1", unresponsive[0]]) == {"127.0.0.1"}
+
+
+def test_tcp_sweep_counts_refused_connection_as_alive():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    closed_port = probe.getsockname()[1]
+    probe.close()
+
+    preflight = ReachabilityFilter(method="tcp", port=closed_port, timeout=0.2)
+    assert preflight.sweep(["127.0.0.1"]) == {"127.0.0.1"}
+
+
+def test_tcp_sweep_takes_about_one_timeout(listener, unresponsive):
+    preflight = ReachabilityFilter(method="tcp", port=listener, timeout=0.3)
+
+    started = time.monotonic()
+    reachable = preflight.sweep(unresponsive + ["127.0.0.1"])
+
+    assert reachable == {"127.0.0.1"}
+    assert time.monotonic() - started < 1.0
+
+
+def test_concurrency_fits_the_open_files_limit(monkeypatch):
+    monkeypatch.setattr(reachability.resource, "getrlimit", lambda limit: (1024, 4096))
+
+    assert ReachabilityFilter().concurrency() == 1024 - 128
+    assert ReachabilityFilter(max_concurrency=100).concurrency() == 100
+
+
+def test_tcp_sweep_backs_off_when_out_of_descriptors(
+    listener, unresponsive, monkeypatch
+):
+    connect = ReachabilityFilter._connect
+    calls = []
+
+    def connect_until_exhausted(self, address):
+        calls.append(address)
+        if len(calls) == 3:
+            raise OSError(errno.EMFILE, "Too many open files")
+        return connect(self, address)
+
+    monkeypatch.setattr(ReachabilityFilter, "_connect", connect_until_exhausted)
+    preflight = ReachabilityFilter(method="tcp", port=listener, timeout=0.2)
+
+    reachable = preflight.sweep(unresponsive[:2] + ["127.0.0.1"])
+
+    assert reachable == {"127.0.0.1"}
+    assert calls.count("127.0.0.1") == 2
+
+
+def test_tcp_sweep_fails_when_no_descriptor_is_left(monkeypatch):
+    def exhausted(self, address):
+        raise OSError(errno.EMFILE, "Too many open files")
+
+    monkeypatch.setattr(ReachabilityFilter, "_connect", exhausted)
+
+    with pytest.raises(OSError):
+        ReachabilityFilter(method="tcp").sweep(["127.0.0.1"])
+
+
+def test_arp_sweep_reads_complete_entries(tmpdir):
+    arp_cache = tmpdir.join("arp")
+    arp_cache.write(
+        "IP address       HW type     Flags       HW address            Mask     Device\n"
+        "10.0.0.1         0x1         0x2         00:11:22:33:44:55     *        eth0\n"
+        "10.0.0.2         0x1         0x0         00:00:00:00:00:00     *        eth0\n"
+    )
+    preflight = ReachabilityFilter(method="arp", arp_cache=str(arp_cache))
+    assert preflight.sweep(["10.0.0.1", "10.0.0.2", "10.0.0.3"]) == {"10.0.0.1"}
+
+
+def test_icmp_sweep_uses_command_exit_status():
+    assert ReachabilityFilter(method="icmp", command="true").sweep(["10.0.0.1"]) == {
+        "10.0.0.1"
+    }
+    assert (
+        ReachabilityFilter(method="icmp", command="false").sweep(["10.0.0.1"]) == set()
+    )
+
+
+def test_apply_tags_unreachable_interfaces(listener, unresponsive):
+    dead = unresponsive[0]
+    nodes = [make_node("node1", "127.0.0.1", dead), make_node("node2", dead)]
+    preflight = ReachabilityFilter(port=listener, timeout=0.2, action="tag")
+
+    filtered = preflight.apply(nodes)
+
+    assert [node.id for node in filtered] == ["node1", "node2"]
+    assert [i.is_active for i in filtered[0].network_interfaces] == [True, False]
+    assert [i.is_active for i in filtered[1].network_interfaces] == [False]
+
+
+def test_apply_drops_unreachable_interfaces_and_nodes(listener, unresponsive):
+    dead = unresponsive[0]
+    nodes = [make_node("node1", "127.0.0.1", dead), make_node("node2", dead)]
+    preflight = ReachabilityFilter(port=listener, timeout=0.2, action="drop")
+
+    filtered = preflight.apply(nodes)
+
+    assert [node.id for node in filtered] == ["node1"]
+    assert [str(i.ip_address) for i in filtered[0].network_interfaces] == ["127.0.0.1"]
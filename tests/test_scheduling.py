@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from rapidswarm.scheduling import RoundScheduler, backoff_delay, parse_duration
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, None),
+        (5, 5.0),
+        ("30", 30.0),
+        ("250ms", 0.25),
+        ("30s", 30.0),
+        ("5m", 300.0),
+        ("1.5h", 5400.0),
+    ],
+)
+def test_parse_duration(value, expected):
+    assert parse_duration(value) == expected
+
+
+@pytest.mark.parametrize("value", ["soon", "5 minutes", "-1s", -1])
+def test_parse_duration_invalid(value):
+    with pytest.raises(ValueError):
+        parse_duration(value)
+
+
+def test_backoff_delay_doubles_and_caps():
+    assert [backoff_delay(n, 1.0, cap=5.0) for n in range(1, 6)] == [
+        1.0,
+        2.0,
+        4.0,
+        5.0,
+        5.0,
+    ]
+
+
+def test_scheduler_spreads_starts_over_jitter_window():
+    clock = FakeClock()
+    started = []
+
+    def execute(unit):
+        started.append((unit, clock()))
+        return [unit], False
+
+    scheduler = RoundScheduler(
+        jitter=10.0, clock=clock, sleep=clock.sleep, rng=random.Random(1)
+    )
+    results = list(scheduler.run(range(50), execute))
+
+    assert sorted(unit for unit, _ in results) == list(range(50))
+    start_times = [t for _, t in started]
+    assert start_times == sorted(start_times)
+    assert 0 <= start_times[0] and start_times[-1] <= 10.0
+    assert len(set(start_times)) == 50
+
+
+def test_scheduler_retries_without_blocking_other_units():
+    clock = FakeClock()
+    attempts = []
+
+    def execute(unit):
+        attempts.append((unit, clock()))
+        failed = unit == "bad" and len([a for a in attempts if a[0] == "bad"]) < 3
+        return [unit], failed
+
+    scheduler = RoundScheduler(
+        max_retries=3, backoff=2.0, clock=clock, sleep=clock.sleep
+    )
+    results = list(scheduler.run(["bad", "good1", "good2"], execute))
+
+    # The good units run immediately, ahead of the first retry of the bad one.
+    assert [a[0] for a in attempts] == ["bad", "good1", "good2", "bad", "bad"]
+    assert [t for _, t in attempts] == [0.0, 0.0, 0.0, 2.0, 6.0]
+    assert results == [("good1", ["good1"]), ("good2", ["good2"]), ("bad", ["bad"])]
+
+
+def test_scheduler_gives_up_after_max_retries():
+    clock = FakeClock()
+    calls = []
+
+    def execute(unit):
+        calls.append(unit)
+        return [], True
+
+    scheduler = RoundScheduler(max_retries=2, clock=clock, sleep=clock.sleep)
+    assert list(scheduler.run(["dead"], execute)) == [("dead", [])]
+    assert calls == ["dead", "dead", "dead"]
+
+
+def test_scheduler_jitters_from_the_start_of_the_round():
+    clock = FakeClock()
+    clock.now = 100.0
+    started = []
+
+    def execute(unit):
+        started.append(clock())
+        return [unit], False
+
+    scheduler = RoundScheduler(
+        jitter=10.0, clock=clock, sleep=clock.sleep, rng=random.Random(1)
+    )
+    # A later batch of a round that started 6 seconds ago.
+    list(scheduler.run(range(50), execute, started=94.0))
+
+    assert 100.0 <= min(started) and max(started) <= 104.0
+    assert started.count(100.0) > 20
@@ -0,0 +1,146 @@
+import pytest
+
+from plugins.probes.probe_ping_plugin import PingProbe, PingResult
+from rapidswarm.config import Config, create_managers
+from rapidswarm.history import ResultHistory
+from rapidswarm.models.results import ProbeFailure, ProbeStatus
+from rapidswarm.plan import compile_plan
+from rapidswarm.selection import NodeIndex, NodeSelector
+from rapidswarm.synthetic import SyntheticCluster
+
+
+@pytest.fixture
+def nodes():
+    # 100 nodes of an Ethernet and an InfiniBand interface on 4 switches.
+    return SyntheticCluster(200).inventory()
+
+
+def summary(nodes):
+    return [
+        (node.hostname, [str(i.ip_address) for i in node.network_interfaces])
+        for node in nodes
+    ]
+
+
+@pytest.mark.parametrize(
+    "criteria",
+    [
+        {"switches": ["leaf001"]},
+        {"switches": ["leaf001", "leaf003"], "hostnames": ["node000[4-7]?"]},
+        {"hostnames": ["node0001*", "*99"]},
+        {"cidrs": ["10.0.0.16/28"]},
+        {"cidrs": ["10.0.0.0/24"], "interface_types": ["infiniband"]},
+        {"interface_types": ["ethernet"], "switches": ["leaf002"]},
+        {"switches": ["nonesuch"]},
+        {},
+    ],
+)
+def test_index_selects_the_same_nodes_as_a_scan(nodes, criteria):
+    selector = NodeSelector(**criteria)
+
+    expected = selector.select(nodes)
+
+    assert summary(NodeIndex(nodes).select(selector)) == summary(expected)
+
+
+def test_interface_criteria_narrow_the_nodes(nodes):
+    selector = NodeSelector(cidrs=["10.0.0.16/30"], switches=["leaf000"])
+
+    selected = selector.select(nodes, NodeIndex(nodes))
+
+    # 10.0.0.16 to .19 are interfaces of node00007 to node00009.
+    assert summary(selected) == [
+        ("node00007", ["10.0.0.16"]),
+        ("node00008", ["10.0.0.17", "10.0.0.18"]),
+        ("node00009", ["10.0.0.19"]),
+    ]
+    assert selected[1] is nodes[8]
+    assert len(nodes[7].network_interfaces) == 2
+
+
+def test_failed_in_last_run_reads_the_result_history(nodes, tmpdir):
+    database = str(tmpdir.join("results.sqlite"))
+    selector = NodeSelector(failed_in_last_run=True, history=database)
+    assert selector.select(nodes) == []
+
+    history = ResultHistory(database)
+    first = history.start_run()
+    history.insert(first, [PingResult(node="node00001", interface="x", success=False)])
+    history.finish_run(first)
+    last = history.start_run()
+    failed_interface = str(nodes[3].network_interfaces[1].mac_address)
+    history.insert(
+        last,
+        [
+            PingResult(node="node00003", interface=failed_interface, success=False),
+            PingResult(node="node00004", interface="y", success=True),
+            ProbeFailure(
+                node="node00005", probe="PingProbe", status=ProbeStatus.SKIPPED
+            ),
+        ],
+    )
+    history.finish_run(last)
+    # Still running, so not the last run.
+    history.insert(
+        history.start_run(),
+        [PingResult(node="node00006", interface="z", success=False)],
+    )
+    history.close()
+
+    selector = NodeSelector(failed_in_last_run=True, history=database)
+    expected = [
+        ("node00003", [str(nodes[3].network_interfaces[1].ip_address)]),
+        ("node00005", [str(i.ip_address) for i in nodes[5].network_interfaces]),
+    ]
+    assert summary(selector.select(nodes)) == expected
+    assert summary(NodeIndex(nodes).select(selector)) == expected
+
+
+def test_configured_selectors_limit_the_probe_units(nodes):
+    config = Config(
+        scanners=[],
+        reporters=[],
+        managers=[
+            {
+                "type": "ParallelManager",
+                "config": {},
+                "select": {"switches": ["leaf002"]},
+                "probes": [
+                    {
+                        "type": "PingProbe",
+                        "config": {},
+                        "select": {"interface_types": ["infiniband"]},
+                    },
+                    {"type": "PingProbe", "config": {}},
+                ],
+            }
+        ],
+    )
+    (manager,) = create_managers(config, nodes)
+
+    plan = compile_plan([manager], nodes, "abc")
+    streamed = manager.units(nodes[60:80])
+
+    ib, both = plan.managers[0].units[:32], plan.managers[0].units[32:]
+    assert len(plan.managers[0].units) == 64
+    assert {unit.probes for unit in ib} == {1}
+    assert {unit.probes for unit in both} == {2}
+    assert {tuple(unit.switches) for unit in plan.managers[0].units} == {("leaf002",)}
+    # Batches of a streaming run are selected from in the same way.
+    assert [unit.unit_key() for unit in streamed] == [
+        unit.key.split("/", 2)[2]
+        for unit in plan.managers[0].units
+        if unit.targets[0] in {node.hostname for node in nodes[64:80]}
+    ]
+
+
+def test_pairwise_units_need_every_node_selected(nodes):
+    probe = PingProbe(
+        nodes=nodes[:2],
+        interface=nodes[0].network_interfaces[0],
+        select={"hostnames": ["node00000"]},
+    )
+
+    assert probe.units() == []
+    probe.select = [NodeSelector(switches=["leaf000"])]
+    assert probe.units() == [probe]
@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+
+from rapidswarm import client, server
+from rapidswarm.config import merge_config
+from rapidswarm.synthetic import FakeExecutor, SyntheticCluster
+
+
+def job_config(interfaces):
+    return {
+        "scanners": [
+            {
+                "type": "CSVScanner",
+                "config": {"csv_data": SyntheticCluster(interfaces).csv()},
+            }
+        ],
+        "managers": [
+            {
+                "type": "SequentialManager",
+                "config": {},
+                "probes": [{"type": "PingProbe", "config": {}}],
+            }
+        ],
+        "reporters": [],
+    }
+
+
+@pytest.fixture
+def daemon(tmpdir):
+    daemon = server.RapidSwarmDaemon(str(tmpdir.join("rs.sock")), max_jobs=2)
+    daemon.start()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    with FakeExecutor(failure_rate=0.25):
+        yield daemon
+    daemon.shutdown()
+    daemon.close()
+
+
+def submit(daemon, **message):
+    return list(client.request({"command": "run", **message}, daemon.socket_path))
+
+
+def test_jobs_stream_their_results_and_reuse_the_inventory(daemon):
+    config = job_config(20)
+    first = submit(daemon, config=config)
+    probes = [{"type": "PingProbe", "config": {"command": "ping -c 2"}}]
+    managers = [{**config["managers"][0], "probes": probes}]
+    second = submit(daemon, config=config, overrides={"managers": managers})
+
+    for events in (first, second):
+        assert events[0]["event"] == "accepted"
+        assert events[-1]["event"] == "done"
+        assert (events[-1]["results"], events[-1]["nodes"]) == (20, 10)
+        results = [r for e in events if e["event"] == "results" for r in e["results"]]
+        assert len(results) == 20
+        assert {result["type"] for result in results} == {"PingResult"}
+    assert first[0]["job"] != second[0]["job"]
+    # The second job used the inventory scanned for the first.
+    assert daemon.inventory.scans == 1
+    status = list(client.request({"command": "status"}, daemon.socket_path))[0]
+    assert status["jobs_done"] == 2
+    assert status["inventories"] == 1
+
+
+def test_concurrent_jobs_share_the_daemon(daemon):
+    outcomes = []
+
+    def run(interfaces):
+        events = submit(daemon, config=job_config(interfaces))
+        outcomes.append((interfaces, events[-1]))
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in (10, 20, 30, 40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted((n, done["event"], done["nodes"]) for n, done in outcomes) == [
+        (n, "done", n // 2) for n in (10, 20, 30, 40)
+    ]
+    assert daemon.inventory.scans == 4
+
+
+def test_invalid_requests_are_answered_with_errors(daemon):
+    config = job_config(4)
+    config["managers"][0]["type"] = "NoSuchManager"
+
+    assert submit(daemon, config=config)[-1]["event"] == "error"
+    assert submit(daemon)[-1]["message"].startswith("A run request needs")
+    assert daemon.jobs_running == 0
+
+
+def test_merge_config_merges_mappings_and_replaces_the_rest():
+    base = {"preflight": {"mode": "drop", "port": 22}, "reporters": [1, 2]}
+
+    merged = merge_config(base, {"preflight": {"mode": "tag"}, "reporters": [3]})
+
+    assert merged == {"preflight": {"mode": "tag", "port": 22}, "reporters": [3]}
+    assert base["preflight"]["mode"] == "drop"
+
+
+def test_selected_re_tests_only_probe_the_selected_nodes(daemon):
+    config = job_config(200)
+    submit(daemon, config=config)
+    config["managers"][0]["select"] = {"hostnames": ["node0001?"]}
+
+    events = submit(daemon, config=config)
+
+    results = [r for e in events if e["event"] == "results" for r in e["results"]]
+    assert {result["node"] for result in results} == {
+        f"node{number:05d}" for number in range(10, 20)
+    }
+    assert daemon.inventory.scans == 1
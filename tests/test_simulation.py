@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from plugins.managers.manager_parallel_plugin import ParallelManager
+from plugins.managers.manager_sequential_plugin import SequentialManager
+from plugins.probes.probe_ping_plugin import PingProbe
+from rapidswarm.simulation import (
+    FabricFault,
+    FabricTopology,
+    LinkProfile,
+    SimulatedFabric,
+)
+
+
+def run(fabric, manager):
+    fabric.reset()
+    with fabric:
+        results = manager.run()
+    return {result.node: result for result in results}, fabric.elapsed()
+
+
+def test_ping_probes_are_answered_with_modeled_results():
+    topology = FabricTopology(
+        nodes=64,
+        nodes_per_switch=16,
+        spawn_overhead="2ms",
+        timeout="1s",
+        faults=[
+            FabricFault(nodes=["node00003"], down=True),
+            FabricFault(switches=["leaf001"], down=True),
+        ],
+    )
+    fabric = SimulatedFabric(topology)
+    nodes = fabric.inventory()
+
+    results, elapsed = run(fabric, SequentialManager(probes=[PingProbe(nodes=nodes)]))
+
+    failed = {node for node, result in results.items() if not result.success}
+    assert failed == {"node00003"} | {f"node{n:05d}" for n in range(16, 32)}
+    assert all(0.1 < r.ping_time < 1.0 for r in results.values() if r.success)
+    # Sequential pings take the sum of their durations: 17 timeouts, and
+    # a spawn and a round trip each.
+    assert elapsed == pytest.approx(17 * 1.0 + 64 * 0.002, abs=0.05)
+    # The same draws again after a reset.
+    again, _ = run(fabric, SequentialManager(probes=[PingProbe(nodes=nodes)]))
+    assert again == results
+
+
+def test_parallel_manager_is_faster_on_the_fabric():
+    fabric = SimulatedFabric(FabricTopology(nodes=512), time_scale=0.01)
+    nodes = fabric.inventory()
+
+    _, sequential = run(fabric, SequentialManager(probes=[PingProbe(nodes=nodes)]))
+    _, parallel = run(
+        fabric,
+        ParallelManager(probes=[PingProbe(nodes=nodes)], max_concurrent_tests=8),
+    )
+
+    assert fabric.probes["ping"] == 512
+    assert sequential / 16 < parallel < sequential / 4
+
+
+def test_tcp_latency_follows_the_path():
+    fabric = SimulatedFabric(
+        FabricTopology(
+            nodes=64,
+            host_link=LinkProfile(latency=0.01, jitter=0),
+            uplink=LinkProfile(latency=0.1, jitter=0),
+            faults=[FabricFault(switches=["leaf001"], latency=0.5)],
+        )
+    )
+    address = {
+        node.hostname: node.network_interfaces[0].ip_address
+        for node in fabric.inventory()
+    }
+
+    same_switch = fabric.tcp_connect(address["node00001"], source=address["node00000"])
+    across = fabric.tcp_connect(address["node00032"], source=address["node00000"])
+    # A slow uplink only slows traffic that crosses it.
+    slow = fabric.tcp_connect(address["node00033"], source=address["node00032"])
+
+    assert same_switch == pytest.approx(0.04)
+    assert across == pytest.approx(2 * (0.01 + 0.1 + 0.6 + 0.01))
+    assert slow == same_switch
+    assert fabric.tcp_connect("192.0.2.1") is None
+    assert fabric.elapsed() == pytest.approx(1.0, abs=0.01)
+
+
+def test_concurrent_bandwidth_tests_share_the_uplink():
+    fabric = SimulatedFabric(
+        FabricTopology(
+            nodes=64,
+            host_link=LinkProfile(bandwidth=100, jitter=0),
+            uplink=LinkProfile(bandwidth=100, jitter=0),
+            faults=[FabricFault(switches=["leaf001"], congestion=0.5)],
+        )
+    )
+    address = {
+        node.hostname: node.network_interfaces[0].ip_address
+        for node in fabric.inventory()
+    }
+    results = {}
+
+    def test(source, target):
+        results[source] = fabric.bandwidth(address[target], source=address[source])
+
+    first = threading.Thread(target=test, args=("node00000", "node00032"))
+    first.start()
+    first.join()
+    second = threading.Thread(target=test, args=("node00001", "node00033"))
+    second.start()
+    second.join()
+
+    # Half of the uplink is taken by background traffic, and the second
+    # test shares the rest with the first.
+    assert results["node00000"] == pytest.approx(50.0)
+    assert results["node00001"] == pytest.approx(25.0)
+    # Tests run back to back in one thread do not overlap.
+    fabric.reset()
+    for _ in range(2):
+        throughput = fabric.bandwidth(address["node00034"], source=address["node00000"])
+        assert throughput == pytest.approx(50.0)
@@ -0,0 +1,141 @@
+import math
+from typing import Optional
+
+import numpy as np
+import pytest
+from pydantic import BaseModel
+
+from plugins.reporters.reporter_sketch_plugin import SketchReporter
+from rapidswarm.analysis import main
+from rapidswarm.models.node import NetworkSwitch, Node
+from rapidswarm.sketches import SketchSet, StreamingSummary, TDigest
+
+
+class ProbeResult(BaseModel):
+    node: str
+    interface: str
+    success: bool = True
+    latency: Optional[float] = None
+
+
+def make_nodes():
+    switch = NetworkSwitch(id="sw1", model="m", ip_address="10.0.0.254")
+    return [
+        Node(hostname="n1", network_switch=switch),
+        Node(hostname="n2", network_switch=switch),
+        Node(hostname="n3"),
+    ]
+
+
+def rank(values, estimate):
+    return np.searchsorted(np.sort(values), estimate) / len(values)
+
+
+@pytest.mark.parametrize("q", [0.01, 0.5, 0.9, 0.99, 0.999])
+def test_digest_quantiles_are_within_a_small_rank_error(q):
+    values = np.random.default_rng(2).lognormal(0, 1.5, 200_000)
+    digest = TDigest()
+    for chunk in np.array_split(values, 200):
+        digest.add(chunk)
+
+    assert abs(rank(values, digest.quantile(q)) - q) < 0.005
+    assert len(digest.means) <= digest.compression
+
+
+def test_merged_digests_summarize_the_union():
+    rng = np.random.default_rng(3)
+    first, second = rng.normal(10, 1, 50_000), rng.exponential(5, 50_000)
+    left, right = TDigest(), TDigest()
+    left.add(first)
+    right.add(second)
+    left.merge(right)
+
+    union = np.concatenate([first, second])
+    assert left.count == len(union)
+    assert left.minimum == union.min() and left.maximum == union.max()
+    for q in (0.1, 0.5, 0.95):
+        assert abs(rank(union, left.quantile(q)) - q) < 0.005
+
+
+def test_summary_moments_match_numpy():
+    rng = np.random.default_rng(4)
+    values = rng.normal(1e6, 3, 10_000)
+    summary, other = StreamingSummary(), StreamingSummary()
+    for chunk in np.array_split(values[:6000], 7):
+        summary.add(chunk)
+    other.add(np.append(values[6000:], np.nan))
+    summary.merge(other)
+
+    assert summary.count == len(values)
+    assert summary.mean == pytest.approx(values.mean())
+    assert summary.variance == pytest.approx(values.var(ddof=1))
+    assert math.isnan(StreamingSummary().variance)
+
+
+def test_sketches_group_by_interface_and_switch():
+    sketches = SketchSet(metrics=["latency"])
+    sketches.add_nodes(make_nodes())
+    sketches.add_results(
+        [
+            ProbeResult(node="n1", interface="eth0", latency=1.0),
+            ProbeResult(node="n1", interface="eth0", latency=3.0),
+            ProbeResult(node="n2", interface="eth0", latency=5.0),
+            ProbeResult(node="n3", interface="eth0", latency=None),
+            ProbeResult(node="n3", interface="eth1", latency=7.0),
+        ]
+    )
+
+    rows = {(row["grouping"], row["group"]): row for row in sketches.query()}
+    assert sorted(rows) == [
+        ("node+interface", "node=n1,interface=eth0"),
+        ("node+interface", "node=n2,interface=eth0"),
+        ("node+interface", "node=n3,interface=eth1"),
+        ("switch", "switch=sw1"),
+    ]
+    switch = rows[("switch", "switch=sw1")]
+    assert switch["count"] == 3
+    assert switch["mean"] == 3.0
+    assert switch["min"] == 1.0 and switch["max"] == 5.0
+    assert switch["p50"] == pytest.approx(3.0)
+    assert list(switch)[-4:] == ["p50", "p90", "p99", "max"]
+
+
+def test_save_and_load_round_trip(tmpdir):
+    path = str(tmpdir.join("report.sketch.npz"))
+    sketches = SketchSet(groupings=[["node"]])
+    values = np.random.default_rng(5).normal(0, 1, 5000)
+    sketches.add_results(
+        [ProbeResult(node="n1", interface="eth0", latency=v) for v in values]
+    )
+    sketches.save(path)
+
+    loaded = SketchSet.load(path)
+    assert loaded.query() == sketches.query()
+    empty = str(tmpdir.join("empty.npz"))
+    SketchSet().save(empty)
+    assert SketchSet.load(empty).summaries == {}
+
+
+def test_reporter_merges_runs_and_command_queries(tmpdir, capsys):
+    path = str(tmpdir.join("report.sketch.npz"))
+    for latency in (1.0, 3.0):
+        reporter = SketchReporter(output_file=path, groupings=[["switch"]])
+        reporter.add_nodes(make_nodes())
+        reporter.write([ProbeResult(node="n1", interface="eth0", latency=latency)])
+        reporter.close()
+
+    main(["quantiles", path, "--metric", "latency", "--quantile", "0.5"])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == [
+        "grouping",
+        "group",
+        "metric",
+        "count",
+        "mean",
+        "std",
+        "min",
+        "p50",
+        "max",
+    ]
+    assert lines[1].split()[:5] == ["switch", "switch=sw1", "latency", "2", "2"]
@@ -0,0 +1,65 @@
+import subprocess
+
+from plugins.probes.probe_ping_plugin import PingProbe
+from plugins.scanners.scanner_arp_plugin import ARPScanner
+from plugins.scanners.scanner_csv_plugin import CSVScanner
+from plugins.scanners.scanner_nmap_plugin import NmapScanner
+from rapidswarm.models.network_interface_type import NetworkInterfaceType
+from rapidswarm.synthetic import FakeExecutor, SyntheticCluster
+
+
+def test_cluster_layout():
+    cluster = SyntheticCluster(101, interfaces_per_node=2, nodes_per_switch=8)
+
+    assert len(cluster.nodes) == 51
+    assert len(cluster.nodes[-1].interfaces) == 1
+    assert cluster.switch_count == 7
+    addresses = [i.ip_address for node in cluster.nodes for i in node.interfaces]
+    assert len(set(addresses)) == 101
+
+
+def test_csv_inventory_round_trips_through_the_scanner(tmpdir):
+    cluster = SyntheticCluster(64, nodes_per_switch=16)
+    path = tmpdir.join("inventory.csv")
+    path.write(cluster.csv())
+
+    nodes = CSVScanner(csv_file=str(path)).scan()
+
+    assert [node.model_dump() for node in nodes] == [
+        node.model_dump() for node in cluster.inventory()
+    ]
+    assert {node.network_switch.id for node in nodes} == {"leaf000", "leaf001"}
+    types = [i.interface_type for i in nodes[0].network_interfaces]
+    assert types == [NetworkInterfaceType.ETHERNET, NetworkInterfaceType.INFINIBAND]
+
+
+def test_arp_and_nmap_outputs_parse_to_every_interface():
+    cluster = SyntheticCluster(20)
+    arp_nodes = ARPScanner.model_construct().parse_arp_output(cluster.arp_scan())
+    nmap_nodes = NmapScanner.model_construct().parse_nmap_output(cluster.nmap_xml())
+
+    assert len(arp_nodes) == len(nmap_nodes) == 20
+    assert nmap_nodes[0].hostname == "node00000"
+    assert str(nmap_nodes[1].network_interfaces[0].ip_address) == "10.0.0.2"
+    assert [n.network_interfaces[0].mac_address for n in arp_nodes] == [
+        n.network_interfaces[0].mac_address.lower() for n in nmap_nodes
+    ]
+
+
+def test_fake_executor_answers_ping_probes():
+    cluster = SyntheticCluster(200)
+    probe = PingProbe(nodes=cluster.inventory())
+
+    with FakeExecutor(latency=1.0, failure_rate=0.25) as executor:
+        results = [result for unit in probe.units() for result in unit.run()]
+        # Anything but ping still runs for real.
+        assert subprocess.check_output(["echo", "hi"], text=True) == "hi\n"
+
+    assert subprocess.check_output is not executor.check_output
+    assert executor.calls == len(results) == 200
+    answered = [result for result in results if result.success]
+    assert 100 < len(answered) < 200
+    assert all(0.5 <= result.ping_time <= 1.5 for result in answered)
+    # Every run gets the same results.
+    with FakeExecutor(latency=1.0, failure_rate=0.25):
+        assert [result for unit in probe.units() for result in unit.run()] == results